@@ -66,9 +66,37 @@ function runMonthlyAggregation() {
   writeDetailAggregation_(ss, paymentData, paymentHeaders, budgetSheet);
 
   Logger.log('月次集計完了: ' + Object.keys(aggregated).length + '月分');
+
+  // api.gs の応答のキャッシュ（scripts/site_api_cache.py）を無効化
+  notifyCacheInvalidation_();
+
   return { status: 'completed', months: Object.keys(aggregated).length };
 }
 
+/**
+ * 集計結果の更新をキャッシュプロキシ（scripts/site_api_cache.py）に通知する
+ * スクリプトプロパティ CACHE_INVALIDATE_URL が未設定なら何もしない
+ * 通知に失敗しても集計は失敗にしない（キャッシュはTTLで更新される）
+ */
+function notifyCacheInvalidation_() {
+  try {
+    var props = PropertiesService.getScriptProperties();
+    var url = props.getProperty('CACHE_INVALIDATE_URL');
+    if (!url) return;
+
+    var response = UrlFetchApp.fetch(url, {
+      method: 'post',
+      contentType: 'application/json',
+      headers: { 'X-Cache-Admin-Token': props.getProperty('CACHE_ADMIN_TOKEN') || '' },
+      payload: JSON.stringify({ project_id: props.getProperty('PROJECT_ID') || '', warm: true }),
+      muteHttpExceptions: true
+    });
+    Logger.log('キャッシュ無効化通知: HTTP ' + response.getResponseCode());
+  } catch (err) {
+    Logger.log('キャッシュ無効化通知に失敗: ' + err.message);
+  }
+}
+
 /**
  * シートのスナップショットを取得する（QA-02）
  * データを一括読み込みし、以降の処理はこのコピーに対して行う
@@ -2,7 +2,7 @@
 """
 新規工事プロジェクト登録スクリプト
 
-project_registry.json に新規工事を登録し、
+工事台帳（project_registry.json。保存は project_registry.py）に新規工事を登録し、
 環境構築に必要な操作チェックリストを出力する。
 
 使用方法:
@@ -13,38 +13,93 @@ project_registry.json に新規工事を登録し、
         --budget_total 185000000 \
         --start_date 2026-04-01 \
         --end_date 2027-03-31
+
+    登録はジャーナルへの追記で確定し、project_registry.json には一定件数ごとに
+    書き出す。すぐに反映する場合は --export を付ける。
+
+    チェックリストの本文は templates/project_checklist.md（checklist_template.py）。
+    --format html / json でHTML・JSONでも出力できる。
+
+一括登録（CSV/TSV）:
+    python scripts/add_new_project.py --csv projects.csv
+    python scripts/add_new_project.py --csv projects.tsv --dry-run     # 検証のみ
+
+    列: project_id, project_name, spreadsheet_url, budget_total, start_date, end_date
+    （1行目は見出し。拡張子が .tsv ならタブ区切り。Excelの BOM付きUTF-8 も可）
+    全行を検証してから登録する。エラーが1行でもあれば行番号ごとに表示して、どれも登録しない。
+    登録は台帳への1回の追記で、チェックリストは工事ごとのファイルに並列で書き出す
+    （標準出力には表示しない）。
 """
 
 import argparse
-import json
+import csv
+import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+from checklist_template import (
+    DEFAULT_TEMPLATE,
+    FORMAT_SUFFIXES,
+    FORMATS,
+    ChecklistTemplateError,
+    load_template,
+)
+from project_registry import DuplicateProjectError, ProjectRegistry, RegistryLockTimeout
+
 # パス設定
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_DIR = SCRIPT_DIR.parent
 REGISTRY_PATH = PROJECT_DIR / "project_registry.json"
 OUTPUT_DIR = PROJECT_DIR / "output"
 
+# 一括登録ファイルの列（引数名と同じ）
+PROJECT_COLUMNS = [
+    "project_id",
+    "project_name",
+    "spreadsheet_url",
+    "budget_total",
+    "start_date",
+    "end_date",
+]
+# チェックリストの書き出しの並列数（この件数未満は1スレッドで書く）
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+PARALLEL_MIN_PROJECTS = 32
+
+
+class ProjectInputError(ValueError):
+    """登録内容の形式が不正（hint は形式例）"""
+
+    def __init__(self, message, hint=""):
+        super().__init__(message)
+        self.hint = hint
+
+
+class ProjectInputErrors(ProjectInputError):
+    """1件の登録内容に複数の形式エラーがある（errors は個々の ProjectInputError）"""
+
+    def __init__(self, errors):
+        super().__init__(" / ".join(str(e) for e in errors))
+        self.errors = errors
+
 
 def extract_spreadsheet_id(url: str) -> str:
     """Spreadsheet URLからIDを抽出する"""
     match = re.search(r"/d/([a-zA-Z0-9_-]+)", url)
     if not match:
-        print(f"エラー: Spreadsheet URLからIDを抽出できません: {url}", file=sys.stderr)
-        print("  形式例: https://docs.google.com/spreadsheets/d/{ID}/edit", file=sys.stderr)
-        sys.exit(1)
+        raise ProjectInputError(
+            f"Spreadsheet URLからIDを抽出できません: {url}",
+            "形式例: https://docs.google.com/spreadsheets/d/{ID}/edit",
+        )
     return match.group(1)
 
 
 def validate_project_id(project_id: str) -> None:
     """プロジェクトIDの形式を検証する"""
     if not re.match(r"^P\d{3,}$", project_id):
-        print(f"エラー: project_idの形式が不正です: {project_id}", file=sys.stderr)
-        print("  形式例: P001, P005, P100", file=sys.stderr)
-        sys.exit(1)
+        raise ProjectInputError(f"project_idの形式が不正です: {project_id}", "形式例: P001, P005, P100")
 
 
 def validate_date(date_str: str, label: str) -> str:
@@ -53,149 +108,206 @@ def validate_date(date_str: str, label: str) -> str:
         datetime.strptime(date_str, "%Y-%m-%d")
         return date_str
     except ValueError:
-        print(f"エラー: {label}の日付形式が不正です: {date_str}", file=sys.stderr)
-        print("  形式例: 2026-04-01", file=sys.stderr)
-        sys.exit(1)
+        raise ProjectInputError(f"{label}の日付形式が不正です: {date_str}", "形式例: 2026-04-01") from None
+
+
+def parse_budget(value) -> int:
+    """実行予算額を整数にする（CSVの桁区切りカンマは許す）"""
+    try:
+        return int(str(value).replace(",", "").strip())
+    except ValueError:
+        raise ProjectInputError(f"budget_totalが整数ではありません: {value}", "形式例: 185000000") from None
+
+
+def build_project(fields: dict, registered_at: str) -> dict:
+    """入力（引数またはCSVの1行）を検証して台帳に登録する工事情報を作る
+
+    空でない項目はすべて検証し、エラーが複数あれば ProjectInputErrors にまとめて送出する。
+    """
+    values = {column: str(fields.get(column) or "").strip() for column in PROJECT_COLUMNS}
+    errors = []
+    missing = [column for column in PROJECT_COLUMNS if not values[column]]
+    if missing:
+        errors.append(ProjectInputError(f"必須項目が空です: {', '.join(missing)}"))
+    checks = [
+        ("project_id", validate_project_id, ()),
+        ("spreadsheet_url", extract_spreadsheet_id, ()),
+        ("budget_total", parse_budget, ()),
+        ("start_date", validate_date, ("start_date",)),
+        ("end_date", validate_date, ("end_date",)),
+    ]
+    checked = {}
+    for column, validate, extra in checks:
+        if not values[column]:
+            continue
+        try:
+            checked[column] = validate(values[column], *extra)
+        except ProjectInputError as e:
+            errors.append(e)
+    if len(errors) == 1:
+        raise errors[0]
+    if errors:
+        raise ProjectInputErrors(errors)
+    return {
+        "project_id": values["project_id"],
+        "project_name": values["project_name"],
+        "spreadsheet_id": checked["spreadsheet_url"],
+        "spreadsheet_url": values["spreadsheet_url"],
+        "budget_total": checked["budget_total"],
+        "start_date": values["start_date"],
+        "end_date": values["end_date"],
+        "registered_at": registered_at,
+    }
+
+
+def print_input_error(error: ProjectInputError, prefix: str = "") -> None:
+    """形式エラーを表示する（複数ある場合は2件目以降を1件目の位置に揃える）"""
+    indent = " " * len(prefix)
+    for i, e in enumerate(getattr(error, "errors", [error])):
+        print(f"{prefix if i == 0 else indent}エラー: {e}", file=sys.stderr)
+        if e.hint:
+            print(f"{indent}  {e.hint}", file=sys.stderr)
+
+
+def generate_checklist(project: dict, fmt: str = "markdown", template_path: Path = DEFAULT_TEMPLATE) -> str:
+    """操作チェックリストを生成する（本文は templates/project_checklist.md）"""
+    return load_template(template_path).render(project, fmt)
+
+
+def checklist_path_for(project: dict, output_dir: Path, fmt: str, date_str: str) -> Path:
+    return output_dir / f"checklist_{project['project_id']}_{date_str}{FORMAT_SUFFIXES[fmt]}"
+
+
+def write_checklist(project: dict, output_dir: Path, date_str: str,
+                    fmt: str = "markdown", template_path: Path = DEFAULT_TEMPLATE) -> Path:
+    """チェックリストを生成して output_dir に保存する"""
+    checklist_path = checklist_path_for(project, output_dir, fmt, date_str)
+    checklist_path.write_text(generate_checklist(project, fmt, template_path), encoding="utf-8")
+    return checklist_path
+
+
+def write_checklists(projects: list, output_dir: Path, workers: int,
+                     fmt: str = "markdown", template_path: Path = DEFAULT_TEMPLATE) -> list:
+    """工事ごとのチェックリストを並列に書き出す（登録順のパス一覧を返す）"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    date_str = datetime.now().strftime("%Y%m%d")
+
+    def write(project):
+        return write_checklist(project, output_dir, date_str, fmt, template_path)
+
+    if workers <= 1 or len(projects) < PARALLEL_MIN_PROJECTS:
+        return [write(project) for project in projects]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(write, projects))
+
+
+def read_project_rows(path: Path) -> list:
+    """一括登録ファイルを読み込む（[(行番号, 行の辞書), ...]）"""
+    delimiter = "\t" if path.suffix.lower() in (".tsv", ".tab") else ","
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        header = [name.strip() for name in (reader.fieldnames or [])]
+        missing = [column for column in PROJECT_COLUMNS if column not in header]
+        if missing:
+            raise ProjectInputError(
+                f"{path.name} の見出しに列がありません: {', '.join(missing)}",
+                f"見出し例: {delimiter.join(PROJECT_COLUMNS)}",
+            )
+        reader.fieldnames = header
+        rows = []
+        for row in reader:
+            if not any((value or "").strip() for value in row.values() if isinstance(value, str)):
+                continue
+            rows.append((reader.line_num, row))
+    return rows
+
+
+def register_projects_bulk(csv_path: Path, registry_path: Path, output_dir: Path, workers: int,
+                           export: bool, dry_run: bool, fmt: str, template_path: Path) -> int:
+    """CSV/TSVの全行を検証し、まとめて台帳に登録してチェックリストを書き出す"""
+    print(f"=== 新規工事プロジェクト一括登録 ===\n")
+    try:
+        template = load_template(template_path)
+        rows = read_project_rows(csv_path)
+        registry = ProjectRegistry(registry_path)
+    except ProjectInputError as e:
+        print_input_error(e)
+        return 1
+    except (OSError, ValueError, csv.Error, RegistryLockTimeout) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    print(f"入力: {csv_path}（{len(rows)}件）")
+    print(f"台帳: {registry_path}（登録済み {len(registry)}件）")
+    print("-" * 50)
 
+    # 全行を検証（形式・ファイル内の重複・登録済みとの重複）
+    registered_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    projects = []
+    first_line = {}
+    error_rows = 0
+    for line_no, row in rows:
+        prefix = f"{line_no}行目: "
+        try:
+            project = build_project(row, registered_at)
+        except ProjectInputError as e:
+            print_input_error(e, prefix)
+            error_rows += 1
+            continue
+        project_id = project["project_id"]
+        if project_id in first_line:
+            print(f"{prefix}エラー: project_id '{project_id}' が{first_line[project_id]}行目と重複しています",
+                  file=sys.stderr)
+            error_rows += 1
+        elif project_id in registry:
+            print(f"{prefix}エラー: project_id '{project_id}' は既に登録済みです"
+                  f"（{registry.get(project_id).get('project_name', '')}）", file=sys.stderr)
+            error_rows += 1
+        else:
+            first_line[project_id] = line_no
+            projects.append(project)
+
+    if error_rows:
+        print(f"\n{error_rows}行にエラーがあります。どの工事も登録していません。", file=sys.stderr)
+        return 1
+    if not projects:
+        print("登録する工事がありません。")
+        return 0
+    # テンプレートの差し込み項目が工事情報にあるか（登録前に確認）
+    try:
+        template.values(projects[0])
+    except ChecklistTemplateError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    if dry_run:
+        print(f"検証OK: {len(projects)}件（--dry-run のため登録していません）")
+        return 0
+
+    # 台帳に一括登録（1回の追記。検証後に他のプロセスが登録した分もロック中に確認する）
+    try:
+        registry.add_many(projects)
+        if export:
+            registry.export()
+    except DuplicateProjectError as e:
+        print(f"エラー: {e}。どの工事も登録していません。", file=sys.stderr)
+        return 1
+    except (OSError, ValueError, RegistryLockTimeout) as e:
+        print(f"エラー: 工事台帳に登録できません: {e}", file=sys.stderr)
+        return 1
+    print(f"project_registry.json に登録完了: {len(projects)}件")
+    print(f"  ファイル: {registry_path}")
+    print(f"  登録数: {len(registry)}件")
+    if registry.pending:
+        print(f"  未書き出し: {registry.pending}件（{registry.journal_path.name}。"
+              f"--export または project_registry.py export で反映）")
+
+    checklist_paths = write_checklists(projects, output_dir, workers, fmt, template_path)
+    print(f"\nチェックリスト: {len(checklist_paths)}件")
+    for project, path in zip(projects, checklist_paths):
+        print(f"  {project['project_id']:<6} {path.name}  {project['project_name']}")
+    print(f"  保存先: {output_dir}")
 
-def load_registry() -> dict:
-    """project_registry.jsonを読み込む（存在しない場合は空で初期化）"""
-    if REGISTRY_PATH.exists():
-        with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"projects": [], "updated_at": ""}
-
-
-def save_registry(registry: dict) -> None:
-    """project_registry.jsonに保存する"""
-    registry["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(REGISTRY_PATH, "w", encoding="utf-8") as f:
-        json.dump(registry, f, ensure_ascii=False, indent=2)
-    # LF改行で再書き込み
-    content = REGISTRY_PATH.read_text(encoding="utf-8")
-    REGISTRY_PATH.write_text(content, encoding="utf-8", newline="")
-
-
-def generate_checklist(project: dict) -> str:
-    """操作チェックリストを生成する"""
-    pid = project["project_id"]
-    pname = project["project_name"]
-    ssid = project["spreadsheet_id"]
-    budget = project["budget_total"]
-    start = project["start_date"]
-    end = project["end_date"]
-
-    budget_str = f"{budget:,}"
-
-    lines = []
-    lines.append(f"# 工事登録チェックリスト: {pid} {pname}")
-    lines.append(f"")
-    lines.append(f"作成日時: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    lines.append(f"")
-    lines.append(f"## 登録情報")
-    lines.append(f"")
-    lines.append(f"| 項目 | 値 |")
-    lines.append(f"|------|-----|")
-    lines.append(f"| プロジェクトID | {pid} |")
-    lines.append(f"| 工事名 | {pname} |")
-    lines.append(f"| Spreadsheet ID | {ssid} |")
-    lines.append(f"| 実行予算額 | {budget_str}円 |")
-    lines.append(f"| 工期開始 | {start} |")
-    lines.append(f"| 工期終了 | {end} |")
-    lines.append(f"")
-    lines.append(f"---")
-    lines.append(f"")
-    lines.append(f"## Step 1: hub.gsの_M工事台帳にspreadsheet_idを登録")
-    lines.append(f"")
-    lines.append(f"- [ ] 1. 本社管理台帳スプレッドシートを開く")
-    lines.append(f"- [ ] 2. _M工事台帳シートに移動")
-    lines.append(f"- [ ] 3. 新しい行に以下の情報を入力:")
-    lines.append(f"")
-    lines.append(f"| 列 | 入力値 |")
-    lines.append(f"|-----|--------|")
-    lines.append(f"| project_id | {pid} |")
-    lines.append(f"| project_name | {pname} |")
-    lines.append(f"| spreadsheet_id | {ssid} |")
-    lines.append(f"| budget_total | {budget_str} |")
-    lines.append(f"| start_date | {start} |")
-    lines.append(f"| end_date | {end} |")
-    lines.append(f"| active | TRUE |")
-    lines.append(f"")
-    lines.append(f"- [ ] 4. 入力後、_M工事台帳シートに{pid}の行が追加されていることを確認")
-    lines.append(f"")
-    lines.append(f"---")
-    lines.append(f"")
-    lines.append(f"## Step 2: 現場SSのGASセットアップ")
-    lines.append(f"")
-    lines.append(f"- [ ] 5. 対象スプレッドシートを開く:")
-    lines.append(f"  - URL: https://docs.google.com/spreadsheets/d/{ssid}/edit")
-    lines.append(f"- [ ] 6. メニュー「拡張機能」->「Apps Script」でエディタを開く")
-    lines.append(f"- [ ] 7. gas_templates/budget_management/ 配下の6ファイルをコピー:")
-    lines.append(f"  - config.gs, template.gs, validation_extended.gs")
-    lines.append(f"  - aggregation.gs, budget_health.gs, api.gs")
-    lines.append(f"- [ ] 8. setup_project_data.gs をコピーして追加（初期データ投入用）")
-    lines.append(f"- [ ] 9. Apps Scriptエディタで setupProjectData() を実行")
-    lines.append(f"  - 初回実行時: Googleアカウントの認証許可が求められる -> 「許可」をクリック")
-    lines.append(f"  - 成功時: 9シートが自動生成される")
-    lines.append(f"- [ ] 10. setup_project_data.gs を削除（初期化完了後は不要）")
-    lines.append(f"")
-    lines.append(f"---")
-    lines.append(f"")
-    lines.append(f"## Step 3: 動作確認")
-    lines.append(f"")
-    lines.append(f"### 3-1. APIデプロイ")
-    lines.append(f"")
-    lines.append(f"- [ ] 11. Apps Script -> 「デプロイ」->「新しいデプロイ」")
-    lines.append(f"  - 種類: ウェブアプリ")
-    lines.append(f"  - 実行するユーザー: 自分")
-    lines.append(f"  - アクセスできるユーザー: 全員（組織内）")
-    lines.append(f"- [ ] 12. デプロイURLをメモ")
-    lines.append(f"")
-    lines.append(f"### 3-2. APIヘルスチェック（PowerShell）")
-    lines.append(f"")
-    lines.append(f"```powershell")
-    lines.append(f"# mode=health で予算健康度を確認")
-    lines.append(f'Invoke-WebRequest -Uri "{{DEPLOY_URL}}?mode=health&key={{API_KEY}}" | Select-Object -ExpandProperty Content')
-    lines.append(f"```")
-    lines.append(f"")
-    lines.append(f"期待値: budget_total > 0 を含むJSONレスポンス")
-    lines.append(f"")
-    lines.append(f"```powershell")
-    lines.append(f"# mode=summary で工事概要を確認")
-    lines.append(f'Invoke-WebRequest -Uri "{{DEPLOY_URL}}?mode=summary&key={{API_KEY}}" | Select-Object -ExpandProperty Content')
-    lines.append(f"```")
-    lines.append(f"")
-    lines.append(f"期待値: project_id={pid}、budget_total={budget_str} を含むJSON")
-    lines.append(f"")
-    lines.append(f"### 3-3. hub.gs横断確認（PowerShell）")
-    lines.append(f"")
-    lines.append(f"```powershell")
-    lines.append(f"# 本社台帳から全工事一覧を取得")
-    lines.append(f'Invoke-WebRequest -Uri "{{HUB_URL}}?mode=cross_health" | Select-Object -ExpandProperty Content')
-    lines.append(f"```")
-    lines.append(f"")
-    lines.append(f"期待値: {pid}が一覧に含まれ、budget_total > 0 であること")
-    lines.append(f"")
-    lines.append(f"---")
-    lines.append(f"")
-    lines.append(f"## Step 4: Dify DSLインポート（任意）")
-    lines.append(f"")
-    lines.append(f"Dify Cloudと連携する場合、以下を実施:")
-    lines.append(f"")
-    lines.append(f"- [ ] 13. Dify Cloud（cloud.dify.ai）にログイン")
-    lines.append(f"- [ ] 14. 「スタジオ」->「DSLファイルからインポート」")
-    lines.append(f"- [ ] 15. dsl/generated/budget_inquiry_chatbot.dsl をアップロード")
-    lines.append(f"- [ ] 16. 環境変数を設定（設定 -> 環境変数）:")
-    lines.append(f"  - GAS_HUB_URL: hub.gsのWebアプリURL")
-    lines.append(f"  - GAS_ENDPOINT_URL: api.gsのWebアプリURL")
-    lines.append(f'- [ ] 17. 動作確認: 「{pid}の今月の状況を教えてください」と入力')
-    lines.append(f"  - 期待値: 消化率/出来高率/信号を含む日本語レポート")
-    lines.append(f"")
-    lines.append(f"---")
-    lines.append(f"")
-    lines.append(f"以上で {pid} {pname} の登録が完了です。")
-
-    return "\n".join(lines)
+    print("\n=== 完了 ===")
+    return 0
 
 
 def main():
@@ -204,85 +316,127 @@ def main():
     )
     parser.add_argument(
         "--project_id",
-        required=True,
         help="プロジェクトID（例: P005）"
     )
     parser.add_argument(
         "--project_name",
-        required=True,
         help="工事名（例: 境川河川改修2期）"
     )
     parser.add_argument(
         "--spreadsheet_url",
-        required=True,
         help="Google Spreadsheet URL"
     )
     parser.add_argument(
         "--budget_total",
-        required=True,
         type=int,
         help="実行予算額（例: 185000000）"
     )
     parser.add_argument(
         "--start_date",
-        required=True,
         help="工期開始日（例: 2026-04-01）"
     )
     parser.add_argument(
         "--end_date",
-        required=True,
         help="工期終了日（例: 2027-03-31）"
     )
+    parser.add_argument(
+        "--csv",
+        type=Path,
+        help="一括登録する工事の一覧（CSV/TSV。指定時は上記の個別引数は使わない）"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="一括登録の検証のみ行い、登録しない（--csv と併用）"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="一括登録時のチェックリスト書き出しの並列数"
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="markdown",
+        help="チェックリストの出力形式（markdown は .txt、html、json）"
+    )
+    parser.add_argument(
+        "--template",
+        type=Path,
+        default=DEFAULT_TEMPLATE,
+        help="チェックリストのテンプレート"
+    )
+    parser.add_argument(
+        "--registry",
+        type=Path,
+        default=REGISTRY_PATH,
+        help="工事台帳（project_registry.json）のパス"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=OUTPUT_DIR,
+        help="チェックリストの保存先"
+    )
+    parser.add_argument(
+        "--export",
+        action="store_true",
+        help="登録後すぐに project_registry.json を書き出す"
+    )
 
     args = parser.parse_args()
 
+    if args.csv:
+        return register_projects_bulk(args.csv, args.registry, args.output_dir, max(1, args.workers),
+                                      args.export, args.dry_run, args.format, args.template)
+    missing = [f"--{column}" for column in PROJECT_COLUMNS if getattr(args, column) is None]
+    if missing:
+        parser.error(f"次の引数が必要です: {', '.join(missing)}（一括登録は --csv）")
+
     # 入力検証
-    validate_project_id(args.project_id)
-    validate_date(args.start_date, "start_date")
-    validate_date(args.end_date, "end_date")
-    spreadsheet_id = extract_spreadsheet_id(args.spreadsheet_url)
+    try:
+        project = build_project(vars(args), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    except ProjectInputError as e:
+        print_input_error(e)
+        sys.exit(1)
+
+    # チェックリスト生成（テンプレートの誤りは登録前に止める）
+    try:
+        checklist = generate_checklist(project, args.format, args.template)
+    except (OSError, ChecklistTemplateError) as e:
+        print(f"エラー: チェックリストを生成できません: {e}", file=sys.stderr)
+        sys.exit(1)
 
     print(f"=== 新規工事プロジェクト登録 ===\n")
-    print(f"プロジェクトID: {args.project_id}")
-    print(f"工事名: {args.project_name}")
-    print(f"Spreadsheet ID: {spreadsheet_id}")
-    print(f"実行予算額: {args.budget_total:,}円")
-    print(f"工期: {args.start_date} ~ {args.end_date}")
+    print(f"プロジェクトID: {project['project_id']}")
+    print(f"工事名: {project['project_name']}")
+    print(f"Spreadsheet ID: {project['spreadsheet_id']}")
+    print(f"実行予算額: {project['budget_total']:,}円")
+    print(f"工期: {project['start_date']} ~ {project['end_date']}")
     print("-" * 50)
 
-    # レジストリ読み込み
-    registry = load_registry()
-
-    # 重複チェック
-    existing_ids = [p["project_id"] for p in registry["projects"]]
-    if args.project_id in existing_ids:
-        print(f"\nエラー: project_id '{args.project_id}' は既に登録済みです。", file=sys.stderr)
+    # 台帳に登録（重複チェックはロック中に最新の台帳で行う）
+    try:
+        registry = ProjectRegistry(args.registry)
+        registry.add(project)
+        if args.export:
+            registry.export()
+    except DuplicateProjectError as e:
+        print(f"\nエラー: {e}。", file=sys.stderr)
         print("既存プロジェクト一覧:", file=sys.stderr)
-        for p in registry["projects"]:
+        for p in registry.projects():
             print(f"  {p['project_id']}: {p['project_name']}", file=sys.stderr)
         sys.exit(1)
-
-    # 新規プロジェクト情報
-    project = {
-        "project_id": args.project_id,
-        "project_name": args.project_name,
-        "spreadsheet_id": spreadsheet_id,
-        "spreadsheet_url": args.spreadsheet_url,
-        "budget_total": args.budget_total,
-        "start_date": args.start_date,
-        "end_date": args.end_date,
-        "registered_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    }
-
-    # レジストリに追加して保存
-    registry["projects"].append(project)
-    save_registry(registry)
+    except (OSError, ValueError, RegistryLockTimeout) as e:
+        print(f"\nエラー: 工事台帳に登録できません: {e}", file=sys.stderr)
+        sys.exit(1)
     print(f"\nproject_registry.json に登録完了")
-    print(f"  ファイル: {REGISTRY_PATH}")
-    print(f"  登録数: {len(registry['projects'])}件")
-
-    # チェックリスト生成
-    checklist = generate_checklist(project)
+    print(f"  ファイル: {args.registry}")
+    print(f"  登録数: {len(registry)}件")
+    if registry.pending:
+        print(f"  未書き出し: {registry.pending}件（{registry.journal_path.name}。"
+              f"--export または project_registry.py export で反映）")
 
     # 標準出力に表示
     print("\n" + "=" * 60)
@@ -290,9 +444,9 @@ def main():
     print("=" * 60)
 
     # ファイルに保存
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    args.output_dir.mkdir(parents=True, exist_ok=True)
     date_str = datetime.now().strftime("%Y%m%d")
-    checklist_path = OUTPUT_DIR / f"checklist_{args.project_id}_{date_str}.txt"
+    checklist_path = checklist_path_for(project, args.output_dir, args.format, date_str)
     checklist_path.write_text(checklist, encoding="utf-8")
     print(f"\nチェックリスト保存先: {checklist_path}")
 
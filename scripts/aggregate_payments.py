@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+月次・カテゴリ別 支払集計（aggregation.gs のPython版）
+
+aggregation.gs の runMonthlyAggregation が作る2つの集計シートを、
+支払明細（poc_test_data.tsv または列指向形式）と実行予算テーブルから
+NumPyのグループ集計で計算する。GASの行ループと同じ結果になるよう、
+列の取り方（headers.indexOf）・parseFloat・文字列比較・toFixed(1)の丸めまで合わせている。
+集計結果はシートにそのまま貼り付けられるTSVで出力する。
+
+対応するGAS関数:
+  - getBudgetTotals_          → budget_totals()
+  - aggregatePayments_        → aggregate_payments()
+  - calculatePendingOffsets_  → calculate_pending_offsets()
+  - writeMonthlyAggregation_  → monthly_aggregation_rows()   （_C_月次集計）
+  - writeDetailAggregation_   → detail_aggregation_rows()    （_C_費目別集計）
+  - getSpentByBudgetBox       → SpentByBudgetBox.up_to()
+
+依存: numpy（pip install numpy）、列指向形式の入力には pyarrow
+
+使用方法:
+    python scripts/aggregate_payments.py
+    python scripts/aggregate_payments.py --payments output/poc_test_data.parquet \
+        --budget output/poc_budget.tsv --up-to 2025-12
+"""
+
+import argparse
+import csv
+import itertools
+import math
+import re
+import sys
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+
+import numpy as np
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+OUTPUT_DIR = SCRIPT_DIR.parent / "output"
+PAYMENT_PATH = OUTPUT_DIR / "poc_test_data.tsv"
+BUDGET_PATH = OUTPUT_DIR / "poc_budget.tsv"
+MONTHLY_OUTPUT = OUTPUT_DIR / "poc_monthly_aggregation.tsv"
+DETAIL_OUTPUT = OUTPUT_DIR / "poc_detail_aggregation.tsv"
+
+# カテゴリ（aggregation.gs と同じ）
+CATEGORY_MAP = {"直接工事費": "C01", "共通仮設費": "C02", "現場管理費": "C03"}
+CATEGORY_IDS = ["C01", "C02", "C03"]
+CATEGORIES = CATEGORY_IDS + ["ALL"]
+CATEGORY_NAMES = {"C01": "直接工事費", "C02": "共通仮設費", "C03": "現場管理費", "ALL": "合計"}
+
+# 支払明細シートの列名。TSV（prepare_poc_data.py出力）の「金額」はシート上の「支払金額」列
+PAYMENT_COLUMN_ALIASES = {"支払金額": ["支払金額", "金額"]}
+
+MONTHLY_HEADERS = [
+    "year_month", "category_id", "category_name", "budget_amount", "spent_amount",
+    "spent_cumulative", "remaining", "consumption_rate", "pending_offset", "updated_at",
+]
+DETAIL_HEADERS = [
+    "budget_box_id", "category_id", "expense_id", "expense_name", "budget_amount",
+    "spent_cumulative", "remaining", "consumption_rate", "vendor_count", "updated_at",
+]
+
+# JavaScriptの空白文字（String.prototype.trim / parseFloat が読み飛ばす文字）
+JS_WHITESPACE = (
+    "\t\n\v\f\r \xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006"
+    "\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff"
+)
+_JS_FLOAT = re.compile(r"([+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?))")
+# 列全体が「空欄または10進数表記」だけかを1回で判定する（float()とparseFloatの結果が同じになる表記）
+_PLAIN_DECIMALS = re.compile(r"(?:[+-]?\d+(?:\.\d*)?)?(?:\n(?:[+-]?\d+(?:\.\d*)?)?)*")
+
+
+# === JavaScript互換の値変換 ===
+
+def js_parse_float(value):
+    """JavaScriptの parseFloat(value) || 0 と同じ値を返す"""
+    if isinstance(value, bool):
+        return 0.0
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        return 0.0 if math.isnan(value) else value
+    if value is None:
+        return 0.0
+    match = _JS_FLOAT.match(str(value).lstrip(JS_WHITESPACE))
+    if not match:
+        return 0.0
+    text = match.group(1)
+    if text.lstrip("+-") == "Infinity":
+        return -math.inf if text.startswith("-") else math.inf
+    return float(text)
+
+
+def js_string(value):
+    """JavaScriptの String(value)（シートの空セルは空文字）"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _all_strings(values):
+    return set(map(type, values)) <= {str}
+
+
+def js_parse_float_array(values):
+    """値の列をparseFloat(v) || 0 したfloat64配列にする
+
+    シートやTSVの金額列はほぼすべて空欄か10進数表記なので、その場合は
+    正規表現1回で確認してから一括変換する（それ以外の値を含む列は1件ずつ変換）。
+    """
+    if _all_strings(values) and _PLAIN_DECIMALS.fullmatch("\n".join(values)):
+        array = np.array(values, dtype=object)
+        array[array == ""] = "0"
+        return array.astype(np.float64)
+    return np.array([js_parse_float(v) for v in values], dtype=np.float64)
+
+
+def js_string_array(values):
+    """値の列をString(v)したobject配列にする"""
+    if _all_strings(values):
+        return np.array(values, dtype=object)
+    return np.array([js_string(v) for v in values], dtype=object)
+
+
+def js_to_fixed1(value):
+    """parseFloat(value.toFixed(1)) と同じ丸め（2進値を10進で四捨五入）"""
+    if not math.isfinite(value):
+        return value
+    return float(Decimal(value).quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
+
+
+def js_number(value):
+    """シート貼り付け用の数値表記（整数値は小数点なし）"""
+    if isinstance(value, str):
+        return value
+    value = float(value)
+    if value.is_integer() and abs(value) < 1e21:
+        return int(value)
+    return repr(value)
+
+
+def format_amount(value):
+    """表示用の金額（整数値は桁区切り）"""
+    number = js_number(value)
+    return f"{number:,}" if isinstance(number, int) else number
+
+
+# === 入力 ===
+
+def _column_index(headers, name):
+    """headers.indexOf(name)（別名も確認し、列が無ければ-1）"""
+    for alias in PAYMENT_COLUMN_ALIASES.get(name, [name]):
+        if alias in headers:
+            return headers.index(alias)
+    return -1
+
+
+def normalize_budget_headers(headers, rows):
+    """poc_budget.tsv（category列にカテゴリ名）を _実行予算テーブル の category_id 列に揃える"""
+    if "category_id" in headers or "category" not in headers:
+        return headers, rows
+    index = headers.index("category")
+    rows = [
+        row[:index] + [CATEGORY_MAP.get(row[index], row[index])] + row[index + 1:]
+        for row in rows
+    ]
+    return headers[:index] + ["category_id"] + headers[index + 1:], rows
+
+
+def read_sheet_tsv(path):
+    """TSVを getDataRange().getValues() 相当の (headers, rows) として読み込む"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        data = list(csv.reader(f, delimiter="\t"))
+    if not data:
+        return [], []
+    return data[0], data[1:]
+
+
+class PaymentColumns:
+    """支払明細のうち集計に使う列をNumPy配列で保持する
+
+    金額・相殺額はparseFloat済みのfloat64（JavaScriptのnumberと同じ倍精度）、
+    文字列列はString()済み。列が無い場合はNone（GASの indexOf < 0 に対応）。
+    """
+
+    def __init__(self, year_month, category, amount, offset, offset_vendor, budget_box_id, vendor):
+        self.year_month = year_month
+        self.category = category
+        self.amount = amount
+        self.offset = offset
+        self.offset_vendor = offset_vendor
+        self.budget_box_id = budget_box_id
+        self.vendor = vendor
+
+    def __len__(self):
+        return 0 if self.year_month is None else len(self.year_month)
+
+    @classmethod
+    def from_rows(cls, headers, rows):
+        """シート形式の (headers, rows) から作る"""
+        # 行→列の転置は1回だけ（TSVの短い行は空欄で埋める）
+        columns = list(itertools.zip_longest(*rows, fillvalue="")) if rows else []
+
+        def column(name):
+            index = _column_index(headers, name)
+            if index < 0:
+                return None
+            return list(columns[index]) if index < len(columns) else [""] * len(rows)
+
+        def strings(name):
+            values = column(name)
+            return None if values is None else js_string_array(values)
+
+        def numbers(name):
+            values = column(name)
+            return None if values is None else js_parse_float_array(values)
+
+        return cls(
+            year_month=strings("支払年月"),
+            category=strings("カテゴリ"),
+            amount=numbers("支払金額"),
+            offset=numbers("相殺額"),
+            offset_vendor=strings("相殺先"),
+            budget_box_id=strings("予算箱ID"),
+            vendor=strings("支払先"),
+        )
+
+    @classmethod
+    def from_table(cls, table):
+        """列指向形式（poc_columnar.read_table）から作る。金額列は再解析しない"""
+        names = table.column_names
+
+        def strings(name):
+            if name not in names:
+                return None
+            return np.array(table.column(name).cast("string").to_pylist(), dtype=object)
+
+        def numbers(name):
+            for alias in PAYMENT_COLUMN_ALIASES.get(name, [name]):
+                if alias in names:
+                    return table.column(alias).to_numpy().astype(np.float64)
+            return None
+
+        return cls(
+            year_month=strings("支払年月"),
+            category=strings("カテゴリ"),
+            amount=numbers("支払金額"),
+            offset=numbers("相殺額"),
+            offset_vendor=strings("相殺先"),
+            budget_box_id=strings("予算箱ID"),
+            vendor=strings("支払先"),
+        )
+
+
+def load_payments(path):
+    """支払明細を読み込む（.tsv / .parquet / .arrows）"""
+    path = Path(path)
+    if path.suffix in (".parquet", ".arrows"):
+        import poc_columnar
+        return PaymentColumns.from_table(poc_columnar.read_table(path))
+    headers, rows = read_sheet_tsv(path)
+    return PaymentColumns.from_rows(headers, rows)
+
+
+def _month_keys(year_month):
+    """String(ym).substring(0, 7)（固定長文字列への変換で先頭7文字に切り詰める）"""
+    return year_month.astype("U7")
+
+
+def _valid_months(month_keys):
+    """!ym || ym.length < 7 で除外されない行"""
+    return np.char.str_len(month_keys) >= 7
+
+
+def _category_index(category, count):
+    """カテゴリ列を 0:C01 / 1:C02 / 2:C03 / 3:その他 の番号にする"""
+    if category is None:
+        # catIdx < 0 の場合は 'UNKNOWN'（ALLにのみ計上）
+        return np.full(count, 3, dtype=np.int64)
+    lookup = {name: CATEGORY_IDS.index(cid) for name, cid in CATEGORY_MAP.items()}
+    # catMap_[catRaw] || catRaw なので、カテゴリID（C01等）が直接入っていてもそのIDとして扱う
+    lookup.update({cid: i for i, cid in enumerate(CATEGORY_IDS)})
+    return np.fromiter(map(lookup.get, category, itertools.repeat(3)), dtype=np.int64, count=count)
+
+
+def _factorize(values):
+    """(昇順のユニーク値, 各要素の番号)。文字列の昇順はJavaScriptのsort()と同じ
+
+    ユニーク値の少ない列（年月・予算箱ID・支払先）が対象なので、全件のソートは行わず
+    setで重複を除いてから辞書引きで番号を振る。
+    """
+    uniques = sorted(set(values.tolist()))
+    lookup = {value: i for i, value in enumerate(uniques)}
+    inverse = np.fromiter(map(lookup.__getitem__, values.tolist()), dtype=np.int64, count=len(values))
+    return np.array(uniques, dtype=object), inverse
+
+
+def _net_amount(payments):
+    """実質支出額 = 税抜額 - 相殺額（相殺未入力は0扱い）"""
+    if payments.offset is None:
+        return payments.amount
+    return payments.amount - payments.offset
+
+
+# === 集計 ===
+
+def budget_totals(headers, rows):
+    """getBudgetTotals_: カテゴリID別の予算合計"""
+    totals = {"C01": 0.0, "C02": 0.0, "C03": 0.0, "ALL": 0.0}
+    if not rows or "category_id" not in headers or "budget_amount" not in headers:
+        return totals
+    cat_idx = headers.index("category_id")
+    amt_idx = headers.index("budget_amount")
+    for row in rows:
+        cat = js_string(row[cat_idx] if cat_idx < len(row) else "")
+        amt = js_parse_float(row[amt_idx] if amt_idx < len(row) else "")
+        if cat in totals:
+            totals[cat] += amt
+        totals["ALL"] += amt
+    return totals
+
+
+def aggregate_payments(payments):
+    """aggregatePayments_: 月 × カテゴリの実質支出額
+
+    Returns:
+        tuple: (months, matrix) -- monthsは昇順の年月、matrixは (月数, 4) の
+               float64配列で列は C01 / C02 / C03 / ALL
+    """
+    if payments.year_month is None or payments.amount is None or not len(payments):
+        return np.array([], dtype=object), np.zeros((0, 4))
+
+    ym = _month_keys(payments.year_month)
+    valid = _valid_months(ym)
+    months, month_idx = _factorize(ym[valid])
+    net = _net_amount(payments)[valid]
+    cat_idx = _category_index(payments.category, len(ym))[valid]
+
+    # np.bincountは入力順に加算するため、GASの行ループと同じ順序の倍精度加算になる
+    by_category = np.bincount(month_idx * 4 + cat_idx, weights=net, minlength=len(months) * 4)
+    matrix = by_category.reshape(len(months), 4)
+    matrix[:, 3] = np.bincount(month_idx, weights=net, minlength=len(months))
+    return months, matrix
+
+
+def calculate_pending_offsets(payments):
+    """calculatePendingOffsets_: 相殺未確定の可能性がある行を含む月（推定額は常に0）"""
+    if payments.year_month is None or payments.amount is None or not len(payments):
+        return {}
+    count = len(payments)
+    ym = _month_keys(payments.year_month)
+    offset = payments.offset if payments.offset is not None else np.zeros(count)
+    if payments.offset_vendor is not None:
+        stripped = np.fromiter(map(str.strip, payments.offset_vendor, itertools.repeat(JS_WHITESPACE)),
+                               dtype=object, count=count)
+        no_vendor = stripped == ""
+    else:
+        no_vendor = np.ones(count, dtype=bool)
+    cat_idx = _category_index(payments.category, count)
+    valid = _valid_months(ym)
+    pending = valid & (offset == 0) & no_vendor & ((cat_idx == 1) | (cat_idx == 2)) & (payments.amount > 0)
+    return {month: 0 for month in sorted(set(ym[pending]))}
+
+
+def monthly_aggregation_rows(months, matrix, totals, pending_offsets, updated_at):
+    """writeMonthlyAggregation_: _C_月次集計シートの行"""
+    cumulative = np.cumsum(matrix, axis=0)
+    rows = []
+    for m, ym in enumerate(months):
+        for c, cat in enumerate(CATEGORIES):
+            budget = totals.get(cat, 0) or 0
+            spent = matrix[m, c]
+            cum = cumulative[m, c]
+            rate = js_to_fixed1(cum / budget * 100) if budget > 0 else 0
+            rows.append([
+                ym, cat, CATEGORY_NAMES[cat], budget, spent, cum, budget - cum, rate,
+                (pending_offsets.get(ym) or 0) if cat == "ALL" else "",
+                updated_at,
+            ])
+    return rows
+
+
+def load_budget_map(headers, rows):
+    """writeDetailAggregation_ の予算箱ID別予算マップ"""
+    budget_map = {}
+    if not rows or "budget_box_id" not in headers:
+        return budget_map
+
+    def get(row, name, default=""):
+        if name not in headers:
+            return default
+        index = headers.index(name)
+        return row[index] if index < len(row) else ""
+
+    for row in rows:
+        box_id = get(row, "budget_box_id")
+        if box_id:
+            budget_map[js_string(box_id)] = {
+                "category_id": get(row, "category_id"),
+                "expense_id": get(row, "expense_id"),
+                "expense_name": get(row, "expense_name"),
+                "budget_amount": js_parse_float(get(row, "budget_amount", 0)) if "budget_amount" in headers else 0,
+            }
+    return budget_map
+
+
+def detail_aggregation_rows(payments, budget_map, updated_at):
+    """writeDetailAggregation_: _C_費目別集計シートの行（予算箱ID別）"""
+    spent = {}
+    vendor_counts = {}
+    if payments.budget_box_id is not None and payments.amount is not None and len(payments):
+        boxes = payments.budget_box_id
+        valid = boxes != ""
+        box_ids, box_idx = _factorize(boxes[valid])
+        totals = np.bincount(box_idx, weights=_net_amount(payments)[valid], minlength=len(box_ids))
+        spent = dict(zip(box_ids, totals))
+
+        counts = np.zeros(len(box_ids), dtype=np.int64)
+        if payments.vendor is not None:
+            vendors = payments.vendor[valid]
+            has_vendor = vendors != ""
+            if has_vendor.any():
+                _, vendor_idx = _factorize(vendors[has_vendor])
+                pairs = np.unique(box_idx[has_vendor] * (vendor_idx.max() + 1) + vendor_idx)
+                counts = np.bincount(pairs // (vendor_idx.max() + 1), minlength=len(box_ids))
+        vendor_counts = dict(zip(box_ids, counts))
+
+    empty = {"category_id": "", "expense_id": "", "expense_name": "", "budget_amount": 0}
+    rows = []
+    for box_id in sorted(set(budget_map) | set(spent)):
+        info = budget_map.get(box_id, empty)
+        budget = info["budget_amount"]
+        total = spent.get(box_id, 0)
+        rate = js_to_fixed1(total / budget * 100) if budget > 0 else 0
+        rows.append([
+            box_id, info["category_id"], info["expense_id"], info["expense_name"],
+            budget, total, budget - total, rate, int(vendor_counts.get(box_id, 0)), updated_at,
+        ])
+    return rows
+
+
+class SpentByBudgetBox:
+    """getSpentByBudgetBox(upToMonth) を任意の月について繰り返し求める
+
+    年月・予算箱IDの番号付けは1回だけ行い、up_to(month) は対象行の絞り込みと
+    bincountだけで求める。行の加算順はGASのループと同じ（小数を含む金額でも一致）。
+    """
+
+    def __init__(self, payments):
+        self.months = np.array([], dtype=object)
+        self.box_ids = np.array([], dtype=object)
+        self._month_idx = np.zeros(0, dtype=np.int64)
+        self._box_idx = np.zeros(0, dtype=np.int64)
+        self._net = np.zeros(0)
+        if payments.budget_box_id is None or payments.year_month is None or payments.amount is None:
+            return
+        boxes = payments.budget_box_id
+        valid = boxes != ""
+        # GASは ym > upToMonth の行だけを除外するため、7文字未満の年月も比較対象に残る
+        self.months, self._month_idx = _factorize(_month_keys(payments.year_month)[valid])
+        self.box_ids, self._box_idx = _factorize(boxes[valid])
+        self._net = _net_amount(payments)[valid]
+
+    def up_to(self, month):
+        """{予算箱ID: 累計実質支出}（支払年月が month 以前の行のみ）"""
+        # 年月は昇順に番号付けしているため、month以前の年月は番号の上限で判定できる
+        limit = np.searchsorted(self.months.astype(str), month, side="right")
+        selected = self._month_idx < limit
+        box_idx = self._box_idx[selected]
+        totals = np.bincount(box_idx, weights=self._net[selected], minlength=len(self.box_ids))
+        present = np.bincount(box_idx, minlength=len(self.box_ids)) > 0
+        return {box: float(totals[i]) for i, box in enumerate(self.box_ids) if present[i]}
+
+
+# === 出力 ===
+
+def write_sheet_tsv(path, headers, rows):
+    """集計行をシート貼り付け用TSVで書き出す"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow([js_number(v) if isinstance(v, (int, float, np.number)) else v for v in row])
+    print(f"  出力: {path} ({len(rows)}行)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="支払明細の月次・カテゴリ別集計（aggregation.gs互換）")
+    parser.add_argument("--payments", type=Path, default=PAYMENT_PATH,
+                        help="支払明細（.tsv / .parquet / .arrows）")
+    parser.add_argument("--budget", type=Path, default=BUDGET_PATH, help="実行予算テーブルTSV")
+    parser.add_argument("--monthly-output", type=Path, default=MONTHLY_OUTPUT,
+                        help="_C_月次集計 の出力先TSV")
+    parser.add_argument("--detail-output", type=Path, default=DETAIL_OUTPUT,
+                        help="_C_費目別集計 の出力先TSV")
+    parser.add_argument("--up-to", help="指定年月（YYYY-MM）までの予算箱ID別支出累計を表示")
+    args = parser.parse_args()
+
+    for path in (args.payments, args.budget):
+        if not path.exists():
+            print(f"エラー: ファイルが見つかりません: {path}", file=sys.stderr)
+            return 1
+
+    print("=== 月次集計（aggregation.gs互換） ===\n")
+    payments = load_payments(args.payments)
+    budget_headers, budget_rows = normalize_budget_headers(*read_sheet_tsv(args.budget))
+    print(f"  支払明細: {len(payments):,}行 ({args.payments.name})")
+    print(f"  実行予算: {len(budget_rows):,}行 ({args.budget.name})")
+
+    updated_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    totals = budget_totals(budget_headers, budget_rows)
+    months, matrix = aggregate_payments(payments)
+    pending = calculate_pending_offsets(payments)
+
+    monthly_rows = monthly_aggregation_rows(months, matrix, totals, pending, updated_at)
+    detail_rows = detail_aggregation_rows(payments, load_budget_map(budget_headers, budget_rows), updated_at)
+
+    print("\n--- 月別 実質支出（C01 / C02 / C03 / ALL） ---")
+    for ym, values in zip(months, matrix):
+        print(f"  {ym}: " + " / ".join(f"{format_amount(v):>12}" for v in values))
+
+    print()
+    write_sheet_tsv(args.monthly_output, MONTHLY_HEADERS, monthly_rows)
+    write_sheet_tsv(args.detail_output, DETAIL_HEADERS, detail_rows)
+
+    if args.up_to:
+        print(f"\n--- 予算箱ID別 支出累計（{args.up_to}まで） ---")
+        for box_id, amount in sorted(SpentByBudgetBox(payments).up_to(args.up_to).items()):
+            print(f"  {box_id}: {format_amount(amount)}")
+
+    print("\n=== 完了 ===")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+複数工事のPoCデータ一括変換スクリプト
+
+project_registry.json（add_new_project.py で管理）に登録された工事ごとの
+支払明細JSON（final_output.json形式）を、プロセスプールで並列に変換する。
+変換は prepare_poc_data.py のストリーミングモードと同じ処理で、工事ごとに
+3種類のTSVを出力し、全工事の結果（月別合計の検証を含む）を1つのレポートにまとめる。
+1工事の入力が壊れていても、その工事だけが失敗として記録され他の工事は続行する
+（失敗した工事の出力先は書き換えず、前回のTSV一式を残す）。
+実行予算の期間は工事台帳の工期（start_date / end_date の年月）を使い、
+台帳に無い工事は prepare_poc_data.py の既定期間（BUDGET_PERIOD）とする。
+
+入力JSONの探索（--input-dir 配下）:
+    {project_id}.json または {project_id}/final_output.json
+
+出力:
+    output/batch/{project_id}/poc_test_data.tsv, poc_vendors.tsv, poc_budget.tsv
+    output/batch/batch_report.json
+
+使用方法:
+    python scripts/batch_prepare_poc_data.py --input-dir path/to/ledgers
+    python scripts/batch_prepare_poc_data.py --input-dir path/to/ledgers --workers 8 \
+        --expected expected_totals.json
+    python scripts/batch_prepare_poc_data.py P001=path/to/p001.json P002=path/to/p002.json
+
+検証値ファイル（--expected）の形式:
+    {"P001": {"10月度": 10933337, "11月度": 8458604}, ...}
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import prepare_poc_data as ppd
+from project_registry import ProjectRegistry
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+REGISTRY_PATH = PROJECT_DIR / "project_registry.json"
+BATCH_OUTPUT_DIR = PROJECT_DIR / "output" / "batch"
+REPORT_NAME = "batch_report.json"
+
+
+def load_registry_projects(registry_path):
+    """工事台帳から有効な工事の一覧を読み込む（未書き出しのジャーナル分を含む）"""
+    registry = ProjectRegistry(registry_path)
+    return [p for p in registry.projects() if p.get("active", True)]
+
+
+def registry_budget_periods(projects):
+    """工事ID → 実行予算の期間（工期の開始月, 終了月）"""
+    return {
+        p["project_id"]: (p["start_date"][:7], p["end_date"][:7])
+        for p in projects
+        if p.get("start_date") and p.get("end_date")
+    }
+
+
+def find_project_input(input_dir, project_id):
+    """工事IDに対応する入力JSONを探す（見つからなければNone）"""
+    for candidate in (input_dir / f"{project_id}.json", input_dir / project_id / "final_output.json"):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def collect_jobs(args):
+    """変換対象の (project_id, 入力JSONパス) の一覧を作る
+
+    同じ工事IDが複数回指定された場合は、出力先が重なるため ValueError を送出する。
+    """
+    jobs = []
+    for spec in args.inputs:
+        project_id, sep, path = spec.partition("=")
+        if not sep:
+            path = project_id
+            project_id = Path(path).stem
+        jobs.append((project_id, Path(path)))
+
+    counts = Counter(project_id for project_id, _ in jobs)
+    duplicates = sorted(project_id for project_id, n in counts.items() if n > 1)
+    if duplicates:
+        raise ValueError(f"工事IDが重複しています: {', '.join(duplicates)}（同じ出力先に書き込むため1回だけ指定）")
+
+    if args.input_dir:
+        listed = {project_id for project_id, _ in jobs}
+        for project in load_registry_projects(args.registry):
+            project_id = project["project_id"]
+            if project_id in listed:
+                continue
+            # 入力が見つからない工事も失敗として記録するためパスはNoneのまま登録
+            jobs.append((project_id, find_project_input(args.input_dir, project_id)))
+    return jobs
+
+
+def convert_project(project_id, json_path, output_dir, expected, budget_period=None):
+    """1工事分を変換する（ワーカープロセスで実行）
+
+    例外はすべて捕捉し、失敗としてレポート用の結果に記録する。3種類のTSVは
+    変換が最後まで終わった場合のみまとめて置き換わるため、失敗した工事の出力先には
+    前回成功時のTSV一式がそのまま残る（残っているものを previous_outputs に記録する）。
+    """
+    started = time.perf_counter()
+    result = {
+        "project_id": project_id,
+        "input": str(json_path) if json_path else None,
+        "output_dir": str(output_dir),
+        "status": "error",
+    }
+    test_path = output_dir / ppd.TSV_TEST_DATA.name
+    vendor_path = output_dir / ppd.TSV_VENDORS.name
+    budget_path = output_dir / ppd.TSV_BUDGET.name
+    log = io.StringIO()
+    try:
+        if json_path is None:
+            raise FileNotFoundError("入力JSONが見つかりません")
+        if not json_path.exists():
+            raise FileNotFoundError(f"入力JSONが見つかりません: {json_path}")
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            ppd.set_vendor_master(ppd.load_vendor_master(vendor_path))
+            converted = ppd.convert_streaming(json_path, test_path, vendor_path, budget_path,
+                                              budget_period=budget_period)
+
+        checks = ppd.check_totals(converted["monthly_totals"], expected) if expected else []
+        result.update({
+            "status": "ok",
+            "outputs": [str(test_path), str(vendor_path), str(budget_path)],
+            "months": {k: v for k, v in converted["months"].items() if v},
+            "row_count": converted["row_count"],
+            "vendor_count": converted["vendor_count"],
+            "budget_rows": len(converted["budget_rows"]),
+            "budget_period": list(budget_period or ppd.BUDGET_PERIOD),
+            "budget_total": sum(r[6] for r in converted["budget_rows"]),
+            "review_count": converted["review_count"],
+            "vendor_reviews": converted["vendor_reviews"],
+            "monthly_totals": dict(converted["monthly_totals"]),
+            "validation": {
+                "passed": all(c["passed"] for c in checks) if checks else None,
+                "checks": checks,
+            },
+        })
+    except (Exception, SystemExit) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["previous_outputs"] = [str(p) for p in (test_path, vendor_path, budget_path) if p.exists()]
+    result["elapsed_sec"] = round(time.perf_counter() - started, 3)
+    result["log"] = log.getvalue().splitlines()
+    return result
+
+
+def run_batch(jobs, output_root, expected_totals, workers, budget_periods=None):
+    """プロセスプールで全工事を変換し、工事ID順の結果リストを返す"""
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                convert_project,
+                project_id,
+                json_path,
+                output_root / project_id,
+                expected_totals.get(project_id),
+                (budget_periods or {}).get(project_id),
+            ): project_id
+            for project_id, json_path in jobs
+        }
+        for future in as_completed(futures):
+            project_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # ワーカープロセス自体が異常終了した場合
+                result = {
+                    "project_id": project_id,
+                    "status": "error",
+                    "error": f"{type(e).__name__}: {e}",
+                }
+            results[project_id] = result
+            mark = "OK " if result["status"] == "ok" else "NG "
+            detail = (f"{result['row_count']}件" if result["status"] == "ok" else result["error"])
+            print(f"  {mark} {project_id}: {detail}")
+    return [results[project_id] for project_id, _ in jobs]
+
+
+def write_report(report_path, results, started_at, elapsed):
+    """全工事の結果を1つのJSONレポートに書き出す"""
+    summary = {
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "validation_failed": sum(
+            1 for r in results
+            if r["status"] == "ok" and r["validation"]["passed"] is False
+        ),
+    }
+    report = {
+        "started_at": started_at,
+        "elapsed_sec": round(elapsed, 3),
+        "summary": summary,
+        "projects": results,
+    }
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="複数工事のPoCデータを並列に一括変換する")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="入力JSON（project_id=パス 形式、または パス のみで拡張子抜きのファイル名を工事IDとする）"
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=Path,
+        help="登録済み工事の入力JSONを探すディレクトリ"
+    )
+    parser.add_argument(
+        "--registry",
+        type=Path,
+        default=REGISTRY_PATH,
+        help="工事台帳（project_registry.json）のパス"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=BATCH_OUTPUT_DIR,
+        help="出力先ディレクトリ（工事ごとにサブディレクトリを作成）"
+    )
+    parser.add_argument(
+        "--expected",
+        type=Path,
+        help="工事ごとの月別合計の検証値（JSON）"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="並列プロセス数"
+    )
+    args = parser.parse_args()
+
+    try:
+        jobs = collect_jobs(args)
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    if not jobs:
+        print("エラー: 変換対象の工事がありません（inputs または --input-dir を指定）", file=sys.stderr)
+        return 1
+
+    expected_totals = {}
+    if args.expected:
+        with open(args.expected, "r", encoding="utf-8") as f:
+            expected_totals = json.load(f)
+
+    print("=== PoCデータ一括変換 ===\n")
+    print(f"対象工事: {len(jobs)}件 / 並列数: {args.workers}")
+    print(f"出力先: {args.output_dir}")
+    print("-" * 50)
+
+    budget_periods = registry_budget_periods(load_registry_projects(args.registry))
+
+    started_at = datetime.now().isoformat()
+    started = time.perf_counter()
+    results = run_batch(jobs, args.output_dir, expected_totals, max(1, args.workers), budget_periods)
+    elapsed = time.perf_counter() - started
+
+    report_path = args.output_dir / REPORT_NAME
+    summary = write_report(report_path, results, started_at, elapsed)
+
+    print("-" * 50)
+    print(f"成功: {summary['succeeded']}件 / 失敗: {summary['failed']}件 / "
+          f"検証不一致: {summary['validation_failed']}件 ({elapsed:.1f}秒)")
+    print(f"レポート: {report_path}")
+    print("\n=== 完了 ===")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
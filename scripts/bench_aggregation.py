@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+月次・カテゴリ別集計 ベンチマーク
+
+合成した支払明細（既定100万行）で aggregation.gs の集計を2方式で計算し、
+結果の一致と処理時間を比較する:
+  - loop:  aggregation.gs の行ループをそのままPythonに移したもの（従来方式）
+  - numpy: aggregate_payments.py（列の一括変換 + bincountによるグループ集計）
+
+--gas を指定すると、Node.js 上で aggregation.gs 自体を実行し（シートはモック）、
+_C_月次集計・_C_費目別集計・getSpentByBudgetBox の結果がNumPy版と一致することも確認する。
+
+使用方法:
+    python scripts/bench_aggregation.py
+    python scripts/bench_aggregation.py --rows 200000 --gas
+"""
+
+import argparse
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+import aggregate_payments as agg
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+AGGREGATION_GS = SCRIPT_DIR.parent / "gas_templates" / "budget_management" / "aggregation.gs"
+
+PAYMENT_HEADERS = ["支払年月", "カテゴリ", "支払先", "支払金額", "相殺額", "相殺先", "予算箱ID"]
+BUDGET_HEADERS = ["budget_box_id", "category_id", "expense_id", "expense_name", "budget_amount"]
+
+# 予算箱（カテゴリID, 費目ID, 費目名）
+BUDGET_BOXES = [
+    ("C01-W04-K9901-E11", "C01", "E11", "材料費"),
+    ("C01-W04-K9901-E12", "C01", "E12", "機械経費"),
+    ("C01-W04-K9901-E14", "C01", "E14", "外注費"),
+    ("C02-F32", "C02", "F32", "調査・準備費"),
+    ("C02-F35", "C02", "F35", "安全対策費"),
+    ("C02-F38", "C02", "F38", "役務費"),
+    ("C02-F39", "C02", "F39", "営繕費"),
+    ("C03-F59", "C03", "F59", "福利厚生費"),
+    ("C03-F60", "C03", "F60", "事務用品費"),
+    ("C03-F67", "C03", "F67", "雑費"),
+]
+
+UPDATED_AT = "1970-01-01T00:00:00.000Z"
+
+# aggregation.gs をモックしたシートで実行するNode.jsスクリプト
+GAS_RUNNER = r"""
+const fs = require('fs');
+const vm = require('vm');
+const [gsPath, inputPath, upToMonth] = process.argv.slice(2);
+const input = JSON.parse(fs.readFileSync(inputPath, 'utf8'));
+
+function mockSheet(name, values) {
+  let written = [];
+  const sheet = {
+    getName: () => name,
+    getLastRow: () => values.length,
+    getDataRange: () => ({ getValues: () => values }),
+    clear: () => { written = []; },
+    getRange: (row, col, numRows, numCols) => ({
+      setValues: (rows) => { if (row > 1) written = written.concat(rows); },
+      setFontWeight() { return this; }, setBackground() { return this; },
+      setFontColor() { return this; }, setNumberFormat() { return this; },
+    }),
+    setFrozenRows: () => {},
+    written: () => written,
+  };
+  return sheet;
+}
+
+const sheets = {
+  '支払明細入力': mockSheet('支払明細入力', input.payments),
+  '_実行予算テーブル': mockSheet('_実行予算テーブル', input.budget),
+};
+const ss = { getSheetByName: (name) => sheets[name] || null };
+const context = {
+  Logger: { log: () => {} },
+  SpreadsheetApp: { flush: () => {} },
+  // スクリプトプロパティは未設定（キャッシュ無効化の通知は行わない）
+  PropertiesService: { getScriptProperties: () => ({ getProperty: () => null }) },
+  getSpreadsheet_: () => ss,
+  getOrCreateSheet_: (_, name) => (sheets[name] = sheets[name] || mockSheet(name, [])),
+  Date: class extends Date { toISOString() { return '__UPDATED_AT__'; } },
+};
+vm.createContext(context);
+vm.runInContext(fs.readFileSync(gsPath, 'utf8'), context);
+vm.runInContext('runMonthlyAggregation()', context);
+
+process.stdout.write(JSON.stringify({
+  monthly: sheets['_C_月次集計'].written(),
+  detail: sheets['_C_費目別集計'].written(),
+  spent: vm.runInContext('getSpentByBudgetBox(' + JSON.stringify(upToMonth) + ')', context),
+}));
+""".replace("__UPDATED_AT__", UPDATED_AT)
+
+
+# === 合成データ ===
+
+def build_ledger(rows, months, rng):
+    """支払明細シート相当の行（getValues()と同じく値は文字列）を生成する
+
+    GASの分岐を一通り通るよう、相殺あり・相殺未入力・年月欠損・未登録カテゴリ・
+    予算箱ID空欄・小数の金額を一定割合で含める。
+    """
+    year_months = [agg_month(i) for i in range(months)]
+    vendors = [f"取引先{i:04d}" for i in range(400)]
+    categories = list(agg.CATEGORY_MAP) + ["その他"]
+    ledger = []
+    for _ in range(rows):
+        box_id, cat_id, _, _ = rng.choice(BUDGET_BOXES)
+        category = agg.CATEGORY_NAMES[cat_id] if rng.random() < 0.98 else rng.choice(categories)
+        year_month = rng.choice(year_months) if rng.random() < 0.995 else rng.choice(["", "2025-1"])
+        amount = rng.randint(1, 2_000_000)
+        if rng.random() < 0.05:
+            amount = f"{amount}.{rng.randint(1, 9)}"
+        offset, offset_vendor = "", ""
+        roll = rng.random()
+        if roll < 0.1:
+            offset = str(rng.randint(1, 50_000))
+            offset_vendor = rng.choice(vendors)
+        elif roll < 0.15:
+            offset = "0"
+        ledger.append([
+            year_month,
+            category,
+            rng.choice(vendors) if rng.random() < 0.97 else "",
+            str(amount),
+            offset,
+            offset_vendor,
+            box_id if rng.random() < 0.99 else "",
+        ])
+    return ledger
+
+
+def agg_month(index):
+    """2025-04 から index か月後の YYYY-MM"""
+    year, month = divmod(3 + index, 12)
+    return f"{2025 + year}-{month + 1:02d}"
+
+
+def build_budget(rng):
+    """実行予算テーブル相当の行"""
+    return [
+        [box_id, cat_id, expense_id, name, str(rng.randint(1, 500) * 1_000_000)]
+        for box_id, cat_id, expense_id, name in BUDGET_BOXES
+    ]
+
+
+# === 従来方式（aggregation.gs の行ループ） ===
+
+def loop_aggregate(headers, rows, budget_headers, budget_rows, up_to):
+    """aggregation.gs の各関数をそのまま移した行ループで集計する"""
+    ym_idx = headers.index("支払年月")
+    cat_idx = headers.index("カテゴリ")
+    amt_idx = headers.index("支払金額")
+    off_idx = headers.index("相殺額")
+    off_v_idx = headers.index("相殺先")
+    box_idx = headers.index("予算箱ID")
+    vendor_idx = headers.index("支払先")
+    parse = agg.js_parse_float
+
+    # aggregatePayments_
+    result = {}
+    for row in rows:
+        ym = row[ym_idx][:7]
+        cat = agg.CATEGORY_MAP.get(row[cat_idx]) or row[cat_idx]
+        amt = parse(row[amt_idx])
+        offset = parse(row[off_idx])
+        if len(ym) < 7:
+            continue
+        net = amt - offset
+        totals = result.setdefault(ym, {"C01": 0.0, "C02": 0.0, "C03": 0.0, "ALL": 0.0})
+        if cat in totals:
+            totals[cat] += net
+        totals["ALL"] += net
+
+    # calculatePendingOffsets_
+    pending = {}
+    for row in rows:
+        ym = row[ym_idx][:7]
+        if len(ym) < 7:
+            continue
+        cat = agg.CATEGORY_MAP.get(row[cat_idx]) or row[cat_idx]
+        if (parse(row[off_idx]) == 0 and not row[off_v_idx].strip()
+                and cat in ("C02", "C03") and parse(row[amt_idx]) > 0):
+            pending[ym] = 0
+
+    budget_totals = agg.budget_totals(budget_headers, budget_rows)
+    months = sorted(result)
+    matrix = [[result[ym][cat] for cat in agg.CATEGORIES] for ym in months]
+    matrix = np.array(matrix, dtype=np.float64).reshape(len(months), len(agg.CATEGORIES))
+    monthly = agg.monthly_aggregation_rows(months, matrix, budget_totals, pending, UPDATED_AT)
+
+    # writeDetailAggregation_
+    spent = {}
+    for row in rows:
+        box_id = row[box_idx]
+        if not box_id:
+            continue
+        info = spent.setdefault(box_id, {"total": 0.0, "vendors": set()})
+        info["total"] += parse(row[amt_idx]) - parse(row[off_idx])
+        if row[vendor_idx]:
+            info["vendors"].add(row[vendor_idx])
+    budget_map = agg.load_budget_map(budget_headers, budget_rows)
+    detail = []
+    for box_id in sorted(set(budget_map) | set(spent)):
+        budget = budget_map.get(box_id, {"budget_amount": 0})
+        info = spent.get(box_id, {"total": 0, "vendors": set()})
+        amount = budget["budget_amount"]
+        rate = agg.js_to_fixed1(info["total"] / amount * 100) if amount > 0 else 0
+        detail.append([
+            box_id, budget.get("category_id", ""), budget.get("expense_id", ""),
+            budget.get("expense_name", ""), amount, info["total"], amount - info["total"],
+            rate, len(info["vendors"]), UPDATED_AT,
+        ])
+
+    # getSpentByBudgetBox
+    spent_up_to = {}
+    for row in rows:
+        if row[ym_idx][:7] > up_to or not row[box_idx]:
+            continue
+        spent_up_to[row[box_idx]] = spent_up_to.get(row[box_idx], 0.0) + (
+            parse(row[amt_idx]) - parse(row[off_idx]))
+
+    return monthly, detail, spent_up_to
+
+
+# === NumPy方式 ===
+
+def numpy_aggregate(payments, budget_headers, budget_rows, up_to):
+    """aggregate_payments.py で集計する"""
+    totals = agg.budget_totals(budget_headers, budget_rows)
+    months, matrix = agg.aggregate_payments(payments)
+    pending = agg.calculate_pending_offsets(payments)
+    monthly = agg.monthly_aggregation_rows(months, matrix, totals, pending, UPDATED_AT)
+    detail = agg.detail_aggregation_rows(payments, agg.load_budget_map(budget_headers, budget_rows), UPDATED_AT)
+    spent_up_to = agg.SpentByBudgetBox(payments).up_to(up_to)
+    return monthly, detail, spent_up_to
+
+
+def normalize(result):
+    """比較用に数値をfloatへ揃える（行の並び・値はそのまま）"""
+    monthly, detail, spent = result
+
+    def row(values):
+        return [float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else v for v in values]
+    return [row(r) for r in monthly], [row(r) for r in detail], {k: float(v) for k, v in spent.items()}
+
+
+def run_gas(ledger, budget, up_to):
+    """Node.js で aggregation.gs を実行し結果を返す"""
+    with tempfile.TemporaryDirectory() as tmp:
+        runner = Path(tmp) / "run_aggregation.js"
+        data = Path(tmp) / "input.json"
+        runner.write_text(GAS_RUNNER, encoding="utf-8")
+        data.write_text(json.dumps({
+            "payments": [PAYMENT_HEADERS] + ledger,
+            "budget": [BUDGET_HEADERS] + budget,
+        }, ensure_ascii=False), encoding="utf-8")
+        completed = subprocess.run(
+            ["node", "--max-old-space-size=8192", str(runner), str(AGGREGATION_GS), str(data), up_to],
+            capture_output=True, text=True, check=True,
+        )
+    result = json.loads(completed.stdout)
+    return result["monthly"], result["detail"], result["spent"]
+
+
+def compare(label, expected, actual):
+    """集計結果の一致を確認して表示（不一致の件数を返す）"""
+    names = ("_C_月次集計", "_C_費目別集計", "getSpentByBudgetBox")
+    mismatches = 0
+    for name, left, right in zip(names, normalize(expected), normalize(actual)):
+        if left != right:
+            mismatches += 1
+            print(f"  NG  {label}: {name} が一致しません")
+    if not mismatches:
+        print(f"  OK  {label}: 3種類の集計結果が完全一致")
+    return mismatches
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="月次・カテゴリ別集計ベンチマーク（行ループ vs NumPy）")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="合成する支払明細の行数")
+    parser.add_argument("--months", type=int, default=24, help="支払年月の月数")
+    parser.add_argument("--up-to", default="2025-12", help="getSpentByBudgetBox の集計上限年月")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    parser.add_argument("--gas", action="store_true", help="Node.jsでaggregation.gsを実行して結果を照合する")
+    args = parser.parse_args()
+
+    if args.gas and not shutil.which("node"):
+        print("エラー: --gas には Node.js（node コマンド）が必要です", file=sys.stderr)
+        return 1
+
+    rng = random.Random(args.seed)
+    print("=== 月次・カテゴリ別集計 ベンチマーク ===\n")
+    ledger, build_sec = timed(build_ledger, args.rows, args.months, rng)
+    budget = build_budget(rng)
+    print(f"  合成データ: {len(ledger):,}行 × {args.months}か月 / 予算箱{len(budget)}件 ({build_sec:.1f}秒)\n")
+
+    loop_result, loop_sec = timed(loop_aggregate, PAYMENT_HEADERS, ledger, BUDGET_HEADERS, budget, args.up_to)
+    payments, parse_sec = timed(agg.PaymentColumns.from_rows, PAYMENT_HEADERS, ledger)
+    numpy_result, numpy_sec = timed(numpy_aggregate, payments, BUDGET_HEADERS, budget, args.up_to)
+
+    print(f"  {'方式':<24} {'秒':>8}  {'速度比':>6}")
+    print(f"  {'loop（解析+集計）':<20} {loop_sec:>8.3f}  {1.0:>7.1f}x")
+    print(f"  {'numpy（解析+集計）':<20} {parse_sec + numpy_sec:>8.3f}  "
+          f"{loop_sec / (parse_sec + numpy_sec):>7.1f}x")
+    print(f"  {'numpy（集計のみ）':<20} {numpy_sec:>8.3f}  {loop_sec / numpy_sec:>7.1f}x")
+    print("  ※「集計のみ」は列指向形式（数値列が解析済み）から読み込んだ場合に相当\n")
+
+    mismatches = compare("loop vs numpy", loop_result, numpy_result)
+    if args.gas:
+        gas_result, gas_sec = timed(run_gas, ledger, budget, args.up_to)
+        mismatches += compare(f"aggregation.gs vs numpy（node {gas_sec:.1f}秒）", gas_result, numpy_result)
+
+    if mismatches:
+        print("\nエラー: 集計結果が一致しません", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+工事登録チェックリスト生成 ベンチマーク
+
+合成した工事（既定1万件）のチェックリストを次の方式で生成し、処理時間を比較する:
+  - legacy:   従来の generate_checklist（lines.append で1行ずつ組み立て）
+  - reparse:  テンプレートを工事ごとに解析・コンパイルし直して出力（使い回さない場合。
+              遅いため先頭 REPARSE_SAMPLE 件で計測し、件数あたりの値を示す）
+  - markdown / html / json: checklist_template.py（1回だけコンパイルし、工事ごとは差し込みのみ）
+
+Markdown出力が全件で従来方式と完全一致すること、JSON出力が全件で読み込めることも確認する。
+
+使用方法:
+    python scripts/bench_checklist.py
+    python scripts/bench_checklist.py --projects 100000 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import checklist_template as ct
+
+GENERATED_AT = "2026-04-01 09:00:00"
+# 工事名に混ぜる文字（エスケープ・書式文字列の扱いの確認用）
+NAME_EXTRAS = ["", "（2期）", " <仮>", " & 付帯工", " {A}", ' "B"']
+REPARSE_SAMPLE = 200
+
+
+# === 従来方式 ===
+
+def legacy_checklist(project, generated_at):
+    """add_new_project.py の従来の generate_checklist（作成日時のみ引数）"""
+    pid = project["project_id"]
+    pname = project["project_name"]
+    ssid = project["spreadsheet_id"]
+    budget = project["budget_total"]
+    start = project["start_date"]
+    end = project["end_date"]
+
+    budget_str = f"{budget:,}"
+
+    lines = []
+    lines.append(f"# 工事登録チェックリスト: {pid} {pname}")
+    lines.append(f"")
+    lines.append(f"作成日時: {generated_at}")
+    lines.append(f"")
+    lines.append(f"## 登録情報")
+    lines.append(f"")
+    lines.append(f"| 項目 | 値 |")
+    lines.append(f"|------|-----|")
+    lines.append(f"| プロジェクトID | {pid} |")
+    lines.append(f"| 工事名 | {pname} |")
+    lines.append(f"| Spreadsheet ID | {ssid} |")
+    lines.append(f"| 実行予算額 | {budget_str}円 |")
+    lines.append(f"| 工期開始 | {start} |")
+    lines.append(f"| 工期終了 | {end} |")
+    lines.append(f"")
+    lines.append(f"---")
+    lines.append(f"")
+    lines.append(f"## Step 1: hub.gsの_M工事台帳にspreadsheet_idを登録")
+    lines.append(f"")
+    lines.append(f"- [ ] 1. 本社管理台帳スプレッドシートを開く")
+    lines.append(f"- [ ] 2. _M工事台帳シートに移動")
+    lines.append(f"- [ ] 3. 新しい行に以下の情報を入力:")
+    lines.append(f"")
+    lines.append(f"| 列 | 入力値 |")
+    lines.append(f"|-----|--------|")
+    lines.append(f"| project_id | {pid} |")
+    lines.append(f"| project_name | {pname} |")
+    lines.append(f"| spreadsheet_id | {ssid} |")
+    lines.append(f"| budget_total | {budget_str} |")
+    lines.append(f"| start_date | {start} |")
+    lines.append(f"| end_date | {end} |")
+    lines.append(f"| active | TRUE |")
+    lines.append(f"")
+    lines.append(f"- [ ] 4. 入力後、_M工事台帳シートに{pid}の行が追加されていることを確認")
+    lines.append(f"")
+    lines.append(f"---")
+    lines.append(f"")
+    lines.append(f"## Step 2: 現場SSのGASセットアップ")
+    lines.append(f"")
+    lines.append(f"- [ ] 5. 対象スプレッドシートを開く:")
+    lines.append(f"  - URL: https://docs.google.com/spreadsheets/d/{ssid}/edit")
+    lines.append(f"- [ ] 6. メニュー「拡張機能」->「Apps Script」でエディタを開く")
+    lines.append(f"- [ ] 7. gas_templates/budget_management/ 配下の6ファイルをコピー:")
+    lines.append(f"  - config.gs, template.gs, validation_extended.gs")
+    lines.append(f"  - aggregation.gs, budget_health.gs, api.gs")
+    lines.append(f"- [ ] 8. setup_project_data.gs をコピーして追加（初期データ投入用）")
+    lines.append(f"- [ ] 9. Apps Scriptエディタで setupProjectData() を実行")
+    lines.append(f"  - 初回実行時: Googleアカウントの認証許可が求められる -> 「許可」をクリック")
+    lines.append(f"  - 成功時: 9シートが自動生成される")
+    lines.append(f"- [ ] 10. setup_project_data.gs を削除（初期化完了後は不要）")
+    lines.append(f"")
+    lines.append(f"---")
+    lines.append(f"")
+    lines.append(f"## Step 3: 動作確認")
+    lines.append(f"")
+    lines.append(f"### 3-1. APIデプロイ")
+    lines.append(f"")
+    lines.append(f"- [ ] 11. Apps Script -> 「デプロイ」->「新しいデプロイ」")
+    lines.append(f"  - 種類: ウェブアプリ")
+    lines.append(f"  - 実行するユーザー: 自分")
+    lines.append(f"  - アクセスできるユーザー: 全員（組織内）")
+    lines.append(f"- [ ] 12. デプロイURLをメモ")
+    lines.append(f"")
+    lines.append(f"### 3-2. APIヘルスチェック（PowerShell）")
+    lines.append(f"")
+    lines.append(f"```powershell")
+    lines.append(f"# mode=health で予算健康度を確認")
+    lines.append(f'Invoke-WebRequest -Uri "{{DEPLOY_URL}}?mode=health&key={{API_KEY}}" | Select-Object -ExpandProperty Content')
+    lines.append(f"```")
+    lines.append(f"")
+    lines.append(f"期待値: budget_total > 0 を含むJSONレスポンス")
+    lines.append(f"")
+    lines.append(f"```powershell")
+    lines.append(f"# mode=summary で工事概要を確認")
+    lines.append(f'Invoke-WebRequest -Uri "{{DEPLOY_URL}}?mode=summary&key={{API_KEY}}" | Select-Object -ExpandProperty Content')
+    lines.append(f"```")
+    lines.append(f"")
+    lines.append(f"期待値: project_id={pid}、budget_total={budget_str} を含むJSON")
+    lines.append(f"")
+    lines.append(f"### 3-3. hub.gs横断確認（PowerShell）")
+    lines.append(f"")
+    lines.append(f"```powershell")
+    lines.append(f"# 本社台帳から全工事一覧を取得")
+    lines.append(f'Invoke-WebRequest -Uri "{{HUB_URL}}?mode=cross_health" | Select-Object -ExpandProperty Content')
+    lines.append(f"```")
+    lines.append(f"")
+    lines.append(f"期待値: {pid}が一覧に含まれ、budget_total > 0 であること")
+    lines.append(f"")
+    lines.append(f"---")
+    lines.append(f"")
+    lines.append(f"## Step 4: Dify DSLインポート（任意）")
+    lines.append(f"")
+    lines.append(f"Dify Cloudと連携する場合、以下を実施:")
+    lines.append(f"")
+    lines.append(f"- [ ] 13. Dify Cloud（cloud.dify.ai）にログイン")
+    lines.append(f"- [ ] 14. 「スタジオ」->「DSLファイルからインポート」")
+    lines.append(f"- [ ] 15. dsl/generated/budget_inquiry_chatbot.dsl をアップロード")
+    lines.append(f"- [ ] 16. 環境変数を設定（設定 -> 環境変数）:")
+    lines.append(f"  - GAS_HUB_URL: hub.gsのWebアプリURL")
+    lines.append(f"  - GAS_ENDPOINT_URL: api.gsのWebアプリURL")
+    lines.append(f'- [ ] 17. 動作確認: 「{pid}の今月の状況を教えてください」と入力')
+    lines.append(f"  - 期待値: 消化率/出来高率/信号を含む日本語レポート")
+    lines.append(f"")
+    lines.append(f"---")
+    lines.append(f"")
+    lines.append(f"以上で {pid} {pname} の登録が完了です。")
+
+    return "\n".join(lines)
+
+
+
+# === 計測 ===
+
+def build_projects(count, rng):
+    """project_registry.json の1件と同じ形の工事情報"""
+    projects = []
+    for i in range(count):
+        projects.append({
+            "project_id": f"P{i + 1:05d}",
+            "project_name": f"工事{rng.randint(1, 999):03d}号{rng.choice(NAME_EXTRAS)}",
+            "spreadsheet_id": "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-")
+                                      for _ in range(44)),
+            "budget_total": rng.randint(1, 5000) * 100_000,
+            "start_date": "2026-04-01",
+            "end_date": "2027-03-31",
+        })
+    return projects
+
+
+def best_of(repeat, func):
+    """repeat回実行して最短の秒数と最後の結果を返す"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工事登録チェックリスト生成ベンチマーク（従来方式 vs テンプレート）")
+    parser.add_argument("--projects", type=int, default=10_000, help="生成するチェックリストの件数")
+    parser.add_argument("--repeat", type=int, default=3, help="計測の繰り返し回数（最短を採用）")
+    parser.add_argument("--template", default=ct.DEFAULT_TEMPLATE, help="チェックリストのテンプレート")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    args = parser.parse_args()
+
+    projects = build_projects(args.projects, random.Random(args.seed))
+    with open(args.template, "r", encoding="utf-8") as f:
+        source = f.read()
+    compile_sec, template = best_of(args.repeat, lambda: ct.ChecklistTemplate(source))
+
+    print("=== 工事登録チェックリスト生成 ベンチマーク ===\n")
+    print(f"  工事: {len(projects):,}件 / テンプレート: {args.template}（作業項目{template.task_count}件）")
+    print(f"  コンパイル（1回）: {compile_sec * 1000:.2f}ms\n")
+
+    sample = projects[:REPARSE_SAMPLE]
+    cases = [
+        ("legacy", projects, lambda: [legacy_checklist(p, GENERATED_AT) for p in projects]),
+        ("reparse", sample, lambda: [ct.ChecklistTemplate(source).render(p, "markdown", GENERATED_AT)
+                                     for p in sample]),
+    ] + [
+        (fmt, projects, lambda fmt=fmt: [template.render(p, fmt, GENERATED_AT) for p in projects])
+        for fmt in ct.FORMATS
+    ]
+    results = {}
+    print(f"  {'方式':<10} {'件数':>7} {'秒':>8} {'件/秒':>10} {'µs/件':>8} {'速度比':>7}")
+    legacy_per_item = None
+    for name, items, func in cases:
+        seconds, outputs = best_of(args.repeat, func)
+        results[name] = outputs
+        per_item = seconds / len(items)
+        legacy_per_item = legacy_per_item or per_item
+        print(f"  {name:<10} {len(items):>7,} {seconds:>8.3f} {1 / per_item:>10,.0f} "
+              f"{per_item * 1e6:>8.1f} {legacy_per_item / per_item:>6.1f}x")
+    print()
+
+    errors = 0
+    mismatched = sum(1 for a, b in zip(results["legacy"], results["markdown"]) if a != b)
+    if mismatched:
+        errors += 1
+        print(f"  NG  markdown: 従来方式と一致しない件数 {mismatched:,}")
+    else:
+        print(f"  OK  markdown: 全{len(projects):,}件が従来方式と完全一致")
+    try:
+        for output in results["json"]:
+            json.loads(output)
+        print(f"  OK  json: 全{len(projects):,}件を読み込めた")
+    except ValueError as e:
+        errors += 1
+        print(f"  NG  json: {e}")
+
+    if errors:
+        print("\nエラー: 出力の検証に失敗しました", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Difyエクスポートのスループットベンチマーク
+
+ローカルの代替サーバー（mock_dify_console.py）をアプリ数ごとに別プロセスで起動し、
+export_dify_workflows.py を実際のコマンドとして実行して、エクスポート全体
+（トークン取得・一覧・各DSLの取得と保存）の所要時間とアプリ/秒を計測する:
+  - files:       個別ファイルへの出力（初回。出力先は空）
+  - incremental: files の出力先で --incremental を再実行（全アプリ未変更）
+  - archive:     --archive でzipバンドルに出力
+
+出力先・トークンキャッシュは一時ディレクトリに置き、dsl/exported には書き込まない。
+結果は機械可読なJSONに書き出し、--compare で以前の結果と比較すると、閾値を超えて
+遅くなった計測を表示する（回帰があれば終了コード1）。
+
+使用方法:
+    python scripts/bench_export.py                                  # 10 / 100 / 1000 アプリ
+    python scripts/bench_export.py --apps 100 --workers 1 4 8 --export-latency 200
+    python scripts/bench_export.py --error-rate 0.05 --rate-limit 50 --modes files
+    python scripts/bench_export.py --output output/bench/after.json --compare output/bench/before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+from bench_pipeline import DEFAULT_THRESHOLD, MIN_COMPARE_SECONDS, git_commit
+from mock_dify_console import DEFAULT_REFRESH_TOKEN, add_server_arguments
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+BENCH_OUTPUT = PROJECT_DIR / "output" / "bench" / "bench_export.json"
+EXPORT_SCRIPT = SCRIPT_DIR / "export_dify_workflows.py"
+MOCK_SCRIPT = SCRIPT_DIR / "mock_dify_console.py"
+
+MODES = ["files", "incremental", "archive"]
+DEFAULT_APPS = [10, 100, 1000]
+DEFAULT_WORKERS = [4]
+# 代替サーバーの既定の遅延（ミリ秒）。実サーバーに近い待ち時間を入れて並列化の効果を見る
+DEFAULT_LATENCY_MS = 20
+DEFAULT_EXPORT_LATENCY_MS = 80
+RESULT_VERSION = 1
+
+SERVER_START_TIMEOUT = 30
+EXPORT_TIMEOUT = 3600
+
+COMPLETED_PATTERN = re.compile(r"エクスポート完了: (\d+) 件")
+
+
+class MockServer:
+    """代替サーバーを別プロセスで起動する（計測対象とGILを取り合わないように）"""
+
+    def __init__(self, apps, server_args):
+        self.process = subprocess.Popen(
+            [sys.executable, str(MOCK_SCRIPT), "--port", "0", "--apps", str(apps), *server_args],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        line = self.process.stdout.readline()
+        if not line.startswith("URL: "):
+            self.stop()
+            raise RuntimeError(f"代替サーバーを起動できません: {self.process.stderr.read().strip() or line}")
+        self.url = line.split(" ", 1)[1].strip()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with urllib.request.urlopen(f"{self.url}/_mock/stats", timeout=SERVER_START_TIMEOUT) as response:
+            return json.load(response)
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process.stdout.close()
+        self.process.stderr.close()
+
+
+def server_arguments(args):
+    """ベンチマークの引数から代替サーバーの引数を組み立てる"""
+    return [
+        "--latency", str(args.latency),
+        "--export-latency", str(args.export_latency),
+        "--jitter", str(args.jitter),
+        "--max-page-size", str(args.max_page_size),
+        "--error-rate", str(args.error_rate),
+        "--error-statuses", *map(str, args.error_statuses),
+        "--rate-limit", str(args.rate_limit),
+        "--token-ttl", str(args.token_ttl),
+        "--export-format", args.export_format,
+        "--template-dir", str(args.template_dir),
+        "--seed", str(args.seed),
+    ]
+
+
+def _counts_delta(before, after):
+    keys = set(before) | set(after)
+    return {key: after.get(key, 0) - before.get(key, 0) for key in sorted(keys) if after.get(key, 0) != before.get(key, 0)}
+
+
+def run_export(server, mode, workers, work_dir):
+    """エクスポートを1回実行して計測する"""
+    output_dir = work_dir / "exported"
+    command = [sys.executable, str(EXPORT_SCRIPT), "--workers", str(workers)]
+    if mode == "incremental":
+        command.append("--incremental")
+    elif mode == "archive":
+        command += ["--archive", str(work_dir / "exported.zip")]
+    env = {
+        **os.environ,
+        "DIFY_BASE_URL": server.url,
+        "DIFY_REFRESH_TOKEN": DEFAULT_REFRESH_TOKEN,
+        "DIFY_EXPORT_DIR": str(output_dir),
+        "DIFY_TOKEN_CACHE": str(work_dir / "tokens.json"),
+        "PYTHONIOENCODING": "utf-8",
+    }
+
+    before = server.stats()
+    started = time.perf_counter()
+    completed = subprocess.run(
+        command, cwd=PROJECT_DIR, env=env, capture_output=True, text=True, timeout=EXPORT_TIMEOUT,
+    )
+    seconds = time.perf_counter() - started
+    after = server.stats()
+    if completed.returncode != 0:
+        detail = (completed.stdout + completed.stderr).strip().splitlines()[-3:]
+        raise RuntimeError(f"エクスポートが失敗しました（{mode}）: {' / '.join(detail)}")
+
+    match = COMPLETED_PATTERN.search(completed.stdout)
+    exported = int(match.group(1)) if match else 0
+    requests = _counts_delta(before["requests"], after["requests"])
+    output_bytes = (
+        (work_dir / "exported.zip").stat().st_size if mode == "archive"
+        else sum(path.stat().st_size for path in output_dir.glob("*.yml"))
+    )
+    return {
+        "mode": mode,
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "exported": exported,
+        "apps_per_sec": round(exported / seconds, 1) if seconds else None,
+        "requests": requests,
+        "statuses": _counts_delta(before["statuses"], after["statuses"]),
+        "token_refreshes": after["issued_tokens"] - before["issued_tokens"],
+        "output_bytes": output_bytes,
+    }
+
+
+def environment():
+    import requests
+    import yaml
+    return {
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "requests": requests.__version__,
+        "pyyaml": yaml.__version__,
+        "libyaml": hasattr(yaml, "CSafeLoader"),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare_results(previous, current, threshold):
+    """前回の結果と比較し、回帰（閾値超えの遅延）の一覧を返す"""
+    def key(result):
+        return result["apps"], result["mode"], result["workers"]
+
+    before = {key(r): r for r in previous.get("results", [])}
+    regressions = []
+    print(f"\n--- 前回との比較（{previous.get('environment', {}).get('git_commit')} → "
+          f"{current['environment']['git_commit']}） ---")
+    print(f"  {'アプリ':>6} {'方式':<12} {'並列':>4} {'前回秒':>9} {'今回秒':>9} {'比':>6}")
+    for r in current["results"]:
+        old = before.get(key(r))
+        if not old:
+            continue
+        ratio = r["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        regressed = ratio > threshold and max(r["seconds"], old["seconds"]) >= MIN_COMPARE_SECONDS
+        mark = "  ← 回帰" if regressed else ""
+        print(f"  {r['apps']:>6,} {r['mode']:<12} {r['workers']:>4} {old['seconds']:>9.3f} "
+              f"{r['seconds']:>9.3f} {ratio:>6.2f}{mark}")
+        if regressed:
+            regressions.append({"apps": r["apps"], "mode": r["mode"], "workers": r["workers"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Difyエクスポートのスループットベンチマーク（ローカル代替サーバー）")
+    parser.add_argument("--apps", type=int, nargs="+", default=DEFAULT_APPS, help="代替サーバーのアプリ数")
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS, help="エクスポートの並列数")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="計測する出力方式")
+    parser.add_argument("--output", type=Path, default=BENCH_OUTPUT, help="結果JSONの出力先")
+    parser.add_argument("--compare", type=Path, help="比較する以前の結果JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="回帰とみなす処理時間の比率（今回 / 前回）")
+    add_server_arguments(parser)
+    parser.set_defaults(latency=DEFAULT_LATENCY_MS, export_latency=DEFAULT_EXPORT_LATENCY_MS)
+    args = parser.parse_args()
+
+    if args.compare and not args.compare.exists():
+        print(f"エラー: ファイルが見つかりません: {args.compare}", file=sys.stderr)
+        return 1
+    if "incremental" in args.modes and "files" not in args.modes:
+        print("エラー: incremental は files の出力を使うため、files と一緒に指定してください", file=sys.stderr)
+        return 1
+
+    modes = [mode for mode in MODES if mode in args.modes]
+    print("=== Difyエクスポート スループットベンチマーク ===\n")
+    print(f"  アプリ数: {', '.join(f'{n:,}' for n in args.apps)} / 並列数: {', '.join(map(str, args.workers))}")
+    print(f"  代替サーバー: 遅延 {args.latency:g}ms + エクスポート {args.export_latency:g}ms / "
+          f"エラー率 {args.error_rate:g} / レート制限 {args.rate_limit:g}/秒\n")
+    print(f"  {'アプリ':>6} {'方式':<12} {'並列':>4} {'秒':>9} {'件数':>6} {'件/秒':>8} {'リクエスト':>10} {'再試行':>6}")
+
+    results = []
+    work_root = Path(tempfile.mkdtemp(prefix="bench_export_"))
+    try:
+        for apps in args.apps:
+            with MockServer(apps, server_arguments(args)) as server:
+                for workers in args.workers:
+                    work_dir = work_root / f"apps{apps}_w{workers}"
+                    work_dir.mkdir(parents=True)
+                    for mode in modes:
+                        result = {"apps": apps, **run_export(server, mode, workers, work_dir)}
+                        results.append(result)
+                        sent = sum(result["requests"].values())
+                        retried = sum(count for status, count in result["statuses"].items() if status != "200")
+                        print(f"  {apps:>6,} {mode:<12} {workers:>4} {result['seconds']:>9.3f} {result['exported']:>6,} "
+                              f"{result['apps_per_sec'] or 0:>8,.1f} {sent:>10,} {retried:>6,}")
+    except (RuntimeError, OSError, subprocess.TimeoutExpired) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    report = {
+        "version": RESULT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "params": {
+            "apps": args.apps,
+            "workers": args.workers,
+            "modes": modes,
+            "latency_ms": args.latency,
+            "export_latency_ms": args.export_latency,
+            "jitter": args.jitter,
+            "max_page_size": args.max_page_size,
+            "error_rate": args.error_rate,
+            "rate_limit": args.rate_limit,
+            "token_ttl": args.token_ttl,
+            "export_format": args.export_format,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n  結果: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        regressions = compare_results(previous, report, args.threshold)
+        if regressions:
+            print(f"\nエラー: {len(regressions)}件の計測で処理時間が{args.threshold}倍を超えました",
+                  file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+小口購入分の費目推定 マイクロベンチマーク
+
+infer_petty_expense の照合方式を比較する:
+  - loop:       PETTY_CASH_MAPを登録順に `keyword in description` で走査（従来方式）
+  - classifier: KeywordClassifier（Aho–Corasick、import時に1回だけ構築）
+
+現行の PETTY_CASH_MAP に加え、キーワード数を増やした合成マップでも計測し、
+両方式の推定結果が全件一致することを確認する。
+
+使用方法:
+    python scripts/bench_petty_matcher.py
+    python scripts/bench_petty_matcher.py --keywords 100 300 1000 --rows 20000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from prepare_poc_data import PETTY_CASH_MAP, KeywordClassifier
+
+# 合成キーワード・内訳に使う文字（実データの内訳に近い和文字種）
+SYNTHETIC_CHARS = (
+    "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモ"
+    "材料電線釘管板金具工事用品椅子床水道照明台車掃除機茶紙"
+)
+
+
+def loop_match(mapping, description):
+    """従来方式: 登録順に部分一致を確認し、最初に一致したキーワードを返す"""
+    for keyword, value in mapping.items():
+        if keyword in description:
+            return keyword, value
+    return None
+
+
+def build_synthetic_map(size, rng):
+    """現行マップを先頭に置き、合成キーワードでsize件まで拡張する"""
+    mapping = dict(PETTY_CASH_MAP)
+    values = list(PETTY_CASH_MAP.values())
+    while len(mapping) < size:
+        length = rng.randint(2, 6)
+        keyword = "".join(rng.choice(SYNTHETIC_CHARS) for _ in range(length))
+        mapping.setdefault(keyword, rng.choice(values))
+    return mapping
+
+
+def build_descriptions(mapping, rows, rng):
+    """内訳文字列を生成（約3割はキーワードを含む）"""
+    keywords = list(mapping.keys())
+    descriptions = []
+    for _ in range(rows):
+        text = "".join(rng.choice(SYNTHETIC_CHARS) for _ in range(rng.randint(4, 16)))
+        if rng.random() < 0.3:
+            pos = rng.randint(0, len(text))
+            text = text[:pos] + rng.choice(keywords) + text[pos:]
+        descriptions.append(text)
+    return descriptions
+
+
+def time_per_row(func, descriptions, repeat):
+    """1行あたりの最短処理時間（マイクロ秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for description in descriptions:
+            func(description)
+        best = min(best, time.perf_counter() - start)
+    return best / len(descriptions) * 1e6
+
+
+def run_case(label, mapping, rows, repeat, rng):
+    """1ケース分の構築・検証・計測を行い結果を表示"""
+    start = time.perf_counter()
+    classifier = KeywordClassifier(mapping)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    descriptions = build_descriptions(mapping, rows, rng)
+    mismatches = sum(
+        1 for d in descriptions if loop_match(mapping, d) != classifier.match(d)
+    )
+
+    loop_us = time_per_row(lambda d: loop_match(mapping, d), descriptions, repeat)
+    classifier_us = time_per_row(classifier.match, descriptions, repeat)
+    speedup = loop_us / classifier_us if classifier_us else float("inf")
+
+    print(f"  {label:<12} {len(mapping):>6}  {build_ms:>8.1f}  {loop_us:>9.2f}  "
+          f"{classifier_us:>9.2f}  {speedup:>7.1f}x  {mismatches:>5}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="小口購入分の費目推定 マイクロベンチマーク")
+    parser.add_argument(
+        "--keywords",
+        type=int,
+        nargs="+",
+        default=[100, 300, 1000],
+        help="合成マップのキーワード数（複数指定可）"
+    )
+    parser.add_argument("--rows", type=int, default=10000, help="計測する内訳の件数")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数（最短値を採用）")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    print("=== 費目推定 照合方式ベンチマーク ===\n")
+    print(f"  {'ケース':<10} {'語数':>6}  {'構築ms':>6}  {'loop us':>9}  "
+          f"{'AC us':>9}  {'速度比':>6}  {'不一致':>4}")
+
+    mismatches = run_case("current", PETTY_CASH_MAP, args.rows, args.repeat, rng)
+    for size in args.keywords:
+        mapping = build_synthetic_map(size, rng)
+        mismatches += run_case("synthetic", mapping, args.rows, args.repeat, rng)
+
+    if mismatches:
+        print(f"\nエラー: 推定結果の不一致が{mismatches}件あります", file=sys.stderr)
+        return 1
+    print("\n推定結果: 全ケースで従来方式と一致")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
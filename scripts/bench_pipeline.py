@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+PoCデータ変換パイプラインのスケーリングベンチマーク
+
+generate_synthetic_ledger.py の合成明細（シード固定）を規模別に用意し、
+変換パイプラインの各段階の処理時間とメモリ使用量を計測する:
+  - load:      final_output.json の逐次読み込み（iter_resolved_items）
+  - classify:  読み込み + 分類（classify_item: 費目判定・業者名の名寄せ）
+  - write:     ストリーミング変換（convert_streaming: 3種類のTSV出力まで）
+  - aggregate: 出力した支払明細TSVの月次・費目別集計（aggregate_payments.py）
+
+各段階は新しいプロセス（spawn）で1つずつ実行し、そのプロセスの最大RSSと
+計測開始時点のRSSとの差を記録する（resource モジュールのない Windows では記録しない）。
+結果は機械可読なJSONに書き出し、
+--compare で以前の結果と比較すると、閾値を超えて遅くなった段階を表示する
+（回帰があれば終了コード1）。
+
+使用方法:
+    python scripts/bench_pipeline.py
+    python scripts/bench_pipeline.py --sizes 1000 100000 1000000 10000000 --months 36
+    python scripts/bench_pipeline.py --output output/bench/after.json \
+        --compare output/bench/before.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:     # Windows（最大RSSは計測しない）
+    resource = None
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+BENCH_OUTPUT = PROJECT_DIR / "output" / "bench" / "bench_pipeline.json"
+
+STAGES = ["load", "classify", "write", "aggregate"]
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+RESULT_VERSION = 1
+
+# 回帰とみなす処理時間の比率（今回 / 前回）
+DEFAULT_THRESHOLD = 1.2
+# 比較対象から外す短い計測（秒）。プロセス起動等の揺らぎの方が大きいため
+MIN_COMPARE_SECONDS = 0.05
+
+
+def max_rss_mb():
+    """このプロセスの最大RSS（MB。計測できない環境ではNone）"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linuxはキロバイト、macOSはバイト単位
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+# === 各段階（ワーカープロセスで実行） ===
+
+def _stage_load(ledger_path, work_dir):
+    import prepare_poc_data as ppd
+    return sum(1 for _ in ppd.iter_resolved_items(ledger_path, OrderedDict()))
+
+
+def _stage_classify(ledger_path, work_dir):
+    import prepare_poc_data as ppd
+    ppd.set_vendor_master([])
+    count = 0
+    for _, _, item in ppd.iter_resolved_items(ledger_path, OrderedDict()):
+        ppd.classify_item(item)
+        count += 1
+    return count
+
+
+def _stage_write(ledger_path, work_dir):
+    import prepare_poc_data as ppd
+    ppd.set_vendor_master([])
+    with contextlib.redirect_stdout(io.StringIO()):
+        converted = ppd.convert_streaming(
+            ledger_path,
+            work_dir / ppd.TSV_TEST_DATA.name,
+            work_dir / ppd.TSV_VENDORS.name,
+            work_dir / ppd.TSV_BUDGET.name,
+        )
+    return converted["row_count"]
+
+
+def _stage_aggregate(ledger_path, work_dir):
+    import aggregate_payments as agg
+    import prepare_poc_data as ppd
+    payments = agg.load_payments(work_dir / ppd.TSV_TEST_DATA.name)
+    budget_headers, budget_rows = agg.normalize_budget_headers(
+        *agg.read_sheet_tsv(work_dir / ppd.TSV_BUDGET.name)
+    )
+    months, matrix = agg.aggregate_payments(payments)
+    agg.monthly_aggregation_rows(
+        months, matrix, agg.budget_totals(budget_headers, budget_rows),
+        agg.calculate_pending_offsets(payments), "",
+    )
+    agg.detail_aggregation_rows(payments, agg.load_budget_map(budget_headers, budget_rows), "")
+    return len(payments)
+
+
+STAGE_FUNCTIONS = {
+    "load": _stage_load,
+    "classify": _stage_classify,
+    "write": _stage_write,
+    "aggregate": _stage_aggregate,
+}
+
+
+def run_stage(stage, ledger_path, work_dir, trace_memory):
+    """1段階を計測する（spawnした新しいプロセスで呼ばれる）"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import aggregate_payments  # noqa: F401  計測前にimportを済ませる
+    import prepare_poc_data  # noqa: F401
+
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    base_rss = max_rss_mb()
+    started = time.perf_counter()
+    rows = STAGE_FUNCTIONS[stage](Path(ledger_path), Path(work_dir))
+    seconds = time.perf_counter() - started
+    peak_rss = max_rss_mb()
+    result = {
+        "seconds": seconds,
+        "rows": rows,
+        "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+        "rss_delta_mb": round(peak_rss - base_rss, 1) if peak_rss is not None else None,
+    }
+    if trace_memory:
+        result["py_heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+    return result
+
+
+def max_or_none(values):
+    """None（計測できなかった値）を除いた最大値"""
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def format_mb(value, width):
+    """MB値を右寄せで表示（計測できなかった値は -）"""
+    return f"{value:>{width}.1f}" if value is not None else f"{'-':>{width}}"
+
+
+def measure(stage, ledger_path, work_dir, repeat, trace_memory):
+    """段階ごとに新しいプロセスでrepeat回計測し、最短時間・最大メモリを返す"""
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        with context.Pool(1) as pool:
+            runs.append(pool.apply(run_stage, (stage, str(ledger_path), str(work_dir), trace_memory)))
+    best = min(runs, key=lambda r: r["seconds"])
+    result = {
+        "stage": stage,
+        "seconds": round(best["seconds"], 4),
+        "rows_per_sec": round(best["rows"] / best["seconds"]) if best["seconds"] else None,
+        "peak_rss_mb": max_or_none(r["peak_rss_mb"] for r in runs),
+        "rss_delta_mb": max_or_none(r["rss_delta_mb"] for r in runs),
+    }
+    if trace_memory:
+        result["py_heap_peak_mb"] = max(r["py_heap_peak_mb"] for r in runs)
+    return result
+
+
+# === 実行環境・比較 ===
+
+def git_commit():
+    """計測したコードのコミット（git管理外ならNone）"""
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+            capture_output=True, text=True, check=True,
+        )
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() + ("-dirty" if dirty else "")
+
+
+def environment():
+    import numpy
+    return {
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare_results(previous, current, threshold):
+    """前回の結果と比較し、回帰（閾値超えの遅延）の一覧を返す"""
+    before = {(r["rows"], r["stage"]): r for r in previous.get("results", [])}
+    regressions = []
+    print(f"\n--- 前回との比較（{previous.get('environment', {}).get('git_commit')} → "
+          f"{current['environment']['git_commit']}） ---")
+    print(f"  {'行数':>10} {'段階':<10} {'前回秒':>9} {'今回秒':>9} {'比':>6}  {'RSS増分MB':>10}")
+    for r in current["results"]:
+        old = before.get((r["rows"], r["stage"]))
+        if not old:
+            continue
+        ratio = r["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        regressed = ratio > threshold and max(r["seconds"], old["seconds"]) >= MIN_COMPARE_SECONDS
+        mark = "  ← 回帰" if regressed else ""
+        print(f"  {r['rows']:>10,} {r['stage']:<10} {old['seconds']:>9.3f} {r['seconds']:>9.3f} "
+              f"{ratio:>6.2f}  {format_mb(old.get('rss_delta_mb'), 5)}→{format_mb(r['rss_delta_mb'], 5).strip():<5}{mark}")
+        if regressed:
+            regressions.append({"rows": r["rows"], "stage": r["stage"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PoCデータ変換パイプラインのスケーリングベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="計測する明細の行数")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="計測する段階")
+    parser.add_argument("--months", type=int, default=24, help="合成明細の月数")
+    parser.add_argument("--vendors", type=int, default=300, help="合成明細の業者数")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    parser.add_argument("--repeat", type=int, default=1, help="各段階の計測回数（最短時間を採用）")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="tracemallocでPythonヒープの最大使用量も記録する（計測が遅くなる）")
+    parser.add_argument("--work-dir", type=Path,
+                        help="合成明細・中間TSVの置き場所（指定時は合成明細を再利用し、終了後も残す）")
+    parser.add_argument("--output", type=Path, default=BENCH_OUTPUT, help="結果JSONの出力先")
+    parser.add_argument("--compare", type=Path, help="比較する以前の結果JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="回帰とみなす処理時間の比率（今回 / 前回）")
+    args = parser.parse_args()
+
+    if args.compare and not args.compare.exists():
+        print(f"エラー: ファイルが見つかりません: {args.compare}", file=sys.stderr)
+        return 1
+    if "aggregate" in args.stages and "write" not in args.stages:
+        print("エラー: aggregate は write の出力TSVを使うため、write と一緒に指定してください",
+              file=sys.stderr)
+        return 1
+
+    import generate_synthetic_ledger as synthetic
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    stages = [stage for stage in STAGES if stage in args.stages]
+
+    print("=== パイプライン スケーリングベンチマーク ===\n")
+    print(f"  規模: {', '.join(f'{n:,}' for n in args.sizes)}行 / {args.months}か月 / "
+          f"業者{args.vendors} / シード{args.seed}")
+    print(f"  作業ディレクトリ: {work_dir}\n")
+    print(f"  {'行数':>10} {'段階':<10} {'秒':>9} {'行/秒':>12} {'最大RSS MB':>11} {'RSS増分MB':>10}")
+
+    results = []
+    ledgers = []
+    try:
+        for rows in args.sizes:
+            ledger_path = work_dir / f"final_output_{rows}_m{args.months}_v{args.vendors}_s{args.seed}.json"
+            started = time.perf_counter()
+            if not ledger_path.exists():
+                synthetic.generate_ledger(ledger_path, rows, args.months, args.vendors, seed=args.seed)
+            ledgers.append({
+                "rows": rows,
+                "bytes": ledger_path.stat().st_size,
+                "generate_seconds": round(time.perf_counter() - started, 3),
+            })
+            stage_dir = work_dir / f"tsv_{rows}"
+            stage_dir.mkdir(exist_ok=True)
+
+            for stage in stages:
+                result = {"rows": rows, **measure(stage, ledger_path, stage_dir, args.repeat, args.trace_memory)}
+                results.append(result)
+                print(f"  {rows:>10,} {stage:<10} {result['seconds']:>9.3f} {result['rows_per_sec'] or 0:>12,} "
+                      f"{format_mb(result['peak_rss_mb'], 11)} {format_mb(result['rss_delta_mb'], 10)}")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "version": RESULT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "params": {
+            "sizes": args.sizes,
+            "stages": stages,
+            "months": args.months,
+            "vendors": args.vendors,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "ledgers": ledgers,
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n  結果: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        regressions = compare_results(previous, report, args.threshold)
+        if regressions:
+            print(f"\nエラー: {len(regressions)}件の段階で処理時間が{args.threshold}倍を超えました",
+                  file=sys.stderr)
+            return 1
+
+    print("\n=== 完了 ===")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+DSL保存時のYAML整形（save_dsl）ベンチマーク
+
+dsl/templates/ と dsl/generated/ のDSLを対象に、保存用の整形方式を比較する:
+  - legacy: yaml.safe_load + yaml.dump（純Python、従来方式）
+  - fast:   normalize_dsl（libyamlのCSafeLoaderで読み込み + yaml.dump）
+  - skip:   前回保存した内容と同じDSL（source_hash一致）の判定のみ（整形しない）
+
+fast の出力が legacy とバイト単位で一致すること、整形結果をもう一度整形しても
+変わらない（正規形である）ことを全ファイルで確認する。参考として、libyamlの
+CSafeDumper で出力した場合に legacy と一致するファイル数も表示する。
+
+使用方法:
+    python scripts/bench_yaml_roundtrip.py
+    python scripts/bench_yaml_roundtrip.py --repeat 5 dsl/exported/*.yml
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from export_dify_workflows import YAML_LOADER, content_hash, is_saved_form, normalize_dsl
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+DSL_DIR = SCRIPT_DIR.parent / "dsl"
+DEFAULT_PATTERNS = ["templates/*.yml", "generated/*.dsl"]
+
+DUMP_OPTIONS = dict(allow_unicode=True, default_flow_style=False, sort_keys=False, width=120)
+
+
+def legacy_normalize(dsl_content):
+    """従来方式: 純Pythonのsafe_load + dump"""
+    try:
+        return yaml.dump(yaml.safe_load(dsl_content), **DUMP_OPTIONS)
+    except yaml.YAMLError:
+        return dsl_content
+
+
+def c_dumper_normalize(dsl_content):
+    """参考: 読み書きともlibyaml（出力は従来方式と一致しない場合がある）"""
+    try:
+        return yaml.dump(yaml.load(dsl_content, Loader=yaml.CSafeLoader), Dumper=yaml.CSafeDumper, **DUMP_OPTIONS)
+    except yaml.YAMLError:
+        return dsl_content
+
+
+def best_time(func, repeat):
+    """repeat回実行した最短時間（秒）と最後の戻り値"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DSL保存時のYAML整形ベンチマーク")
+    parser.add_argument("files", nargs="*", type=Path, help="対象のDSLファイル（省略時はdsl/templates・dsl/generated）")
+    parser.add_argument("--repeat", type=int, default=3, help="計測の繰り返し回数（最短値を採用）")
+    args = parser.parse_args()
+
+    files = args.files or sorted(path for pattern in DEFAULT_PATTERNS for path in DSL_DIR.glob(pattern))
+    if not files:
+        print("エラー: 対象のDSLファイルがありません", file=sys.stderr)
+        return 1
+    has_c_dumper = hasattr(yaml, "CSafeDumper")
+
+    print("=== DSL保存時のYAML整形ベンチマーク ===\n")
+    print(f"  ローダー: {YAML_LOADER.__name__} / ファイル数: {len(files)} / 繰り返し: {args.repeat}\n")
+    print(f"  {'ファイル':<44} {'行数':>6} {'legacy ms':>10} {'fast ms':>9} {'skip ms':>8} {'倍率':>6}")
+
+    totals = {"legacy": 0.0, "fast": 0.0, "skip": 0.0}
+    mismatches = []
+    not_canonical = []
+    c_dumper_identical = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        saved_path = Path(tmp) / "saved.yml"
+        for path in files:
+            raw = path.read_text(encoding="utf-8")
+            legacy_seconds, legacy = best_time(lambda: legacy_normalize(raw), args.repeat)
+            fast_seconds, fast = best_time(lambda: normalize_dsl(raw), args.repeat)
+
+            # 前回保存済みの状態を再現し、再取得時の判定だけを計測
+            saved_path.write_bytes(fast.encode("utf-8"))
+            previous = {"hash": content_hash(fast), "source_hash": content_hash(raw)}
+            skip_seconds, skipped = best_time(lambda: is_saved_form(saved_path, raw, previous), args.repeat)
+
+            if fast != legacy:
+                mismatches.append(path.name)
+            if normalize_dsl(fast) != fast or not skipped:
+                not_canonical.append(path.name)
+            if has_c_dumper and c_dumper_normalize(raw) == legacy:
+                c_dumper_identical += 1
+
+            totals["legacy"] += legacy_seconds
+            totals["fast"] += fast_seconds
+            totals["skip"] += skip_seconds
+            print(f"  {path.name[:44]:<44} {raw.count(chr(10)):>6} {legacy_seconds * 1000:>10.1f} "
+                  f"{fast_seconds * 1000:>9.1f} {skip_seconds * 1000:>8.2f} {legacy_seconds / fast_seconds:>5.1f}x")
+
+    print(f"\n  {'合計':<44} {'':>6} {totals['legacy'] * 1000:>10.1f} {totals['fast'] * 1000:>9.1f} "
+          f"{totals['skip'] * 1000:>8.2f} {totals['legacy'] / totals['fast']:>5.1f}x")
+    print(f"\n  fast と legacy の出力一致: {len(files) - len(mismatches)}/{len(files)}")
+    print(f"  整形結果が正規形（再整形で不変・skip判定可）: {len(files) - len(not_canonical)}/{len(files)}")
+    if has_c_dumper:
+        print(f"  参考: CSafeDumper の出力が legacy と一致: {c_dumper_identical}/{len(files)}"
+              "（絵文字のエスケープ・長い文字列の折り返し位置が異なるため不採用）")
+
+    if mismatches or not_canonical:
+        for name in mismatches:
+            print(f"エラー: 出力が従来方式と一致しません: {name}", file=sys.stderr)
+        for name in not_canonical:
+            print(f"エラー: 整形結果が正規形になっていません: {name}", file=sys.stderr)
+        return 1
+
+    print("\n=== 完了 ===")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
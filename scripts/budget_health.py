@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+予算健康度（簡易EVM）のオフライン計算（budget_health.gs のPython版）
+
+budget_health.gs は対象月ごとに実行予算・支払明細の全行を走査してPV・ACを求めるが、
+ここでは実行予算テーブルと支払明細（poc_budget.tsv / poc_test_data.tsv）を1回だけ読み、
+月軸の累積PV・累積AC・出来高率の配列を作る。任意の月の指標は前計算した配列の参照
+（ACは年月の二分探索）だけで求まり、工期全月の系列も1回の呼び出しでまとめて計算する。
+
+計算内容は monthlyBudgetHealthCalculation と同じ:
+  - BAC: budget_amount の合計
+  - PV:  開始月/終了月の均等配分の累計（countMonths_ は両端を含む）、Math.round
+  - AC:  支払年月（文字列比較）が対象月以前の支払金額の累計（相殺額は控除しない）
+  - 消化率・出来高率・差分: Math.round(x * 10) / 10
+  - 過不足見込み: BAC - Math.round(AC / (出来高率 / 100))
+  - 信号: getSignal_（差分 <= 5 → 正常、<= 15 → 注意、それ以外 → 超過）
+
+依存: numpy（pip install numpy）
+
+使用方法:
+    python scripts/budget_health.py                       # 工期全月の系列を出力
+    python scripts/budget_health.py --month 2025-12       # 1か月分を表示
+    python scripts/budget_health.py --start 2025-10 --end 2026-03 \
+        --adjustments path/to/monthly_adjustment.tsv
+"""
+
+import argparse
+import math
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+import aggregate_payments as agg
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+OUTPUT_DIR = SCRIPT_DIR.parent / "output"
+HEALTH_OUTPUT = OUTPUT_DIR / "poc_budget_health.tsv"
+
+# 信号閾値（budget_health.gs と同じ）
+SIGNAL_NORMAL = 5    # 消化率 - 出来高率 <= 5pt → 正常
+SIGNAL_WARNING = 15  # 消化率 - 出来高率 <= 15pt → 注意
+# 15pt超 → 超過
+
+# 工期の既定値（api.gs の getFallbackProjectData_ と同じ）
+FALLBACK_START = "2025-09"
+FALLBACK_END = "2026-03"
+
+# generateMonthList_ の安全弁（最大5年間）
+MAX_MONTHS = 60
+
+HEALTH_HEADERS = [
+    "year_month", "bac", "pv", "ac", "consumption_rate", "progress_rate",
+    "gap", "shortage", "signal", "updated_at",
+]
+
+_JS_INT = re.compile(r"[+-]?\d+")
+
+
+# === JavaScript互換の計算 ===
+
+def js_parse_int(text):
+    """parseInt(text, 10)（数値にならない場合はNaN）"""
+    match = _JS_INT.match(str(text).lstrip(agg.JS_WHITESPACE))
+    return float(int(match.group())) if match else math.nan
+
+
+def month_index(year_month):
+    """countMonths_ で使う通し月番号（年 * 12 + 月）。解析できなければNaN
+
+    countMonths_(a, b) == month_index(b) - month_index(a) + 1
+    """
+    parts = str(year_month).split("-")
+    year = js_parse_int(parts[0])
+    month = js_parse_int(parts[1]) if len(parts) > 1 else math.nan
+    return year * 12 + month
+
+
+def count_months(from_ym, to_ym):
+    """countMonths_: 2つのYYYY-MM間の月数（両端含む）"""
+    return month_index(to_ym) - month_index(from_ym) + 1
+
+
+def get_signal(gap):
+    """getSignal_: 消化率 - 出来高率 から信号を判定する"""
+    if gap <= SIGNAL_NORMAL:
+        return "正常"
+    if gap <= SIGNAL_WARNING:
+        return "注意"
+    return "超過"
+
+
+def js_round(values):
+    """Math.round（0.5は正の無限大方向に丸める）。スカラー・配列どちらも可"""
+    values = np.asarray(values, dtype=np.float64)
+    floor = np.floor(values)
+    return floor + (values - floor >= 0.5)
+
+
+def round1(values):
+    """Math.round(x * 10) / 10"""
+    return js_round(np.asarray(values, dtype=np.float64) * 10) / 10
+
+
+def generate_month_list(start, end):
+    """generateMonthList_: 開始月から終了月までのYYYY-MMのリスト"""
+    start = str(start)[:7]
+    end = str(end)[:7]
+    parts = start.split("-")
+    year = js_parse_int(parts[0])
+    month = js_parse_int(parts[1]) if len(parts) > 1 else math.nan
+
+    months = []
+    current = start
+    while current <= end and len(months) < MAX_MONTHS:
+        months.append(current)
+        month += 1
+        if month > 12:
+            month = 1
+            year += 1
+        current = _js_month_label(year, month)
+    if not months:
+        raise ValueError(f"工期が不正: {start} - {end}")
+    return months
+
+
+def _js_month_label(year, month):
+    """y + '-' + String(m).padStart(2, '0')"""
+    def text(value):
+        return "NaN" if math.isnan(value) else str(int(value))
+    return f"{text(year)}-{text(month).rjust(2, '0')}"
+
+
+# === 月軸の累積表 ===
+
+class CumulativeByMonth:
+    """「年月の文字列 <= 対象月」の行を合計する累計を、対象月ごとに即答する
+
+    calculateActualCost_ / calculatePVFromMonthly_ の行ループに相当する。
+    年月（先頭7文字）ごとの小計を昇順に並べて累積しておき、対象月は二分探索で引く。
+    金額が整数（円単位）であれば、行順に加算するGASと同じ値になる。
+    """
+
+    def __init__(self, year_month, amount):
+        if year_month is None or amount is None or not len(year_month):
+            self.months = np.array([], dtype=str)
+            self.cumulative = np.zeros(0)
+            return
+        self.months, index = np.unique(agg._month_keys(year_month), return_inverse=True)
+        totals = np.bincount(index.reshape(-1), weights=amount, minlength=len(self.months))
+        self.cumulative = np.cumsum(totals)
+
+    def up_to(self, year_months):
+        """対象月（1つまたは配列）までの累計"""
+        position = np.searchsorted(self.months, np.asarray(year_months, dtype=str), side="right")
+        padded = np.concatenate([[0.0], self.cumulative])
+        return padded[position]
+
+
+class PlannedValueSchedule:
+    """calculatePlannedValue_ の累積PVを通し月番号の範囲で前計算した表
+
+    予算行ごとの「月次配分額 × 経過月数（工期月数で頭打ち）」を月軸の配列として
+    行順に加算する。最初の開始月より前は全行の経過月数が0以下、最後の終了月より後は
+    全行が頭打ちになるため、範囲外の月は両端の値がそのまま答えになる。
+    """
+
+    def __init__(self, amounts, start_months, end_months):
+        starts = np.array([month_index(m) for m in start_months], dtype=np.float64)
+        ends = np.array([month_index(m) for m in end_months], dtype=np.float64)
+        finite = np.isfinite(starts) & np.isfinite(ends)
+        if finite.any():
+            first = int(starts[finite].min()) - 1
+            last = int(max(ends[finite].max(), starts[finite].max()))
+        else:
+            first = last = 0
+        self.first = first
+        self.values = np.zeros(last - first + 1)
+
+        grid = np.arange(first, last + 1, dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            for budget, start, end in zip(amounts, starts, ends):
+                months = end - start + 1
+                if months <= 0:
+                    continue
+                monthly_amount = budget / months
+                elapsed = grid - start + 1
+                elapsed = np.where(elapsed > months, months, elapsed)
+                self.values += np.where(elapsed <= 0, 0.0, monthly_amount * elapsed)
+        self.values = js_round(self.values)
+
+    def at(self, indices):
+        """通し月番号（1つまたは配列）の累積PV"""
+        indices = np.asarray(indices, dtype=np.float64)
+        position = np.clip(np.nan_to_num(indices - self.first), 0, len(self.values) - 1)
+        # 解析できない年月はGASと同じくNaN（経過月数がNaNのまま加算される）
+        return np.where(np.isnan(indices), math.nan, self.values[position.astype(np.int64)])
+
+
+# === 予算健康度 ===
+
+class BudgetHealth:
+    """予算健康度の計算エンジン（入力は構築時に1回だけ走査する）
+
+    Args:
+        budget_headers, budget_rows: 実行予算テーブル（_実行予算テーブル / poc_budget.tsv）
+        payments: aggregate_payments.PaymentColumns（支払明細）
+        project_start, project_end: 工期（工程進捗率の計算と全月系列の範囲に使う）
+        adjustments: {YYYY-MM: 出来高率} 所長入力の出来高率（_月次調整）
+        budget_monthly: (headers, rows) 月別配分テーブル（開始月/終了月列が無い場合のPV）
+    """
+
+    def __init__(self, budget_headers, budget_rows, payments, project_start=FALLBACK_START,
+                 project_end=FALLBACK_END, adjustments=None, budget_monthly=None):
+        self.project_start = str(project_start)[:7]
+        self.project_end = str(project_end)[:7]
+        self.adjustments = adjustments or {}
+
+        # BAC（calculateBudgetTotal_）: NaNの行は加算しない
+        amounts = _sheet_column(budget_headers, budget_rows, "budget_amount")
+        self.bac = float(sum(agg.js_parse_float(v) for v in amounts)) if amounts is not None else 0.0
+
+        # PV（calculatePlannedValue_ / calculatePVFromMonthly_）
+        self._pv_schedule = None
+        self._pv_monthly = None
+        starts = _sheet_column(budget_headers, budget_rows, "start_month")
+        ends = _sheet_column(budget_headers, budget_rows, "end_month")
+        if amounts is not None and starts is not None and ends is not None:
+            rows = [
+                (budget, start, end)
+                for budget, start, end in zip(
+                    (agg.js_parse_float(v) for v in amounts),
+                    (agg.js_string(v)[:7] for v in starts),
+                    (agg.js_string(v)[:7] for v in ends),
+                )
+                if budget > 0 and len(start) >= 7 and len(end) >= 7
+            ]
+            self._pv_schedule = PlannedValueSchedule(*zip(*rows)) if rows else None
+        elif budget_monthly is not None:
+            monthly_headers, monthly_rows = budget_monthly
+            year_month = _sheet_column(monthly_headers, monthly_rows, "year_month")
+            planned = _sheet_column(monthly_headers, monthly_rows, "planned_amount")
+            if year_month is not None and planned is not None:
+                self._pv_monthly = CumulativeByMonth(
+                    agg.js_string_array(year_month), agg.js_parse_float_array(planned)
+                )
+
+        # AC（calculateActualCost_）: 支払年月の長さは確認しない（空欄の行も常に含まれる）
+        self._ac = CumulativeByMonth(payments.year_month, payments.amount)
+
+    # --- 個別指標 ---
+
+    def pv(self, year_months):
+        """対象月までの累積PV"""
+        if self._pv_schedule is not None:
+            return self._pv_schedule.at(_month_indices(year_months))
+        if self._pv_monthly is not None:
+            return self._pv_monthly.up_to(year_months)
+        return np.zeros(np.shape(year_months))
+
+    def ac(self, year_months):
+        """対象月までの累積AC（支払金額、相殺控除なし）"""
+        return self._ac.up_to(year_months)
+
+    def schedule_progress(self, year_months):
+        """calculateScheduleProgress_: 工期の経過月数による工程進捗率"""
+        indices = _month_indices(year_months)
+        if len(self.project_start) < 7 or len(self.project_end) < 7:
+            return np.zeros(np.shape(indices))
+        total = count_months(self.project_start, self.project_end)
+        if total <= 0:
+            return np.zeros(np.shape(indices))
+        with np.errstate(invalid="ignore"):
+            elapsed = indices - month_index(self.project_start) + 1
+            elapsed = np.where(elapsed > total, total, elapsed)
+            return np.where(elapsed <= 0, 0.0, round1(elapsed / total * 100))
+
+    def progress_rate(self, year_months):
+        """getProgressRate_: 月次調整の出来高率（正の値のみ）、無ければ工程進捗率"""
+        rates = np.array(self.schedule_progress(year_months), dtype=np.float64)
+        months = np.asarray(year_months, dtype=str)
+        for position in np.ndindex(months.shape):
+            adjusted = self.adjustments.get(str(months[position]))
+            if adjusted is not None:
+                rates[position] = adjusted
+        return rates
+
+    # --- まとめて計算 ---
+
+    def series(self, year_months=None):
+        """指定月（省略時は工期全月）の予算健康度を一括計算する
+
+        Returns:
+            list[dict]: monthlyBudgetHealthCalculation と同じキーの辞書（月順）
+        """
+        if year_months is None:
+            year_months = generate_month_list(self.project_start, self.project_end)
+        months = np.asarray(list(year_months), dtype=str)
+
+        pv = self.pv(months)
+        ac = self.ac(months)
+        bac = self.bac
+        with np.errstate(divide="ignore", invalid="ignore"):
+            consumption = round1(ac / bac * 100) if bac > 0 else np.zeros(len(months))
+            progress = self.progress_rate(months)
+            has_progress = progress > 0
+            projected = np.where(has_progress, js_round(ac / (progress / 100)), ac)
+        shortage = bac - projected
+        gap = consumption - progress
+
+        results = []
+        for i, year_month in enumerate(months):
+            results.append({
+                "yearMonth": str(year_month),
+                "bac": bac,
+                "pv": float(pv[i]),
+                "ac": float(ac[i]),
+                "consumption_rate": float(consumption[i]),
+                "progress_rate": float(progress[i]),
+                "projected_total": float(projected[i]),
+                "shortage": float(shortage[i]),
+                "signal": get_signal(gap[i]),
+                "gap": float(round1(gap[i])),
+            })
+        return results
+
+    def metrics(self, year_month):
+        """1か月分の予算健康度（monthlyBudgetHealthCalculation の戻り値と同じ形）"""
+        return self.series([year_month])[0]
+
+
+def _sheet_column(headers, rows, name):
+    """headers.indexOf(name) の列の値（列が無ければNone）"""
+    if name not in headers:
+        return None
+    index = headers.index(name)
+    return [row[index] if index < len(row) else "" for row in rows]
+
+
+def _month_indices(year_months):
+    months = np.asarray(year_months, dtype=str)
+    return np.array([month_index(m) for m in months.reshape(-1)], dtype=np.float64).reshape(months.shape)
+
+
+def load_adjustments(path):
+    """_月次調整 相当のTSV（year_month, progress_rate）から出来高率を読み込む
+
+    同じ年月が複数ある場合は、先頭から見て最初の正の値を使う（getProgressRate_ と同じ）。
+    """
+    headers, rows = agg.read_sheet_tsv(path)
+    year_months = _sheet_column(headers, rows, "year_month")
+    rates = _sheet_column(headers, rows, "progress_rate")
+    adjustments = {}
+    if year_months is None or rates is None:
+        return adjustments
+    for year_month, rate in zip(year_months, rates):
+        rate = agg.js_parse_float(rate)
+        year_month = agg.js_string(year_month)[:7]
+        if rate > 0 and year_month not in adjustments:
+            adjustments[year_month] = rate
+    return adjustments
+
+
+def health_rows(results, updated_at):
+    """_C_予算健康度シートの行（writeBudgetHealth_ と同じ列順）"""
+    return [
+        [r["yearMonth"], r["bac"], r["pv"], r["ac"], r["consumption_rate"], r["progress_rate"],
+         r["gap"], r["shortage"], r["signal"], updated_at]
+        for r in results
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="予算健康度（消化率・出来高率・信号）のオフライン計算")
+    parser.add_argument("--payments", type=Path, default=agg.PAYMENT_PATH,
+                        help="支払明細（.tsv / .parquet / .arrows）")
+    parser.add_argument("--budget", type=Path, default=agg.BUDGET_PATH, help="実行予算テーブルTSV")
+    parser.add_argument("--budget-monthly", type=Path,
+                        help="月別配分テーブルTSV（実行予算に開始月/終了月が無い場合のPV）")
+    parser.add_argument("--adjustments", type=Path, help="出来高率の入力TSV（year_month, progress_rate）")
+    parser.add_argument("--start", default=FALLBACK_START, help="工期の開始月（YYYY-MM）")
+    parser.add_argument("--end", default=FALLBACK_END, help="工期の終了月（YYYY-MM）")
+    parser.add_argument("--month", help="指定した年月のみ表示（省略時は工期全月をTSV出力）")
+    parser.add_argument("--output", type=Path, default=HEALTH_OUTPUT, help="_C_予算健康度 の出力先TSV")
+    args = parser.parse_args()
+
+    for path in (args.payments, args.budget, args.budget_monthly, args.adjustments):
+        if path is not None and not path.exists():
+            print(f"エラー: ファイルが見つかりません: {path}", file=sys.stderr)
+            return 1
+    if args.month and not re.fullmatch(r"\d{4}-\d{2}", args.month):
+        print(f"エラー: 年月はYYYY-MM形式で指定してください: {args.month}", file=sys.stderr)
+        return 1
+
+    print("=== 予算健康度（budget_health.gs互換） ===\n")
+    budget_headers, budget_rows = agg.read_sheet_tsv(args.budget)
+    health = BudgetHealth(
+        budget_headers,
+        budget_rows,
+        agg.load_payments(args.payments),
+        project_start=args.start,
+        project_end=args.end,
+        adjustments=load_adjustments(args.adjustments) if args.adjustments else None,
+        budget_monthly=agg.read_sheet_tsv(args.budget_monthly) if args.budget_monthly else None,
+    )
+
+    try:
+        results = [health.metrics(args.month)] if args.month else health.series()
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+
+    print(f"  工期: {health.project_start} ~ {health.project_end} / BAC: {agg.format_amount(health.bac)}\n")
+    print(f"  {'年月':<8} {'PV':>12} {'AC':>12} {'消化率':>6} {'出来高率':>6} {'差分':>6} {'過不足見込み':>12}  信号")
+    for r in results:
+        print(f"  {r['yearMonth']:<9} {agg.format_amount(r['pv']):>12} {agg.format_amount(r['ac']):>12} "
+              f"{r['consumption_rate']:>8.1f} {r['progress_rate']:>9.1f} {r['gap']:>7.1f} "
+              f"{agg.format_amount(r['shortage']):>15}  {r['signal']}")
+
+    if not args.month:
+        updated_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        print()
+        agg.write_sheet_tsv(args.output, HEALTH_HEADERS, health_rows(results, updated_at))
+
+    print("\n=== 完了 ===")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+工事登録チェックリストのテンプレート
+
+チェックリストの本文は templates/project_checklist.md（Markdown）に書き、
+工事ごとに {{ project_id }} 等を置き換えて出力する。テンプレートは最初に1回だけ解析し、
+出力形式（Markdown / HTML / JSON）ごとに、文書全体を1つのf文字列で返すPython関数へ
+コンパイルしておくため、工事ごとの処理は差し込む値の整形（エスケープ）と関数呼び出し1回で済む。
+
+テンプレートの書き方:
+  - {{ 項目名 }} は工事情報（project_registry.json の1件）の値、{{ generated_at }} は作成日時
+  - {{ budget_total|comma }} は3桁区切り（使えるフィルターは FILTERS）
+  - 「- [ ] 」で始まる行は作業項目で、先頭から順に「1. 」「2. 」…と番号を付ける
+  - 作業項目の直後の「  - 」で始まる行はその項目の補足
+  - 行頭の <!-- から --> まではコメントで、出力しない
+  - 見出し（# / ## / ###）・表（| … |）・区切り線（---）・コードブロック（```）は
+    HTML / JSON でもそれぞれの要素になる
+
+使用方法:
+    python scripts/checklist_template.py                         # 台帳の全工事のチェックリストを output/ に書き出す
+    python scripts/checklist_template.py P005 --format html      # P005 のチェックリストをHTMLで書き出す
+    python scripts/checklist_template.py P005 --stdout           # 標準出力に表示
+    python scripts/checklist_template.py --template path/to/checklist.md P005
+"""
+
+import argparse
+import html
+import json
+import re
+import sys
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from project_registry import ProjectRegistry, RegistryLockTimeout
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+REGISTRY_PATH = PROJECT_DIR / "project_registry.json"
+OUTPUT_DIR = PROJECT_DIR / "output"
+DEFAULT_TEMPLATE = SCRIPT_DIR / "templates" / "project_checklist.md"
+
+FORMATS = ("markdown", "html", "json")
+# 出力形式ごとの拡張子（Markdownは従来どおり .txt）
+FORMAT_SUFFIXES = {"markdown": ".txt", "html": ".html", "json": ".json"}
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+FILTERS = {
+    "comma": lambda value: f"{int(value):,}",
+}
+
+# JSON文字列の中でエスケープが必要な文字
+JSON_ESCAPE_RE = re.compile(r'["\\\x00-\x1f]')
+
+
+def _json_escape(value):
+    if JSON_ESCAPE_RE.search(value) is None:
+        return value
+    return json.dumps(value, ensure_ascii=False)[1:-1]
+
+
+# 出力形式ごとの差し込む値のエスケープ（None はそのまま）
+ESCAPES = {
+    "markdown": None,
+    "html": html.escape,
+    "json": _json_escape,
+}
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_]\w*)\s*(?:\|\s*([A-Za-z_]\w*)\s*)?\}\}")
+TASK_PREFIX = "- [ ] "
+BULLET_PREFIX = "- "
+NOTE_PREFIX = "  - "
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+TABLE_SEPARATOR_RE = re.compile(r"^\s*:?-+:?\s*$")
+
+# 差し込み位置の目印（コンパイル中だけ使う。私用領域の文字なのでエスケープされない）
+MARK_OPEN, MARK_CLOSE = "\ue000", "\ue001"
+MARK_RE = re.compile(f"{MARK_OPEN}(\\d+){MARK_CLOSE}")
+
+HTML_STYLE = (
+    "body{font-family:sans-serif;max-width:60em;margin:2em auto;line-height:1.6}"
+    "table{border-collapse:collapse}th,td{border:1px solid #ccc;padding:.2em .6em}"
+    "pre{background:#f4f4f4;padding:.6em}ul.tasks{list-style:none;padding-left:0}"
+)
+
+
+class ChecklistTemplateError(ValueError):
+    """テンプレートの書式の誤り、または差し込む値がない"""
+
+
+class ChecklistTemplate:
+    """解析・コンパイル済みのチェックリストテンプレート
+
+    template = load_template()
+    template.render(project)                    # Markdown
+    template.render(project, "html")            # HTML（1ファイルで完結するページ）
+    template.render(project, "json")            # JSON（節・作業項目・表の構造）
+    """
+
+    def __init__(self, source, name="<template>"):
+        self.name = name
+        self.fields = []            # 差し込む (項目名, フィルター)。位置がそのままコンパイルした関数の引数の順
+        self._field_index = {}
+        self.task_count = 0
+        lines = self._strip_comments(source)
+        self._lines = [(line_no, self._parse_inline(text, line_no)) for line_no, text in lines]
+        self._blocks = self._parse_blocks()
+        self._renderers = {
+            "markdown": self._compile(self._emit_markdown()),
+            "html": self._compile(self._emit_html()),
+            "json": self._compile(self._emit_json()),
+        }
+
+    # === 解析 ===
+
+    def _error(self, line_no, message):
+        return ChecklistTemplateError(f"{self.name}:{line_no}: {message}")
+
+    def _strip_comments(self, source):
+        """コメントを除いた (行番号, 行) の一覧（末尾の改行1つは出力しない）"""
+        raw_lines = source.split("\n")
+        if raw_lines and raw_lines[-1] == "":
+            raw_lines.pop()
+        lines = []
+        comment_start = None
+        for line_no, text in enumerate(raw_lines, start=1):
+            if comment_start is None and text.lstrip().startswith("<!--"):
+                comment_start = line_no
+            if comment_start is not None:
+                if "-->" in text:
+                    comment_start = None
+                continue
+            lines.append((line_no, text))
+        if comment_start is not None:
+            raise self._error(comment_start, "コメント（<!--）が閉じていません")
+        return lines
+
+    def _parse_inline(self, text, line_no):
+        """1行を固定文字列と差し込み（フィールド番号）の並びにする"""
+        parts = []
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            parts.append(text[position:match.start()])
+            name, filter_name = match.groups()
+            if filter_name and filter_name not in FILTERS:
+                raise self._error(line_no, f"不明なフィルターです: {filter_name}（使えるもの: {', '.join(FILTERS)}）")
+            key = (name, filter_name)
+            if key not in self._field_index:
+                self._field_index[key] = len(self.fields)
+                self.fields.append(key)
+            parts.append(self._field_index[key])
+            position = match.end()
+        parts.append(text[position:])
+        literal = "".join(part for part in parts if isinstance(part, str))
+        if "{{" in literal or "}}" in literal:
+            raise self._error(line_no, f"差し込みの書式が不正です: {text.strip()}")
+        return [part for part in parts if part != ""]
+
+    @staticmethod
+    def _starts_with(parts, prefix):
+        return bool(parts) and isinstance(parts[0], str) and parts[0].startswith(prefix)
+
+    @staticmethod
+    def _strip_prefix(parts, prefix):
+        rest = [parts[0][len(prefix):]] + parts[1:]
+        return [part for part in rest if part != ""]
+
+    @staticmethod
+    def _plain(parts):
+        return "".join(part for part in parts if isinstance(part, str))
+
+    def _split_cells(self, parts):
+        """表の1行（| a | b |）をセルごとの並びに分ける"""
+        cells = [[]]
+        for part in parts:
+            if isinstance(part, int):
+                cells[-1].append(part)
+                continue
+            pieces = part.split("|")
+            cells[-1].append(pieces[0])
+            for piece in pieces[1:]:
+                cells.append([piece])
+        cells = cells[1:-1]     # 行頭・行末の | の外側
+        return [self._trim(cell) for cell in cells]
+
+    @staticmethod
+    def _trim(parts):
+        parts = [part for part in parts if part != ""]
+        if parts and isinstance(parts[0], str):
+            parts[0] = parts[0].lstrip()
+        if parts and isinstance(parts[-1], str):
+            parts[-1] = parts[-1].rstrip()
+        return [part for part in parts if part != ""]
+
+    def _parse_blocks(self):
+        """行の並びをブロック（見出し・作業項目の並び・表・コード・段落・区切り線）にする"""
+        blocks = []
+        lines = self._lines
+        i = 0
+        while i < len(lines):
+            line_no, parts = lines[i]
+            plain = self._plain(parts)
+            if not parts:
+                i += 1
+            elif plain.startswith("```"):
+                language = plain[3:].strip()
+                code = []
+                i += 1
+                while i < len(lines) and not self._plain(lines[i][1]).startswith("```"):
+                    code.append(lines[i][1])
+                    i += 1
+                if i == len(lines):
+                    raise self._error(line_no, "コードブロック（```）が閉じていません")
+                blocks.append({"type": "code", "language": language, "lines": code})
+                i += 1
+            elif HEADING_RE.match(plain):
+                level = len(plain) - len(plain.lstrip("#"))
+                blocks.append({"type": "heading", "level": level,
+                               "text": self._trim(self._strip_prefix(parts, "#" * level))})
+                i += 1
+            elif plain.strip() == "---":
+                blocks.append({"type": "rule"})
+                i += 1
+            elif self._starts_with(parts, "|"):
+                rows = []
+                while i < len(lines) and self._starts_with(lines[i][1], "|"):
+                    cells = self._split_cells(lines[i][1])
+                    if not all(len(cell) == 1 and isinstance(cell[0], str) and TABLE_SEPARATOR_RE.match(cell[0])
+                               for cell in cells):
+                        rows.append(cells)
+                    i += 1
+                blocks.append({"type": "table", "columns": rows[0], "rows": rows[1:]})
+            elif self._starts_with(parts, BULLET_PREFIX):
+                items = []
+                while i < len(lines) and self._starts_with(lines[i][1], BULLET_PREFIX):
+                    item_parts = lines[i][1]
+                    if self._starts_with(item_parts, TASK_PREFIX):
+                        self.task_count += 1
+                        item = {"number": self.task_count, "text": self._strip_prefix(item_parts, TASK_PREFIX)}
+                    else:
+                        item = {"number": None, "text": self._strip_prefix(item_parts, BULLET_PREFIX)}
+                    item["notes"] = []
+                    i += 1
+                    while i < len(lines) and self._starts_with(lines[i][1], NOTE_PREFIX):
+                        item["notes"].append(self._strip_prefix(lines[i][1], NOTE_PREFIX))
+                        i += 1
+                    items.append(item)
+                blocks.append({"type": "list", "items": items})
+            else:
+                text = [parts]
+                i += 1
+                while i < len(lines) and lines[i][1] and not self._is_block_start(lines[i][1]):
+                    text.append(lines[i][1])
+                    i += 1
+                blocks.append({"type": "paragraph", "lines": text})
+        return blocks
+
+    def _is_block_start(self, parts):
+        plain = self._plain(parts)
+        return (plain.startswith(("```", "#", "|", BULLET_PREFIX)) or plain.strip() == "---")
+
+    # === 出力形式ごとの書式文字列 ===
+
+    @staticmethod
+    def _marked(parts, escape=lambda text: text):
+        """固定文字列はエスケープし、差し込み位置は目印にする"""
+        return "".join(
+            f"{MARK_OPEN}{part}{MARK_CLOSE}" if isinstance(part, int) else escape(part)
+            for part in parts
+        )
+
+    def _emit_markdown(self):
+        lines = []
+        number = 0
+        for _, parts in self._lines:
+            if self._starts_with(parts, TASK_PREFIX):
+                number += 1
+                lines.append(f"{TASK_PREFIX}{number}. {self._marked(self._strip_prefix(parts, TASK_PREFIX))}")
+            else:
+                lines.append(self._marked(parts))
+        return "\n".join(lines)
+
+    def _emit_html(self):
+        def text(parts):
+            return self._marked(parts, html.escape)
+
+        title = next((text(block["text"]) for block in self._blocks if block["type"] == "heading"), "")
+        body = []
+        for block in self._blocks:
+            kind = block["type"]
+            if kind == "heading":
+                body.append(f"<h{block['level']}>{text(block['text'])}</h{block['level']}>")
+            elif kind == "rule":
+                body.append("<hr>")
+            elif kind == "paragraph":
+                body.append("<p>" + "<br>\n".join(text(line) for line in block["lines"]) + "</p>")
+            elif kind == "code":
+                language = html.escape(block["language"])
+                code = "\n".join(text(line) for line in block["lines"])
+                body.append(f'<pre><code class="language-{language}">{code}</code></pre>')
+            elif kind == "table":
+                header = "".join(f"<th>{text(cell)}</th>" for cell in block["columns"])
+                rows = "".join(
+                    "<tr>" + "".join(f"<td>{text(cell)}</td>" for cell in row) + "</tr>\n"
+                    for row in block["rows"]
+                )
+                body.append(f"<table>\n<thead><tr>{header}</tr></thead>\n<tbody>\n{rows}</tbody>\n</table>")
+            elif kind == "list":
+                is_tasks = any(item["number"] for item in block["items"])
+                items = []
+                for item in block["items"]:
+                    if item["number"]:
+                        label = f'<label><input type="checkbox"> {item["number"]}. {text(item["text"])}</label>'
+                    else:
+                        label = text(item["text"])
+                    notes = "".join(f"<li>{text(note)}</li>" for note in item["notes"])
+                    items.append(f"<li>{label}" + (f"<ul>{notes}</ul>" if notes else "") + "</li>")
+                opening = '<ul class="tasks">' if is_tasks else "<ul>"
+                body.append(opening + "\n" + "\n".join(items) + "\n</ul>")
+        return (
+            '<!DOCTYPE html>\n<html lang="ja">\n<head>\n<meta charset="utf-8">\n'
+            f"<title>{title}</title>\n<style>{HTML_STYLE}</style>\n</head>\n<body>\n"
+            + "\n".join(body)
+            + "\n</body>\n</html>\n"
+        )
+
+    def _emit_json(self):
+        def text(parts):
+            return self._marked(parts)
+
+        document = {"title": "", "task_count": self.task_count, "blocks": [], "sections": []}
+        target = document["blocks"]
+        for block in self._blocks:
+            kind = block["type"]
+            if kind == "heading":
+                if block["level"] == 1 and not document["title"]:
+                    document["title"] = text(block["text"])
+                    continue
+                section = {"level": block["level"], "title": text(block["text"]), "blocks": []}
+                document["sections"].append(section)
+                target = section["blocks"]
+            elif kind == "paragraph":
+                target.append({"type": "text", "text": "\n".join(text(line) for line in block["lines"])})
+            elif kind == "code":
+                target.append({"type": "code", "language": block["language"],
+                               "text": "\n".join(text(line) for line in block["lines"])})
+            elif kind == "table":
+                target.append({
+                    "type": "table",
+                    "columns": [text(cell) for cell in block["columns"]],
+                    "rows": [[text(cell) for cell in row] for row in block["rows"]],
+                })
+            elif kind == "list":
+                items = []
+                for item in block["items"]:
+                    entry = {"number": item["number"]} if item["number"] else {}
+                    entry["text"] = text(item["text"])
+                    if item["notes"]:
+                        entry["notes"] = [text(note) for note in item["notes"]]
+                    items.append(entry)
+                tasks = any(item["number"] for item in block["items"])
+                target.append({"type": "tasks" if tasks else "list", "items": items})
+        return json.dumps(document, ensure_ascii=False, indent=2) + "\n"
+
+    def _compile(self, marked):
+        """目印付きの文書を、差し込む値を引数に取りf文字列1つで返す関数にする"""
+        pieces = MARK_RE.split(marked)
+        body = "".join(
+            "{_" + piece + "}" if i % 2 else piece.replace("{", "{{").replace("}", "}}")
+            for i, piece in enumerate(pieces)
+        )
+        params = ", ".join(f"_{i}" for i in range(len(self.fields)))
+        namespace = {}
+        exec(compile(f"def render({params}):\n    return f{body!r}\n", self.name, "exec"), namespace)
+        return namespace["render"]
+
+    # === 出力 ===
+
+    def values(self, project, generated_at=None):
+        """差し込む値（フィルター適用済み・エスケープ前）"""
+        values = []
+        for name, filter_name in self.fields:
+            if name == "generated_at" and name not in project:
+                value = generated_at or datetime.now().strftime(TIMESTAMP_FORMAT)
+            else:
+                try:
+                    value = project[name]
+                except KeyError:
+                    raise ChecklistTemplateError(f"{self.name}: 工事情報に {name} がありません") from None
+            if filter_name:
+                try:
+                    value = FILTERS[filter_name](value)
+                except (TypeError, ValueError) as e:
+                    raise ChecklistTemplateError(f"{self.name}: {name}|{filter_name}: {e}") from None
+            values.append("" if value is None else str(value))
+        return values
+
+    def render(self, project, fmt="markdown", generated_at=None):
+        """工事1件のチェックリストを fmt（markdown / html / json）で出力する"""
+        try:
+            render = self._renderers[fmt]
+        except KeyError:
+            raise ChecklistTemplateError(f"不明な出力形式です: {fmt}（{' / '.join(FORMATS)}）") from None
+        values = self.values(project, generated_at)
+        escape = ESCAPES[fmt]
+        return render(*(map(escape, values) if escape else values))
+
+
+@lru_cache(maxsize=None)
+def _load_template(path):
+    return ChecklistTemplate(Path(path).read_text(encoding="utf-8"), name=Path(path).name)
+
+
+def load_template(path=DEFAULT_TEMPLATE):
+    """テンプレートを読み込んでコンパイルする（同じパスは2回目から再利用）"""
+    return _load_template(str(Path(path).resolve()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登録済みの工事のチェックリストをテンプレートから出力する")
+    parser.add_argument("project_ids", nargs="*", help="工事ID（省略時は台帳の全工事）")
+    parser.add_argument("--format", choices=FORMATS, default="markdown", help="出力形式")
+    parser.add_argument("--template", type=Path, default=DEFAULT_TEMPLATE, help="チェックリストのテンプレート")
+    parser.add_argument("--registry", type=Path, default=REGISTRY_PATH, help="工事台帳（project_registry.json）のパス")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR, help="保存先")
+    parser.add_argument("--stdout", action="store_true", help="ファイルに保存せず標準出力に表示する")
+    args = parser.parse_args()
+
+    try:
+        template = load_template(args.template)
+        registry = ProjectRegistry(args.registry)
+    except (OSError, ValueError, RegistryLockTimeout) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+
+    missing = [pid for pid in args.project_ids if pid not in registry]
+    if missing:
+        print(f"エラー: 未登録の工事IDです: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    projects = [registry.get(pid) for pid in args.project_ids] or registry.projects()
+    if not projects:
+        print("エラー: 台帳に工事が登録されていません", file=sys.stderr)
+        return 1
+
+    date_str = datetime.now().strftime("%Y%m%d")
+    if not args.stdout:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+    for project in projects:
+        try:
+            checklist = template.render(project, args.format)
+        except ChecklistTemplateError as e:
+            print(f"エラー: {project.get('project_id')}: {e}", file=sys.stderr)
+            return 1
+        if args.stdout:
+            print(checklist)
+            continue
+        path = args.output_dir / f"checklist_{project['project_id']}_{date_str}{FORMAT_SUFFIXES[args.format]}"
+        path.write_text(checklist, encoding="utf-8")
+        print(f"  {project['project_id']:<6} {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+DSLバンドル（エクスポートしたDSLをまとめた単一のzip）の書き込み・読み込み
+
+export_dify_workflows.py --archive が出力する。各アプリのDSLはエクスポートが
+完了した順にその場でzipへ追記し（メモリにためない）、最後にマニフェスト
+（_manifest.json）を索引として書き込む。zipは末尾の中央ディレクトリから
+任意のエントリを直接読めるため、1アプリだけ取り出す場合も全体を展開しない。
+
+使用方法:
+    python scripts/dsl_bundle.py list dsl/exported.zip
+    python scripts/dsl_bundle.py show dsl/exported.zip <アプリID|アプリ名|ファイル名>
+    python scripts/dsl_bundle.py extract dsl/exported.zip <アプリ...> -o dsl/exported
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import zipfile
+from pathlib import Path
+
+import yaml
+
+MANIFEST_NAME = "_manifest.json"
+COMPRESSION = zipfile.ZIP_DEFLATED
+COMPRESS_LEVEL = 6
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class DslBundleWriter:
+    """DSLバンドルの書き込み
+
+    一時ファイル（<path>.tmp）に書き込み、close()でマニフェストを追加してから
+    置き換えるため、途中で失敗しても既存のバンドルは壊れない。add()は複数スレッドから
+    呼んでよい（書き込みはロックで直列化する）。
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._zip = zipfile.ZipFile(self._tmp_path, "w", compression=COMPRESSION, compresslevel=COMPRESS_LEVEL)
+        self._lock = threading.Lock()
+        self._names = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+    def add(self, filename, content):
+        """DSL 1件を追記する（同名のエントリは追加できない）"""
+        with self._lock:
+            if filename in self._names:
+                raise ValueError(f"バンドル内でファイル名が重複しています: {filename}")
+            self._names.add(filename)
+            self._zip.writestr(filename, content.encode("utf-8"))
+
+    def close(self, manifest):
+        """マニフェストを書き込んでバンドルを確定する"""
+        with self._lock:
+            self._zip.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+            self._zip.close()
+            os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        """書き込みを中止し、一時ファイルを削除する"""
+        with self._lock:
+            self._zip.close()
+            self._tmp_path.unlink(missing_ok=True)
+
+
+class DslBundle:
+    """DSLバンドルの読み込み（必要なエントリだけを読む）"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(self.path, "r")
+        self._manifest = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            self._manifest = json.loads(self._zip.read(MANIFEST_NAME).decode("utf-8"))
+        return self._manifest
+
+    @property
+    def apps(self):
+        return self.manifest.get("apps", [])
+
+    def names(self):
+        """DSLのファイル名一覧（マニフェストを除く）"""
+        return [name for name in self._zip.namelist() if name != MANIFEST_NAME]
+
+    def find(self, key):
+        """アプリID（前方一致）・アプリ名・ファイル名のいずれかでマニフェストの項目を探す"""
+        for entry in self.apps:
+            if key in (entry.get("id"), entry.get("name"), entry.get("filename")):
+                return entry
+        matches = [entry for entry in self.apps if entry.get("id", "").startswith(key)]
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            raise KeyError(f"アプリIDが複数のアプリに一致します: {key}")
+        raise KeyError(f"バンドルにアプリがありません: {key}")
+
+    def read(self, key):
+        """1アプリのDSL（YAML文字列）を読む"""
+        return self._zip.read(self.find(key)["filename"]).decode("utf-8")
+
+    def load(self, key):
+        """1アプリのDSLをYAMLとして読み込む"""
+        return yaml.load(self.read(key), Loader=YAML_LOADER)
+
+    def extract(self, key, output_dir):
+        """1アプリのDSLをoutput_dirに書き出し、そのパスを返す"""
+        entry = self.find(key)
+        filepath = Path(output_dir) / entry["filename"]
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_bytes(self._zip.read(entry["filename"]))
+        return filepath
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DSLバンドルの一覧表示・取り出し")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="収録アプリの一覧")
+    list_parser.add_argument("bundle", type=Path)
+    show_parser = subparsers.add_parser("show", help="1アプリのDSLを標準出力に表示")
+    show_parser.add_argument("bundle", type=Path)
+    show_parser.add_argument("app", help="アプリID（前方一致）・アプリ名・ファイル名")
+    extract_parser = subparsers.add_parser("extract", help="指定したアプリのDSLをファイルに書き出す")
+    extract_parser.add_argument("bundle", type=Path)
+    extract_parser.add_argument("apps", nargs="+", help="アプリID（前方一致）・アプリ名・ファイル名")
+    extract_parser.add_argument("-o", "--output-dir", type=Path, default=Path("."), help="出力先ディレクトリ")
+    args = parser.parse_args()
+
+    if not args.bundle.exists():
+        print(f"エラー: ファイルが見つかりません: {args.bundle}", file=sys.stderr)
+        return 1
+
+    try:
+        with DslBundle(args.bundle) as bundle:
+            if args.command == "list":
+                manifest = bundle.manifest
+                print(f"=== {args.bundle.name} ===\n")
+                print(f"  エクスポート日時: {manifest.get('exported_at')} / アプリ数: {manifest.get('total_apps')}\n")
+                for entry in bundle.apps:
+                    print(f"  {entry.get('id', '')[:8]}  {entry.get('mode', ''):<14} {entry.get('name', '')}")
+            elif args.command == "show":
+                sys.stdout.write(bundle.read(args.app))
+            else:
+                for key in args.apps:
+                    print(f"  -> {bundle.extract(key, args.output_dir)}")
+    except KeyError as e:
+        print(f"エラー: {e.args[0]}", file=sys.stderr)
+        return 1
+    except zipfile.BadZipFile as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
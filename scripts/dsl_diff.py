@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+DSLの構造差分
+
+2つのバージョンのDSLを、ノードはID、エッジは接続（source・handle・target）、
+変数は名前で対応付けて比較し、追加・削除・パラメータの変更を表示する。
+ノードの位置・サイズ・選択状態・キャンバスの表示位置（viewport）などレイアウトだけの
+項目は比較しないため、ノードの並べ替えや移動だけの再エクスポートは差分なしになる。
+各要素は辞書で対応付けるので、処理時間はDSLの大きさに比例する。
+
+終了コード: 0 = 差分なし / 1 = 差分あり / 2 = エラー（diffコマンドと同じ）
+
+使用方法:
+    python scripts/dsl_diff.py old.yml new.yml
+    python scripts/dsl_diff.py --rev HEAD dsl/exported/App_1234abcd.yml   # コミット時点と比較
+    python scripts/dsl_diff.py --json old.yml new.yml
+    git difftool -y -x "python scripts/dsl_diff.py" -- dsl/exported/
+"""
+
+import argparse
+import difflib
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import yaml
+
+from dsl_graph import YAML_LOADER, DslGraph
+
+# ノードのdataのうちレイアウト・表示だけの項目（比較しない）
+LAYOUT_DATA_FIELDS = {"selected", "width", "height", "theme", "showAuthor"}
+# 値の表示幅（これより長い値は省略）
+VALUE_WIDTH = 80
+
+MISSING = object()
+
+
+def _format_value(value):
+    if value is MISSING:
+        return "(なし)"
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    text = text.replace("\n", "\\n")
+    return text if len(text) <= VALUE_WIDTH else text[:VALUE_WIDTH - 1] + "…"
+
+
+def _json_value(value):
+    return None if value is MISSING else value
+
+
+def _has_ids(items):
+    return bool(items) and all(isinstance(item, dict) and "id" in item for item in items)
+
+
+def diff_values(old, new, path=(), ignored=frozenset()):
+    """2つの値の差分を (パス, 旧値, 新値) のリストで返す
+
+    辞書はキー、idを持つ辞書のリストは（条件分岐のcase・プロンプトのメッセージ等）idで
+    対応付ける。それ以外のリストは長さが同じなら要素ごと、違えばリスト全体を比較する。
+    ignoredのキーは最上位でのみ無視する。
+    """
+    changes = []
+    _diff_into(old, new, path, ignored, changes)
+    return changes
+
+
+def _diff_into(old, new, path, ignored, changes):
+    if old == new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in list(old) + [key for key in new if key not in old]:
+            if key in ignored:
+                continue
+            _diff_into(old.get(key, MISSING), new.get(key, MISSING), path + (str(key),), frozenset(), changes)
+    elif isinstance(old, list) and isinstance(new, list) and _has_ids(old) and _has_ids(new):
+        old_by_id = {item["id"]: item for item in old}
+        new_by_id = {item["id"]: item for item in new}
+        for item_id in list(old_by_id) + [item_id for item_id in new_by_id if item_id not in old_by_id]:
+            _diff_into(old_by_id.get(item_id, MISSING), new_by_id.get(item_id, MISSING),
+                       path + (f"[id={item_id}]",), frozenset(), changes)
+        if [item["id"] for item in old] != [item["id"] for item in new] and old_by_id.keys() == new_by_id.keys():
+            changes.append((path + ("(順序)",), [item["id"] for item in old], [item["id"] for item in new]))
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            _diff_into(old_item, new_item, path + (f"[{index}]",), frozenset(), changes)
+    else:
+        changes.append((path, old, new))
+
+
+def _edge_key(edge):
+    return (edge.source, edge.source_handle, edge.target, edge.target_handle)
+
+
+def _variables(graph):
+    """変数を (種別, 名前) → 定義 で返す"""
+    variables = {}
+    for variable in graph.environment_variables:
+        variables[("env", variable.get("name", ""))] = variable
+    for variable in graph.conversation_variables:
+        variables[("conversation", variable.get("name", ""))] = variable
+    for _, variable in graph.start_variables():
+        variables[("input", variable.get("variable", ""))] = variable
+    return variables
+
+
+def _settings(dsl):
+    """ノード・エッジ・変数以外の設定（アプリ情報・機能設定・model_config）
+
+    グラフ（ノード・エッジ・viewport）と変数は個別に比較するため除く。
+    """
+    workflow = dsl.get("workflow") or {}
+    settings = {key: value for key, value in dsl.items() if key not in ("workflow", "dependencies")}
+    settings["workflow"] = {
+        key: value for key, value in workflow.items()
+        if key not in ("graph", "environment_variables", "conversation_variables")
+    }
+    model_config = settings.get("model_config")
+    if isinstance(model_config, dict) and "user_input_form" in model_config:
+        settings["model_config"] = {k: v for k, v in model_config.items() if k != "user_input_form"}
+    return settings
+
+
+def diff_dsl(old_dsl, new_dsl):
+    """2つのDSLの構造差分
+
+    Returns:
+        dict: nodes / edges / variables / settings の差分
+    """
+    old_graph, new_graph = DslGraph(old_dsl), DslGraph(new_dsl)
+    result = {"nodes": {"added": [], "removed": [], "changed": []},
+              "edges": {"added": [], "removed": []},
+              "variables": {"added": [], "removed": [], "changed": []},
+              "settings": []}
+
+    for node_id, node in new_graph.nodes.items():
+        if node_id not in old_graph.nodes:
+            result["nodes"]["added"].append(node)
+    for node_id, node in old_graph.nodes.items():
+        new_node = new_graph.nodes.get(node_id)
+        if new_node is None:
+            result["nodes"]["removed"].append(node)
+            continue
+        changes = diff_values(node.data, new_node.data, ignored=LAYOUT_DATA_FIELDS)
+        if node.parent != new_node.parent:
+            changes.insert(0, (("(所属)",), node.parent or MISSING, new_node.parent or MISSING))
+        if changes:
+            result["nodes"]["changed"].append((new_node, changes))
+
+    old_edges = {_edge_key(edge): edge for edge in old_graph.edges}
+    new_edges = {_edge_key(edge): edge for edge in new_graph.edges}
+    result["edges"]["added"] = [edge for key, edge in new_edges.items() if key not in old_edges]
+    result["edges"]["removed"] = [edge for key, edge in old_edges.items() if key not in new_edges]
+
+    old_variables, new_variables = _variables(old_graph), _variables(new_graph)
+    for key, variable in new_variables.items():
+        if key not in old_variables:
+            result["variables"]["added"].append(key)
+    for key, variable in old_variables.items():
+        if key not in new_variables:
+            result["variables"]["removed"].append(key)
+        else:
+            changes = diff_values(variable, new_variables[key])
+            if changes:
+                result["variables"]["changed"].append((key, changes))
+
+    result["settings"] = diff_values(_settings(old_dsl), _settings(new_dsl))
+    return result, old_graph, new_graph
+
+
+def has_changes(result):
+    return any([
+        *result["nodes"].values(), *result["edges"].values(), *result["variables"].values(), result["settings"],
+    ])
+
+
+def _node_label(node):
+    return f"{node.id} ({node.type}) {node.title}".rstrip()
+
+
+def _print_change(path, old, new, indent, full_text):
+    label = ".".join(path) if path else "(値)"
+    if full_text and isinstance(old, str) and isinstance(new, str) and ("\n" in old or "\n" in new):
+        print(f"{indent}{label}:")
+        for line in difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm="", n=1):
+            if not line.startswith(("---", "+++")):
+                print(f"{indent}  {line}")
+    else:
+        print(f"{indent}{label}: {_format_value(old)} → {_format_value(new)}")
+
+
+def print_result(result, old_graph, new_graph, full_text=False):
+    """差分を表示する"""
+    def title(node_id, graph):
+        node = graph.nodes.get(node_id)
+        return f"{node_id} ({node.title})" if node and node.title else node_id
+
+    nodes = result["nodes"]
+    if any(nodes.values()):
+        print("ノード:")
+        for node in nodes["added"]:
+            print(f"  + {_node_label(node)}")
+        for node in nodes["removed"]:
+            print(f"  - {_node_label(node)}")
+        for node, changes in nodes["changed"]:
+            print(f"  ~ {_node_label(node)}")
+            for path, old, new in changes:
+                _print_change(path, old, new, "      ", full_text)
+    edges = result["edges"]
+    if any(edges.values()):
+        print("エッジ:")
+        for sign, items, graph in (("+", edges["added"], new_graph), ("-", edges["removed"], old_graph)):
+            for edge in items:
+                handle = f" [{edge.source_handle}]" if edge.source_handle != "source" else ""
+                print(f"  {sign} {title(edge.source, graph)}{handle} → {title(edge.target, graph)}")
+    variables = result["variables"]
+    if any(variables.values()):
+        print("変数:")
+        for kind, name in variables["added"]:
+            print(f"  + {kind}.{name}")
+        for kind, name in variables["removed"]:
+            print(f"  - {kind}.{name}")
+        for (kind, name), changes in variables["changed"]:
+            print(f"  ~ {kind}.{name}")
+            for path, old, new in changes:
+                _print_change(path, old, new, "      ", full_text)
+    if result["settings"]:
+        print("設定:")
+        for path, old, new in result["settings"]:
+            _print_change(path, old, new, "  ~ ", full_text)
+
+
+def result_to_json(result):
+    def changes(items):
+        return [{"path": ".".join(path), "old": _json_value(old), "new": _json_value(new)} for path, old, new in items]
+
+    def node(item):
+        return {"id": item.id, "type": item.type, "title": item.title}
+
+    def edge(item):
+        return {"source": item.source, "source_handle": item.source_handle,
+                "target": item.target, "target_handle": item.target_handle}
+
+    return {
+        "nodes": {
+            "added": [node(item) for item in result["nodes"]["added"]],
+            "removed": [node(item) for item in result["nodes"]["removed"]],
+            "changed": [{**node(item), "changes": changes(items)} for item, items in result["nodes"]["changed"]],
+        },
+        "edges": {
+            "added": [edge(item) for item in result["edges"]["added"]],
+            "removed": [edge(item) for item in result["edges"]["removed"]],
+        },
+        "variables": {
+            "added": [{"kind": kind, "name": name} for kind, name in result["variables"]["added"]],
+            "removed": [{"kind": kind, "name": name} for kind, name in result["variables"]["removed"]],
+            "changed": [{"kind": kind, "name": name, "changes": changes(items)}
+                        for (kind, name), items in result["variables"]["changed"]],
+        },
+        "settings": changes(result["settings"]),
+    }
+
+
+def read_git_revision(rev, path):
+    """gitのリビジョン時点のファイル内容"""
+    path = Path(path).resolve()
+    toplevel = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"], cwd=path.parent, capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    relative = path.relative_to(Path(toplevel).resolve()).as_posix()
+    return subprocess.run(
+        ["git", "show", f"{rev}:{relative}"], cwd=toplevel, capture_output=True, text=True, check=True,
+    ).stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DSLの構造差分（レイアウトの変更は無視）")
+    parser.add_argument("files", nargs="+", type=Path, help="旧DSL 新DSL（--rev 指定時は新DSLのみ）")
+    parser.add_argument("--rev", help="比較元のgitリビジョン（例: HEAD, HEAD~1）")
+    parser.add_argument("--json", action="store_true", help="差分をJSONで出力する")
+    parser.add_argument("--full-text", action="store_true", help="複数行の値（プロンプト・コード）は行単位の差分で表示する")
+    args = parser.parse_args()
+
+    expected = 1 if args.rev else 2
+    if len(args.files) != expected:
+        parser.error("旧DSLと新DSLを指定してください" if expected == 2 else "--rev 指定時は新DSLを1つ指定してください")
+    try:
+        new_path = args.files[-1]
+        if args.rev:
+            old_label = f"{args.rev}:{new_path}"
+            old_text = read_git_revision(args.rev, new_path)
+        else:
+            old_label = str(args.files[0])
+            old_text = args.files[0].read_text(encoding="utf-8")
+        old_dsl = yaml.load(old_text, Loader=YAML_LOADER) or {}
+        new_dsl = yaml.load(new_path.read_text(encoding="utf-8"), Loader=YAML_LOADER) or {}
+    except (OSError, subprocess.CalledProcessError, yaml.YAMLError, ValueError) as e:
+        detail = e.stderr.strip() if isinstance(e, subprocess.CalledProcessError) else e
+        print(f"エラー: {detail}", file=sys.stderr)
+        return 2
+    if not isinstance(old_dsl, dict) or not isinstance(new_dsl, dict):
+        print("エラー: DSLの形式ではありません", file=sys.stderr)
+        return 2
+
+    result, old_graph, new_graph = diff_dsl(old_dsl, new_dsl)
+    if args.json:
+        print(json.dumps(result_to_json(result), ensure_ascii=False, indent=2))
+    elif has_changes(result):
+        print(f"--- {old_label}\n+++ {new_path}")
+        print_result(result, old_graph, new_graph, args.full_text)
+    return 1 if has_changes(result) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Dify DSL（ワークフロー）のグラフ構造の読み込み
+
+dsl/templates/*.yml・dsl/generated/*.dsl・dsl/exported/*.yml（export_dify_workflows.py の
+出力）を読み込み、ノード・エッジ・変数・モデル・変数参照を取り出す。
+DSLの索引（dsl_index.py）などのツールが共通で使う。
+
+使用方法（1ファイルの概要表示）:
+    python scripts/dsl_graph.py dsl/templates/DeepResearch.yml
+"""
+
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# DSLの拡張子
+DSL_SUFFIXES = (".yml", ".yaml", ".dsl")
+
+# 注釈ノード（custom-note）はdata.typeが空のため、この種別で扱う
+NOTE_TYPE = "note"
+
+# {{#ノードID.変数名#}} 形式の変数参照（env / sys / conversation も同じ形式）
+VARIABLE_REFERENCE = re.compile(r"\{\{#([\w-]+)\.([\w.-]+)#\}\}")
+
+# *selector 以外でセレクタ（[ノードID, 変数名]）を値に持つキー
+SELECTOR_KEYS = ("query",)
+SELECTOR_LIST_KEYS = ("variables",)
+
+# ノードID以外の参照先（環境変数・システム変数・会話変数）
+SCOPE_PREFIXES = ("env", "sys", "conversation")
+
+
+@dataclass
+class Node:
+    id: str
+    type: str
+    title: str
+    parent: str = ""     # 所属するイテレーション・ループのノードID
+    data: dict = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class Edge:
+    id: str
+    source: str
+    target: str
+    source_handle: str = "source"
+    target_handle: str = "target"
+
+
+@dataclass(frozen=True)
+class Reference:
+    """ノードからの変数参照（scopeはノードID または env / sys / conversation）"""
+    node_id: str
+    scope: str
+    name: str
+
+
+def load_dsl(path):
+    """DSLファイルを読み込む"""
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=YAML_LOADER)
+
+
+def iter_dsl_files(roots):
+    """ディレクトリ配下（またはファイル自体）のDSLファイルを名前順に列挙する"""
+    for root in roots:
+        root = Path(root)
+        if root.is_file():
+            yield root
+        elif root.is_dir():
+            yield from sorted(
+                path for path in root.rglob("*")
+                if path.suffix in DSL_SUFFIXES and path.is_file()
+            )
+
+
+def _iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_strings(item)
+
+
+def _is_selector(value):
+    return isinstance(value, list) and len(value) >= 2 and all(isinstance(part, str) for part in value)
+
+
+def _iter_selectors(value):
+    """value_selector・variable_selector 等（キーが *selector の文字列リスト）を列挙する
+
+    パラメータ抽出の query（セレクタ1つ）と変数集約器の variables（セレクタのリスト）も含む。
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if (key.endswith("selector") or key in SELECTOR_KEYS) and _is_selector(item):
+                yield item
+            elif key in SELECTOR_LIST_KEYS and isinstance(item, list) and item and all(map(_is_selector, item)):
+                yield from item
+            else:
+                yield from _iter_selectors(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_selectors(item)
+
+
+class DslGraph:
+    """DSL 1件のグラフ構造
+
+    チャット型のアプリ（workflowを持たず model_config のみ）はノード・エッジが空で、
+    モデルはアプリ単位（node_idが空）で返す。
+    """
+
+    def __init__(self, dsl):
+        self.dsl = dsl or {}
+        app = self.dsl.get("app") or {}
+        self.name = app.get("name", "")
+        self.mode = app.get("mode", "")
+        self.version = str(self.dsl.get("version", ""))
+        workflow = self.dsl.get("workflow") or {}
+        graph = workflow.get("graph") or {}
+
+        self.nodes = {}
+        for raw in graph.get("nodes") or []:
+            data = raw.get("data") or {}
+            node_type = data.get("type") or (NOTE_TYPE if raw.get("type") == "custom-note" else "")
+            parent = raw.get("parentId") or data.get("iteration_id") or data.get("loop_id") or ""
+            node_id = str(raw.get("id", ""))
+            self.nodes[node_id] = Node(node_id, node_type, data.get("title", ""), str(parent), data)
+
+        self.edges = [
+            Edge(
+                str(raw.get("id", "")),
+                str(raw.get("source", "")),
+                str(raw.get("target", "")),
+                str(raw.get("sourceHandle") or "source"),
+                str(raw.get("targetHandle") or "target"),
+            )
+            for raw in graph.get("edges") or []
+        ]
+        self.environment_variables = list(workflow.get("environment_variables") or [])
+        self.conversation_variables = list(workflow.get("conversation_variables") or [])
+        self.model_config = self.dsl.get("model_config") or {}
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_dsl(path))
+
+    @property
+    def is_workflow(self):
+        return bool(self.nodes)
+
+    def start_variables(self):
+        """開始ノードの入力変数"""
+        for node in self.nodes.values():
+            if node.type == "start":
+                for variable in node.data.get("variables") or []:
+                    yield node.id, variable
+        for variable in (self.model_config.get("user_input_form") or []):
+            for spec in variable.values() if isinstance(variable, dict) else []:
+                if isinstance(spec, dict) and spec.get("variable"):
+                    yield "", spec
+
+    def models(self):
+        """使用モデルの (ノードID, provider, name) を列挙する"""
+        for node in self.nodes.values():
+            model = node.data.get("model")
+            if isinstance(model, dict) and model.get("name"):
+                yield node.id, model.get("provider", ""), model["name"]
+        model = self.model_config.get("model")
+        if isinstance(model, dict) and model.get("name"):
+            yield "", model.get("provider", ""), model["name"]
+
+    def references(self):
+        """ノードが参照する変数（テンプレート中の {{#...#}} と *selector）を列挙する"""
+        for node in self.nodes.values():
+            seen = set()
+            for text in _iter_strings(node.data):
+                if "{{#" not in text:
+                    continue
+                for scope, name in VARIABLE_REFERENCE.findall(text):
+                    seen.add((scope, name))
+            for selector in _iter_selectors(node.data):
+                seen.add((selector[0], ".".join(selector[1:])))
+            for scope, name in sorted(seen):
+                yield Reference(node.id, scope, name)
+
+    def http_requests(self):
+        """HTTPリクエストノードの (ノードID, method, url) を列挙する"""
+        for node in self.nodes.values():
+            if node.type == "http-request":
+                yield node.id, str(node.data.get("method", "")).upper(), str(node.data.get("url", ""))
+
+    def tools(self):
+        """ツールノードの (ノードID, provider, tool_name) を列挙する"""
+        for node in self.nodes.values():
+            if node.type == "tool":
+                provider = node.data.get("provider_id") or node.data.get("provider_name", "")
+                yield node.id, provider, node.data.get("tool_name", "")
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("使用方法: python scripts/dsl_graph.py <DSLファイル>", file=sys.stderr)
+        return 1
+    path = Path(sys.argv[1])
+    if not path.exists():
+        print(f"エラー: ファイルが見つかりません: {path}", file=sys.stderr)
+        return 1
+
+    graph = DslGraph.from_file(path)
+    print(f"=== {path.name} ===\n")
+    print(f"  アプリ: {graph.name} (mode: {graph.mode}, version: {graph.version})")
+    print(f"  ノード: {len(graph.nodes)} / エッジ: {len(graph.edges)}")
+    for node_type, count in Counter(node.type for node in graph.nodes.values()).most_common():
+        print(f"    {node_type or '(不明)':<22} {count:>4}")
+    models = sorted({(provider, name) for _, provider, name in graph.models()})
+    print(f"  モデル: {', '.join(f'{provider}/{name}' for provider, name in models) or 'なし'}")
+    print(f"  環境変数: {', '.join(v.get('name', '') for v in graph.environment_variables) or 'なし'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+DSLの索引と検索
+
+dsl/templates・dsl/generated・dsl/exported のDSLを1回だけ解析し、ノード・エッジ・
+変数・モデル・変数参照・HTTPエンドポイント・ツールをSQLiteの索引
+（output/.dsl_index.sqlite3）に保存する。検索のたびに索引を差分更新し
+（更新日時とサイズが同じファイルは読まない。変わっていても内容のハッシュが
+同じなら再解析しない）、検索は索引に対するSQLだけで答える。
+
+使用方法:
+    python scripts/dsl_index.py update                      # 索引の更新のみ
+    python scripts/dsl_index.py stats                       # ノード種別・モデルの集計
+    python scripts/dsl_index.py nodes --type http-request
+    python scripts/dsl_index.py models --name gpt-4o
+    python scripts/dsl_index.py vars GAS_HUB_URL            # 定義・参照しているDSL
+    python scripts/dsl_index.py http --url script.google.com
+    python scripts/dsl_index.py tools --provider tavily
+    python scripts/dsl_index.py files --errors --json
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+from dsl_graph import YAML_LOADER, DslGraph, iter_dsl_files
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+INDEX_PATH = PROJECT_DIR / "output" / ".dsl_index.sqlite3"
+DEFAULT_ROOTS = [
+    PROJECT_DIR / "dsl" / "templates",
+    PROJECT_DIR / "dsl" / "generated",
+    PROJECT_DIR / "dsl" / "exported",
+]
+
+# 索引の形式を変えたら上げる（既存の索引は作り直す）
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    app_name TEXT,
+    mode TEXT,
+    node_count INTEGER,
+    edge_count INTEGER,
+    error TEXT
+);
+CREATE TABLE nodes (
+    file_id INTEGER REFERENCES files(id) ON DELETE CASCADE,
+    node_id TEXT, type TEXT, title TEXT, parent TEXT
+);
+CREATE TABLE edges (
+    file_id INTEGER REFERENCES files(id) ON DELETE CASCADE,
+    edge_id TEXT, source TEXT, target TEXT, source_handle TEXT
+);
+CREATE TABLE variables (
+    file_id INTEGER REFERENCES files(id) ON DELETE CASCADE,
+    kind TEXT, node_id TEXT, name TEXT, value_type TEXT
+);
+CREATE TABLE models (
+    file_id INTEGER REFERENCES files(id) ON DELETE CASCADE,
+    node_id TEXT, provider TEXT, name TEXT
+);
+CREATE TABLE refs (
+    file_id INTEGER REFERENCES files(id) ON DELETE CASCADE,
+    node_id TEXT, scope TEXT, name TEXT
+);
+CREATE TABLE http (
+    file_id INTEGER REFERENCES files(id) ON DELETE CASCADE,
+    node_id TEXT, method TEXT, url TEXT
+);
+CREATE TABLE tools (
+    file_id INTEGER REFERENCES files(id) ON DELETE CASCADE,
+    node_id TEXT, provider TEXT, tool_name TEXT
+);
+CREATE INDEX nodes_file ON nodes(file_id);
+CREATE INDEX nodes_type ON nodes(type);
+CREATE INDEX edges_file ON edges(file_id);
+CREATE INDEX variables_name ON variables(name);
+CREATE INDEX models_name ON models(name);
+CREATE INDEX refs_scope_name ON refs(scope, name);
+CREATE INDEX tools_provider ON tools(provider);
+"""
+
+DETAIL_TABLES = ("nodes", "edges", "variables", "models", "refs", "http", "tools")
+
+
+def display_path(path):
+    """索引に記録するパス（プロジェクト内なら相対パス）"""
+    path = Path(path).resolve()
+    try:
+        return str(path.relative_to(PROJECT_DIR))
+    except ValueError:
+        return str(path)
+
+
+def open_index(path=INDEX_PATH):
+    """索引を開く（なければ作成、形式が古ければ作り直す）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        for table in DETAIL_TABLES + ("files",):
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    return conn
+
+
+def _index_graph(conn, file_id, graph):
+    conn.executemany(
+        "INSERT INTO nodes VALUES (?, ?, ?, ?, ?)",
+        [(file_id, node.id, node.type, node.title, node.parent) for node in graph.nodes.values()],
+    )
+    conn.executemany(
+        "INSERT INTO edges VALUES (?, ?, ?, ?, ?)",
+        [(file_id, edge.id, edge.source, edge.target, edge.source_handle) for edge in graph.edges],
+    )
+    variables = [
+        (file_id, "env", "", v.get("name", ""), v.get("value_type", "")) for v in graph.environment_variables
+    ] + [
+        (file_id, "conversation", "", v.get("name", ""), v.get("value_type", ""))
+        for v in graph.conversation_variables
+    ] + [
+        (file_id, "input", node_id, v.get("variable", ""), v.get("type", ""))
+        for node_id, v in graph.start_variables()
+    ]
+    conn.executemany("INSERT INTO variables VALUES (?, ?, ?, ?, ?)", variables)
+    conn.executemany("INSERT INTO models VALUES (?, ?, ?, ?)", [(file_id, *row) for row in graph.models()])
+    conn.executemany(
+        "INSERT INTO refs VALUES (?, ?, ?, ?)",
+        [(file_id, ref.node_id, ref.scope, ref.name) for ref in graph.references()],
+    )
+    conn.executemany("INSERT INTO http VALUES (?, ?, ?, ?)", [(file_id, *row) for row in graph.http_requests()])
+    conn.executemany("INSERT INTO tools VALUES (?, ?, ?, ?)", [(file_id, *row) for row in graph.tools()])
+
+
+def refresh_index(conn, roots=None):
+    """索引を差分更新する
+
+    Returns:
+        dict: added / updated / unchanged / removed の件数
+    """
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    known = {row["path"]: row for row in conn.execute("SELECT id, path, mtime_ns, size, hash FROM files")}
+    seen = set()
+
+    for path in iter_dsl_files(roots or DEFAULT_ROOTS):
+        key = display_path(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        stat = path.stat()
+        row = known.get(key)
+        if row and row["mtime_ns"] == stat.st_mtime_ns and row["size"] == stat.st_size:
+            stats["unchanged"] += 1
+            continue
+
+        content = path.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        if row and row["hash"] == digest:
+            conn.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?",
+                         (stat.st_mtime_ns, stat.st_size, row["id"]))
+            stats["unchanged"] += 1
+            continue
+
+        try:
+            graph = DslGraph(yaml.load(content.decode("utf-8"), Loader=YAML_LOADER))
+            error = None
+        except (yaml.YAMLError, UnicodeDecodeError, AttributeError, TypeError) as e:
+            graph = DslGraph({})
+            error = str(e).splitlines()[0] if str(e) else type(e).__name__
+
+        if row:
+            conn.execute("DELETE FROM files WHERE id = ?", (row["id"],))
+            stats["updated"] += 1
+        else:
+            stats["added"] += 1
+        cursor = conn.execute(
+            "INSERT INTO files (path, mtime_ns, size, hash, app_name, mode, node_count, edge_count, error)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, stat.st_mtime_ns, stat.st_size, digest, graph.name, graph.mode,
+             len(graph.nodes), len(graph.edges), error),
+        )
+        _index_graph(conn, cursor.lastrowid, graph)
+
+    for path, row in known.items():
+        if path not in seen:
+            conn.execute("DELETE FROM files WHERE id = ?", (row["id"],))
+            stats["removed"] += 1
+    conn.commit()
+    return stats
+
+
+# === 検索 ===
+
+def _like(value):
+    return f"%{value}%"
+
+
+def query_nodes(conn, node_type=None, title=None):
+    sql = ("SELECT f.path, f.app_name, n.node_id, n.type, n.title, n.parent"
+           " FROM nodes n JOIN files f ON f.id = n.file_id WHERE 1 = 1")
+    params = []
+    if node_type:
+        sql += " AND n.type = ?"
+        params.append(node_type)
+    if title:
+        sql += " AND n.title LIKE ?"
+        params.append(_like(title))
+    return conn.execute(sql + " ORDER BY f.path, n.node_id", params).fetchall()
+
+
+def query_models(conn, provider=None, name=None):
+    sql = ("SELECT f.path, f.app_name, m.node_id, n.title, m.provider, m.name"
+           " FROM models m JOIN files f ON f.id = m.file_id"
+           " LEFT JOIN nodes n ON n.file_id = m.file_id AND n.node_id = m.node_id WHERE 1 = 1")
+    params = []
+    if provider:
+        sql += " AND m.provider LIKE ?"
+        params.append(_like(provider))
+    if name:
+        sql += " AND m.name LIKE ?"
+        params.append(_like(name))
+    return conn.execute(sql + " ORDER BY f.path, m.node_id", params).fetchall()
+
+
+def query_variables(conn, name):
+    """変数の定義（環境変数・会話変数・入力変数）と参照（{{#env.NAME#}} 等）"""
+    definitions = conn.execute(
+        "SELECT f.path, f.app_name, 'define' AS usage, v.kind, v.node_id, '' AS title, v.name"
+        " FROM variables v JOIN files f ON f.id = v.file_id WHERE v.name = ?",
+        (name,),
+    ).fetchall()
+    references = conn.execute(
+        "SELECT f.path, f.app_name, 'reference' AS usage, r.scope AS kind, r.node_id, n.title, r.name"
+        " FROM refs r JOIN files f ON f.id = r.file_id"
+        " LEFT JOIN nodes n ON n.file_id = r.file_id AND n.node_id = r.node_id"
+        " WHERE r.scope IN ('env', 'conversation', 'sys') AND r.name = ?",
+        (name,),
+    ).fetchall()
+    return sorted(definitions + references, key=lambda row: (row["path"], row["usage"], row["node_id"]))
+
+
+def query_http(conn, url=None):
+    sql = ("SELECT f.path, f.app_name, h.node_id, n.title, h.method, h.url"
+           " FROM http h JOIN files f ON f.id = h.file_id"
+           " LEFT JOIN nodes n ON n.file_id = h.file_id AND n.node_id = h.node_id WHERE 1 = 1")
+    params = []
+    if url:
+        sql += " AND h.url LIKE ?"
+        params.append(_like(url))
+    return conn.execute(sql + " ORDER BY f.path, h.node_id", params).fetchall()
+
+
+def query_tools(conn, provider=None, tool_name=None):
+    sql = ("SELECT f.path, f.app_name, t.node_id, n.title, t.provider, t.tool_name"
+           " FROM tools t JOIN files f ON f.id = t.file_id"
+           " LEFT JOIN nodes n ON n.file_id = t.file_id AND n.node_id = t.node_id WHERE 1 = 1")
+    params = []
+    if provider:
+        sql += " AND t.provider LIKE ?"
+        params.append(_like(provider))
+    if tool_name:
+        sql += " AND t.tool_name LIKE ?"
+        params.append(_like(tool_name))
+    return conn.execute(sql + " ORDER BY f.path, t.node_id", params).fetchall()
+
+
+def query_files(conn, errors_only=False):
+    sql = "SELECT path, app_name, mode, node_count, edge_count, error FROM files"
+    if errors_only:
+        sql += " WHERE error IS NOT NULL"
+    return conn.execute(sql + " ORDER BY path").fetchall()
+
+
+def query_stats(conn):
+    return {
+        "files": conn.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+        "nodes": conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0],
+        "edges": conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0],
+        "node_types": [dict(row) for row in conn.execute(
+            "SELECT type, COUNT(*) AS count, COUNT(DISTINCT file_id) AS files"
+            " FROM nodes GROUP BY type ORDER BY count DESC")],
+        "models": [dict(row) for row in conn.execute(
+            "SELECT provider, name, COUNT(*) AS count, COUNT(DISTINCT file_id) AS files"
+            " FROM models GROUP BY provider, name ORDER BY count DESC")],
+    }
+
+
+def print_rows(rows, columns):
+    """検索結果を表形式で表示する"""
+    if not rows:
+        print("  該当なし")
+        return
+    widths = [min(48, max(len(column), *(len(str(row[column] or "")) for row in rows))) for column in columns]
+    print("  " + "  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  " + "  ".join(str(row[column] or "")[:width].ljust(width) for column, width in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DSLの索引と検索")
+    parser.add_argument("--index", type=Path, default=INDEX_PATH, help="索引ファイル")
+    parser.add_argument("--root", type=Path, action="append",
+                        help="索引の対象（複数指定可。省略時は dsl/templates・generated・exported）")
+    parser.add_argument("--no-refresh", action="store_true", help="索引を更新せずに検索する")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("update", help="索引を更新する")
+    subparsers.add_parser("stats", help="ノード種別・モデルの集計")
+    nodes_parser = subparsers.add_parser("nodes", help="ノードを検索")
+    nodes_parser.add_argument("--type", help="ノード種別（llm, http-request, code 等）")
+    nodes_parser.add_argument("--title", help="タイトル（部分一致）")
+    models_parser = subparsers.add_parser("models", help="モデルを使うノードを検索")
+    models_parser.add_argument("--provider", help="プロバイダー（部分一致）")
+    models_parser.add_argument("--name", help="モデル名（部分一致）")
+    vars_parser = subparsers.add_parser("vars", help="変数を定義・参照しているDSLを検索")
+    vars_parser.add_argument("name", help="変数名（例: GAS_HUB_URL）")
+    http_parser = subparsers.add_parser("http", help="HTTPリクエストノードを検索")
+    http_parser.add_argument("--url", help="URL（部分一致）")
+    tools_parser = subparsers.add_parser("tools", help="ツールノードを検索")
+    tools_parser.add_argument("--provider", help="ツールのプロバイダー（部分一致）")
+    tools_parser.add_argument("--tool", help="ツール名（部分一致）")
+    files_parser = subparsers.add_parser("files", help="索引済みのファイル一覧")
+    files_parser.add_argument("--errors", action="store_true", help="解析に失敗したファイルのみ")
+    args = parser.parse_args()
+
+    conn = open_index(args.index)
+    try:
+        if not args.no_refresh or args.command == "update":
+            started = time.perf_counter()
+            refreshed = refresh_index(conn, args.root)
+            if args.command == "update" or not args.json:
+                print(f"索引: 追加 {refreshed['added']} / 更新 {refreshed['updated']} / "
+                      f"変更なし {refreshed['unchanged']} / 削除 {refreshed['removed']} "
+                      f"({(time.perf_counter() - started) * 1000:.1f} ms)", file=sys.stderr)
+        if args.command == "update":
+            return 0
+
+        started = time.perf_counter()
+        if args.command == "stats":
+            result = query_stats(conn)
+        elif args.command == "nodes":
+            result = query_nodes(conn, args.type, args.title)
+            columns = ["path", "node_id", "type", "title"]
+        elif args.command == "models":
+            result = query_models(conn, args.provider, args.name)
+            columns = ["path", "node_id", "title", "provider", "name"]
+        elif args.command == "vars":
+            result = query_variables(conn, args.name)
+            columns = ["path", "usage", "kind", "node_id", "title"]
+        elif args.command == "http":
+            result = query_http(conn, args.url)
+            columns = ["path", "node_id", "title", "method", "url"]
+        elif args.command == "tools":
+            result = query_tools(conn, args.provider, args.tool)
+            columns = ["path", "node_id", "title", "provider", "tool_name"]
+        else:
+            result = query_files(conn, args.errors)
+            columns = ["path", "app_name", "mode", "node_count", "edge_count", "error"]
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        conn.close()
+
+    if args.json:
+        payload = result if isinstance(result, dict) else [dict(row) for row in result]
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+        return 0
+
+    if args.command == "stats":
+        print(f"ファイル: {result['files']} / ノード: {result['nodes']} / エッジ: {result['edges']}\n")
+        print_rows(result["node_types"], ["type", "count", "files"])
+        print()
+        print_rows(result["models"], ["provider", "name", "count", "files"])
+    else:
+        print_rows(result, columns)
+        print(f"\n{len(result)} 件 ({elapsed_ms:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
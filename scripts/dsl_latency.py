@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+"""
+DSLの並列分岐レイテンシ分析
+
+DSLのグラフにノード種別ごとの所要時間モデル（平均・ばらつき）を割り当て、実行を
+繰り返しシミュレーションして、所要時間の分布・クリティカルパス・各ノードがクリティカル
+パスに乗る割合を求める。並列分岐の合流は最も遅い分岐を待つため、ばらつきがあると
+平均値だけで見積もった時間より長くなる。
+
+あわせて、エッジでは直列につながっているが互いの出力を参照していないノードの並び
+（並列に実行できる直列チェーン）を、変数参照から求めたデータ依存関係をもとに列挙する。
+
+所要時間モデルの指定（--timings のJSON/YAML、または --set）:
+    types: {llm: 6.0, http-request: {mean: 0.8, cv: 0.5}}   # ノード種別ごと
+    nodes: {"1724743284784": 12, "Study Plan": 15}          # ノードID・タイトルごと（種別より優先）
+
+使用方法:
+    python scripts/dsl_latency.py dsl/templates/PopularScienceArticle_NestedParallel.yml
+    python scripts/dsl_latency.py dsl/templates/ResearchAgentProcessFlow.yml --iterations 5 --runs 5000
+    python scripts/dsl_latency.py dsl/generated --set llm=6 --set "レポート生成=20"
+    python scripts/dsl_latency.py --branch 1724927400256=1 --json dsl/templates/PopularScienceArticle_NestedParallel.yml
+"""
+
+import argparse
+import heapq
+import json
+import math
+import random
+import statistics
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import yaml
+
+from dsl_graph import DslGraph, iter_dsl_files
+from dsl_validate import (
+    CONTAINER_TYPES, DEFAULT_LATENCY, DEFAULT_REPETITIONS, NODE_LATENCY, TERMINAL_TYPES,
+    adjacency, branch_handles, children, entry_nodes, find_cycle, topological_order,
+)
+
+# === 設定 ===
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_ROOTS = [PROJECT_ROOT / "dsl" / "generated"]
+
+# 所要時間のばらつき（変動係数 = 標準偏差 / 平均）。ここにない種別は DEFAULT_CV
+NODE_LATENCY_CV = {
+    "llm": 0.4,
+    "agent": 0.5,
+    "parameter-extractor": 0.3,
+    "question-classifier": 0.3,
+    "http-request": 0.5,
+    "tool": 0.5,
+    "knowledge-retrieval": 0.3,
+}
+DEFAULT_CV = 0.1
+
+DEFAULT_RUNS = 2000
+DEFAULT_SEED = 0
+# 並列化の候補として表示する最小の短縮見込み（秒）
+MIN_SAVING = 0.5
+# 表示するノード数（クリティカル率の上位）
+DEFAULT_TOP = 10
+
+
+class TimingModel:
+    """ノードごとの所要時間（平均・変動係数）
+
+    所要時間は対数正規分布（負にならず、右に裾を引く）で生成する。
+    """
+
+    def __init__(self, graph, types=None, nodes=None):
+        self.graph = graph
+        self._types = {node_type: {"mean": mean, "cv": NODE_LATENCY_CV.get(node_type, DEFAULT_CV)}
+                       for node_type, mean in NODE_LATENCY.items()}
+        for key, value in (types or {}).items():
+            self._types[key] = self._spec(value, self._types.get(key, {"mean": DEFAULT_LATENCY, "cv": DEFAULT_CV}))
+        titles = {node.title: node.id for node in graph.nodes.values() if node.title}
+        self._nodes = {}
+        for key, value in (nodes or {}).items():
+            node_id = key if key in graph.nodes else titles.get(key)
+            if node_id is None:
+                raise KeyError(f"ノードが見つかりません: {key}")
+            self._nodes[node_id] = self._spec(value, self._for_type(graph.nodes[node_id].type))
+
+    @staticmethod
+    def _spec(value, base):
+        if isinstance(value, dict):
+            return {"mean": float(value.get("mean", base["mean"])), "cv": float(value.get("cv", base["cv"]))}
+        return {"mean": float(value), "cv": base["cv"]}
+
+    def _for_type(self, node_type):
+        return self._types.get(node_type) or {"mean": DEFAULT_LATENCY, "cv": NODE_LATENCY_CV.get(node_type, DEFAULT_CV)}
+
+    def spec(self, node_id):
+        return self._nodes.get(node_id) or self._for_type(self.graph.nodes[node_id].type)
+
+    def mean(self, node_id):
+        return self.spec(node_id)["mean"]
+
+    def sample(self, node_id, rng):
+        spec = self.spec(node_id)
+        if spec["mean"] <= 0 or spec["cv"] <= 0:
+            return max(spec["mean"], 0.0)
+        sigma2 = math.log(1 + spec["cv"] ** 2)
+        return rng.lognormvariate(math.log(spec["mean"]) - sigma2 / 2, math.sqrt(sigma2))
+
+
+class _Level:
+    """イテレーション・ループの内側（または最上位）のノードとエッジ"""
+
+    def __init__(self, graph, parent):
+        self.members = children(graph, parent)
+        self.successors = adjacency(graph, self.members)
+        self.entries = entry_nodes(graph, parent)
+        self.order = topological_order(self.successors)
+        self.incoming = defaultdict(list)
+        self.handles = defaultdict(set)
+        members = set(self.members)
+        for edge in graph.edges:
+            if edge.source in members and edge.target in members:
+                self.incoming[edge.target].append((edge.source, edge.source_handle))
+                self.handles[edge.source].add(edge.source_handle)
+
+
+class Simulator:
+    """DSLの実行シミュレーション
+
+    ノードは有効な入力エッジの接続元がすべて終わった時点で開始する（並列分岐の合流は
+    最も遅い分岐を待つ）。分岐ノードは接続先のあるハンドルから1つを等確率で選ぶ
+    （branchesで固定できる）。選ばれなかったハンドルの先のノードは実行しない。
+    イテレーションは内側を繰り返し回数分実行し、並列イテレーションは並列数の
+    ワーカーに順に割り当てる。ループは繰り返し回数分を直列に実行する。
+    """
+
+    def __init__(self, graph, timings, repetitions=DEFAULT_REPETITIONS, branches=None):
+        self.graph = graph
+        self.timings = timings
+        self.repetitions = repetitions
+        self.branches = branches or {}
+        self._levels = {}
+
+    def level(self, parent=""):
+        if parent not in self._levels:
+            self._levels[parent] = _Level(self.graph, parent)
+        return self._levels[parent]
+
+    def _rounds(self, node):
+        if node.type == "loop":
+            return min(self.repetitions, node.data.get("loop_count") or self.repetitions)
+        return self.repetitions
+
+    def _workers(self, node):
+        if node.type == "iteration" and node.data.get("is_parallel"):
+            return max(1, node.data.get("parallel_nums") or 1)
+        return 1
+
+    def duration(self, node_id, rng):
+        """ノード1件の所要時間（イテレーション・ループは内側の実行を含む）"""
+        node = self.graph.nodes[node_id]
+        own = self.timings.sample(node_id, rng)
+        if node.type not in CONTAINER_TYPES:
+            return own
+        workers = [0.0] * self._workers(node)
+        for _ in range(self._rounds(node)):
+            wall, _, _ = self.run(node_id, rng)
+            heapq.heappush(workers, heapq.heappop(workers) + wall)
+        return own + max(workers)
+
+    def _choose(self, node_id, rng):
+        handles = sorted(self.level(self.graph.nodes[node_id].parent).handles[node_id])
+        forced = self.branches.get(node_id)
+        if forced is not None:
+            return forced
+        return rng.choice(handles) if handles else None
+
+    def run(self, parent, rng):
+        """1回の実行。(所要時間, クリティカルパス, 各ノードの終了時刻) を返す"""
+        level = self.level(parent)
+        finish, via, taken = {}, {}, {}
+        entries = set(level.entries)
+        for node_id in level.order:
+            if node_id in entries:
+                start = 0.0
+            else:
+                sources = [
+                    source for source, handle in level.incoming[node_id]
+                    if source in finish and taken.get(source, handle) == handle
+                ]
+                if not sources:
+                    continue
+                via[node_id] = max(sources, key=finish.get)
+                start = finish[via[node_id]]
+            finish[node_id] = start + self.duration(node_id, rng)
+            if branch_handles(self.graph.nodes[node_id]) is not None:
+                taken[node_id] = self._choose(node_id, rng)
+        if not finish:
+            return 0.0, [], finish
+        last = max(finish, key=finish.get)
+        path = [last]
+        while path[-1] in via:
+            path.append(via[path[-1]])
+        return finish[last], path[::-1], finish
+
+    def expected_duration(self, node_id):
+        """平均値での所要時間（分岐は最も長いものを取る）"""
+        node = self.graph.nodes[node_id]
+        own = self.timings.mean(node_id)
+        if node.type not in CONTAINER_TYPES:
+            return own
+        inner = self.longest(node_id)[0]
+        return own + inner * math.ceil(self._rounds(node) / self._workers(node))
+
+    def longest(self, parent="", predecessors=None):
+        """平均値での最長経路 (所要時間, 経路)。predecessorsを渡すとその依存関係で求める"""
+        level = self.level(parent)
+        if predecessors is None:
+            predecessors = {node_id: [source for source, _ in level.incoming[node_id]] for node_id in level.members}
+        successors = defaultdict(list)
+        for node_id, sources in predecessors.items():
+            for source in sources:
+                successors[source].append(node_id)
+        finish, via = {}, {}
+        order = topological_order({node_id: successors[node_id] for node_id in level.members})
+        for node_id in order:
+            sources = [source for source in predecessors.get(node_id, []) if source in finish]
+            if sources:
+                via[node_id] = max(sources, key=finish.get)
+            start = finish[via[node_id]] if node_id in via else 0.0
+            finish[node_id] = start + self.expected_duration(node_id)
+        if not finish:
+            return 0.0, []
+        last = max(finish, key=finish.get)
+        path = [last]
+        while path[-1] in via:
+            path.append(via[path[-1]])
+        return finish[last], path[::-1]
+
+
+# === データ依存関係 ===
+
+def _lift(graph, node_id, parent):
+    """node_idを含む、parent直下のノード（parentの外側ならNone）"""
+    while node_id in graph.nodes:
+        node = graph.nodes[node_id]
+        if node.parent == parent:
+            return node_id
+        node_id = node.parent
+    return None
+
+
+def _written_conversation_variables(node):
+    """会話変数を書き換えるノード（変数代入）が書き込む変数名"""
+    names = set()
+
+    def visit(value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if (key.endswith("selector") and isinstance(item, list) and len(item) >= 2
+                        and item[0] == "conversation" and key.startswith(("assigned", "variable"))):
+                    names.add(item[1])
+                else:
+                    visit(item)
+        elif isinstance(value, list):
+            for item in value:
+                visit(item)
+
+    if node.type in ("assigner", "variable-assigner"):
+        visit(node.data)
+    return names
+
+
+def _dominators(level):
+    """各ノードを支配するノード（起点からそのノードへのすべての経路が通るノード）"""
+    predecessors = defaultdict(list)
+    for node_id, targets in level.successors.items():
+        for target in targets:
+            predecessors[target].append(node_id)
+    dominators = {}
+    for node_id in level.order:
+        sources = [dominators[source] for source in predecessors[node_id] if source in dominators]
+        dominators[node_id] = (set.intersection(*sources) if sources else set()) | {node_id}
+    return dominators
+
+
+def data_dependencies(simulator, parent=""):
+    """parent直下のノードの依存先（エッジではなく実行に必要な先行ノード）
+
+    次の場合に依存があるとみなす:
+      - 変数参照（内側のノードからの参照はそのイテレーション・ループ単位にまとめる）
+      - 会話変数の書き込みと、その前後の読み込み
+      - 分岐ノードとその分岐の先にあるノード（分岐の結果で実行が決まるため）
+      - 回答ノード同士（チャットへの出力順を保つため）
+    """
+    graph = simulator.graph
+    level = simulator.level(parent)
+    members = set(level.members)
+    control_ancestors = {node_id: set() for node_id in level.order}
+    for node_id in level.order:
+        for target in level.successors[node_id]:
+            if target in control_ancestors:
+                control_ancestors[target] |= control_ancestors[node_id] | {node_id}
+
+    dependencies = {node_id: set() for node_id in level.members}
+    readers = defaultdict(set)
+    for reference in graph.references():
+        reader = _lift(graph, reference.node_id, parent)
+        if reader is None:
+            continue
+        if reference.scope == "conversation":
+            readers[reference.name.split(".")[0]].add(reader)
+        elif reference.scope in graph.nodes:
+            source = _lift(graph, reference.scope, parent)
+            if source in members and source != reader:
+                dependencies[reader].add(source)
+
+    for node in graph.nodes.values():
+        node_id = _lift(graph, node.id, parent)
+        if node_id not in control_ancestors:
+            continue
+        for name in _written_conversation_variables(node):
+            for reader in readers[name] - {node_id}:
+                if node_id in control_ancestors.get(reader, ()):
+                    dependencies[reader].add(node_id)
+                elif reader in control_ancestors[node_id]:
+                    dependencies[node_id].add(reader)
+    dominators = _dominators(level)
+    for node_id in level.order:
+        for dominator in dominators[node_id] - {node_id}:
+            if branch_handles(graph.nodes[dominator]) is not None:
+                dependencies[node_id].add(dominator)
+        if graph.nodes[node_id].type in TERMINAL_TYPES:
+            dependencies[node_id] |= {
+                ancestor for ancestor in control_ancestors[node_id] if graph.nodes[ancestor].type == "answer"
+            }
+    # 起点（開始ノード）は全ノードの前提とする
+    for node_id in level.members:
+        if node_id not in level.entries:
+            dependencies[node_id] |= set(level.entries)
+    return dependencies
+
+
+def _closure(dependencies, node_id, cache):
+    if node_id not in cache:
+        cache[node_id] = set()
+        for source in dependencies.get(node_id, ()):
+            cache[node_id] |= {source} | _closure(dependencies, source, cache)
+    return cache[node_id]
+
+
+def parallel_chains(simulator, parent=""):
+    """エッジでは直列だが互いに依存しないノードの並び（並列に実行できる直列チェーン）
+
+    Returns:
+        list[dict]: nodes（チェーンのノードID）, serial（直列の推定秒数）, parallel（並列の推定秒数）
+    """
+    level = simulator.level(parent)
+    dependencies = data_dependencies(simulator, parent)
+    cache = {}
+    predecessors = defaultdict(list)
+    for node_id, targets in level.successors.items():
+        for target in targets:
+            predecessors[target].append(node_id)
+
+    def independent(node_id, chain):
+        return all(
+            member not in _closure(dependencies, node_id, cache)
+            and node_id not in _closure(dependencies, member, cache)
+            for member in chain
+        )
+
+    chains = []
+    used = set()
+    entries = set(level.entries)
+    for node_id in level.order:
+        if node_id in used or node_id in entries:
+            continue
+        chain = [node_id]
+        current = node_id
+        while len(level.successors[current]) == 1:
+            target = level.successors[current][0]
+            if len(predecessors[target]) != 1 or target in used or not independent(target, chain):
+                break
+            chain.append(target)
+            current = target
+        if len(chain) < 2:
+            continue
+        used.update(chain)
+        durations = [simulator.expected_duration(member) for member in chain]
+        if sum(durations) - max(durations) < MIN_SAVING:
+            continue
+        chains.append({"nodes": chain, "serial": sum(durations), "parallel": max(durations)})
+    chains.sort(key=lambda chain: chain["parallel"] - chain["serial"])
+    return chains
+
+
+# === 分析 ===
+
+def analyze(simulator, runs, seed):
+    graph = simulator.graph
+    rng = random.Random(seed)
+    walls = []
+    critical_paths = Counter()
+    critical_nodes = Counter()
+    executed = Counter()
+    for _ in range(runs):
+        wall, path, finish = simulator.run("", rng)
+        walls.append(wall)
+        critical_paths[tuple(path)] += 1
+        critical_nodes.update(path)
+        executed.update(finish.keys())
+    walls.sort()
+
+    def percentile(ratio):
+        return walls[min(len(walls) - 1, int(ratio * len(walls)))] if walls else 0.0
+
+    expected, expected_path = simulator.longest()
+    dependencies = data_dependencies(simulator)
+    dataflow, dataflow_path = simulator.longest(predecessors={key: sorted(value) for key, value in dependencies.items()})
+    containers = [node.id for node in graph.nodes.values() if node.type in CONTAINER_TYPES]
+    path, count = critical_paths.most_common(1)[0] if critical_paths else ((), 0)
+    return {
+        "runs": runs,
+        "wall": {
+            "mean": statistics.fmean(walls) if walls else 0.0,
+            "p50": percentile(0.5), "p90": percentile(0.9), "p99": percentile(0.99),
+            "max": walls[-1] if walls else 0.0,
+        },
+        "expected": {"latency": expected, "nodes": expected_path},
+        "dataflow": {"latency": dataflow, "nodes": dataflow_path},
+        "critical_path": {"nodes": list(path), "share": count / runs if runs else 0.0},
+        "criticality": [
+            {"node_id": node_id, "share": critical_nodes[node_id] / runs, "executed": executed[node_id] / runs,
+             "mean": simulator.expected_duration(node_id)}
+            for node_id, _ in critical_nodes.most_common()
+        ],
+        "parallel_chains": [
+            {"parent": parent, **chain}
+            for parent in [""] + containers
+            for chain in parallel_chains(simulator, parent)
+        ],
+        "cycle": find_cycle(simulator.level().successors),
+    }
+
+
+def _label(graph, node_id):
+    node = graph.nodes[node_id]
+    return node.title.strip() or node_id
+
+
+def _chain_label(graph, nodes):
+    return " → ".join(_label(graph, node_id) for node_id in nodes)
+
+
+def print_report(path, graph, result, top):
+    print(f"=== {path} ===")
+    print(f"  アプリ: {graph.name} (mode: {graph.mode}) / ノード: {len(graph.nodes)} / エッジ: {len(graph.edges)}")
+    if result["cycle"]:
+        print(f"  警告: 循環があるため、循環内のノードは除いて計算します（{_chain_label(graph, result['cycle'])}）")
+    wall = result["wall"]
+    print(f"\n  所要時間（{result['runs']}回のシミュレーション）:")
+    print(f"    平均 {wall['mean']:.1f}秒 / 中央値 {wall['p50']:.1f}秒 / p90 {wall['p90']:.1f}秒 / "
+          f"p99 {wall['p99']:.1f}秒 / 最大 {wall['max']:.1f}秒")
+    print(f"    平均値での見積もり（最長の分岐）: {result['expected']['latency']:.1f}秒")
+
+    critical = result["critical_path"]
+    print(f"\n  クリティカルパス（{critical['share']:.0%} の実行で最長）:")
+    print(f"    {_chain_label(graph, critical['nodes'])}")
+    print("\n  ノード別（クリティカルパスに乗る割合の上位）:")
+    print(f"    {'割合':>6} {'実行率':>6} {'平均秒':>7}  ノード")
+    for item in result["criticality"][:top]:
+        node = graph.nodes[item["node_id"]]
+        print(f"    {item['share']:>6.0%} {item['executed']:>6.0%} {item['mean']:>7.1f}  {_label(graph, node.id)} ({node.type})")
+
+    chains = result["parallel_chains"]
+    print("\n  並列化できる直列チェーン（互いの出力を参照していない）:")
+    if not chains:
+        print("    なし")
+    for chain in chains:
+        where = f"[{_label(graph, chain['parent'])} 内] " if chain["parent"] else ""
+        print(f"    {where}{_chain_label(graph, chain['nodes'])}")
+        print(f"      直列 {chain['serial']:.1f}秒 → 並列 {chain['parallel']:.1f}秒"
+              f"（{chain['serial'] - chain['parallel']:.1f}秒短縮の見込み）")
+    dataflow = result["dataflow"]["latency"]
+    print(f"\n  データ依存だけで並べた場合の見積もり（最長の分岐）: {dataflow:.1f}秒"
+          f"（現在 {result['expected']['latency']:.1f}秒）")
+
+
+def load_timings(path):
+    """所要時間モデルのファイル（JSON/YAML）を読み込む"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"所要時間モデルの形式が不正です: {path}")
+    return dict(data.get("types") or {}), dict(data.get("nodes") or {})
+
+
+def split_timings(graph, types, values, strict=True):
+    """ノード種別・ノードID・タイトルが混在した指定を (種別ごと, ノードごと) に分ける
+
+    strictでなければ、このDSLにないノードの指定は無視する（複数のDSLを分析する場合）。
+    """
+    known_types = set(NODE_LATENCY) | {node.type for node in graph.nodes.values()}
+    known_nodes = set(graph.nodes) | {node.title for node in graph.nodes.values()}
+    types = dict(types)
+    nodes = {}
+    for key, value in values.items():
+        if key in known_types:
+            types[key] = value
+        elif strict or key in known_nodes:
+            nodes[key] = value
+    return types, nodes
+
+
+def _parse_assignments(values, option):
+    result = {}
+    for value in values:
+        key, sep, item = value.rpartition("=")
+        if not sep or not key:
+            raise ValueError(f"{option} は KEY=VALUE の形式で指定してください: {value}")
+        result[key] = item
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DSLの並列分岐レイテンシ分析")
+    parser.add_argument("paths", nargs="*", type=Path, help="DSLファイルまたはディレクトリ（既定: dsl/generated）")
+    parser.add_argument("--timings", type=Path, help="所要時間モデルのファイル（JSON/YAML）")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=SECONDS",
+                        help="所要時間の平均（KEYはノード種別・ノードID・タイトル。複数指定可）")
+    parser.add_argument("--branch", action="append", default=[], metavar="NODE=HANDLE",
+                        help="分岐ノードの選択を固定する（既定: 等確率）")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_REPETITIONS,
+                        help=f"イテレーション・ループの繰り返し回数（既定: {DEFAULT_REPETITIONS}）")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help=f"シミュレーション回数（既定: {DEFAULT_RUNS}）")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="乱数のシード")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help=f"表示するノード数（既定: {DEFAULT_TOP}）")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args()
+
+    try:
+        types, nodes = load_timings(args.timings) if args.timings else ({}, {})
+        overrides = {key: float(value) for key, value in _parse_assignments(args.overrides, "--set").items()}
+        branches = _parse_assignments(args.branch, "--branch")
+    except (OSError, yaml.YAMLError, ValueError) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+
+    files = list(iter_dsl_files(args.paths or DEFAULT_ROOTS))
+    if not files:
+        print("エラー: DSLファイルが見つかりません", file=sys.stderr)
+        return 1
+
+    reports = []
+    status = 0
+    for index, path in enumerate(files):
+        try:
+            graph = DslGraph.from_file(path)
+        except (OSError, yaml.YAMLError, AttributeError) as e:
+            print(f"エラー: {path} を読み込めません: {e}", file=sys.stderr)
+            status = 1
+            continue
+        if not graph.is_workflow:
+            continue
+        try:
+            timings = TimingModel(graph, *split_timings(graph, types, {**nodes, **overrides}, strict=len(files) == 1))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"エラー: {path}: {e.args[0]}", file=sys.stderr)
+            status = 1
+            continue
+        simulator = Simulator(graph, timings, args.iterations, {key: value for key, value in branches.items() if key in graph.nodes})
+        result = analyze(simulator, args.runs, args.seed)
+        if args.json:
+            reports.append({"path": str(path), "name": graph.name, "mode": graph.mode, **result})
+        else:
+            if index:
+                print()
+            print_report(path, graph, result, args.top)
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
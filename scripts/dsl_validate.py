@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+DSLの静的検証とコスト見積もり
+
+Dify Cloudへインポートせずに、DSL（dsl/generated/*.dsl など）のグラフ構造を検証する。
+
+検証項目:
+  - エッジの接続元・接続先が存在するか、分岐のハンドル（if-elseの条件・分類）が正しいか
+  - 開始ノードから到達できないノード、終了（end / answer）に到達しない行き止まり
+  - 未定義の変数参照（環境変数・会話変数・システム変数・上流にないノードの出力）
+  - 循環（ループはloopノードで表すため、エッジの循環はエラー）
+
+あわせて、開始ノードから終端までの各経路のLLM・HTTPノード数と推定所要時間を求め、
+最も時間のかかる経路（クリティカルパス）を表示する。並列分岐は同時に実行されるため、
+ワークフロー全体の所要時間はクリティカルパスの長さで見積もる。
+
+使用方法:
+    python scripts/dsl_validate.py                                  # dsl/generated を検証
+    python scripts/dsl_validate.py dsl/templates/DeepResearch.yml --max-paths 5
+    python scripts/dsl_validate.py --json dsl/generated
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import yaml
+
+from dsl_graph import NOTE_TYPE, DslGraph, iter_dsl_files
+
+# === 設定 ===
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_ROOTS = [PROJECT_ROOT / "dsl" / "generated"]
+
+# ノード種別ごとの推定所要時間（秒）。ここにない種別は DEFAULT_LATENCY
+NODE_LATENCY = {
+    "llm": 8.0,
+    "agent": 20.0,
+    "parameter-extractor": 4.0,
+    "question-classifier": 3.0,
+    "http-request": 1.0,
+    "tool": 3.0,
+    "knowledge-retrieval": 1.0,
+    "document-extractor": 1.0,
+    "code": 0.1,
+}
+DEFAULT_LATENCY = 0.01
+
+# イテレーション・ループの推定繰り返し回数（入力の件数は実行時まで分からないため）
+DEFAULT_REPETITIONS = 3
+
+# LLM呼び出し・HTTP呼び出しとして数えるノード種別
+LLM_TYPES = {"llm", "agent", "parameter-extractor", "question-classifier"}
+HTTP_TYPES = {"http-request"}
+
+# 終端ノード（ここで終わる経路は行き止まりではない）
+TERMINAL_TYPES = {"end", "answer"}
+# コンテナ（内部に子ノードを持つ）とその開始ノード
+CONTAINER_TYPES = {"iteration", "loop"}
+CONTAINER_START_TYPES = {"iteration-start", "loop-start"}
+
+# システム変数（{{#sys.X#}}）
+SYSTEM_VARIABLES = {
+    "query", "files", "conversation_id", "user_id", "dialogue_count",
+    "app_id", "workflow_id", "workflow_run_id",
+}
+
+# ノード種別ごとの固定の出力変数（code・start 等はノードの設定から求める）
+NODE_OUTPUTS = {
+    "llm": {"text", "reasoning_content", "structured_output", "usage", "files"},
+    "http-request": {"body", "status_code", "headers", "files"},
+    "template-transform": {"output"},
+    "knowledge-retrieval": {"result"},
+    "question-classifier": {"class_name", "class_id", "usage"},
+    "document-extractor": {"text"},
+    "variable-aggregator": {"output"},
+    "variable-assigner": {"output"},
+    "iteration": {"output", "item", "index"},
+    "list-operator": {"result", "first_record", "last_record"},
+}
+# 出力がツール・プラグインごとに異なるため、変数名を検証しない種別
+DYNAMIC_OUTPUT_TYPES = {"tool", "agent"}
+
+# 表示する経路数
+DEFAULT_PATHS = 10
+# 列挙する経路数の上限（分岐の組み合わせで経路数が爆発するのを防ぐ）
+MAX_PATHS = 10000
+
+ERROR = "error"
+WARNING = "warning"
+LEVEL_LABELS = {ERROR: "エラー", WARNING: "警告"}
+
+
+@dataclass
+class Issue:
+    level: str
+    code: str
+    node_id: str
+    message: str
+
+
+@dataclass
+class PathCost:
+    """経路1本のコスト（イテレーション・ループ内は推定繰り返し回数分を含む）"""
+    nodes: list = field(default_factory=list)
+    latency: float = 0.0
+    llm: int = 0
+    http: int = 0
+
+
+# === グラフ操作 ===
+
+def children(graph, parent=""):
+    """parent直下のノードID（注釈ノードを除く）。parentが空なら最上位のノード"""
+    return [
+        node.id for node in graph.nodes.values()
+        if node.parent == parent and node.type != NOTE_TYPE
+    ]
+
+
+def adjacency(graph, node_ids):
+    """node_ids間のエッジの隣接リスト（接続先のないエッジは除く）"""
+    members = set(node_ids)
+    successors = {node_id: [] for node_id in node_ids}
+    for edge in graph.edges:
+        if edge.source in members and edge.target in members:
+            successors[edge.source].append(edge.target)
+    return successors
+
+
+def entry_nodes(graph, parent=""):
+    """経路の起点。最上位は開始ノード、イテレーション・ループ内はその開始ノード"""
+    if not parent:
+        return [node_id for node_id in children(graph) if graph.nodes[node_id].type == "start"]
+    start_node_id = graph.nodes[parent].data.get("start_node_id")
+    if start_node_id in graph.nodes:
+        return [start_node_id]
+    return [node_id for node_id in children(graph, parent) if graph.nodes[node_id].type in CONTAINER_START_TYPES]
+
+
+def reachable(successors, sources):
+    """sourcesから到達できるノードの集合"""
+    seen = set(sources)
+    queue = deque(sources)
+    while queue:
+        for target in successors.get(queue.popleft(), []):
+            if target not in seen:
+                seen.add(target)
+                queue.append(target)
+    return seen
+
+
+def topological_order(successors):
+    """トポロジカル順（循環があれば、循環に含まれるノードは結果に現れない）"""
+    indegree = {node_id: 0 for node_id in successors}
+    for targets in successors.values():
+        for target in targets:
+            indegree[target] += 1
+    queue = deque(node_id for node_id, count in indegree.items() if count == 0)
+    order = []
+    while queue:
+        node_id = queue.popleft()
+        order.append(node_id)
+        for target in successors[node_id]:
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                queue.append(target)
+    return order
+
+
+def find_cycle(successors):
+    """循環を1つ見つけて、そのノードIDのリストを返す（なければ空）"""
+    state = {}
+    for root in successors:
+        if root in state:
+            continue
+        stack = [(root, iter(successors[root]))]
+        state[root] = "active"
+        trail = [root]
+        while stack:
+            node_id, targets = stack[-1]
+            target = next(targets, None)
+            if target is None:
+                stack.pop()
+                trail.pop()
+                state[node_id] = "done"
+            elif state.get(target) == "active":
+                return trail[trail.index(target):] + [target]
+            elif target not in state:
+                state[target] = "active"
+                trail.append(target)
+                stack.append((target, iter(successors[target])))
+    return []
+
+
+def is_descendant(graph, node_id, container_id):
+    """node_idがcontainer_id（イテレーション・ループ）の内側にあるか"""
+    parent = graph.nodes[node_id].parent
+    while parent:
+        if parent == container_id:
+            return True
+        parent = graph.nodes[parent].parent if parent in graph.nodes else ""
+    return False
+
+
+def ancestors_of(graph, node_id, predecessors):
+    """node_idの実行前に値が確定しているノード（上流ノード・所属するコンテナとその上流）"""
+    result = set()
+    current = node_id
+    while current:
+        upstream = reachable(predecessors, [current])
+        upstream.discard(current)
+        result |= upstream
+        parent = graph.nodes[current].parent if current in graph.nodes else ""
+        if parent:
+            result.add(parent)
+        current = parent
+    return result
+
+
+# === 検証 ===
+
+def node_outputs(node):
+    """ノードの出力変数名（不明な場合はNone = 検証しない）"""
+    data = node.data
+    if node.type in DYNAMIC_OUTPUT_TYPES:
+        return None
+    if node.type == "start":
+        return {variable.get("variable") for variable in data.get("variables") or []} | {"sys"}
+    if node.type == "code":
+        return set(data.get("outputs") or {})
+    if node.type == "parameter-extractor":
+        return {parameter.get("name") for parameter in data.get("parameters") or []} | {"__is_success", "__reason", "__usage"}
+    if node.type == "loop":
+        return {variable.get("label") for variable in data.get("loop_variables") or []} | {"index"}
+    if node.type in ("variable-aggregator", "variable-assigner"):
+        groups = (data.get("advanced_settings") or {}).get("groups") or []
+        return NODE_OUTPUTS[node.type] | {group.get("group_name") for group in groups}
+    return NODE_OUTPUTS.get(node.type, set() if node.type in TERMINAL_TYPES | {"if-else", "assigner"} else None)
+
+
+def branch_handles(node):
+    """分岐ノードの出力ハンドル（分岐しないノードはNone）"""
+    if node.type == "if-else":
+        cases = node.data.get("cases") or [{"case_id": "true"}]    # 旧形式は true / false の2分岐
+        return {str(case.get("case_id")) for case in cases} | {"false"}
+    if node.type == "question-classifier":
+        return {str(item.get("id")) for item in node.data.get("classes") or []}
+    return None
+
+
+def _check_structure(graph, issues):
+    raw_nodes = ((graph.dsl.get("workflow") or {}).get("graph") or {}).get("nodes") or []
+    seen = set()
+    for raw in raw_nodes:
+        node_id = str(raw.get("id", ""))
+        if node_id in seen:
+            issues.append(Issue(ERROR, "duplicate-node", node_id, "ノードIDが重複しています"))
+        seen.add(node_id)
+
+    starts = entry_nodes(graph)
+    if not starts:
+        issues.append(Issue(ERROR, "no-start", "", "開始ノード（start）がありません"))
+    elif len(starts) > 1:
+        issues.append(Issue(ERROR, "multiple-start", starts[1], "開始ノードが複数あります"))
+    terminal = "end" if graph.mode == "workflow" else "answer"
+    if not any(node.type == terminal for node in graph.nodes.values()):
+        issues.append(Issue(ERROR, "no-terminal", "", f"{terminal} ノードがありません（mode: {graph.mode}）"))
+
+    edge_keys = set()
+    used_handles = defaultdict(set)
+    for edge in graph.edges:
+        for role, node_id in (("接続元", edge.source), ("接続先", edge.target)):
+            if node_id not in graph.nodes:
+                issues.append(Issue(ERROR, "dangling-edge", edge.id, f"エッジの{role}ノードがありません: {node_id}"))
+        if edge.source not in graph.nodes or edge.target not in graph.nodes:
+            continue
+        source, target = graph.nodes[edge.source], graph.nodes[edge.target]
+        key = (edge.source, edge.source_handle, edge.target, edge.target_handle)
+        if key in edge_keys:
+            issues.append(Issue(WARNING, "duplicate-edge", edge.id, f"同じ接続のエッジが重複しています: {edge.source} → {edge.target}"))
+        edge_keys.add(key)
+        if edge.source == edge.target:
+            issues.append(Issue(ERROR, "self-loop", edge.source, "ノードが自分自身に接続されています"))
+        if source.parent != target.parent:
+            issues.append(Issue(
+                ERROR, "cross-container-edge", edge.id,
+                f"イテレーション・ループの内外をまたぐエッジです: {edge.source} → {edge.target}",
+            ))
+        if target.type in ("start", *CONTAINER_START_TYPES) or source.type in (TERMINAL_TYPES - {"answer"}) | {NOTE_TYPE}:
+            issues.append(Issue(ERROR, "invalid-edge", edge.id, f"{source.type} → {target.type} は接続できません"))
+        handles = branch_handles(source)
+        if handles is not None:
+            if edge.source_handle not in handles:
+                issues.append(Issue(ERROR, "unknown-handle", edge.source, f"分岐にないハンドルからのエッジです: {edge.source_handle}"))
+            used_handles[edge.source].add(edge.source_handle)
+
+    for node in graph.nodes.values():
+        handles = branch_handles(node)
+        if handles:
+            for handle in sorted(handles - used_handles[node.id]):
+                issues.append(Issue(WARNING, "unconnected-branch", node.id, f"分岐 {handle} の接続先がありません"))
+        if node.type in CONTAINER_TYPES and not entry_nodes(graph, node.id):
+            issues.append(Issue(ERROR, "no-container-start", node.id, f"{node.type} の開始ノードがありません"))
+
+
+def _check_reachability(graph, issues):
+    for parent in [""] + [node.id for node in graph.nodes.values() if node.type in CONTAINER_TYPES]:
+        members = children(graph, parent)
+        successors = adjacency(graph, members)
+        entries = entry_nodes(graph, parent)
+        if entries:
+            for node_id in members:
+                if node_id not in reachable(successors, entries):
+                    issues.append(Issue(WARNING, "unreachable", node_id, "開始ノードから到達できません"))
+        cycle = find_cycle(successors)
+        if cycle:
+            issues.append(Issue(ERROR, "cycle", cycle[0], "循環しています: " + " → ".join(cycle)))
+        if not parent:
+            for node_id in members:
+                node = graph.nodes[node_id]
+                if not successors[node_id] and node.type not in TERMINAL_TYPES and node_id in reachable(successors, entries):
+                    issues.append(Issue(WARNING, "dead-end", node_id, f"終了（{'/'.join(sorted(TERMINAL_TYPES))}）に到達しない行き止まりです"))
+
+
+def _check_references(graph, issues):
+    predecessors = defaultdict(list)
+    for edge in graph.edges:
+        predecessors[edge.target].append(edge.source)
+    environment = {variable.get("name") for variable in graph.environment_variables}
+    conversation = {variable.get("name") for variable in graph.conversation_variables}
+    ancestors = {}
+
+    for reference in graph.references():
+        scope, name = reference.scope, reference.name
+        head = name.split(".")[0]
+        if scope == "env":
+            defined, label = head in environment, "環境変数"
+        elif scope == "conversation":
+            defined, label = head in conversation, "会話変数"
+        elif scope == "sys":
+            defined, label = head in SYSTEM_VARIABLES, "システム変数"
+        elif scope not in graph.nodes:
+            issues.append(Issue(ERROR, "undefined-node", reference.node_id, f"存在しないノードを参照しています: {scope}.{name}"))
+            continue
+        else:
+            if reference.node_id not in ancestors:
+                ancestors[reference.node_id] = ancestors_of(graph, reference.node_id, predecessors)
+            # イテレーション・ループは内側のノードの出力を集める（output_selector 等）
+            upstream = scope in ancestors[reference.node_id] or is_descendant(graph, scope, reference.node_id)
+            if scope != reference.node_id and not upstream:
+                issues.append(Issue(ERROR, "not-upstream", reference.node_id, f"上流にないノードの出力を参照しています: {scope}.{name}"))
+                continue
+            outputs = node_outputs(graph.nodes[scope])
+            defined, label = outputs is None or head in outputs, f"{graph.nodes[scope].type} の出力"
+        if not defined:
+            issues.append(Issue(ERROR, "undefined-variable", reference.node_id, f"未定義の{label}を参照しています: {scope}.{name}"))
+
+
+def validate(graph):
+    """DSLのグラフ構造を検証し、Issueのリストを返す（チャット型のアプリは対象外で空）"""
+    if not graph.is_workflow:
+        return []
+    issues = []
+    _check_structure(graph, issues)
+    _check_reachability(graph, issues)
+    _check_references(graph, issues)
+    return issues
+
+
+# === コスト見積もり ===
+
+class CostModel:
+    """ノードごとのコスト（所要時間・LLM・HTTP呼び出し数）の見積もり
+
+    イテレーション・ループは内部のクリティカルパスのコスト×繰り返し回数とする
+    （並列イテレーションは並列数で割る）。
+    """
+
+    def __init__(self, graph, latency=None, repetitions=DEFAULT_REPETITIONS):
+        self.graph = graph
+        self.latency = {**NODE_LATENCY, **(latency or {})}
+        self.repetitions = repetitions
+        self._costs = {}
+
+    def node_cost(self, node_id):
+        if node_id in self._costs:
+            return self._costs[node_id]
+        node = self.graph.nodes[node_id]
+        cost = PathCost([node_id], self.latency.get(node.type, DEFAULT_LATENCY),
+                        int(node.type in LLM_TYPES), int(node.type in HTTP_TYPES))
+        if node.type in CONTAINER_TYPES:
+            self._costs[node_id] = cost     # 入れ子の不正な循環で無限再帰しないように仮置きする
+            inner = self.critical_path(node_id)
+            repetitions = self.repetitions
+            if node.type == "loop":
+                repetitions = min(repetitions, node.data.get("loop_count") or repetitions)
+            rounds = repetitions
+            if node.data.get("is_parallel"):
+                rounds = -(-repetitions // max(1, node.data.get("parallel_nums") or 1))
+            cost = PathCost([node_id], cost.latency + inner.latency * rounds,
+                            cost.llm + inner.llm * repetitions, cost.http + inner.http * repetitions)
+        self._costs[node_id] = cost
+        return cost
+
+    def _extend(self, path, node_id):
+        cost = self.node_cost(node_id)
+        return PathCost(path.nodes + [node_id], path.latency + cost.latency, path.llm + cost.llm, path.http + cost.http)
+
+    def critical_path(self, parent=""):
+        """parent直下で最も所要時間の長い経路（循環しているノードは除く）"""
+        members = children(self.graph, parent)
+        successors = adjacency(self.graph, members)
+        best = {node_id: self._extend(PathCost(), node_id) for node_id in entry_nodes(self.graph, parent)}
+        for node_id in topological_order(successors):
+            if node_id not in best:
+                continue
+            for target in successors[node_id]:
+                candidate = self._extend(best[node_id], target)
+                if target not in best or candidate.latency > best[target].latency:
+                    best[target] = candidate
+        return max(best.values(), key=lambda path: path.latency, default=PathCost())
+
+    def paths(self, limit=MAX_PATHS):
+        """開始ノードから終端までの全経路（上限limit本）と、上限で打ち切ったかどうか"""
+        members = children(self.graph)
+        successors = adjacency(self.graph, members)
+        results = []
+        stack = [self._extend(PathCost(), node_id) for node_id in entry_nodes(self.graph)]
+        while stack:
+            path = stack.pop()
+            targets = [target for target in successors[path.nodes[-1]] if target not in path.nodes]
+            if not targets:
+                results.append(path)
+                if len(results) >= limit:
+                    return results, True
+            stack.extend(self._extend(path, target) for target in reversed(targets))
+        return results, False
+
+
+def analyze(graph, repetitions=DEFAULT_REPETITIONS):
+    """検証結果とコスト見積もりをまとめて返す
+
+    循環がある場合、クリティカルパスは循環するノードを除いた値になり経路一覧と食い違うため
+    None とする（経路一覧は循環を1周で打ち切った経路）。
+    """
+    issues = validate(graph)
+    model = CostModel(graph, repetitions=repetitions)
+    paths, truncated = model.paths() if graph.is_workflow else ([], False)
+    paths.sort(key=lambda path: (-path.latency, -path.llm, -path.http))
+    has_cycle = any(issue.code == "cycle" for issue in issues)
+    if not graph.is_workflow:
+        critical = PathCost()
+    else:
+        critical = None if has_cycle else model.critical_path()
+    return {
+        "issues": issues,
+        "critical_path": critical,
+        "paths": paths,
+        "truncated": truncated,
+    }
+
+
+# === 出力 ===
+
+def _path_label(graph, path):
+    return " → ".join(graph.nodes[node_id].title or node_id for node_id in path.nodes)
+
+
+def print_report(path, graph, result, max_paths):
+    print(f"=== {path} ===")
+    print(f"  アプリ: {graph.name} (mode: {graph.mode}) / ノード: {len(graph.nodes)} / エッジ: {len(graph.edges)}")
+    if not graph.is_workflow:
+        print("  チャット型のアプリのため検証対象外")
+        return
+    issues = result["issues"]
+    for issue in issues:
+        target = f" [{issue.node_id}]" if issue.node_id else ""
+        print(f"  {LEVEL_LABELS[issue.level]}{target} {issue.message}")
+    if not issues:
+        print("  問題なし")
+
+    critical = result["critical_path"]
+    if critical is None:
+        print("\n  クリティカルパス: 循環があるため算出しない（循環を解消してから再検証）")
+    else:
+        print(f"\n  クリティカルパス: 推定 {critical.latency:.1f}秒 / LLM {critical.llm} / HTTP {critical.http}")
+        print(f"    {_path_label(graph, critical)}")
+    paths = result["paths"]
+    suffix = f"（上限 {MAX_PATHS} 本で打ち切り）" if result["truncated"] else ""
+    print(f"\n  経路: {len(paths)} 本{suffix}")
+    for item in paths[:max_paths]:
+        print(f"    {item.latency:>7.1f}秒  LLM {item.llm:>2}  HTTP {item.http:>2}  {_path_label(graph, item)}")
+    if len(paths) > max_paths:
+        print(f"    ...（ほか {len(paths) - max_paths} 本）")
+
+
+def result_to_json(path, graph, result):
+    return {
+        "path": str(path),
+        "name": graph.name,
+        "mode": graph.mode,
+        "issues": [asdict(issue) for issue in result["issues"]],
+        "critical_path": asdict(result["critical_path"]) if result["critical_path"] is not None else None,
+        "paths": [asdict(item) for item in result["paths"]],
+        "truncated": result["truncated"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DSLの静的検証とコスト見積もり")
+    parser.add_argument("paths", nargs="*", type=Path, help="DSLファイルまたはディレクトリ（既定: dsl/generated）")
+    parser.add_argument("--max-paths", type=int, default=DEFAULT_PATHS, help=f"表示する経路数（既定: {DEFAULT_PATHS}）")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_REPETITIONS,
+                        help=f"イテレーション・ループの推定繰り返し回数（既定: {DEFAULT_REPETITIONS}）")
+    parser.add_argument("--strict", action="store_true", help="警告もエラーとして扱う（終了コード1）")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args()
+
+    files = list(iter_dsl_files(args.paths or DEFAULT_ROOTS))
+    if not files:
+        print("エラー: DSLファイルが見つかりません", file=sys.stderr)
+        return 1
+
+    failed = False
+    reports = []
+    for index, path in enumerate(files):
+        try:
+            graph = DslGraph.from_file(path)
+        except (OSError, yaml.YAMLError, AttributeError) as e:
+            print(f"エラー: {path} を読み込めません: {e}", file=sys.stderr)
+            failed = True
+            continue
+        result = analyze(graph, args.iterations)
+        failing_levels = {ERROR, WARNING} if args.strict else {ERROR}
+        failed |= any(issue.level in failing_levels for issue in result["issues"])
+        if args.json:
+            reports.append(result_to_json(path, graph, result))
+        else:
+            if index:
+                print()
+            print_report(path, graph, result, args.max_paths)
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
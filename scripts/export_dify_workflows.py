@@ -9,19 +9,38 @@ Dify CloudからワークフローをDSL形式でエクスポートし、
     環境変数を設定してから実行:
     - DIFY_REFRESH_TOKEN: Dify Cloudのリフレッシュトークン
     - DIFY_BASE_URL: Dify CloudのベースURL（デフォルト: https://cloud.dify.ai）
+    - DIFY_EXPORT_DIR: 出力先ディレクトリ（デフォルト: dsl/exported）
+
+    python scripts/export_dify_workflows.py              # 4並列でエクスポート
+    python scripts/export_dify_workflows.py --workers 1  # 1件ずつ（従来の動作）
+    python scripts/export_dify_workflows.py --incremental  # 更新されたアプリのみ取得
+    python scripts/export_dify_workflows.py --archive dsl/exported.zip  # 1つのzipに出力
+
+    アクセストークンは ~/.cache/dify-export/tokens.json（DIFY_TOKEN_CACHE で変更可）に
+    有効期限とともにキャッシュし、次回以降の実行で再利用する。
 
 トークン取得方法:
     Claude Codeで /refresh-dify-token スキルを実行
 """
 
+import argparse
+import base64
+import hashlib
 import os
 import json
 import re
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+
+from dsl_bundle import DslBundleWriter
 
 
 # 設定
@@ -29,12 +48,142 @@ DIFY_BASE_URL = os.environ.get("DIFY_BASE_URL", "https://cloud.dify.ai")
 DIFY_REFRESH_TOKEN = os.environ.get("DIFY_REFRESH_TOKEN", "").strip()
 INCLUDE_SECRET = os.environ.get("INCLUDE_SECRET", "false").lower() == "true"
 
-# 出力先ディレクトリ
+# 出力先ディレクトリ（DIFY_EXPORT_DIR で変更可）
 SCRIPT_DIR = Path(__file__).parent
-OUTPUT_DIR = SCRIPT_DIR.parent / "dsl" / "exported"
+OUTPUT_DIR = Path(os.environ.get("DIFY_EXPORT_DIR", SCRIPT_DIR.parent / "dsl" / "exported"))
+MANIFEST_NAME = "_manifest.json"
+
+# 並列エクスポート
+DEFAULT_WORKERS = 4
+REQUEST_TIMEOUT = 60
+# 429/5xx・接続エラー時の再試行
+MAX_RETRIES = 5
+RETRY_BACKOFF = 1.0      # 秒。Retry-Afterがない場合は 1, 2, 4, ... 秒待つ
+MAX_RETRY_WAIT = 120     # 秒。Retry-Afterがこれより長くても打ち切る
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# DSLの読み込み（libyamlがあればC実装。出力は純Python版とバイト単位で同一）
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# アクセストークンのキャッシュ（実行をまたいで再利用する）
+TOKEN_CACHE_PATH = Path(os.environ.get(
+    "DIFY_TOKEN_CACHE", Path.home() / ".cache" / "dify-export" / "tokens.json"
+))
+TOKEN_REFRESH_MARGIN = 300   # 秒。有効期限までこれより短ければ事前に更新する
+DEFAULT_TOKEN_TTL = 3600     # 秒。access_tokenから有効期限を読めない場合の想定
+
+# エクスポート対象のアプリ種別
+EXPORT_MODES = ("workflow", "advanced-chat")
+
+
+def parse_retry_after(value, now=None):
+    """Retry-Afterヘッダー（秒数またはHTTP日付）を待ち秒数に変換（解釈できなければNone）"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+class ConsoleSession:
+    """コンソールAPI用のHTTPセッション
 
+    keep-aliveの接続プールを並列数ぶん確保し、TLS接続を使い回す。
+    429・5xx・接続エラーは再試行し、Retry-Afterがあればその秒数待つ。
+    レート制限の待ちは全スレッドで共有する（1件が429を受けたら他の要求も待つ）。
 
-def refresh_access_token() -> tuple[str, str]:
+    tokens（TokenManager）を設定すると、認証ヘッダーを常に最新のトークンに
+    差し替え、401を受けたらトークンを更新して1回だけ再送する。
+    """
+
+    def __init__(self, pool_size=DEFAULT_WORKERS, max_retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT, tokens=None):
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.tokens = tokens
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _wait_for_rate_limit(self):
+        with self._lock:
+            delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _defer(self, delay):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+    def request(self, method, url, **kwargs):
+        """要求を送信する（再試行を使い切った場合は最後のレスポンスを返す）"""
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        auth_retried = False
+        while True:
+            access_token = None
+            if self.tokens is not None:
+                access_token, auth_headers = self.tokens.auth_headers()
+                headers = {
+                    key: value for key, value in (kwargs.get("headers") or {}).items()
+                    if key not in auth_headers
+                }
+                kwargs["headers"] = {**headers, **auth_headers}
+            self._wait_for_rate_limit()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+                attempt += 1
+                continue
+
+            if response.status_code == 401 and self.tokens is not None and not auth_retried:
+                response.close()
+                self.tokens.invalidate(access_token)
+                auth_retried = True
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                return response
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = RETRY_BACKOFF * 2 ** attempt
+            delay = min(delay, MAX_RETRY_WAIT)
+            if response.status_code == 429:
+                self._defer(delay)
+            else:
+                time.sleep(delay)
+            response.close()
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+def refresh_access_token(session=None) -> tuple[str, str]:
     """
     リフレッシュトークンから新しいaccess_tokenとcsrf_tokenを取得
 
@@ -48,7 +197,7 @@ def refresh_access_token() -> tuple[str, str]:
         "Cookie": f"__Host-refresh_token={DIFY_REFRESH_TOKEN}"
     }
 
-    response = requests.post(url, headers=headers)
+    response = (session or requests).post(url, headers=headers)
     response.raise_for_status()
 
     # レスポンスのSet-Cookieからトークンを取得
@@ -80,14 +229,158 @@ def get_request_headers(access_token: str, csrf_token: str = ""):
     return headers
 
 
-def get_apps(access_token: str, csrf_token: str = ""):
+def token_expiry(access_token):
+    """access_token（JWT）のexpを読む（検証はしない。読めなければNone）"""
+    parts = access_token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+        return float(payload["exp"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class TokenManager:
+    """access_token / csrf_token の取得・キャッシュ・更新
+
+    トークンは有効期限とともにディスク（TOKEN_CACHE_PATH）へ保存し、次回以降の実行で
+    再利用する。キャッシュはベースURLとリフレッシュトークンの組ごとに分ける。
+    有効期限の TOKEN_REFRESH_MARGIN 秒前（有効期間の半分が上限）になったら事前に更新し、401を受けた場合も
+    更新する。複数スレッドが同時に更新を要求しても、リフレッシュは1回だけ行う。
+    """
+
+    def __init__(self, refresh_func=refresh_access_token, cache_path=TOKEN_CACHE_PATH,
+                 cache_key=None, margin=TOKEN_REFRESH_MARGIN):
+        """
+        Args:
+            refresh_func: (access_token, csrf_token) を返すリフレッシュ処理
+            cache_path: キャッシュファイル（Noneならディスクに保存しない）
+        """
+        self.refresh_func = refresh_func
+        self.cache_path = cache_path
+        self.cache_key = cache_key or hashlib.sha256(
+            f"{DIFY_BASE_URL}\n{DIFY_REFRESH_TOKEN}".encode("utf-8")
+        ).hexdigest()[:16]
+        self.margin = margin
+        self.refresh_count = 0
+        self.from_cache = False
+        self._lock = threading.Lock()
+        self._token = None
+
+    def _is_fresh(self, token):
+        return token is not None and time.time() < token["refresh_at"]
+
+    def _set(self, access_token, csrf_token, expires_at, refresh_at):
+        self._token = {
+            "access_token": access_token,
+            "csrf_token": csrf_token,
+            "expires_at": expires_at,
+            "refresh_at": refresh_at,
+            "headers": get_request_headers(access_token, csrf_token),
+        }
+
+    def _refresh_locked(self):
+        access_token, csrf_token = self.refresh_func()
+        now = time.time()
+        expires_at = token_expiry(access_token) or now + DEFAULT_TOKEN_TTL
+        # 有効期間がmarginより短いトークンでも毎回更新しないよう、期間の半分を上限にする
+        refresh_at = expires_at - min(self.margin, max(expires_at - now, 0) / 2)
+        self._set(access_token, csrf_token, expires_at, refresh_at)
+        self.refresh_count += 1
+        self.from_cache = False
+        self._save_cache()
+
+    def _current(self):
+        token = self._token
+        if self._is_fresh(token):
+            return token
+        with self._lock:
+            if not self._is_fresh(self._token):
+                cached = self._load_cache()
+                if self._is_fresh(cached):
+                    self._set(cached["access_token"], cached["csrf_token"],
+                              cached["expires_at"], cached["refresh_at"])
+                    self.from_cache = True
+                else:
+                    self._refresh_locked()
+            return self._token
+
+    def get(self):
+        """有効なトークンを返す（必要ならキャッシュの読み込み・更新を行う）
+
+        Returns:
+            tuple[str, str]: (access_token, csrf_token)
+        """
+        token = self._current()
+        return token["access_token"], token["csrf_token"]
+
+    def auth_headers(self):
+        """(access_token, 認証ヘッダー) を返す。ヘッダーはトークンごとに1回だけ組み立てる"""
+        token = self._current()
+        return token["access_token"], {key: token["headers"][key] for key in ("Cookie", "X-CSRF-Token")
+                                       if key in token["headers"]}
+
+    def invalidate(self, stale_access_token):
+        """401を受けたトークンを更新する（他のスレッドが更新済みなら何もしない）"""
+        with self._lock:
+            if self._token is None or self._token["access_token"] == stale_access_token:
+                self._refresh_locked()
+
+    def _load_cache(self):
+        if self.cache_path is None:
+            return None
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                entry = json.load(f).get(self.cache_key)
+            if entry and entry.get("access_token"):
+                expires_at = float(entry["expires_at"])
+                return {
+                    "access_token": entry["access_token"],
+                    "csrf_token": entry.get("csrf_token", ""),
+                    "expires_at": expires_at,
+                    "refresh_at": float(entry.get("refresh_at", expires_at - self.margin)),
+                }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+        return None
+
+    def _save_cache(self):
+        """キャッシュを保存する（所有者のみ読み書き可。書き込み失敗は無視）"""
+        if self.cache_path is None:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            if not isinstance(cache, dict):
+                cache = {}
+        except (OSError, ValueError):
+            cache = {}
+        cache[self.cache_key] = {
+            "access_token": self._token["access_token"],
+            "csrf_token": self._token["csrf_token"],
+            "expires_at": self._token["expires_at"],
+            "refresh_at": self._token["refresh_at"],
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"警告: トークンキャッシュを保存できません: {e}")
+
+
+def get_apps(access_token: str, csrf_token: str = "", session=None):
     """全アプリケーション一覧を取得"""
     url = f"{DIFY_BASE_URL}/console/api/apps"
     params = {"page": 1, "limit": 100}
 
     all_apps = []
     while True:
-        response = requests.get(
+        response = (session or requests).get(
             url,
             headers=get_request_headers(access_token, csrf_token),
             params=params
@@ -106,17 +399,22 @@ def get_apps(access_token: str, csrf_token: str = ""):
     return all_apps
 
 
-def export_app_dsl(app_id, app_name, access_token: str, csrf_token: str = ""):
+def export_app_dsl(app_id, app_name, access_token: str, csrf_token: str = "", session=None):
     """アプリケーションのDSLをエクスポート"""
     include_param = "true" if INCLUDE_SECRET else "false"
     url = f"{DIFY_BASE_URL}/console/api/apps/{app_id}/export?include_secret={include_param}"
 
-    response = requests.get(
+    response = (session or requests).get(
         url,
         headers=get_request_headers(access_token, csrf_token)
     )
     response.raise_for_status()
 
+    # コンソールAPIは {"data": "<DSL>"} のJSONで返す（YAMLがそのまま返る場合もある）
+    if response.headers.get("Content-Type", "").startswith("application/json"):
+        data = response.json()
+        if isinstance(data, dict) and isinstance(data.get("data"), str):
+            return data["data"]
     return response.text
 
 
@@ -126,16 +424,15 @@ def sanitize_filename(name):
     return sanitized[:100]
 
 
-def save_dsl(app_name, dsl_content, app_id):
-    """DSLをファイルに保存"""
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-    filename = f"{sanitize_filename(app_name)}_{app_id[:8]}.yml"
-    filepath = OUTPUT_DIR / filename
+def normalize_dsl(dsl_content, loader=YAML_LOADER):
+    """DSLを保存用の正規形YAMLに整形（YAMLとして解釈できなければそのまま）
 
+    読み込みはlibyamlのCSafeLoader（なければ純Python版）で行う。どちらも同じ
+    データになるため、出力は読み込み側の実装によらずバイト単位で同一。
+    """
     try:
-        dsl_data = yaml.safe_load(dsl_content)
-        formatted_content = yaml.dump(
+        dsl_data = yaml.load(dsl_content, Loader=loader)
+        return yaml.dump(
             dsl_data,
             allow_unicode=True,
             default_flow_style=False,
@@ -143,30 +440,268 @@ def save_dsl(app_name, dsl_content, app_id):
             width=120,
         )
     except yaml.YAMLError:
-        formatted_content = dsl_content
+        return dsl_content
+
+
+def content_hash(content):
+    """保存内容のハッシュ（マニフェストに記録する）"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
-    filepath.write_text(formatted_content, encoding="utf-8")
-    return filepath
+
+def write_if_changed(filepath, content):
+    """内容が変わった場合のみ書き込む（書き込んだらTrue）"""
+    data = content.encode("utf-8")
+    try:
+        if filepath.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    filepath.write_bytes(data)
+    return True
+
+
+def is_saved_form(filepath, dsl_content, previous):
+    """取得したDSLを整形し直さなくてよいか（前回保存した内容がそのまま使えるか）
+
+    取得元の内容が前回と同じ（source_hash一致）、または既に正規形（前回保存した
+    内容そのもの）で、ファイルが前回保存したままならTrue。
+    """
+    if not previous or content_hash(dsl_content) not in (previous.get("source_hash"), previous.get("hash")):
+        return False
+    try:
+        return content_hash(filepath.read_text(encoding="utf-8")) == previous.get("hash")
+    except (FileNotFoundError, UnicodeDecodeError):
+        return False
+
+
+def dsl_filename(app_name, app_id):
+    """保存するDSLのファイル名"""
+    return f"{sanitize_filename(app_name)}_{app_id[:8]}.yml"
+
+
+def save_dsl(app_name, dsl_content, app_id, previous=None):
+    """DSLをファイルに保存
+
+    正規化後の内容が既存ファイルとバイト単位で同じなら書き込まない。
+    previous（前回のマニフェストの項目）から内容が変わっていないと分かる場合は
+    YAMLの読み込み・整形自体を省略する。
+
+    Returns:
+        tuple: (保存先パス, 内容のハッシュ, 書き込んだか)
+    """
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    filepath = OUTPUT_DIR / dsl_filename(app_name, app_id)
+
+    if is_saved_form(filepath, dsl_content, previous):
+        return filepath, previous["hash"], False
+
+    formatted_content = normalize_dsl(dsl_content)
+    changed = write_if_changed(filepath, formatted_content)
+    return filepath, content_hash(formatted_content), changed
+
+
+def archive_dsl(bundle, app_name, dsl_content, app_id):
+    """DSLを整形してバンドル（DslBundleWriter）に追記する
+
+    Returns:
+        tuple: (バンドル内のファイル名, 内容のハッシュ)
+    """
+    filename = dsl_filename(app_name, app_id)
+    formatted_content = normalize_dsl(dsl_content)
+    bundle.add(filename, formatted_content)
+    return filename, content_hash(formatted_content)
 
 
-def create_manifest(apps_info):
-    """エクスポートしたアプリの一覧マニフェストを作成"""
+def load_manifest():
+    """前回のマニフェストを読み込む（なければ空）"""
+    try:
+        with open(OUTPUT_DIR / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def build_manifest(apps_info, unreferenced=()):
+    """マニフェストの内容（unreferenced は一覧から参照されなくなったが残しているファイル）"""
     manifest = {
         "exported_at": datetime.now().isoformat(),
+        "include_secret": INCLUDE_SECRET,
         "total_apps": len(apps_info),
         "apps": apps_info,
     }
+    if unreferenced:
+        manifest["unreferenced_files"] = list(unreferenced)
+    return manifest
+
+
+def create_manifest(apps_info, unreferenced=()):
+    """エクスポートしたアプリの一覧マニフェストを作成
+
+    アプリ一覧が前回と同じならファイルを書き換えない（exported_atも据え置き）。
 
-    manifest_path = OUTPUT_DIR / "_manifest.json"
+    Returns:
+        tuple: (マニフェストのパス, 書き込んだか)
+    """
+    manifest_path = OUTPUT_DIR / MANIFEST_NAME
+    previous = load_manifest()
+    if (previous.get("apps") == apps_info and previous.get("include_secret") == INCLUDE_SECRET
+            and previous.get("unreferenced_files", []) == list(unreferenced)):
+        return manifest_path, False
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     manifest_path.write_text(
-        json.dumps(manifest, ensure_ascii=False, indent=2),
+        json.dumps(build_manifest(apps_info, unreferenced), ensure_ascii=False, indent=2),
         encoding="utf-8"
     )
-    return manifest_path
+    return manifest_path, True
+
+
+def is_unchanged(app, entry):
+    """アプリ一覧の項目が前回のマニフェストから変わっていないか（DSLの取得を省略できるか）"""
+    if not entry or app.get("updated_at") is None:
+        return False
+    return (
+        entry.get("updated_at") == app.get("updated_at")
+        and entry.get("name") == app.get("name", "Unknown")
+        and entry.get("mode") == app.get("mode", "unknown")
+        and bool(entry.get("filename"))
+        and (OUTPUT_DIR / entry["filename"]).exists()
+    )
+
+
+def stale_files(previous, apps_info):
+    """前回のマニフェストに記載があり、今回のアプリ一覧から参照されなくなったDSLファイル
+
+    アプリの削除・改名や、一覧に一時的に出ないアプリのファイルが対象。前回 --prune なしで
+    残したファイル（unreferenced_files）も含む。マニフェストに記載のないファイルは対象外。
+    """
+    current = {info["filename"] for info in apps_info}
+    candidates = [entry.get("filename") for entry in previous.get("apps", [])]
+    candidates += previous.get("unreferenced_files", [])
+    return sorted({
+        name for name in candidates
+        if name and Path(name).name == name and name not in current and (OUTPUT_DIR / name).exists()
+    })
+
+
+def remove_stale_files(filenames):
+    """参照されなくなったDSLファイルを削除する（--prune）"""
+    for filename in filenames:
+        (OUTPUT_DIR / filename).unlink(missing_ok=True)
+    return list(filenames)
+
+
+def export_one(app, access_token, csrf_token="", session=None, previous=None, bundle=None):
+    """1アプリをエクスポートして保存し、マニフェスト用の情報と書き込み有無を返す
+
+    bundle（DslBundleWriter）を渡すと、ファイルではなくバンドルに追記する。
+    """
+    app_id = app.get("id", "")
+    app_name = app.get("name", "Unknown")
+    dsl_content = export_app_dsl(app_id, app_name, access_token, csrf_token, session)
+    if bundle is not None:
+        filename, digest = archive_dsl(bundle, app_name, dsl_content, app_id)
+        changed = True
+    else:
+        filepath, digest, changed = save_dsl(app_name, dsl_content, app_id, previous)
+        filename = filepath.name
+    return {
+        "id": app_id,
+        "name": app_name,
+        "mode": app.get("mode", "unknown"),
+        "filename": filename,
+        "updated_at": app.get("updated_at"),
+        "hash": digest,
+        "source_hash": content_hash(dsl_content),
+    }, changed
+
+
+def export_apps(apps, access_token, csrf_token="", session=None, workers=DEFAULT_WORKERS,
+                previous=None, bundle=None):
+    """アプリを最大workers件ずつ並列にエクスポートする
+
+    完了した順に進捗を表示する。previousは前回のマニフェストの アプリID → 項目。
+    bundleを渡すと各DSLを完了順にバンドルへ追記する。
+    1アプリの失敗（通信・YAML・書き込みのエラー等）はそのアプリのエラーとして記録し、
+    他のアプリは続行する。
+
+    Returns:
+        tuple: (アプリID → マニフェスト用の情報（失敗したアプリは含まない）, 書き込んだファイル数,
+                アプリID → エラー内容)
+    """
+    exported = {}
+    errors = {}
+    written = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(
+                export_one, app, access_token, csrf_token, session,
+                (previous or {}).get(app.get("id")), bundle,
+            ): app
+            for app in apps
+        }
+        for future in as_completed(futures):
+            app = futures[future]
+            app_name = app.get("name", "Unknown")
+            try:
+                info, changed = future.result()
+            except Exception as e:
+                errors[app.get("id")] = f"{type(e).__name__}: {e}"
+                print(f"  ERROR: {app_name}: {errors[app.get('id')]}")
+                continue
+            exported[info["id"]] = info
+            written += changed
+            status = "" if changed else " (変更なし)"
+            print(f"  Exported: {app_name} -> {info['filename']}{status}")
+    return exported, written, errors
+
+
+def export_archive(path, apps, access_token, csrf_token="", session=None, workers=DEFAULT_WORKERS):
+    """アプリをエクスポートしてzipバンドルに出力する
+
+    各DSLは完了順にバンドルへ追記し、最後にマニフェストを索引として書き込む。
+    1件もエクスポートできなければバンドルを作らない（既存のバンドルはそのまま）。
+
+    Returns:
+        tuple: (バンドルのパス（作らなかった場合はNone）, マニフェストのアプリ一覧)
+    """
+    with DslBundleWriter(path) as bundle:
+        exported, _, _ = export_apps(apps, access_token, csrf_token, session, workers, bundle=bundle)
+        apps_info = [exported[app.get("id")] for app in apps if app.get("id") in exported]
+        if not apps_info:
+            bundle.abort()
+            return None, []
+        return bundle.close(build_manifest(apps_info)), apps_info
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dify CloudのワークフローをDSL形式でエクスポート")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"同時にエクスポートするアプリ数（デフォルト: {DEFAULT_WORKERS}）")
+    parser.add_argument("--incremental", action="store_true",
+                        help="前回のマニフェストからupdated_atが変わっていないアプリはDSLを取得しない")
+    parser.add_argument("--archive", type=Path, metavar="PATH",
+                        help="DSLを個別ファイルではなく1つのzipバンドルに出力する（例: dsl/exported.zip）")
+    parser.add_argument("--prune", action="store_true",
+                        help="前回のマニフェストにあって今回の一覧にないアプリのDSLファイルを削除する")
+    parser.add_argument("--no-token-cache", action="store_true",
+                        help="アクセストークンをディスクにキャッシュしない（毎回リフレッシュする）")
+    return parser.parse_args()
 
 
 def main():
     """メイン処理"""
+    args = parse_args()
+    workers = max(1, args.workers)
+    if args.archive and args.incremental:
+        print("ERROR: --archive と --incremental は同時に指定できません")
+        return 1
+    if args.archive and args.prune:
+        print("ERROR: --archive と --prune は同時に指定できません（バンドルは毎回全体を書き直す）")
+        return 1
+
     # 環境変数チェック
     if not DIFY_REFRESH_TOKEN:
         print("ERROR: DIFY_REFRESH_TOKEN が設定されていません")
@@ -175,60 +710,99 @@ def main():
 
     print(f"Dify Base URL: {DIFY_BASE_URL}")
     print(f"Include Secrets: {INCLUDE_SECRET}")
-    print(f"Output Directory: {OUTPUT_DIR}")
+    print(f"Output: {args.archive or OUTPUT_DIR}")
     print(f"Token Length: {len(DIFY_REFRESH_TOKEN)}")
     print(f"Token Preview: {DIFY_REFRESH_TOKEN[:10]}...{DIFY_REFRESH_TOKEN[-10:]}")
     print("-" * 50)
 
+    session = ConsoleSession(pool_size=workers)
+    # リフレッシュは認証ヘッダーを差し替えない素のセッションで行う
+    tokens = TokenManager(
+        lambda: refresh_access_token(session.session),
+        cache_path=None if args.no_token_cache else TOKEN_CACHE_PATH,
+    )
+    session.tokens = tokens
     try:
-        # リフレッシュトークンからアクセストークンとCSRFトークンを取得
+        # キャッシュ済みのトークンがなければリフレッシュトークンから取得
         print("アクセストークンを取得中...")
-        access_token, csrf_token = refresh_access_token()
-        print(f"トークン取得成功 (CSRF: {'あり' if csrf_token else 'なし'})")
+        access_token, csrf_token = tokens.get()
+        source = "キャッシュ" if tokens.from_cache else "リフレッシュ"
+        print(f"トークン取得成功 ({source}, CSRF: {'あり' if csrf_token else 'なし'})")
         print("-" * 50)
 
         # アプリ一覧を取得
         print("アプリケーション一覧を取得中...")
-        apps = get_apps(access_token, csrf_token)
+        apps = get_apps(access_token, csrf_token, session)
         print(f"取得したアプリ数: {len(apps)}")
 
         if not apps:
             print("エクスポート対象のアプリがありません")
             return 0
 
-        # 各アプリをエクスポート
-        apps_info = []
+        # workflowモードのアプリのみエクスポート
+        targets = []
         for app in apps:
-            app_id = app.get("id", "")
-            app_name = app.get("name", "Unknown")
             app_mode = app.get("mode", "unknown")
-
-            # workflowモードのアプリのみエクスポート
-            if app_mode not in ["workflow", "advanced-chat"]:
-                print(f"  SKIP: {app_name} (mode: {app_mode})")
+            if app_mode not in EXPORT_MODES:
+                print(f"  SKIP: {app.get('name', 'Unknown')} (mode: {app_mode})")
                 continue
+            targets.append(app)
+
+        # バンドル出力: 全アプリを取得して1つのzipに書き込む
+        if args.archive:
+            print(f"エクスポート中: {len(targets)} 件 (並列数: {workers}, 出力: {args.archive})")
+            bundle_path, apps_info = export_archive(
+                args.archive, targets, access_token, csrf_token, session, workers
+            )
+            if not apps_info:
+                print("エクスポートしたアプリがありません")
+                return 0
+            print("-" * 50)
+            print(f"エクスポート完了: {len(apps_info)} 件")
+            print(f"バンドル: {bundle_path} ({bundle_path.stat().st_size:,} bytes)")
+            print(f"トークン更新: {tokens.refresh_count} 回")
+            return 0
 
-            print(f"  Exporting: {app_name}...")
-            try:
-                dsl_content = export_app_dsl(app_id, app_name, access_token, csrf_token)
-                filepath = save_dsl(app_name, dsl_content, app_id)
-                apps_info.append({
-                    "id": app_id,
-                    "name": app_name,
-                    "mode": app_mode,
-                    "filename": filepath.name,
-                })
-                print(f"    -> {filepath.name}")
-            except requests.HTTPError as e:
-                print(f"    ERROR: {e}")
-                continue
+        # 差分モード: 一覧の項目が前回と同じアプリは取得を省略
+        previous = load_manifest()
+        previous_apps = previous.get("apps", [])
+        previous_by_id = {entry.get("id"): entry for entry in previous_apps}
+        incremental = args.incremental and previous.get("include_secret") == INCLUDE_SECRET
+        if args.incremental and not incremental and previous:
+            print("INCLUDE_SECRETが前回と異なるため、全アプリを取得します")
+        to_fetch = [
+            app for app in targets
+            if not (incremental and is_unchanged(app, previous_by_id.get(app.get("id"))))
+        ]
+        skipped = len(targets) - len(to_fetch)
+
+        print(f"エクスポート中: {len(to_fetch)} 件 (並列数: {workers}, 未変更でスキップ: {skipped} 件)")
+        exported, written, errors = export_apps(to_fetch, access_token, csrf_token, session, workers,
+                                                previous_by_id)
+
+        # 一覧の順に並べる。取得を省略・失敗したアプリは前回の情報を引き継ぐ
+        apps_info = []
+        for app in targets:
+            info = exported.get(app.get("id")) or previous_by_id.get(app.get("id"))
+            if info:
+                apps_info.append(info)
 
         # マニフェスト作成
         if apps_info:
-            manifest_path = create_manifest(apps_info)
+            # 一覧に一時的に出ないだけのアプリ（権限変更等）もあるため、削除は --prune 指定時のみ。
+            # 残したファイルはマニフェストに記録し、後の --prune で削除できるようにする
+            stale = stale_files(previous, apps_info)
+            removed = remove_stale_files(stale) if args.prune else []
+            kept = [] if args.prune else stale
+            manifest_path, manifest_changed = create_manifest(apps_info, kept)
             print("-" * 50)
-            print(f"エクスポート完了: {len(apps_info)} 件")
-            print(f"マニフェスト: {manifest_path}")
+            print(f"エクスポート完了: {len(apps_info)} 件 "
+                  f"(取得 {len(exported)} / 書き込み {written} / スキップ {skipped} / 削除 {len(removed)}"
+                  f" / 失敗 {len(errors)})")
+            print(f"マニフェスト: {manifest_path}{'' if manifest_changed else ' (変更なし)'}")
+            if kept:
+                print(f"一覧にないアプリのファイル: {len(kept)} 件（残しています。--prune で削除）")
+            print(f"トークン更新: {tokens.refresh_count} 回")
         else:
             print("エクスポートしたアプリがありません")
 
@@ -245,6 +819,8 @@ def main():
     except Exception as e:
         print(f"Error: {e}")
         return 1
+    finally:
+        session.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+合成支払明細（final_output.json形式）の生成スクリプト
+
+prepare_poc_data.py の入力と同じ構造のJSONを、シード固定で任意の規模
+（1千〜1千万行、複数年・多数の業者）に拡大して生成する。性能計測・負荷試験用。
+
+分布:
+  - 経費項目: EXPENSE_CODE_MAP のコードを、poc_test_data.tsv（海潟漁港 10-12月度 82件）の
+    費目出現頻度に合わせた重みで選ぶ。CODE_WEIGHTSに無いコードも低頻度で出現する
+  - 小口購入分（経費項目なし）: PETTY_CASH_MAP のキーワードを含む内訳と、
+    どのキーワードにも一致しない内訳（手動確認行になる）を一定割合で混ぜる
+  - 業者: 既存の業者分類（VENDOR_SUBCONTRACTORS 等）＋合成業者名。出現頻度は偏りを持たせ、
+    一部は「株式会社」「（株）」等の表記揺れで出力する（名寄せの負荷も再現）
+  - 金額: カテゴリごとの対数正規分布。直接工事費の一部は相殺あり、ごく一部は金額なし
+
+同じ引数・シードであれば出力は常に同じバイト列になる。明細は1件ずつ書き出すため、
+行数が多くてもメモリ使用量は一定。
+
+使用方法:
+    python scripts/generate_synthetic_ledger.py --rows 100000
+    python scripts/generate_synthetic_ledger.py --rows 10000000 --months 36 --vendors 2000 \
+        --output /tmp/ledger_10m.json
+    python scripts/generate_synthetic_ledger.py --rows 1000 --months 3 --short-labels
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import prepare_poc_data as ppd
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+SYNTHETIC_DIR = SCRIPT_DIR.parent / "output" / "synthetic"
+
+# 1回に乱数をまとめて引く行数（変更すると同じシードでも出力が変わる）
+CHUNK_ROWS = 65536
+
+# 経費コードの出現重み（poc_test_data.tsv の費目別件数。同じ費目に複数コードが
+# 対応する場合は備考のREVIEWコメントから按分）
+CODE_WEIGHTS = {
+    11: 9, 12: 2, 14: 10,
+    31: 1, 33: 14, 34: 5, 35: 4, 36: 6, 37: 2, 39: 6,
+    51: 2, 56: 1, 57: 5, 58: 7, 59: 3, 60: 5,
+}
+# CODE_WEIGHTSに無いコード（実データでは0件だが発生しうる）の重み
+RARE_CODE_WEIGHT = 0.5
+
+# 行の種類の割合
+PETTY_SHARE = 0.03          # 経費項目なし（小口購入分）
+UNKNOWN_CODE_SHARE = 0.002  # 未知の経費コード
+PETTY_UNMATCHED_SHARE = 0.2  # 小口購入分のうち、どのキーワードにも一致しない内訳
+NULL_AMOUNT_SHARE = 0.003   # 金額なし（相殺のみ）
+OFFSET_SHARE = 0.12         # 直接工事費のうち相殺あり
+FULL_OFFSET_SHARE = 0.3     # 相殺ありのうち全額相殺
+VARIANT_SHARE = 0.02        # 業者名を表記揺れで出力
+DESCRIPTION_SHARE = 0.3     # 経費項目ありの行で内訳を記入
+INSTALLMENT_SHARE = 0.1     # 備考「分割払い」
+
+# カテゴリ別の金額分布（中央値, 対数標準偏差）
+AMOUNT_DISTRIBUTIONS = {
+    "直接工事費": (120_000, 1.4),
+    "共通仮設費": (15_000, 1.0),
+    "現場管理費": (8_000, 1.0),
+    "小口": (3_000, 0.8),
+}
+AMOUNT_MIN = 100
+AMOUNT_MAX = 30_000_000
+
+UNKNOWN_CODES = ["99.費目", "70.費目", "45.費目"]
+DESCRIPTIONS = ["鉄筋", "生コン", "型枠", "砕石", "重機回送", "仮設トイレ", "安全看板", "コピー用紙", "通信費"]
+PETTY_UNMATCHED = ["ガムテープ", "軍手", "乾電池", "ブルーシート", "養生テープ", "延長コード"]
+PETTY_SUFFIXES = ["", "", " 1式", " 追加分", "（現場用）"]
+SYNTHETIC_VENDOR_WORDS = ["南", "北", "東", "西", "中央", "桜島", "錦江", "霧島", "大隅", "薩摩",
+                          "建設", "工業", "興産", "設備", "電工", "商事", "資材", "運輸", "測量", "産業"]
+VENDOR_ZIPF = 1.1
+
+
+def build_vendor_pool(size):
+    """業者名の一覧（既存の業者分類を先頭に、合成名でsize件まで拡張）"""
+    names = sorted(ppd.VENDOR_SUBCONTRACTORS | ppd.VENDOR_SUPPLIERS | ppd.VENDOR_SERVICES)
+    words = SYNTHETIC_VENDOR_WORDS
+    index = 0
+    while len(names) < size:
+        place = words[index % 10]
+        trade = words[10 + (index // 10) % 10]
+        serial = index // 100
+        base = f"{place}{trade}{serial or ''}"
+        names.append(f"(株){base}" if index % 3 else f"{base}(株)" if index % 2 else f"(有){base}")
+        index += 1
+    return names[:size]
+
+
+def vendor_variant(name):
+    """業者名の表記揺れ（名寄せ対象になる書き方）"""
+    if name.startswith("(株)"):
+        return "株式会社" + name[3:]
+    if name.endswith("(株)"):
+        return name[:-3] + " 株式会社"
+    return name.replace("(", "（").replace(")", "）")
+
+
+def code_table():
+    """(経費項目の文字列, カテゴリ, 重み) の一覧"""
+    table = []
+    for code in sorted(ppd.EXPENSE_CODE_MAP):
+        table.append((f"{code}.費目", ppd.get_category(code), CODE_WEIGHTS.get(code, RARE_CODE_WEIGHT)))
+    return table
+
+
+def month_labels(start_month, months, short_labels):
+    """(月度ラベル, YYYY-MM) の一覧"""
+    labels = []
+    for i in range(months):
+        year_month = ppd.add_months(start_month, i)
+        year, month = int(year_month[:4]), int(year_month[5:])
+        label = f"{month}月度" if short_labels else f"{year}年{month}月度"
+        labels.append((label, year_month))
+    return labels
+
+
+def _draw_amounts(rng, kind, count):
+    median, sigma = AMOUNT_DISTRIBUTIONS[kind]
+    amounts = rng.lognormal(np.log(median), sigma, count)
+    amounts = np.clip(amounts, AMOUNT_MIN, AMOUNT_MAX)
+    # 半数は100円単位の金額
+    rounded = rng.random(count) < 0.5
+    amounts = np.where(rounded, np.round(amounts, -2), np.round(amounts))
+    return amounts.astype(np.int64)
+
+
+class LedgerGenerator:
+    """合成明細を1件ずつJSON文字列で返す生成器"""
+
+    def __init__(self, seed, vendors):
+        self.rng = np.random.default_rng(seed)
+
+        def encode(value):
+            return json.dumps(value, ensure_ascii=False)
+
+        codes = code_table()
+        weights = np.array([w for _, _, w in codes], dtype=np.float64)
+        self.code_p = weights / weights.sum()
+        self.code_json = [encode(code) for code, _, _ in codes]
+        self.code_kind = [category for _, category, _ in codes]
+        self.unknown_json = [encode(code) for code in UNKNOWN_CODES]
+
+        pool = build_vendor_pool(vendors)
+        ranks = np.arange(1, len(pool) + 1, dtype=np.float64)
+        self.vendor_p = ranks ** -VENDOR_ZIPF / (ranks ** -VENDOR_ZIPF).sum()
+        self.vendor_json = [encode(name) for name in pool]
+        self.variant_json = [encode(vendor_variant(name)) for name in pool]
+        self.offset_json = [encode(name) for name in sorted(ppd.VENDOR_SUBCONTRACTORS)]
+
+        self.description_json = [encode(d) for d in DESCRIPTIONS]
+        self.petty_json = [
+            encode(f"{keyword}{suffix}") for keyword in ppd.PETTY_CASH_MAP for suffix in PETTY_SUFFIXES
+        ]
+        self.petty_unmatched_json = [encode(d) for d in PETTY_UNMATCHED]
+        self.note_json = (encode(""), encode("分割払い"))
+
+    def rows(self, count):
+        """count件の明細を (JSON文字列, 税抜金額) で返す"""
+        while count > 0:
+            size = min(count, CHUNK_ROWS)
+            yield from self._chunk(size)
+            count -= size
+
+    def _chunk(self, size):
+        # 乱数は配列でまとめて引き、行の組み立て用にPythonのリストへ変換しておく
+        rng = self.rng
+        kind_roll = rng.random(size).tolist()
+        code_idx = rng.choice(len(self.code_p), size=size, p=self.code_p).tolist()
+        vendor_idx = rng.choice(len(self.vendor_p), size=size, p=self.vendor_p).tolist()
+        variant = (rng.random(size) < VARIANT_SHARE).tolist()
+        amounts = {kind: _draw_amounts(rng, kind, size).tolist() for kind in AMOUNT_DISTRIBUTIONS}
+        null_amount = (rng.random(size) < NULL_AMOUNT_SHARE).tolist()
+        offset_roll = rng.random(size).tolist()
+        offset_ratio = rng.uniform(0.1, 1.0, size).tolist()
+        offset_vendor = rng.integers(0, len(self.offset_json), size).tolist()
+        description_roll = rng.random(size).tolist()
+        description_idx = rng.integers(0, len(self.description_json), size).tolist()
+        petty_unmatched = (rng.random(size) < PETTY_UNMATCHED_SHARE).tolist()
+        petty_idx = rng.integers(0, len(self.petty_json), size).tolist()
+        petty_unmatched_idx = rng.integers(0, len(self.petty_unmatched_json), size).tolist()
+        unknown_idx = rng.integers(0, len(self.unknown_json), size).tolist()
+        installment = (rng.random(size) < INSTALLMENT_SHARE).tolist()
+
+        for i in range(size):
+            description = '""'
+            if kind_roll[i] < PETTY_SHARE:
+                kind = "小口"
+                expense = "null"
+                description = (self.petty_unmatched_json[petty_unmatched_idx[i]] if petty_unmatched[i]
+                               else self.petty_json[petty_idx[i]])
+            else:
+                if kind_roll[i] < PETTY_SHARE + UNKNOWN_CODE_SHARE:
+                    kind = "現場管理費"
+                    expense = self.unknown_json[unknown_idx[i]]
+                else:
+                    kind = self.code_kind[code_idx[i]]
+                    expense = self.code_json[code_idx[i]]
+                if description_roll[i] < DESCRIPTION_SHARE:
+                    description = self.description_json[description_idx[i]]
+
+            amount = amounts[kind][i]
+            offset = 0
+            offset_target = "null"
+            if kind == "直接工事費" and offset_roll[i] < OFFSET_SHARE:
+                full = offset_roll[i] < OFFSET_SHARE * FULL_OFFSET_SHARE
+                offset = amount if full else int(amount * offset_ratio[i])
+                offset_target = self.offset_json[offset_vendor[i]]
+            amount_json = str(amount)
+            if null_amount[i]:
+                amount_json = "null"
+                offset = offset or amount
+                offset_target = offset_target if offset_target != "null" else self.offset_json[offset_vendor[i]]
+                amount = 0
+
+            vendor = self.variant_json[vendor_idx[i]] if variant[i] else self.vendor_json[vendor_idx[i]]
+            yield (
+                f'{{"支払先": {vendor}, "経費項目": {expense}, "支払金額_税抜": {amount_json}, '
+                f'"相殺": {offset}, "相殺先": {offset_target}, "内訳": {description}, '
+                f'"備考": {self.note_json[installment[i]]}}}'
+            ), amount
+
+
+def split_rows(rng, rows, months):
+    """行数を月ごとに配分する（月ごとに±30%程度の増減）"""
+    weights = rng.uniform(0.7, 1.3, months)
+    return rng.multinomial(rows, weights / weights.sum())
+
+
+def generate_ledger(path, rows, months=12, vendors=300, start_month="2025-10", seed=42,
+                    short_labels=False):
+    """合成明細をfinal_output.json形式で書き出す
+
+    Returns:
+        dict: 行数・月度別合計（支払金額_税抜の合計）・ファイルサイズ
+    """
+    if short_labels and months > 12:
+        raise ValueError("--short-labels は12か月以内のみ指定できます（月度ラベルが重複するため）")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    generator = LedgerGenerator(seed, vendors)
+    labels = month_labels(start_month, months, short_labels)
+    counts = split_rows(generator.rng, rows, months)
+    meta = {
+        "generator": "generate_synthetic_ledger.py",
+        "seed": seed,
+        "rows": rows,
+        "months": months,
+        "vendors": vendors,
+        "start_month": start_month,
+    }
+
+    monthly_totals = {}
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write('{"source": "synthetic", "meta": ')
+        f.write(json.dumps(meta, ensure_ascii=False))
+        f.write(', "data": {')
+        for m, ((label, _), count) in enumerate(zip(labels, counts)):
+            f.write(",\n" if m else "\n")
+            f.write(f'{json.dumps(label, ensure_ascii=False)}: {{"支払明細": [')
+            total = 0
+            for i, (row, amount) in enumerate(generator.rows(int(count))):
+                f.write(",\n" if i else "\n")
+                f.write(row)
+                total += amount
+            f.write(f'\n], "合計": {total}}}')
+            monthly_totals[label] = total
+        f.write("\n}}\n")
+
+    return {
+        "path": str(path),
+        "rows": rows,
+        "months": dict(labels),
+        "monthly_totals": monthly_totals,
+        "bytes": path.stat().st_size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成支払明細（final_output.json形式）を生成する")
+    parser.add_argument("--rows", type=int, default=100_000, help="明細の総行数")
+    parser.add_argument("--months", type=int, default=12, help="月数")
+    parser.add_argument("--start-month", default="2025-10", help="最初の月（YYYY-MM）")
+    parser.add_argument("--vendors", type=int, default=300, help="業者数")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    parser.add_argument("--short-labels", action="store_true",
+                        help="月度ラベルを「10月度」形式にする（既定は「2025年10月度」）")
+    parser.add_argument("--output", type=Path, help="出力先（既定: output/synthetic/final_output_{rows}.json）")
+    args = parser.parse_args()
+
+    if args.rows < 0 or args.months < 1 or args.vendors < 1:
+        print("エラー: --rows は0以上、--months と --vendors は1以上を指定してください", file=sys.stderr)
+        return 1
+    output = args.output or SYNTHETIC_DIR / f"final_output_{args.rows}.json"
+
+    print("=== 合成支払明細の生成 ===\n")
+    try:
+        summary = generate_ledger(output, args.rows, args.months, args.vendors, args.start_month,
+                                  args.seed, args.short_labels)
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+
+    for label, year_month in summary["months"].items():
+        print(f"  {label:<12} ({year_month}): {summary['monthly_totals'][label]:>16,}円")
+    print(f"\n  出力: {summary['path']} ({summary['rows']:,}行, {summary['bytes'] / 1e6:.1f}MB)")
+    print("\n=== 完了 ===")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+本社横断集計（hub.gs の cross_summary / cross_health のPython版）
+
+hub.gs の getCrossSummary_ / getCrossHealth_ は稼働中の工事を1件ずつ順に取得するため、
+横断集計の所要時間が工事数に比例し、Apps Script の実行時間の上限にも近づく。
+本スクリプトは工事台帳（add_new_project.py で登録した project_registry.json）を読み、
+各現場の api.gs（Web App）の mode=summary / health を asyncio で並行に取得して、
+hub.gs と同じ形のJSONを返す。
+
+  - 現場ごとにタイムアウト（--timeout）があり、遅い現場・失敗した現場があっても
+    残りの現場の結果は返す（その現場は hub.gs と同じく status「エラー」と note で示す）
+  - どの現場が失敗したかは応答の fetch（取得結果の内訳）に入る
+  - 同時に取得する現場数は --concurrency まで（Apps Script の同時実行数の上限は30）
+  - HTTP 429 / 5xx・接続エラーは --retries 回まで再試行する（タイムアウトの範囲内）
+  - 取得は requests（他のスクリプトと同じ）をスレッドで並行に呼ぶため、プロキシ
+    （HTTPS_PROXY / NO_PROXY 等の環境変数）・証明書の設定もそのまま効く
+
+現場の api.gs のURL（優先順）:
+    1. --sites のJSON  {"P001": "https://script.google.com/macros/s/.../exec", "P002": {"url": ..., "key": ...}}
+    2. 台帳の工事情報の gas_webapp_url（hub.gs の _M工事台帳 L列と同じ項目名）
+    3. --site-url-template（{project_id} 等を工事情報で置き換える）
+    URLがない工事は hub.gs のスプレッドシートID未設定と同じく status「未接続」になる。
+    APIキーは --sites の key、なければ --api-key（既定は環境変数 GAS_API_KEY）。
+
+使用方法:
+    python scripts/hub_aggregator.py cross_health --month 2025-12
+    python scripts/hub_aggregator.py cross_summary --sites sites.json --concurrency 8 --timeout 20
+    python scripts/hub_aggregator.py project_detail --project-id P005
+    python scripts/hub_aggregator.py serve --port 8765      # hub.gs と同じ ?mode=...&month=... で応答
+
+    # ローカルの代替サーバー（mock_site_api.py）に対して
+    python scripts/hub_aggregator.py cross_health \\
+        --site-url-template "http://127.0.0.1:8766/macros/s/{project_id}/exec"
+
+終了コード（serve 以外）: 0 全現場から取得 / 1 エラー / 2 一部の現場の取得に失敗（結果は出力する）
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from aggregate_payments import js_to_fixed1
+from project_registry import ProjectRegistry, RegistryLockTimeout
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+REGISTRY_PATH = PROJECT_DIR / "project_registry.json"
+
+MODES = ("projects_all", "cross_summary", "cross_health", "project_detail")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# 現場ごとのタイムアウト（秒。再試行を含む）
+DEFAULT_TIMEOUT = 20.0
+# 同時に取得する現場数（Apps Script の Web App の同時実行数の上限は30）
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RETRIES = 1
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_REDIRECTS = 5
+MAX_BODY_BYTES = 16 * 1024 * 1024
+USER_AGENT = "hub-aggregator/1.0"
+
+API_KEY_ENV = "GAS_API_KEY"
+# 台帳の工事情報で api.gs のURLを持つ項目（hub.gs の _M工事台帳 と同じ名前）
+SITE_URL_FIELD = "gas_webapp_url"
+
+# hub.gs の fetchSiteSummary_ の status 判定（消化率%）
+SUMMARY_WARNING_RATE = 80
+SUMMARY_OVER_RATE = 100
+
+NOTE_NO_URL = "api.gsのURL未設定"
+# 標準エラーに一覧表示する失敗の件数（全件は応答の fetch.failed にある）
+REPORT_FAILURE_LINES = 20
+
+
+class SiteFetchError(Exception):
+    """現場の api.gs から結果を得られなかった（retryable は再試行してよい失敗）"""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def iso_timestamp():
+    """new Date().toISOString() と同じ形式"""
+    now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+
+def current_year_month():
+    """getCurrentYearMonth_"""
+    return datetime.now().strftime("%Y-%m")
+
+
+# === HTTPクライアント（requests をスレッドで並行に呼ぶ） ===
+
+def new_session(pool_size):
+    """現場の api.gs 取得用のセッション（HTTPS_PROXY / NO_PROXY 等の環境変数に従う）"""
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT, "Accept": "application/json"})
+    session.max_redirects = MAX_REDIRECTS
+    adapter = HTTPAdapter(pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def http_get(session, url, timeout):
+    """GETしてリダイレクトをたどる（Apps Script の Web App は302で結果のURLへ転送する）
+
+    戻り値は (ステータス, 本文)。ブロックするのでスレッドから呼ぶ。
+    """
+    with session.get(url, timeout=timeout, stream=True) as response:
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit() and int(length) > MAX_BODY_BYTES:
+            raise SiteFetchError("応答が大きすぎます")
+        body = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            body += chunk
+            if len(body) > MAX_BODY_BYTES:
+                raise SiteFetchError("応答が大きすぎます")
+        return response.status_code, bytes(body)
+
+
+async def fetch_site_api(session, executor, url, mode, year_month, key=None, timeout=DEFAULT_TIMEOUT):
+    """現場の api.gs の1モードを取得して data を返す（success:false・HTTPエラーは SiteFetchError）
+
+    取得は executor のスレッドで行う（requests の接続・読み込みのタイムアウトは timeout 秒）。
+    """
+    query = {"mode": mode, "month": year_month}
+    if key:
+        query["key"] = key
+    separator = "&" if urlsplit(url).query else "?"
+    loop = asyncio.get_running_loop()
+    status, body = await loop.run_in_executor(
+        executor, http_get, session, f"{url}{separator}{urlencode(query)}", timeout)
+    if status != 200:
+        raise SiteFetchError(f"HTTP {status}", retryable=status in RETRY_STATUSES)
+    try:
+        payload = json.loads(body.decode("utf-8"))
+    except ValueError:
+        # アクセス権が「全員」でない Web App はログイン画面（HTML）を返す
+        raise SiteFetchError("JSONではない応答です（Web AppのURL・アクセス権を確認）") from None
+    if not isinstance(payload, dict) or not payload.get("success"):
+        error = payload.get("error") if isinstance(payload, dict) else None
+        raise SiteFetchError(error or "success=false の応答です")
+    data = payload.get("data")
+    if not isinstance(data, dict):
+        raise SiteFetchError("data のない応答です")
+    return data
+
+
+# === hub.gs と同じ形への変換 ===
+
+def _number(value):
+    """parseFloat(value) || 0"""
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        return 0
+    return number if number == number else 0
+
+
+def blank_summary(status, note):
+    """fetchSiteSummary_ の未接続・エラー時の値"""
+    return {
+        "total_budget": 0,
+        "total_spent": 0,
+        "total_remaining": 0,
+        "consumption_rate": 0,
+        "status": status,
+        "note": note,
+    }
+
+
+def summary_entry(data):
+    """api.gs の mode=summary の data を fetchSiteSummary_ の形にする"""
+    if data.get("note"):
+        # api.gs はシート未接続のときサンプル値と note を返す（hub.gs では「未接続」）
+        return blank_summary("未接続", data["note"])
+    total_budget = _number(data.get("total_budget"))
+    total_spent = _number(data.get("total_spent"))
+    rate = js_to_fixed1(total_spent / total_budget * 100) if total_budget > 0 else 0
+    return {
+        "total_budget": total_budget,
+        "total_spent": total_spent,
+        "total_remaining": total_budget - total_spent,
+        "consumption_rate": rate,
+        "status": "超過" if rate > SUMMARY_OVER_RATE else "注意" if rate > SUMMARY_WARNING_RATE else "正常",
+    }
+
+
+def blank_health(year_month, status, note):
+    """fetchSiteHealth_ の未接続・エラー時の値"""
+    return {
+        "yearMonth": year_month,
+        "bac": 0, "pv": 0, "ac": 0,
+        "consumption_rate": 0, "progress_rate": 0,
+        "gap": 0, "shortage": 0, "signal": "",
+        "status": status,
+        "note": note,
+    }
+
+
+def health_entry(data, year_month):
+    """api.gs の mode=health の data を fetchSiteHealth_ の形にする"""
+    entry = {"yearMonth": year_month}
+    for name in ("bac", "pv", "ac", "consumption_rate", "progress_rate", "gap", "shortage"):
+        entry[name] = _number(data.get(name))
+    entry["signal"] = str(data.get("signal", ""))
+    return entry
+
+
+def with_project(entry, project):
+    """hub.gs と同じく工事の識別情報を後ろに付ける"""
+    entry["project_id"] = project["project_id"]
+    entry["project_name"] = project.get("project_name", "")
+    entry["manager_name"] = project.get("manager_name", "")
+    entry["contract_amount"] = _number(project.get("contract_amount", 0))
+    return entry
+
+
+def site_endpoint(project, sites=None, url_template=None, api_key=None):
+    """工事の api.gs のURLとAPIキー（--sites → 台帳の gas_webapp_url → テンプレートの順。なければ (None, None)）"""
+    site = (sites or {}).get(project["project_id"])
+    if isinstance(site, dict):
+        return site.get("url"), site.get("key") or api_key
+    if site:
+        return site, api_key
+    if project.get(SITE_URL_FIELD):
+        return project[SITE_URL_FIELD], api_key
+    if url_template:
+        try:
+            return url_template.format_map(project), api_key
+        except (KeyError, ValueError):
+            return None, None
+    return None, None
+
+
+def is_active(project):
+    """横断集計の対象か（hub.gs の status === 'active'。台帳に項目がなければ対象）"""
+    return project.get("status", "active") == "active" and bool(project.get("active", True))
+
+
+# === 横断集計 ===
+
+@dataclass
+class SiteResult:
+    """1現場・1モードの取得結果"""
+    project_id: str
+    mode: str
+    data: dict = None
+    error: str = None
+    unconnected: bool = False
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    def report(self):
+        return {
+            "project_id": self.project_id,
+            "mode": self.mode,
+            "error": self.error,
+            "attempts": self.attempts,
+            "elapsed_ms": round(self.elapsed * 1000),
+        }
+
+
+class HubAggregator:
+    """台帳の工事の api.gs を並行に取得して hub.gs と同じ形に集計する
+
+    hub = HubAggregator(url_template="http://127.0.0.1:8766/macros/s/{project_id}/exec")
+    response = asyncio.run(hub.handle({"mode": "cross_health", "month": "2025-12"}))
+    """
+
+    def __init__(self, registry_path=REGISTRY_PATH, sites=None, url_template=None, api_key=None,
+                 timeout=DEFAULT_TIMEOUT, concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES):
+        self.registry_path = Path(registry_path)
+        self.sites = sites or {}
+        self.url_template = url_template
+        self.api_key = api_key
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.retries = max(0, retries)
+        # asyncio.to_thread の既定のスレッド数（CPU数+4）では --concurrency まで並ばないため専用に持つ
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="hub-fetch")
+        self.session = new_session(self.concurrency)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def load_projects(self):
+        """台帳の工事（未書き出しのジャーナル分を含む。毎回読み直す）"""
+        return ProjectRegistry(self.registry_path).projects()
+
+    def site_endpoint(self, project):
+        """工事の api.gs のURLとAPIキー（URLがなければ (None, None)）"""
+        return site_endpoint(project, self.sites, self.url_template, self.api_key)
+
+    async def _fetch_with_retries(self, url, key, mode, year_month, result):
+        for attempt in range(self.retries + 1):
+            result.attempts = attempt + 1
+            try:
+                return await fetch_site_api(self.session, self.executor, url, mode, year_month, key,
+                                            self.timeout)
+            except SiteFetchError as e:
+                if not e.retryable or attempt == self.retries:
+                    raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries:
+                    raise SiteFetchError(f"接続エラー: {e or type(e).__name__}") from None
+            except requests.RequestException as e:
+                raise SiteFetchError(f"{type(e).__name__}: {e}") from None
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    async def fetch(self, project, mode, year_month, semaphore):
+        """1現場の1モードを取得する（失敗しても例外にせず SiteResult に記録する）"""
+        result = SiteResult(project["project_id"], mode)
+        url, key = self.site_endpoint(project)
+        if not url:
+            result.unconnected = True
+            result.error = NOTE_NO_URL
+            return result
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result.data = await asyncio.wait_for(
+                    self._fetch_with_retries(url, key, mode, year_month, result), self.timeout)
+            except asyncio.TimeoutError:
+                result.error = f"タイムアウト（{self.timeout:g}秒）"
+            except SiteFetchError as e:
+                result.error = str(e)
+            except (OSError, ValueError, UnicodeError) as e:
+                result.error = f"{type(e).__name__}: {e}"
+            result.elapsed = time.perf_counter() - started
+        return result
+
+    async def fetch_all(self, projects, modes, year_month):
+        """工事 × モードを並行に取得する（[(工事, {モード: SiteResult}), ...] と所要秒数）"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        tasks = [
+            [asyncio.ensure_future(self.fetch(project, mode, year_month, semaphore)) for mode in modes]
+            for project in projects
+        ]
+        await asyncio.gather(*(task for row in tasks for task in row))
+        results = [
+            (project, {mode: task.result() for mode, task in zip(modes, row)})
+            for project, row in zip(projects, tasks)
+        ]
+        return results, time.perf_counter() - started
+
+    @staticmethod
+    def fetch_report(results, elapsed):
+        """取得結果の内訳（どの現場が未接続・失敗か）"""
+        site_results = [result for _, by_mode in results for result in by_mode.values()]
+        failed = [result for result in site_results if result.error and not result.unconnected]
+        return {
+            "sites": len(results),
+            "requests": len(site_results),
+            "succeeded": sum(1 for result in site_results if result.data is not None),
+            "unconnected": sorted({result.project_id for result in site_results if result.unconnected}),
+            "failed": [result.report() for result in failed],
+            "partial": bool(failed),
+            "elapsed_ms": round(elapsed * 1000),
+        }
+
+    async def cross_summary(self, year_month):
+        """getCrossSummary_ と同じ形の data と取得結果の内訳"""
+        projects = [project for project in self.load_projects() if is_active(project)]
+        results, elapsed = await self.fetch_all(projects, ["summary"], year_month)
+        summaries = []
+        total_budget = 0
+        total_spent = 0
+        for project, by_mode in results:
+            summary = self._summary_from(by_mode["summary"])
+            with_project(summary, project)
+            total_budget += summary["total_budget"]
+            total_spent += summary["total_spent"]
+            summaries.append(summary)
+        data = {
+            "yearMonth": year_month,
+            "total": {
+                "budget": total_budget,
+                "spent": total_spent,
+                "remaining": total_budget - total_spent,
+                "consumption_rate": js_to_fixed1(total_spent / total_budget * 100) if total_budget > 0 else 0,
+            },
+            "projects": summaries,
+        }
+        return data, self.fetch_report(results, elapsed)
+
+    async def cross_health(self, year_month):
+        """getCrossHealth_ と同じ形の data と取得結果の内訳"""
+        projects = [project for project in self.load_projects() if is_active(project)]
+        results, elapsed = await self.fetch_all(projects, ["health"], year_month)
+        health_list = [
+            with_project(self._health_from(by_mode["health"], year_month), project)
+            for project, by_mode in results
+        ]
+        return {"yearMonth": year_month, "projects": health_list}, self.fetch_report(results, elapsed)
+
+    async def project_detail(self, project_id, year_month):
+        """getProjectDetail_ と同じ形の data（summary と health は並行に取得）"""
+        target = next((project for project in self.load_projects() if project["project_id"] == project_id), None)
+        if target is None:
+            raise ValueError(f'工事ID "{project_id}" が見つからない')
+        results, elapsed = await self.fetch_all([target], ["summary", "health"], year_month)
+        by_mode = results[0][1]
+        data = {
+            "project": target,
+            "summary": self._summary_from(by_mode["summary"]),
+            "health": self._health_from(by_mode["health"], year_month),
+        }
+        return data, self.fetch_report(results, elapsed)
+
+    @staticmethod
+    def _summary_from(result):
+        if result.unconnected:
+            return blank_summary("未接続", result.error)
+        if result.error:
+            return blank_summary("エラー", result.error)
+        return summary_entry(result.data)
+
+    @staticmethod
+    def _health_from(result, year_month):
+        if result.unconnected:
+            return blank_health(year_month, "未接続", result.error)
+        if result.error:
+            return blank_health(year_month, "エラー", result.error)
+        return health_entry(result.data, year_month)
+
+    async def handle(self, params):
+        """hub.gs の doGet と同じパラメータ（mode / month / project_id）で応答を作る
+
+        応答は hub.gs の {success, mode, timestamp, data} に、取得した場合は fetch（内訳）を加えたもの。
+        """
+        mode = params.get("mode") or ""
+        year_month = params.get("month") or current_year_month()
+        try:
+            report = None
+            if mode == "projects_all":
+                projects = self.load_projects()
+                data = {"count": len(projects), "projects": projects}
+            elif mode == "cross_summary":
+                data, report = await self.cross_summary(year_month)
+            elif mode == "cross_health":
+                data, report = await self.cross_health(year_month)
+            elif mode == "project_detail":
+                if not params.get("project_id"):
+                    raise ValueError("project_detail モードには project_id パラメータが必要")
+                data, report = await self.project_detail(params["project_id"], year_month)
+            else:
+                raise ValueError(f"未知のモード: {mode} ({' / '.join(MODES)} のいずれかを指定)")
+        except (OSError, ValueError, KeyError, RegistryLockTimeout) as e:
+            return {"success": False, "error": str(e), "timestamp": iso_timestamp()}
+        response = {"success": True, "mode": mode, "timestamp": iso_timestamp(), "data": data}
+        if report is not None:
+            response["fetch"] = report
+        return response
+
+
+# === HTTPサーバー（hub.gs の Web App の代わり） ===
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        response = asyncio.run(self.server.hub.handle(params))
+        body = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(hub, host, port):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.hub = hub
+    host, port = server.server_address[:2]
+    print(f"URL: http://{host}:{port}", flush=True)
+    print(f"例: http://{host}:{port}/?mode=cross_health&month={current_year_month()}")
+    print("Ctrl+C で終了", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def load_sites(path):
+    """--sites のJSON（{工事ID: URL または {"url": ..., "key": ...}}）"""
+    with open(path, "r", encoding="utf-8") as f:
+        sites = json.load(f)
+    if not isinstance(sites, dict):
+        raise ValueError(f"{path}: 工事IDをキーとするオブジェクトではありません")
+    return sites
+
+
+def print_report(report):
+    print(f"取得: {report['sites']}現場 / 成功 {report['succeeded']}/{report['requests']}件 / "
+          f"未接続 {len(report['unconnected'])} / 失敗 {len(report['failed'])}（{report['elapsed_ms'] / 1000:.2f}秒）",
+          file=sys.stderr)
+    if report["sites"] == 0:
+        print("警告: 工事台帳に稼働中の工事がありません（--registry を確認）", file=sys.stderr)
+    for failure in report["failed"][:REPORT_FAILURE_LINES]:
+        print(f"  失敗 {failure['project_id']} mode={failure['mode']}: {failure['error']}"
+              f"（{failure['attempts']}回, {failure['elapsed_ms']}ms）", file=sys.stderr)
+    if len(report["failed"]) > REPORT_FAILURE_LINES:
+        print(f"  …ほか{len(report['failed']) - REPORT_FAILURE_LINES}件（応答の fetch.failed を参照）", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本社横断集計（hub.gs の cross_summary / cross_health のPython版）")
+    parser.add_argument("mode", choices=MODES + ("serve",), help="集計の種類、または serve（HTTPで応答）")
+    parser.add_argument("--month", help="対象年月（YYYY-MM、既定は当月）")
+    parser.add_argument("--project-id", help="project_detail の工事ID")
+    parser.add_argument("--registry", type=Path, default=REGISTRY_PATH, help="工事台帳（project_registry.json）のパス")
+    parser.add_argument("--sites", type=Path, help="工事IDごとの api.gs のURL（JSON）")
+    parser.add_argument("--site-url-template", help="api.gs のURLのテンプレート（{project_id} 等）")
+    parser.add_argument("--api-key", default=os.environ.get(API_KEY_ENV, ""),
+                        help=f"api.gs のAPIキー（既定は環境変数 {API_KEY_ENV}）")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="現場ごとのタイムアウト（秒、再試行を含む）")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="同時に取得する現場数")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="HTTP 429/5xx・接続エラー時の再試行回数")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"serve の待ち受けアドレス（既定: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"serve の待ち受けポート（既定: {DEFAULT_PORT}）")
+    args = parser.parse_args()
+
+    try:
+        sites = load_sites(args.sites) if args.sites else {}
+    except (OSError, ValueError) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    with HubAggregator(args.registry, sites, args.site_url_template, args.api_key or None,
+                       args.timeout, args.concurrency, args.retries) as hub:
+        if args.mode == "serve":
+            try:
+                return serve(hub, args.host, args.port)
+            except OSError as e:
+                print(f"エラー: {e}", file=sys.stderr)
+                return 1
+
+        params = {"mode": args.mode, "month": args.month, "project_id": args.project_id}
+        response = asyncio.run(hub.handle(params))
+    print(json.dumps(response, ensure_ascii=False, indent=2))
+    if not response["success"]:
+        print(f"エラー: {response['error']}", file=sys.stderr)
+        return 1
+    if "fetch" in response:
+        print_report(response["fetch"])
+        if response["fetch"]["partial"]:
+            return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Dify コンソールAPIのローカル代替サーバー（エクスポートの負荷試験・回帰試験用）
+
+export_dify_workflows.py が使う次のエンドポイントを、dsl/templates のDSLから
+生成したアプリで応答する:
+  - POST /console/api/refresh-token       Set-Cookieでaccess_token（JWT）・csrf_tokenを返す
+  - GET  /console/api/apps?page=&limit=   アプリ一覧（ページ分割）
+  - GET  /console/api/apps/{id}/export    DSL（{"data": "<DSL>"} のJSON、--export-format yaml でYAMLそのまま）
+  - GET  /_mock/stats                     受け付けたリクエスト数・ステータス別の件数（JSON）
+
+応答の遅延・1ページの最大件数・エラー（5xx）の発生率・レート制限（超過時は429と
+Retry-After）・access_tokenの有効期限を指定できる。アプリはテンプレートを順に繰り返して
+指定件数を作り、アプリ名とIDは件数と順番だけで決まる（実行ごとに同じ）。
+
+使用方法:
+    python scripts/mock_dify_console.py --apps 100 --port 5001 --latency 20 --export-latency 80
+    python scripts/mock_dify_console.py --apps 1000 --error-rate 0.05 --rate-limit 20 --token-ttl 30
+
+    # 別のターミナルでエクスポート（出力先は一時ディレクトリに変える）
+    DIFY_BASE_URL=http://127.0.0.1:5001 DIFY_REFRESH_TOKEN=mock-refresh-token \\
+        DIFY_EXPORT_DIR=/tmp/exported DIFY_TOKEN_CACHE=/tmp/tokens.json \\
+        python scripts/export_dify_workflows.py --workers 8
+"""
+
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import yaml
+
+# === 設定 ===
+PROJECT_ROOT = Path(__file__).parent.parent
+TEMPLATE_DIR = PROJECT_ROOT / "dsl" / "templates"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5001
+DEFAULT_REFRESH_TOKEN = "mock-refresh-token"
+# Difyのアプリ一覧は1ページ最大100件
+DEFAULT_MAX_PAGE_SIZE = 100
+DEFAULT_TOKEN_TTL = 3600
+# 5xxエラーとして返すステータス
+DEFAULT_ERROR_STATUSES = (502, 503)
+
+# アプリIDの生成元（件数と順番が同じなら同じIDになる）
+APP_ID_NAMESPACE = uuid.UUID("6f1c1d2e-6a0b-4f43-9a3c-3f4f7d0e5b21")
+# アプリの作成・更新日時（UNIX秒）の基準
+BASE_TIMESTAMP = 1735657200
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# app: ブロック内の name: 行（アプリごとに名前を差し替える）
+APP_BLOCK = re.compile(r"^app:\n(?:(?:[ \t].*)?\n)*", re.MULTILINE)
+APP_NAME_LINE = re.compile(r"^(  name: ).*$", re.MULTILINE)
+
+
+@dataclass
+class MockConfig:
+    apps: int = 100
+    latency: float = 0.0            # 全リクエスト共通の遅延（秒）
+    export_latency: float = 0.0     # エクスポートに追加する遅延（秒）
+    jitter: float = 0.0             # 遅延のばらつき（割合。0.2なら ±20%）
+    max_page_size: int = DEFAULT_MAX_PAGE_SIZE
+    error_rate: float = 0.0         # エクスポート・一覧でエラーを返す確率
+    error_statuses: tuple = DEFAULT_ERROR_STATUSES
+    rate_limit: float = 0.0         # 1秒あたりのリクエスト数の上限（0は無制限）
+    token_ttl: float = DEFAULT_TOKEN_TTL
+    refresh_token: str = DEFAULT_REFRESH_TOKEN
+    export_format: str = "json"
+    template_dir: Path = TEMPLATE_DIR
+    seed: int = 0
+
+
+@dataclass
+class MockApp:
+    id: str
+    name: str
+    mode: str
+    template: str
+    updated_at: int
+    description: str = ""
+
+    def summary(self):
+        """アプリ一覧の1件"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "mode": self.mode,
+            "description": self.description,
+            "icon_type": "emoji",
+            "icon": "🤖",
+            "created_at": BASE_TIMESTAMP,
+            "updated_at": self.updated_at,
+        }
+
+
+@dataclass
+class _RateLimiter:
+    """トークンバケット（容量 = 1秒分）"""
+    rate: float
+    tokens: float = 0.0
+    updated: float = field(default_factory=time.monotonic)
+
+    def acquire(self):
+        """許可すれば0、超過なら再試行までの秒数を返す"""
+        now = time.monotonic()
+        capacity = max(1.0, self.rate)
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def load_templates(template_dir):
+    """テンプレートDSLの (ファイル名, 内容, アプリ名, mode) のリスト"""
+    templates = []
+    for path in sorted(Path(template_dir).glob("*.yml")):
+        text = path.read_text(encoding="utf-8")
+        try:
+            app = (yaml.load(text, Loader=YAML_LOADER) or {}).get("app") or {}
+        except (yaml.YAMLError, AttributeError):
+            continue
+        templates.append((path.name, text, str(app.get("name") or path.stem).strip(), app.get("mode", "workflow")))
+    if not templates:
+        raise FileNotFoundError(f"テンプレートDSLがありません: {template_dir}")
+    return templates
+
+
+def rename_app(text, name):
+    """DSLの app.name を差し替える（app: ブロックが見つからなければそのまま）"""
+    block = APP_BLOCK.search(text)
+    if not block:
+        return text
+    renamed = APP_NAME_LINE.sub(lambda m: m.group(1) + json.dumps(name, ensure_ascii=False), block.group(0), count=1)
+    return text[:block.start()] + renamed + text[block.end():]
+
+
+def make_jwt(payload):
+    """署名なしのJWT（エクスポート側は有効期限を読むだけ）"""
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(payload)}.mock"
+
+
+class MockDifyConsole:
+    """代替サーバー本体（スレッドで応答する）
+
+    with MockDifyConsole(MockConfig(apps=10), port=0) as console:
+        requests.get(f"{console.url}/console/api/apps", ...)
+    """
+
+    def __init__(self, config=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.config = config or MockConfig()
+        templates = load_templates(self.config.template_dir)
+        self.apps = []
+        for index in range(self.config.apps):
+            filename, _, name, mode = templates[index % len(templates)]
+            self.apps.append(MockApp(
+                id=str(uuid.uuid5(APP_ID_NAMESPACE, f"app-{index}")),
+                name=f"{name} {index + 1:04d}",
+                mode=mode,
+                template=filename,
+                updated_at=BASE_TIMESTAMP + index,
+            ))
+        self.apps_by_id = {app.id: app for app in self.apps}
+        self.templates = {filename: text for filename, text, _, _ in templates}
+        self._dsl_cache = {}
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._limiter = _RateLimiter(self.config.rate_limit) if self.config.rate_limit > 0 else None
+        self._counts = Counter()
+        self._statuses = Counter()
+        self._issued = 0
+        self._started = time.monotonic()
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.console = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # === 応答の材料 ===
+
+    def dsl(self, app):
+        with self._lock:
+            if app.id not in self._dsl_cache:
+                self._dsl_cache[app.id] = rename_app(self.templates[app.template], app.name)
+            return self._dsl_cache[app.id]
+
+    def issue_tokens(self):
+        with self._lock:
+            self._issued += 1
+            issued = self._issued
+        expires_at = time.time() + self.config.token_ttl
+        access_token = make_jwt({"exp": int(math.ceil(expires_at)), "sub": "mock", "n": issued})
+        csrf_token = uuid.uuid4().hex
+        with self._lock:
+            self._tokens[access_token] = (csrf_token, expires_at)
+        return access_token, csrf_token
+
+    def is_authorized(self, access_token, csrf_token):
+        with self._lock:
+            entry = self._tokens.get(access_token)
+        return bool(entry) and entry[0] == csrf_token and entry[1] > time.time()
+
+    def delay(self, seconds):
+        if seconds <= 0:
+            return
+        if self.config.jitter:
+            with self._lock:
+                seconds *= 1 + self._random.uniform(-self.config.jitter, self.config.jitter)
+        time.sleep(max(0.0, seconds))
+
+    def injected_error(self):
+        """エラーを返す場合はそのステータス、返さなければNone"""
+        if self.config.error_rate <= 0:
+            return None
+        with self._lock:
+            if self._random.random() < self.config.error_rate:
+                return self._random.choice(self.config.error_statuses)
+        return None
+
+    def throttle(self):
+        """レート制限を超えていれば再試行までの秒数を返す"""
+        if self._limiter is None:
+            return 0.0
+        with self._lock:
+            return self._limiter.acquire()
+
+    def record(self, endpoint, status):
+        with self._lock:
+            self._counts[endpoint] += 1
+            self._statuses[str(status)] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "uptime": round(time.monotonic() - self._started, 3),
+                "apps": len(self.apps),
+                "issued_tokens": self._issued,
+                "requests": dict(self._counts),
+                "statuses": dict(self._statuses),
+                "config": {key: str(value) if isinstance(value, Path) else value
+                           for key, value in asdict(self.config).items()},
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def console(self):
+        return self.server.console
+
+    def _send(self, endpoint, status, body=b"", content_type="application/json", headers=()):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.console.record(endpoint, status)
+
+    def _cookies(self):
+        cookies = {}
+        for part in self.headers.get("Cookie", "").split(";"):
+            key, sep, value = part.strip().partition("=")
+            if sep:
+                cookies[key] = value
+        return cookies
+
+    def _reject(self, endpoint, inject_errors=True):
+        """レート制限・エラー注入・遅延を適用し、応答済みならTrueを返す"""
+        wait = self.console.throttle()
+        if wait:
+            self._send(endpoint, 429, {"code": "too_many_requests", "message": "Too many requests"},
+                       headers=[("Retry-After", str(max(1, math.ceil(wait))))])
+            return True
+        self.console.delay(self.console.config.latency)
+        status = self.console.injected_error() if inject_errors else None
+        if status:
+            self._send(endpoint, status, {"code": "mock_error", "message": f"Injected error {status}"})
+            return True
+        return False
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if path != "/console/api/refresh-token":
+            return self._send("not_found", 404, {"code": "not_found"})
+        if self._reject("refresh", inject_errors=False):
+            return
+        expected = self.console.config.refresh_token
+        if expected and self._cookies().get("__Host-refresh_token") != expected:
+            return self._send("refresh", 401, {"code": "unauthorized", "message": "Invalid refresh token"})
+        access_token, csrf_token = self.console.issue_tokens()
+        self._send("refresh", 200, {"result": "success"}, headers=[
+            ("Set-Cookie", f"__Host-access_token={access_token}; Path=/; Secure; HttpOnly"),
+            ("Set-Cookie", f"__Host-csrf_token={csrf_token}; Path=/; Secure"),
+        ])
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/_mock/stats":
+            return self._send("stats", 200, self.console.stats())
+
+        match = re.fullmatch(r"/console/api/apps/([^/]+)/export", url.path)
+        if url.path == "/console/api/apps":
+            endpoint = "list"
+        elif match:
+            endpoint = "export"
+        else:
+            return self._send("not_found", 404, {"code": "not_found"})
+
+        cookies = self._cookies()
+        csrf_token = self.headers.get("X-CSRF-Token") or cookies.get("__Host-csrf_token", "")
+        if not self.console.is_authorized(cookies.get("__Host-access_token", ""), csrf_token):
+            return self._send(endpoint, 401, {"code": "unauthorized", "message": "Invalid or expired token"})
+        if self._reject(endpoint):
+            return
+
+        query = parse_qs(url.query)
+        if endpoint == "list":
+            try:
+                page = max(1, int(query.get("page", ["1"])[0]))
+                limit = max(1, min(self.console.config.max_page_size, int(query.get("limit", ["20"])[0])))
+            except ValueError:
+                return self._send(endpoint, 400, {"code": "invalid_param"})
+            apps = self.console.apps[(page - 1) * limit:page * limit]
+            total = len(self.console.apps)
+            return self._send(endpoint, 200, {
+                "data": [app.summary() for app in apps],
+                "page": page, "limit": limit, "total": total, "has_more": page * limit < total,
+            })
+
+        app = self.console.apps_by_id.get(match.group(1))
+        if app is None:
+            return self._send(endpoint, 404, {"code": "app_not_found", "message": "App not found"})
+        self.console.delay(self.console.config.export_latency)
+        dsl = self.console.dsl(app)
+        if self.console.config.export_format == "yaml":
+            return self._send(endpoint, 200, dsl, content_type="application/x-yaml; charset=utf-8")
+        self._send(endpoint, 200, {"data": dsl})
+
+
+def config_from_args(args):
+    return MockConfig(
+        apps=args.apps,
+        latency=args.latency / 1000,
+        export_latency=args.export_latency / 1000,
+        jitter=args.jitter,
+        max_page_size=args.max_page_size,
+        error_rate=args.error_rate,
+        error_statuses=tuple(args.error_statuses),
+        rate_limit=args.rate_limit,
+        token_ttl=args.token_ttl,
+        refresh_token=args.refresh_token,
+        export_format=args.export_format,
+        template_dir=args.template_dir,
+        seed=args.seed,
+    )
+
+
+def add_server_arguments(parser):
+    """代替サーバーの応答設定の引数（ベンチマークと共通）"""
+    parser.add_argument("--latency", type=float, default=0.0, help="全リクエスト共通の遅延（ミリ秒）")
+    parser.add_argument("--export-latency", type=float, default=0.0, help="エクスポートに追加する遅延（ミリ秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="遅延のばらつき（割合。0.2なら ±20%%）")
+    parser.add_argument("--max-page-size", type=int, default=DEFAULT_MAX_PAGE_SIZE,
+                        help=f"アプリ一覧の1ページの最大件数（既定: {DEFAULT_MAX_PAGE_SIZE}）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="一覧・エクスポートでエラーを返す確率（0〜1）")
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=list(DEFAULT_ERROR_STATUSES),
+                        help="エラーとして返すステータス")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="1秒あたりのリクエスト数の上限（超過は429）")
+    parser.add_argument("--token-ttl", type=float, default=DEFAULT_TOKEN_TTL, help="access_tokenの有効期間（秒）")
+    parser.add_argument("--export-format", choices=("json", "yaml"), default="json",
+                        help="エクスポートの応答形式（json: {\"data\": DSL} / yaml: DSLそのまま）")
+    parser.add_argument("--template-dir", type=Path, default=TEMPLATE_DIR, help="アプリの元にするDSLのディレクトリ")
+    parser.add_argument("--seed", type=int, default=0, help="遅延・エラーの乱数シード")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dify コンソールAPIのローカル代替サーバー")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けるアドレス（既定: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"待ち受けるポート（既定: {DEFAULT_PORT}、0で空きポート）")
+    parser.add_argument("--apps", type=int, default=100, help="アプリ数")
+    parser.add_argument("--refresh-token", default=DEFAULT_REFRESH_TOKEN,
+                        help="受け付けるリフレッシュトークン（空文字なら何でも受け付ける）")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        console = MockDifyConsole(config_from_args(args), args.host, args.port)
+    except (OSError, FileNotFoundError) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+
+    # 先頭行はベンチマークが読み取る（ポート0の場合の実際のURL）
+    print(f"URL: {console.url}", flush=True)
+    print(f"アプリ: {len(console.apps)} 件（テンプレート {len(console.templates)} 種）")
+    print(f"リフレッシュトークン: {args.refresh_token or '(何でも可)'}")
+    print("Ctrl+C で終了", flush=True)
+    try:
+        console.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        console.server.server_close()
+        print(json.dumps(console.stats()["statuses"], ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+現場SSの api.gs（Web App）のローカル代替サーバー（hub_aggregator.py の試験用）
+
+Apps Script の Web App と同じ形のURL（/macros/s/{サイトID}/exec）で、任意のサイトIDに
+api.gs の mode=summary / health / project と同じ形のJSONを返す。値はサイトIDと対象年月
+だけで決まる（実行ごとに同じ）。hub_aggregator.py には次のURLテンプレートを渡す:
+
+    http://127.0.0.1:{PORT}/macros/s/{project_id}/exec
+
+応答の遅延・遅いサイトの割合（タイムアウトの確認用）・エラー（api.gs が返す
+success:false と、HTTP 5xx）の発生率・APIキー・Apps Script と同じ302リダイレクト
+（script.googleusercontent.com 相当のURLへ）を指定できる。
+  - GET /_mock/stats    受け付けたリクエスト数・モード別・ステータス別の件数（JSON）
+
+使用方法:
+    python scripts/mock_site_api.py --port 8766 --latency 300 --jitter 0.3
+    python scripts/mock_site_api.py --slow-rate 0.1 --slow-latency 15000 --error-rate 0.05 --redirect
+
+    # 別のターミナルで横断集計
+    python scripts/hub_aggregator.py cross_health \\
+        --site-url-template "http://127.0.0.1:8766/macros/s/{project_id}/exec"
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import aggregate_payments as agg
+from budget_health import get_signal
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+# 同時接続の待ち行列（既定の5では数百サイトの同時取得で接続が詰まる）
+REQUEST_QUEUE_SIZE = 256
+# 5xxエラーとして返すステータス
+DEFAULT_ERROR_STATUSES = (500, 503)
+# 工期（サイトごとの既定。出来高率の計算に使う）
+PROJECT_START = "2025-04"
+PROJECT_MONTHS = 12
+
+
+@dataclass
+class SiteApiConfig:
+    latency: float = 0.0            # 全リクエスト共通の遅延（秒）
+    jitter: float = 0.0             # 遅延のばらつき（割合。0.2なら ±20%）
+    slow_rate: float = 0.0          # 遅いサイトの割合（サイトIDで決まる）
+    slow_latency: float = 0.0       # 遅いサイトに追加する遅延（秒）
+    error_rate: float = 0.0         # success:false を返す確率（api.gs の例外と同じ形）
+    http_error_rate: float = 0.0    # HTTP 5xx を返す確率
+    error_statuses: tuple = DEFAULT_ERROR_STATUSES
+    api_key: str = ""               # 空ならキーなしで受け付ける（api.gs の API_KEY 未設定と同じ）
+    redirect: bool = False          # Apps Script と同じく302で結果のURLへ転送する
+    seed: int = 0
+
+
+def _site_random(site_id, salt=""):
+    return random.Random(zlib.crc32(f"{site_id}:{salt}".encode("utf-8")))
+
+
+def _months_between(start, end):
+    sy, sm = (int(part) for part in start.split("-")[:2])
+    ey, em = (int(part) for part in end.split("-")[:2])
+    return (ey * 12 + em) - (sy * 12 + sm) + 1
+
+
+def site_metrics(site_id, year_month):
+    """サイトIDと対象年月から決まる予算健康度（api.gs の getBudgetHealthMetrics 相当）"""
+    rng = _site_random(site_id)
+    bac = rng.randint(20, 200) * 1_000_000
+    pace = rng.uniform(0.85, 1.3)               # 出来高に対する支出の進み具合
+    try:
+        elapsed = _months_between(PROJECT_START, year_month)
+    except ValueError:
+        elapsed = 0
+    progress = min(max(elapsed / PROJECT_MONTHS, 0.0), 1.0)
+    pv = round(bac * progress)
+    ac = round(bac * progress * pace)
+    consumption_rate = agg.js_to_fixed1(ac / bac * 100)
+    progress_rate = agg.js_to_fixed1(progress * 100)
+    gap = agg.js_to_fixed1(consumption_rate - progress_rate)
+    projected_total = round(ac / progress) if progress > 0 else 0
+    return {
+        "bac": bac,
+        "pv": pv,
+        "ac": ac,
+        "consumption_rate": consumption_rate,
+        "progress_rate": progress_rate,
+        "gap": gap,
+        "projected_total": projected_total,
+        "shortage": max(0, projected_total - bac),
+        "signal": get_signal(gap),
+    }
+
+
+def site_project(site_id):
+    """mode=project（工事メタデータ）"""
+    rng = _site_random(site_id, "project")
+    return {
+        "project_name": f"代替現場 {site_id}",
+        "manager_name": f"所長{rng.randint(1, 99):02d}",
+        "contract_amount": rng.randint(30, 250) * 1_000_000,
+        "start_date": PROJECT_START,
+        "end_date": "2026-03",
+    }
+
+
+def site_summary(site_id, year_month):
+    """mode=summary（api.gs の getSummaryData_ と同じ形）"""
+    metrics = site_metrics(site_id, year_month)
+    return {
+        "yearMonth": year_month,
+        "total_budget": metrics["bac"],
+        "total_spent": metrics["ac"],
+        "total_remaining": metrics["bac"] - metrics["ac"],
+        "consumption_rate": metrics["consumption_rate"],
+        "progress_rate": metrics["progress_rate"],
+        "signal": metrics["signal"],
+        "shortage": metrics["shortage"],
+        "status": metrics["signal"],
+    }
+
+
+def site_health(site_id, year_month):
+    """mode=health（api.gs の getHealthData_ と同じ形）"""
+    metrics = site_metrics(site_id, year_month)
+    project = site_project(site_id)
+    price = project["contract_amount"]
+    signal = metrics["signal"]
+    return {
+        "project_name": project["project_name"],
+        "manager_name": project["manager_name"],
+        "yearMonth": year_month,
+        **metrics,
+        "budget_consumed_pct": metrics["consumption_rate"],
+        "progress_pct": metrics["progress_rate"],
+        "shortage_yen": metrics["shortage"],
+        "profit_impact_pt": f"{metrics['shortage'] / price * 100:.1f}" if price > 0 else "0.0",
+        "status_label": signal,
+        "action_hint": "今すぐ対策が必要" if signal == "超過" else "注意して監視" if signal == "注意" else "正常",
+    }
+
+
+def iso_timestamp():
+    """new Date().toISOString() と同じ形式"""
+    now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+
+class MockSiteApi:
+    """代替サーバー本体（スレッドで応答する）
+
+    with MockSiteApi(SiteApiConfig(latency=0.2), port=0) as api:
+        url = api.site_url("P001")
+    """
+
+    def __init__(self, config=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.config = config or SiteApiConfig()
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._results = {}
+        self._counts = Counter()
+        self._statuses = Counter()
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._started = time.monotonic()
+        server_class = type("_Server", (ThreadingHTTPServer,), {"request_queue_size": REQUEST_QUEUE_SIZE})
+        self.server = server_class((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.site_api = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url_template(self):
+        """hub_aggregator.py の --site-url-template に渡すURL"""
+        return f"{self.url}/macros/s/{{project_id}}/exec"
+
+    def site_url(self, site_id):
+        return self.url_template.format(project_id=site_id)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # === 応答 ===
+
+    def is_slow(self, site_id):
+        return self.config.slow_rate > 0 and _site_random(site_id, "slow").random() < self.config.slow_rate
+
+    def delay(self, site_id):
+        seconds = self.config.latency
+        if self.config.jitter and seconds > 0:
+            with self._lock:
+                seconds *= 1 + self._random.uniform(-self.config.jitter, self.config.jitter)
+        if self.is_slow(site_id):
+            seconds += self.config.slow_latency
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def roll(self, rate):
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def respond(self, site_id, params):
+        """api.gs の doGet と同じ形の応答（dict）"""
+        mode = params.get("mode", "summary")
+        if mode == "evm":
+            mode = "health"
+        if mode != "master" and self.config.api_key:
+            key = params.get("key", "")
+            if not key or key != self.config.api_key:
+                message = "認証エラー: keyパラメータが必要（?key=YOUR_API_KEY）" if not key else "認証エラー: APIキーが無効"
+                return {"success": False, "error": message, "timestamp": iso_timestamp()}
+        if self.roll(self.config.error_rate):
+            return {"success": False, "error": "Service Spreadsheets timed out while accessing document",
+                    "timestamp": iso_timestamp()}
+        year_month = params.get("month") or datetime.now().strftime("%Y-%m")
+        builders = {
+            "summary": lambda: site_summary(site_id, year_month),
+            "health": lambda: site_health(site_id, year_month),
+            "project": lambda: site_project(site_id),
+        }
+        if mode not in builders:
+            return {"success": False, "timestamp": iso_timestamp(),
+                    "error": f"未知のモード: {mode} (health / master / summary / project / aggregate / dashboard のいずれかを指定)"}
+        return {"success": True, "mode": mode, "anonymized": False, "timestamp": iso_timestamp(),
+                "data": builders[mode]()}
+
+    def store_result(self, body):
+        """リダイレクト先で返す結果を預かる（Apps Script の googleusercontent 相当）"""
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._results[token] = body
+        return token
+
+    def take_result(self, token):
+        with self._lock:
+            return self._results.pop(token, None)
+
+    def enter(self):
+        with self._lock:
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def record(self, endpoint, status):
+        with self._lock:
+            self._counts[endpoint] += 1
+            self._statuses[str(status)] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "uptime": round(time.monotonic() - self._started, 3),
+                "requests": dict(self._counts),
+                "statuses": dict(self._statuses),
+                "max_in_flight": self._max_in_flight,
+                "config": asdict(self.config),
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def site_api(self):
+        return self.server.site_api
+
+    def _send(self, endpoint, status, body=b"", content_type="application/json; charset=utf-8", headers=()):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.site_api.record(endpoint, status)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+
+        if url.path == "/_mock/stats":
+            return self._send("stats", 200, self.site_api.stats())
+        if len(parts) == 2 and parts[0] == "_result":
+            body = self.site_api.take_result(parts[1])
+            if body is None:
+                return self._send("result", 404, {"error": "not found"})
+            return self._send("result", 200, body)
+        if len(parts) != 4 or parts[:2] != ["macros", "s"] or parts[3] != "exec":
+            return self._send("unknown", 404, {"error": f"not found: {url.path}"})
+
+        site_id = parts[2]
+        endpoint = params.get("mode", "summary")
+        api = self.site_api
+        api.enter()
+        try:
+            api.delay(site_id)
+            if api.roll(api.config.http_error_rate):
+                with api._lock:
+                    status = api._random.choice(api.config.error_statuses)
+                return self._send(endpoint, status, "<html><body>Service unavailable</body></html>",
+                                  content_type="text/html; charset=utf-8")
+            body = api.respond(site_id, params)
+            if api.config.redirect:
+                token = api.store_result(body)
+                return self._send(endpoint, 302, "", content_type="text/html; charset=utf-8",
+                                  headers=[("Location", f"{api.url}/_result/{token}")])
+            self._send(endpoint, 200, body)
+        finally:
+            api.leave()
+
+
+def config_from_args(args):
+    return SiteApiConfig(
+        latency=args.latency / 1000,
+        jitter=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency / 1000,
+        error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate,
+        error_statuses=tuple(args.error_statuses),
+        api_key=args.api_key,
+        redirect=args.redirect,
+        seed=args.seed,
+    )
+
+
+def add_server_arguments(parser):
+    """代替サーバーの応答設定の引数"""
+    parser.add_argument("--latency", type=float, default=0.0, help="全リクエスト共通の遅延（ミリ秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="遅延のばらつき（割合。0.2なら ±20%%）")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="遅いサイトの割合（0〜1、サイトIDで決まる）")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="遅いサイトに追加する遅延（ミリ秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="success:false を返す確率（0〜1）")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="HTTP 5xx を返す確率（0〜1）")
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=list(DEFAULT_ERROR_STATUSES),
+                        help="HTTPエラーとして返すステータス")
+    parser.add_argument("--api-key", default="", help="要求するAPIキー（空ならキーなしで受け付ける）")
+    parser.add_argument("--redirect", action="store_true", help="Apps Script と同じく302で結果のURLへ転送する")
+    parser.add_argument("--seed", type=int, default=0, help="遅延・エラーの乱数シード")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="現場SSの api.gs のローカル代替サーバー")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けるアドレス（既定: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"待ち受けるポート（既定: {DEFAULT_PORT}、0で空きポート）")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        site_api = MockSiteApi(config_from_args(args), args.host, args.port)
+    except OSError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+
+    # 先頭行は試験スクリプトが読み取る（ポート0の場合の実際のURL）
+    print(f"URL: {site_api.url}", flush=True)
+    print(f"URLテンプレート: {site_api.url_template}")
+    print("Ctrl+C で終了", flush=True)
+    try:
+        site_api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site_api.server.server_close()
+        print(json.dumps(site_api.stats()["statuses"], ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+PoCデータの列指向形式（Parquet / Arrow）入出力
+
+prepare_poc_data.py が出力する3つの表（支払明細・取引先マスタ・実行予算）を
+型付きの列指向形式で書き出し・読み込みする。金額列は整数型、カテゴリ・費目・
+支払先などの繰り返しの多い列は辞書エンコードで保持するため、集計・検証の際に
+TSVの文字列から金額を再解析する必要がない。TSV出力（スプレッドシート貼り付け用）は
+これまで通りで、列指向形式は追加の出力として扱う。
+
+形式:
+  - parquet: Apache Parquet（.parquet）
+  - arrow:   Arrow IPCストリーム（.arrows）
+
+依存: pyarrow（pip install pyarrow）
+
+使用方法（読み込み確認・月別合計の検証）:
+    python scripts/poc_columnar.py output/poc_test_data.parquet
+"""
+
+import sys
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# 形式 → 拡張子
+FORMATS = {
+    "parquet": ".parquet",
+    "arrow": ".arrows",
+}
+
+# 書き出し時に1つのRecordBatchにまとめる行数
+BATCH_SIZE = 65536
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("列指向形式の入出力には pyarrow が必要です: pip install pyarrow")
+
+
+def _dict_string():
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def payment_schema():
+    """支払明細（18列）のスキーマ。列名はTSVヘッダーと同じ"""
+    _require_pyarrow()
+    return pa.schema([
+        ("No.", pa.int64()),
+        ("カテゴリ", _dict_string()),
+        ("工事種別", _dict_string()),
+        ("工種", _dict_string()),
+        ("費目", _dict_string()),
+        ("支払先", _dict_string()),
+        ("支払年月", _dict_string()),
+        ("数量", pa.int64()),
+        ("単位", _dict_string()),
+        ("単価", pa.int64()),
+        ("金額", pa.int64()),
+        ("相殺額", pa.int64()),
+        ("相殺先", _dict_string()),
+        ("課税区分", _dict_string()),
+        ("消費税", pa.int64()),
+        ("税込合計", pa.int64()),
+        ("予算箱ID", _dict_string()),
+        ("備考", pa.string()),
+    ])
+
+
+def vendor_schema():
+    """取引先マスタのスキーマ"""
+    _require_pyarrow()
+    return pa.schema([
+        ("vendor_id", pa.string()),
+        ("vendor_name", pa.string()),
+        ("vendor_type", _dict_string()),
+        ("active", pa.bool_()),
+    ])
+
+
+def budget_schema():
+    """実行予算テーブルのスキーマ"""
+    _require_pyarrow()
+    return pa.schema([
+        ("budget_box_id", pa.string()),
+        ("category", _dict_string()),
+        ("work_type", _dict_string()),
+        ("koushus", _dict_string()),
+        ("expense_id", _dict_string()),
+        ("expense_name", _dict_string()),
+        ("budget_amount", pa.int64()),
+        ("start_month", _dict_string()),
+        ("end_month", _dict_string()),
+    ])
+
+
+def _convert_value(value, field_type):
+    """TSV用の行の値を列の型に合わせる"""
+    if pa.types.is_boolean(field_type):
+        return value if isinstance(value, bool) else str(value).upper() == "TRUE"
+    if pa.types.is_integer(field_type):
+        return int(value or 0)
+    return "" if value is None else str(value)
+
+
+class TableWriter:
+    """行リストを一定件数ごとにRecordBatchへまとめて書き出すライター
+
+    ストリーミング変換から1行ずつ渡しても、保持するのはBATCH_SIZE行分のみ。
+    """
+
+    def __init__(self, path, schema, fmt="parquet", batch_size=BATCH_SIZE):
+        _require_pyarrow()
+        if fmt not in FORMATS:
+            raise ValueError(f"未対応の形式です: {fmt}（{', '.join(FORMATS)}）")
+        self.path = Path(path)
+        self.schema = schema
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.row_count = 0
+        self._columns = [[] for _ in schema]
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(str(self.path), schema)
+        else:
+            self._sink = pa.OSFile(str(self.path), "wb")
+            self._writer = ipc.new_stream(self._sink, schema)
+
+    def write_row(self, row):
+        if len(row) != len(self._columns):
+            raise ValueError(f"列数が一致しません: {len(row)} != {len(self._columns)}")
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self.row_count += 1
+        if len(self._columns[0]) >= self.batch_size:
+            self._flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
+    def _flush(self):
+        if not self._columns[0]:
+            return
+        arrays = [
+            pa.array([_convert_value(v, field.type) for v in column], type=field.type)
+            for column, field in zip(self._columns, self.schema)
+        ]
+        self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self._columns = [[] for _ in self.schema]
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        if self.fmt != "parquet":
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def columnar_path(tsv_path, fmt):
+    """TSVのパスから同名の列指向ファイルのパスを作る"""
+    return Path(tsv_path).with_suffix(FORMATS[fmt])
+
+
+def read_table(path, columns=None):
+    """列指向ファイルを読み込む（形式は拡張子で判定）
+
+    バッチごとに異なる辞書は読み込み時に1つに統一する（集計でそのまま使えるように）。
+
+    Returns:
+        pyarrow.Table: 金額は整数列、カテゴリ等は辞書エンコード列のまま
+    """
+    _require_pyarrow()
+    path = Path(path)
+    if path.suffix == FORMATS["parquet"]:
+        table = pq.read_table(str(path), columns=columns)
+    else:
+        with pa.OSFile(str(path), "rb") as source:
+            table = ipc.open_stream(source).read_all()
+        if columns:
+            table = table.select(columns)
+    return table.unify_dictionaries()
+
+
+def table_to_rows(table):
+    """TSVと同じ並びの行リストに戻す（値の比較・貼り付け用）"""
+    columns = [column.to_pylist() for column in table.columns]
+    return [list(values) for values in zip(*columns)]
+
+
+def monthly_totals(table, month_column="支払年月", amount_column="金額"):
+    """支払年月ごとの金額合計（文字列の再解析なし）
+
+    Returns:
+        dict: YYYY-MM → 合計金額
+    """
+    grouped = table.select([month_column, amount_column]).group_by(month_column).aggregate(
+        [(amount_column, "sum")]
+    )
+    months = grouped.column(month_column).to_pylist()
+    totals = grouped.column(f"{amount_column}_sum").to_pylist()
+    return dict(sorted(zip(months, totals)))
+
+
+def main():
+    import prepare_poc_data as ppd
+
+    if len(sys.argv) != 2:
+        print("使用方法: python scripts/poc_columnar.py <poc_test_data.parquet|.arrows>", file=sys.stderr)
+        return 1
+    path = Path(sys.argv[1])
+    if not path.exists():
+        print(f"エラー: ファイルが見つかりません: {path}", file=sys.stderr)
+        return 1
+
+    table = read_table(path)
+    print(f"=== {path.name} ===\n")
+    print(f"  行数: {table.num_rows:,} / 列数: {table.num_columns}")
+    print(table.schema)
+
+    totals = monthly_totals(table)
+    print("\n--- 支払年月別 合計 ---")
+    for year_month, total in totals.items():
+        print(f"  {year_month}: {total:>14,}")
+
+    # 検証値は月度ラベル単位のため、MONTH_MAPでYYYY-MMに対応付けて照合する
+    label_totals = {label: totals.get(ym, 0) for label, ym in ppd.MONTH_MAP.items()}
+    return 0 if ppd.validate_totals(label_totals) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
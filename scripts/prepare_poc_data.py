@@ -13,12 +13,34 @@ PoC用テストデータ変換スクリプト
 
 検証値:
   - 10月: 10,933,337円 / 11月: 8,458,604円 / 12月: 4,332,077円
+
+使用方法:
+    python scripts/prepare_poc_data.py                 # 従来モード（JSON全体を読み込み）
+    python scripts/prepare_poc_data.py --stream        # ストリーミングモード
+    python scripts/prepare_poc_data.py --stream --json path/to/final_output.json
+    python scripts/prepare_poc_data.py --incremental   # 差分モード（前回からの変更行のみ）
+    python scripts/prepare_poc_data.py --stream --columnar parquet  # TSVに加えてParquetも出力
+    python scripts/prepare_poc_data.py --stream --budget-start 2026-04 --budget-end 2027-03  # 工期を指定
+
+ストリーミングモードでは final_output.json を少しずつ読み込みながら
+支払明細を1件ずつ変換し、3種類のTSVを1パスで出力する。月度は固定リストではなく
+JSON内の出現順に検出するため、複数年分の支払履歴もメモリ一定で処理できる。
+
+差分モードでは各明細の内容ハッシュを output/.poc_row_cache.json に記録し、
+前回から変わっていない行は分類をスキップする。No.と取引先IDは実行をまたいで固定。
 """
+import argparse
+import contextlib
+import hashlib
 import json
 import csv
+import os
+import re
 import sys
+import unicodedata
 from pathlib import Path
-from collections import defaultdict, OrderedDict
+from collections import defaultdict, deque, namedtuple, OrderedDict
+from functools import lru_cache
 
 # === パス設定 ===
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,6 +53,10 @@ TSV_TEST_DATA = OUTPUT_DIR / "poc_test_data.tsv"
 TSV_VENDORS = OUTPUT_DIR / "poc_vendors.tsv"
 TSV_BUDGET = OUTPUT_DIR / "poc_budget.tsv"
 
+# 差分モードの行キャッシュ
+ROW_CACHE_PATH = OUTPUT_DIR / ".poc_row_cache.json"
+ROW_CACHE_VERSION = 5
+
 # 検証値（税抜合計）
 EXPECTED_TOTALS = {
     "10月度": 10_933_337,
@@ -45,6 +71,38 @@ MONTH_MAP = {
     "12月度": "2025-12",
 }
 
+# 実行予算の期間（工期の開始月・終了月）の既定値（--budget-start / --budget-end で変更）
+BUDGET_PERIOD = ("2025-10", "2026-03")
+
+# 年の無い月度ラベルの基準年（ストリーミングモードで最初の月度に使用）
+BASE_YEAR = 2025
+
+# 令和元年 = 2019年
+REIWA_OFFSET = 2018
+
+# ストリーミング読み込みのチャンクサイズ（文字数）
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# ストリーミングモードで画面表示する手動確認項目の上限（全件は備考列に記録済み）
+REVIEW_PREVIEW_LIMIT = 100
+
+# 費目分類キャッシュの上限（経費項目・内訳の組み合わせ数）
+CLASSIFY_CACHE_SIZE = 4096
+
+# TSVヘッダー
+TEST_HEADERS = [
+    "No.", "カテゴリ", "工事種別", "工種", "費目", "支払先",
+    "支払年月", "数量", "単位", "単価", "金額",
+    "相殺額", "相殺先",
+    "課税区分", "消費税", "税込合計", "予算箱ID", "備考"
+]
+VENDOR_HEADERS = ["vendor_id", "vendor_name", "vendor_type", "active"]
+BUDGET_HEADERS = [
+    "budget_box_id", "category", "work_type", "koushus",
+    "expense_id", "expense_name", "budget_amount",
+    "start_month", "end_month"
+]
+
 # === 経費コード→カテゴリ ===
 def get_category(code_num):
     """JSON経費コード番号からカテゴリ名を判定"""
@@ -102,11 +160,123 @@ PETTY_CASH_MAP = {
     "マグネットクリップ": ("F60", "事務用品費", "現場管理費"),
 }
 
-# 表記揺れ正規化マップ
+
+class KeywordClassifier:
+    """キーワード→分類値の対応表から構築するAho–Corasick照合器
+
+    文字列を1回走査するだけで全キーワードの出現を検出し、対応表の登録順で
+    最も優先度の高い（先に登録された）キーワードを返す。`keyword in text` を
+    キーワード数だけ繰り返す方式と同じ結果を、キーワード数に依存しない
+    コストで得られる。構築後に対応表を変更しても反映されないため、
+    変更した場合は作り直すこと。
+    """
+
+    def __init__(self, mapping):
+        self.keywords = list(mapping.keys())
+        self.values = list(mapping.values())
+        self._goto = [{}]     # 状態 → {文字: 次状態}
+        self._fail = [0]      # 状態 → 失敗遷移先
+        self._output = [None]  # 状態 → この状態で一致する最優先キーワードの番号
+
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._goto[state][char] = next_state
+                state = next_state
+            if self._output[state] is None:
+                self._output[state] = index
+
+        # 幅優先で失敗遷移を張り、接尾辞側の一致結果を優先度順に統合する
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target
+                inherited = self._output[target]
+                own = self._output[next_state]
+                if inherited is not None and (own is None or inherited < own):
+                    self._output[next_state] = inherited
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def match(self, text):
+        """textに含まれる最優先のキーワードを探す
+
+        Returns:
+            tuple | None: (keyword, value)。一致しなければNone
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        best = output[0]  # 空文字キーワードは常に一致
+        state = 0
+        for char in text:
+            if best == 0:
+                break
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = output[state]
+            if found is not None and (best is None or found < best):
+                best = found
+        if best is None:
+            return None
+        return self.keywords[best], self.values[best]
+
+
+PETTY_CASH_CLASSIFIER = KeywordClassifier(PETTY_CASH_MAP)
+
+# 表記揺れ正規化マップ（確認済みの別表記 → 正規表記。曖昧一致の確認項目はここに追加する）
 VENDOR_NORMALIZE = {
     "(有)濵畑水道": "(有)濱畑水道",
 }
 
+# 法人格の正式表記 → 略称（NFKC後の半角括弧表記に揃える）
+CORPORATE_FORMS = {
+    "株式会社": "(株)",
+    "有限会社": "(有)",
+    "合同会社": "(同)",
+    "合資会社": "(資)",
+    "合名会社": "(名)",
+}
+
+# 異体字 → 照合用の標準字（照合キーにのみ使用し、表示名は変えない）
+VENDOR_CHAR_VARIANTS = str.maketrans({
+    "濵": "浜", "濱": "浜",
+    "髙": "高",
+    "﨑": "崎", "嵜": "崎",
+    "邊": "辺", "邉": "辺",
+    "齋": "斎", "齊": "斉",
+    "澤": "沢",
+    "冨": "富",
+})
+
+# 表記揺れの曖昧一致（文字2-gramのDice係数）の閾値（一致しても名寄せせず確認項目にする）
+VENDOR_FUZZY_THRESHOLD = 0.8
+
+# 業者名正規化キャッシュの上限（業者名の表記数）
+VENDOR_CACHE_SIZE = 8192
+
+# 業者分類の推定（上記以外はretail）
+VENDOR_SUBCONTRACTORS = {"川越建設(株)", "鹿児島仮設(株)", "菱和コンクリート(株)",
+                         "(有)濱畑水道", "(株)コマロック", "環境保全建設(株)"}
+VENDOR_SUPPLIERS = {"桜島生コンクリート(株)", "(株)加根又本店", "(株)グリーンクロス",
+                    "永瀬電業"}
+VENDOR_SERVICES = {"(株)現場サポート", "(株)シーティーエス", "(株)デザインアーク",
+                   "(有)大建測量設計", "JGS", "(株)勝利商会"}
+
 
 def parse_expense_code(expense_str):
     """経費項目文字列('14.外注費'形式)を解析してコード番号を返す"""
@@ -119,21 +289,193 @@ def parse_expense_code(expense_str):
         return None
 
 
+_CORPORATE_PATTERN = re.compile(
+    r"\s*(" + "|".join(re.escape(form) for form in CORPORATE_FORMS) + r")\s*"
+)
+_CORPORATE_MARK_PATTERN = re.compile(r"\s*\((株|有|同|資|名)\)\s*")
+# 数字・英字の並び（「霧島工業1」「霧島工業2」等、違えば別業者とみなす部分）
+_VENDOR_TOKEN_PATTERN = re.compile(r"[0-9]+|[A-Za-z]+")
+
+
+def canonicalize_vendor_name(name):
+    """業者名の表示形を整える（NFKC・空白整理・法人格の略称化）
+
+    全角英数・全角括弧・㈱等はNFKCで半角表記に揃え、「株式会社」等の正式表記は
+    「(株)」等の略称に置き換える。
+    """
+    name = unicodedata.normalize("NFKC", str(name)).strip()
+    name = re.sub(r"\s+", " ", name)
+    name = _CORPORATE_PATTERN.sub(lambda m: CORPORATE_FORMS[m.group(1)], name)
+    return _CORPORATE_MARK_PATTERN.sub(lambda m: f"({m.group(1)})", name).strip()
+
+
+def vendor_match_key(name):
+    """照合キー (本体, 法人格) を返す。前株・後株と異体字・空白の違いは区別しない"""
+    name = canonicalize_vendor_name(name)
+    kinds = _CORPORATE_MARK_PATTERN.findall(name)
+    body = _CORPORATE_MARK_PATTERN.sub("", name)
+    body = re.sub(r"[\s・]", "", body).translate(VENDOR_CHAR_VARIANTS)
+    return body, kinds[0] if kinds else ""
+
+
+def vendor_tokens(body):
+    """照合キーの本体に含まれる数字・英字の並び（大文字小文字は区別しない）"""
+    return tuple(token.upper() for token in _VENDOR_TOKEN_PATTERN.findall(body))
+
+
+def _bigrams(text):
+    """文字2-gramの集合（1文字の場合はその文字）"""
+    if len(text) < 2:
+        return {text}
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class VendorNormalizer:
+    """業者名の正規化と既存マスタへの名寄せ
+
+    取引先マスタ（poc_vendors.tsv）の業者名を登録しておき、入力された業者名を
+    1. VENDOR_NORMALIZE の明示的な置換（確認済みの別表記）
+    2. NFKC・法人格の略称化（canonicalize_vendor_name）
+    3. 照合キーの完全一致（前株/後株・異体字・空白の違いを吸収）
+    の順に照合し、一致したマスタ上の表記を返す。一致しない業者名は新規として登録する。
+
+    法人格の有無だけが異なる表記や、文字2-gramのDice係数がVENDOR_FUZZY_THRESHOLD以上の
+    表記は別業者の可能性があるため名寄せせず、業者単位の確認候補の組として記録する
+    （数字・英字の並びが異なる表記は候補にもしない）。組は登録のたびに既存の全表記と
+    照合して作るため、入力の順序によらない。同一業者と確認できたものは
+    VENDOR_NORMALIZE に追加する。結果は業者名ごとにLRUキャッシュする。
+    """
+
+    def __init__(self, master_names=(), cache_size=VENDOR_CACHE_SIZE,
+                 threshold=VENDOR_FUZZY_THRESHOLD):
+        self.threshold = threshold
+        self.names = []             # 登録順の正規表記
+        self._keys = []             # 登録番号 → (本体, 法人格)
+        self._bigram_sizes = []     # 登録番号 → 本体の2-gram数
+        self._exact = {}            # (本体, 法人格) → 登録番号
+        self._by_body = {}          # 本体 → 登録番号のリスト
+        self._index = defaultdict(list)  # 2-gram → 登録番号のリスト
+        self._pairs = set()         # 確認候補の組 (表記, 表記)（名前順）
+        for name in master_names:
+            if name:
+                self.register(name)
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def __len__(self):
+        return len(self.names)
+
+    def register(self, name):
+        """正規表記を登録する（照合キーが既に登録済みなら既存の表記を返す）
+
+        登録済みの表記のうち近いものとは確認候補の組を作る。
+        """
+        key = vendor_match_key(name)
+        if key in self._exact:
+            return self.names[self._exact[key]]
+        for index in self._similar_indexes(key):
+            self._pairs.add(tuple(sorted((name, self.names[index]))))
+        index = len(self.names)
+        grams = _bigrams(key[0])
+        self.names.append(name)
+        self._keys.append(key)
+        self._bigram_sizes.append(len(grams))
+        self._exact[key] = index
+        self._by_body.setdefault(key[0], []).append(index)
+        for gram in grams:
+            self._index[gram].append(index)
+        return name
+
+    def lookup(self, name):
+        """照合キーが完全一致する登録済みの表記を探す（無ければNone）"""
+        index = self._exact.get(vendor_match_key(name))
+        return None if index is None else self.names[index]
+
+    def _similar_indexes(self, key):
+        """名寄せはしないが同一業者の可能性がある登録済みの表記の登録番号"""
+        body, kind = key
+        tokens = vendor_tokens(body)
+        found = set()
+
+        # 法人格の有無だけが異なる場合
+        for index in self._by_body.get(body, ()):
+            if not kind or not self._keys[index][1]:
+                found.add(index)
+
+        # 2-gram索引で候補を絞り込み、Dice係数で判定
+        grams = _bigrams(body)
+        shared = defaultdict(int)
+        for gram in grams:
+            for index in self._index.get(gram, ()):
+                shared[index] += 1
+        for index, count in shared.items():
+            other_body, other_kind = self._keys[index]
+            if kind and other_kind and kind != other_kind:
+                continue
+            if vendor_tokens(other_body) != tokens:
+                continue
+            if 2 * count / (len(grams) + self._bigram_sizes[index]) >= self.threshold:
+                found.add(index)
+        return found
+
+    def review_pairs(self, names=None):
+        """確認候補の組を名前順に返す（names指定時は両方がnamesに含まれる組のみ）"""
+        return sorted(pair for pair in self._pairs
+                      if names is None or (pair[0] in names and pair[1] in names))
+
+    def _normalize(self, name):
+        if not name:
+            return ""
+        name = str(name).strip()
+        name = VENDOR_NORMALIZE.get(name, name)
+        display = canonicalize_vendor_name(name)
+        display = VENDOR_NORMALIZE.get(display, display)
+        if not display:
+            return ""
+        found = self.lookup(display)
+        if found is not None:
+            return found
+        return self.register(display)
+
+
+VENDOR_NORMALIZER = VendorNormalizer()
+
+
+def load_vendor_master(path):
+    """取引先マスタTSV（poc_vendors.tsv形式）から業者名を読み込む"""
+    if not path or not Path(path).exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [row["vendor_name"] for row in csv.DictReader(f, delimiter="\t") if row.get("vendor_name")]
+
+
+def set_vendor_master(names):
+    """業者名の名寄せ先となるマスタを設定する（正規化キャッシュも作り直す）"""
+    global VENDOR_NORMALIZER
+    VENDOR_NORMALIZER = VendorNormalizer(names)
+    return VENDOR_NORMALIZER
+
+
 def normalize_vendor(name):
-    """業者名の表記揺れを正規化"""
-    if not name:
-        return ""
-    name = str(name).strip()
-    return VENDOR_NORMALIZE.get(name, name)
+    """業者名の表記揺れを正規化（VENDOR_NORMALIZERで既存マスタに名寄せ）"""
+    return VENDOR_NORMALIZER.normalize(name)
+
+
+def vendor_review_comments(vendor_names):
+    """出力する取引先のうち、名寄せしなかった確認候補の組の手動確認コメント"""
+    return [
+        f"REVIEW: 取引先「{a}」と「{b}」は表記が近い（同一業者ならVENDOR_NORMALIZEに追加）"
+        for a, b in VENDOR_NORMALIZER.review_pairs(set(vendor_names))
+    ]
 
 
 def infer_petty_expense(description):
     """内訳文字列から費目を推定（小口購入分用）"""
     if not description:
         return "F67", "雑費", "現場管理費", "REVIEW: 経費項目未付与"
-    for keyword, (eid, ename, cat) in PETTY_CASH_MAP.items():
-        if keyword in description:
-            return eid, ename, cat, f"REVIEW: 内訳'{description}'から{ename}と推定"
+    matched = PETTY_CASH_CLASSIFIER.match(description)
+    if matched:
+        eid, ename, cat = matched[1]
+        return eid, ename, cat, f"REVIEW: 内訳'{description}'から{ename}と推定"
     return "F67", "雑費", "現場管理費", f"REVIEW: 経費項目未付与（内訳: {description}）"
 
 
@@ -145,15 +487,199 @@ def build_budget_box_id(category, expense_id, work_type="", koushus=""):
     return f"{cat_code}-{expense_id}"
 
 
+def add_months(year_month, months):
+    """YYYY-MM形式の年月にmonthsヶ月加算する"""
+    year, month = (int(x) for x in year_month.split("-"))
+    index = year * 12 + (month - 1) + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def year_month_arg(value):
+    """argparse用: YYYY-MM形式の年月を検証する"""
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", value):
+        raise argparse.ArgumentTypeError(f"YYYY-MM形式で指定してください: {value}")
+    return value
+
+
+def resolve_year_month(month_key, prev_year_month=None):
+    """月度ラベルをYYYY-MM形式に変換する（変換できない場合はNone）
+
+    「2026年1月度」「令和8年1月度」「2026-01」のように年を含むラベルはそのまま解釈する。
+    「1月度」のように年の無いラベルは直前の月度から年を補い、月が戻れば翌年とみなす。
+    最初の月度はMONTH_MAP、無ければBASE_YEARを基準にする。
+    """
+    label = str(month_key).strip()
+
+    match = re.match(r"^(\d{4})\s*[-/年]\s*(\d{1,2})", label)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+    else:
+        match = re.match(r"^令和\s*(\d+|元)\s*年\s*(\d{1,2})", label)
+        if match:
+            era = match.group(1)
+            year = REIWA_OFFSET + (1 if era == "元" else int(era))
+            month = int(match.group(2))
+        else:
+            match = re.match(r"^(\d{1,2})\s*月", label)
+            if not match:
+                return None
+            month = int(match.group(1))
+            if prev_year_month is None:
+                if label in MONTH_MAP:
+                    return MONTH_MAP[label]
+                year = BASE_YEAR
+            else:
+                prev_year, prev_month = (int(x) for x in prev_year_month.split("-"))
+                year = prev_year + 1 if month < prev_month else prev_year
+
+    if not 1 <= month <= 12:
+        return None
+    return f"{year:04d}-{month:02d}"
+
+
+# === ストリーミングJSON読み込み ===
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class JsonStreamReader:
+    """ファイルをチャンク単位で読み進める簡易JSONプルパーサ
+
+    オブジェクト・配列は構造だけを辿り、要素の値は1件ずつjson.JSONDecoderで
+    デコードするため、保持するのは未処理のバッファと現在の要素のみになる。
+    """
+
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """バッファに次のチャンクを追加する（EOFならFalse）"""
+        data = self._f.read(self._chunk_size)
+        if not data:
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _error(self, message):
+        return ValueError(f"JSON解析エラー: {message} (付近: {self._buf[self._pos:self._pos + 40]!r})")
+
+    def peek(self):
+        """空白を読み飛ばして次の1文字を返す（EOFならNone）"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, char):
+        if self.peek() != char:
+            raise self._error(f"'{char}'が必要です")
+        self._pos += 1
+
+    def value(self):
+        """次のJSON値を1つデコードして返す"""
+        if self.peek() is None:
+            raise self._error("予期しないEOF")
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # バッファ末尾で終わる数値・リテラルは続きがある可能性がある
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+    def iter_object(self):
+        """オブジェクトのキーを順に返す（呼び出し側は各キーの値を必ず消費すること）"""
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(":")
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                self._pos -= 1
+                raise self._error("','または'}'が必要です")
+
+    def iter_array(self):
+        """配列の要素位置を順に返す（呼び出し側は各要素を必ず消費すること）"""
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                self._pos -= 1
+                raise self._error("','または']'が必要です")
+
+    def skip(self):
+        """次のJSON値を読み飛ばす（入れ子は構造を辿って1要素ずつ破棄）"""
+        char = self.peek()
+        if char == "{":
+            for _ in self.iter_object():
+                self.skip()
+        elif char == "[":
+            for _ in self.iter_array():
+                self.skip()
+        else:
+            self.value()
+
+
+def iter_payment_items(json_path):
+    """final_output.jsonを逐次読み込み、(月度ラベル, 支払明細1件) をファイル順に返す"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        reader = JsonStreamReader(f)
+        for key in reader.iter_object():
+            if key != "data" or reader.peek() != "{":
+                reader.skip()
+                continue
+            for month_key in reader.iter_object():
+                if reader.peek() != "{":
+                    reader.skip()
+                    continue
+                for field in reader.iter_object():
+                    if field != "支払明細" or reader.peek() != "[":
+                        reader.skip()
+                        continue
+                    for _ in reader.iter_array():
+                        yield month_key, reader.value()
+
+
 # === メイン処理 ===
 
-def load_json():
+def load_json(json_path=None):
     """final_output.jsonを読み込み"""
-    if not JSON_PATH.exists():
-        print(f"エラー: JSONファイルが見つかりません: {JSON_PATH}", file=sys.stderr)
+    json_path = json_path or JSON_PATH
+    if not json_path.exists():
+        print(f"エラー: JSONファイルが見つかりません: {json_path}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError as e:
+        print(f"エラー: JSONファイルを読み込めません: {json_path}: {e}", file=sys.stderr)
         sys.exit(1)
-    with open(JSON_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
 
 
 def load_csv_master():
@@ -171,184 +697,204 @@ def load_csv_master():
     return master
 
 
-def generate_test_data(json_data):
-    """支払明細82件のTSVデータを生成"""
-    rows = []
-    monthly_totals = defaultdict(int)
-    review_comments = []
-    seq = 0
-
+# === 分類エンジン ===
+
+# 支払明細1件の分類結果
+#   source: "code"（経費コードで分類）/ "petty"（内訳から推定）/ "unknown"（未知の経費コード）
+ClassifiedRow = namedtuple("ClassifiedRow", [
+    "expense_id", "expense_name", "category", "work_type", "koushus",
+    "budget_box_id", "comment", "source", "vendor", "amount",
+])
+
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def classify_expense(expense_str, description=""):
+    """経費項目（未付与なら内訳）から費目を分類する
+
+    同じ経費項目・内訳の組み合わせは結果をキャッシュする。
+
+    Returns:
+        tuple: (expense_id, expense_name, category, work_type, koushus,
+                budget_box_id, comment, source)
+    """
+    code_num = parse_expense_code(expense_str)
+
+    if code_num is not None and code_num in EXPENSE_CODE_MAP:
+        expense_id, expense_name, comment = EXPENSE_CODE_MAP[code_num]
+        category = get_category(code_num)
+        source = "code"
+    elif expense_str is None:
+        # 経費項目未付与（小口購入分）
+        expense_id, expense_name, category, comment = infer_petty_expense(description)
+        source = "petty"
+    else:
+        # 未知の経費コード
+        expense_id = "F67"
+        expense_name = "雑費"
+        category = "現場管理費"
+        comment = f"REVIEW: 未知の経費コード '{expense_str}'"
+        source = "unknown"
+
+    # 工事種別・工種（直接工事費のみ）
+    if category == "直接工事費":
+        work_type = "W04"    # 護岸・海岸工事（海潟漁港プロジェクト）
+        koushus = "K9901"    # その他（JSONから特定不可）
+    else:
+        work_type = ""
+        koushus = ""
+
+    budget_box_id = build_budget_box_id(category, expense_id, work_type, koushus)
+    return expense_id, expense_name, category, work_type, koushus, budget_box_id, comment, source
+
+
+def classify_item(item):
+    """支払明細1件を分類し、3種類の出力に必要な情報をClassifiedRowにまとめる
+
+    経費コード解析・費目推定・業者名正規化はここで1回だけ実行し、
+    支払明細・取引先マスタ・実行予算はこの結果から生成する。
+    """
+    expense_str = item.get("経費項目")
+    # 内訳は経費項目未付与の場合のみ分類に影響する
+    description = (item.get("内訳", "") or "") if expense_str is None else ""
+    return ClassifiedRow(
+        *classify_expense(expense_str, description),
+        normalize_vendor(item.get("支払先", "")),
+        item.get("支払金額_税抜") or 0,
+    )
+
+
+def classify_payments(json_data):
+    """10-12月度の支払明細を1回だけ分類する
+
+    Returns:
+        list[tuple]: (月度ラベル, 支払明細, ClassifiedRow) のリスト（明細の出現順）
+    """
+    records = []
     for month_key in ["10月度", "11月度", "12月度"]:
         month_data = json_data["data"].get(month_key)
         if not month_data:
             print(f"警告: {month_key}のデータが見つかりません", file=sys.stderr)
             continue
+        for item in month_data.get("支払明細", []):
+            records.append((month_key, item, classify_item(item)))
+    return records
+
+
+def build_payment_row(seq, year_month, item, classified):
+    """支払明細1件と分類結果から18列の行を生成する"""
+    amount = classified.amount
+    offset_amount = item.get("相殺", 0) or 0
+    offset_target = item.get("相殺先", "") or ""
+    description = item.get("内訳", "") or ""
+    note = item.get("備考", "") or ""
+
+    # 金額がnullの場合は0として処理（相殺のみの行）
+    if item.get("支払金額_税抜") is None and not note:
+        note = "金額なし（相殺のみ）"
+
+    comment = classified.comment
+    if classified.source == "unknown":
+        note = comment
+    elif comment:
+        note = f"{note} / {comment}" if note else comment
+
+    # 課税区分・消費税・税込合計（自動計算列）
+    tax_type = "課税" if amount > 0 else ""
+    tax_amount = round(amount * 0.10) if amount > 0 else 0
+    total_with_tax = amount + tax_amount
+
+    # 備考に内訳を追加
+    if description and not note:
+        note = description
+    elif description and description not in note:
+        note = f"{description} / {note}"
+
+    return [
+        seq,                        # A: No.
+        classified.category,        # B: カテゴリ
+        classified.work_type,       # C: 工事種別
+        classified.koushus,         # D: 工種
+        classified.expense_id,      # E: 費目
+        classified.vendor,          # F: 支払先
+        year_month,                 # G: 支払年月
+        1,                          # H: 数量
+        "式",                       # I: 単位
+        amount,                     # J: 単価
+        amount,                     # K: 金額
+        offset_amount,              # L: 相殺額
+        offset_target,              # M: 相殺先
+        tax_type,                   # N: 課税区分
+        tax_amount,                 # O: 消費税
+        total_with_tax,             # P: 税込合計
+        classified.budget_box_id,   # Q: 予算箱ID
+        note,                       # R: 備考
+    ]
 
-        year_month = MONTH_MAP[month_key]
-        items = month_data.get("支払明細", [])
-
-        for item in items:
-            seq += 1
-            vendor = normalize_vendor(item.get("支払先", ""))
-            expense_str = item.get("経費項目")
-            amount = item.get("支払金額_税抜")
-            offset_amount = item.get("相殺", 0) or 0
-            offset_target = item.get("相殺先", "") or ""
-            description = item.get("内訳", "") or ""
-            note = item.get("備考", "") or ""
-
-            # 金額がnullの場合は0として処理（相殺のみの行）
-            if amount is None:
-                amount = 0
-                if not note:
-                    note = "金額なし（相殺のみ）"
-
-            # 月別合計に加算
-            monthly_totals[month_key] += amount
-
-            # 経費コード解析
-            code_num = parse_expense_code(expense_str)
-
-            if code_num is not None and code_num in EXPENSE_CODE_MAP:
-                expense_id, expense_name, comment = EXPENSE_CODE_MAP[code_num]
-                category = get_category(code_num)
-                if comment:
-                    review_comments.append(f"行{seq}: {comment}")
-                    if note:
-                        note = f"{note} / {comment}"
-                    else:
-                        note = comment
-            elif expense_str is None:
-                # 経費項目未付与（小口購入分）
-                expense_id, expense_name, category, comment = infer_petty_expense(description)
-                review_comments.append(f"行{seq}: {comment}")
-                if note:
-                    note = f"{note} / {comment}"
-                else:
-                    note = comment
-            else:
-                # 未知の経費コード
-                expense_id = "F67"
-                expense_name = "雑費"
-                category = "現場管理費"
-                comment = f"REVIEW: 未知の経費コード '{expense_str}'"
-                review_comments.append(f"行{seq}: {comment}")
-                note = comment
-
-            # 工事種別・工種（直接工事費のみ）
-            if category == "直接工事費":
-                work_type = "W04"    # 護岸・海岸工事（海潟漁港プロジェクト）
-                koushus = "K9901"    # その他（JSONから特定不可）
-            else:
-                work_type = ""
-                koushus = ""
-
-            # 予算箱ID
-            budget_box_id = build_budget_box_id(category, expense_id, work_type, koushus)
-
-            # 課税区分・消費税・税込合計（自動計算列）
-            tax_type = "課税" if amount > 0 else ""
-            tax_amount = round(amount * 0.10) if amount > 0 else 0
-            total_with_tax = amount + tax_amount
-
-            # 備考に内訳を追加
-            if description and not note:
-                note = description
-            elif description and description not in note:
-                note = f"{description} / {note}"
-
-            row = [
-                seq,                # A: No.
-                category,           # B: カテゴリ
-                work_type,          # C: 工事種別
-                koushus,            # D: 工種
-                expense_id,         # E: 費目
-                vendor,             # F: 支払先
-                year_month,         # G: 支払年月
-                1,                  # H: 数量
-                "式",               # I: 単位
-                amount,             # J: 単価
-                amount,             # K: 金額
-                offset_amount,      # L: 相殺額
-                offset_target,      # M: 相殺先
-                tax_type,           # N: 課税区分
-                tax_amount,         # O: 消費税
-                total_with_tax,     # P: 税込合計
-                budget_box_id,      # Q: 予算箱ID
-                note,               # R: 備考
-            ]
-            rows.append(row)
+
+def generate_test_data(records):
+    """分類済み明細から支払明細82件のTSVデータを生成"""
+    rows = []
+    monthly_totals = defaultdict(int)
+    review_comments = []
+
+    for seq, (month_key, item, classified) in enumerate(records, start=1):
+        rows.append(build_payment_row(seq, MONTH_MAP[month_key], item, classified))
+        # 月別合計に加算
+        monthly_totals[month_key] += classified.amount
+        if classified.comment:
+            review_comments.append(f"行{seq}: {classified.comment}")
 
     return rows, monthly_totals, review_comments
 
 
-def generate_vendors(json_data):
-    """取引先マスタを生成"""
-    # 全月から業者名を収集
+def classify_vendor_type(name):
+    """業者名から業者分類を推定"""
+    if name in VENDOR_SUBCONTRACTORS:
+        return "subcontractor"
+    if name in VENDOR_SUPPLIERS:
+        return "supplier"
+    if name in VENDOR_SERVICES:
+        return "service"
+    return "retail"
+
+
+def build_vendor_rows(vendor_names):
+    """出現順の業者名から取引先マスタ行を生成"""
+    return [[f"V{i:03d}", name, classify_vendor_type(name), "TRUE"]
+            for i, name in enumerate(vendor_names, start=1)]
+
+
+def generate_vendors(records):
+    """分類済み明細から取引先マスタを生成"""
+    # 出現順に業者名を収集（正規化は分類時に実施済み）
     vendors = OrderedDict()
-    for month_key in ["10月度", "11月度", "12月度"]:
-        month_data = json_data["data"].get(month_key, {})
-        for item in month_data.get("支払明細", []):
-            name = normalize_vendor(item.get("支払先", ""))
-            if name and name not in vendors:
-                vendors[name] = None
-
-    # 業者分類の推定
-    subcontractors = {"川越建設(株)", "鹿児島仮設(株)", "菱和コンクリート(株)",
-                      "(有)濱畑水道", "(株)コマロック", "環境保全建設(株)"}
-    suppliers = {"桜島生コンクリート(株)", "(株)加根又本店", "(株)グリーンクロス",
-                 "永瀬電業"}
-    services = {"(株)現場サポート", "(株)シーティーエス", "(株)デザインアーク",
-                "(有)大建測量設計", "JGS", "(株)勝利商会"}
-    # 上記以外はretail
+    for _, _, classified in records:
+        if classified.vendor:
+            vendors.setdefault(classified.vendor, None)
+    return build_vendor_rows(vendors.keys())
 
-    rows = []
-    for i, name in enumerate(vendors.keys(), start=1):
-        vid = f"V{i:03d}"
-        if name in subcontractors:
-            vtype = "subcontractor"
-        elif name in suppliers:
-            vtype = "supplier"
-        elif name in services:
-            vtype = "service"
-        else:
-            vtype = "retail"
-        rows.append([vid, name, vtype, "TRUE"])
 
-    return rows
+def new_expense_totals():
+    """費目別実績の集計用dictを生成"""
+    return defaultdict(lambda: {"amount": 0, "category": "", "expense_id": "", "expense_name": ""})
 
 
-def generate_budget(json_data):
-    """実行予算テーブルを生成（実績ベースで推定）"""
-    # 費目別の3ヶ月実績を集計
-    expense_totals = defaultdict(lambda: {"amount": 0, "category": "", "expense_id": "", "expense_name": ""})
+def accumulate_expense(expense_totals, classified):
+    """分類結果を費目別実績に加算"""
+    totals = expense_totals[classified.expense_id]
+    totals["amount"] += classified.amount
+    totals["category"] = classified.category
+    totals["expense_id"] = classified.expense_id
+    totals["expense_name"] = classified.expense_name
 
-    for month_key in ["10月度", "11月度", "12月度"]:
-        month_data = json_data["data"].get(month_key, {})
-        for item in month_data.get("支払明細", []):
-            expense_str = item.get("経費項目")
-            amount = item.get("支払金額_税抜") or 0
-            code_num = parse_expense_code(expense_str)
-
-            if code_num is not None and code_num in EXPENSE_CODE_MAP:
-                expense_id, expense_name, _ = EXPENSE_CODE_MAP[code_num]
-                category = get_category(code_num)
-            elif expense_str is None:
-                description = item.get("内訳", "") or ""
-                expense_id, expense_name, category, _ = infer_petty_expense(description)
-            else:
-                expense_id = "F67"
-                expense_name = "雑費"
-                category = "現場管理費"
-
-            key = expense_id
-            expense_totals[key]["amount"] += amount
-            expense_totals[key]["category"] = category
-            expense_totals[key]["expense_id"] = expense_id
-            expense_totals[key]["expense_name"] = expense_name
-
-    # 実績の約2倍を予算額とする（3ヶ月実績 × 2 = 6ヶ月分の見込み）
-    # 工期: 2025-10 ~ 2026-03（6ヶ月想定）
+
+def build_budget_rows(expense_totals, budget_period=None):
+    """費目別実績から実行予算テーブル行を生成
+
+    実績の約2倍を予算額とする（観測期間の実績 × 2 = 工期全体の見込み）。
+    budget_period: (開始月, 終了月) のYYYY-MM。省略時は BUDGET_PERIOD
+    """
+    start_month, end_month = budget_period or BUDGET_PERIOD
     rows = []
     for key in sorted(expense_totals.keys()):
         data = expense_totals[key]
@@ -365,7 +911,7 @@ def generate_budget(json_data):
             koushus = ""
 
         budget_box_id = build_budget_box_id(category, expense_id, work_type, koushus)
-        # 予算額 = 3ヶ月実績 × 2（6ヶ月工期想定）、千円単位で切り上げ
+        # 予算額 = 実績 × 2、千円単位で切り上げ
         budget_amount = ((data["amount"] * 2) // 1000 + 1) * 1000
 
         rows.append([
@@ -376,50 +922,573 @@ def generate_budget(json_data):
             expense_id,         # expense_id
             data["expense_name"],  # expense_name
             budget_amount,      # budget_amount
-            "2025-10",          # start_month
-            "2026-03",          # end_month
+            start_month,        # start_month
+            end_month,          # end_month
         ])
 
     return rows
 
 
-def validate_totals(monthly_totals):
+def generate_budget(records, budget_period=None):
+    """分類済み明細から実行予算テーブルを生成（実績ベースで推定）"""
+    # 費目別の3ヶ月実績を集計
+    expense_totals = new_expense_totals()
+    for _, _, classified in records:
+        accumulate_expense(expense_totals, classified)
+
+    # 3ヶ月実績 × 2 = 6ヶ月分の見込み
+    # 工期: 既定は 2025-10 ~ 2026-03（6ヶ月想定）
+    return build_budget_rows(expense_totals, budget_period)
+
+
+def iter_resolved_items(json_path, months):
+    """iter_payment_itemsの各明細に支払年月(YYYY-MM)を付けて返す
+
+    Args:
+        months: 月度ラベル → YYYY-MM を出現順に記録するdict（呼び出し側で用意）。
+                解釈できない月度はNoneを記録し、その明細はスキップする。
+
+    Yields:
+        tuple: (月度ラベル, YYYY-MM, 支払明細)
+    """
+    current_key = None
+    year_month = None
+    for month_key, item in iter_payment_items(json_path):
+        if month_key != current_key:
+            current_key = month_key
+            if month_key not in months:
+                resolved = resolve_year_month(month_key, year_month)
+                if resolved is None:
+                    print(f"警告: 月度ラベルを解釈できません（スキップ）: {month_key}", file=sys.stderr)
+                months[month_key] = resolved
+            year_month = months[month_key] or year_month
+        if months[month_key] is not None:
+            yield month_key, months[month_key], item
+
+
+def columnar_output_path(tsv_path, fmt):
+    """TSVと同名の列指向ファイル（Parquet/Arrow）のパス"""
+    import poc_columnar  # pyarrowは列指向出力を使う場合のみ必要
+
+    return poc_columnar.columnar_path(tsv_path, fmt)
+
+
+def open_columnar_writer(tsv_path, table, fmt, path=None):
+    """TSVと同名の列指向ファイル（Parquet/Arrow）のライターを開く
+
+    table: "payment" / "vendor" / "budget"
+    path: 書き出し先（省略時はTSVと同名のファイル）
+    """
+    import poc_columnar
+
+    schema = {
+        "payment": poc_columnar.payment_schema,
+        "vendor": poc_columnar.vendor_schema,
+        "budget": poc_columnar.budget_schema,
+    }[table]()
+    return poc_columnar.TableWriter(path or columnar_output_path(tsv_path, fmt), schema, fmt)
+
+
+def write_columnar(tsv_path, table, rows, fmt, path=None):
+    """行リストを列指向ファイルに書き出す"""
+    with open_columnar_writer(tsv_path, table, fmt, path) as writer:
+        writer.write_rows(rows)
+    if path is None:
+        print(f"  出力: {writer.path} ({writer.row_count}行)")
+    return writer.row_count
+
+
+def tmp_output_path(path):
+    """書き出し途中の一時ファイルのパス（書き終えてから os.replace で置き換える）"""
+    return path.with_name(path.name + ".tmp")
+
+
+def stage_output(staged, path):
+    """出力先を一時ファイル経由の書き出しとして登録し、一時ファイルのパスを返す"""
+    tmp_path = tmp_output_path(path)
+    staged.append((tmp_path, path))
+    return tmp_path
+
+
+def commit_outputs(staged, row_counts):
+    """一時ファイルをまとめて出力先に置き換える（全出力を書き終えてから呼ぶ）"""
+    for tmp_path, path in staged:
+        os.replace(tmp_path, path)
+        print(f"  出力: {path} ({row_counts[path]}行)")
+
+
+def discard_outputs(staged):
+    """書き出し途中の一時ファイルを削除する（出力先は前回のまま残る）"""
+    for tmp_path, _ in staged:
+        with contextlib.suppress(FileNotFoundError):
+            tmp_path.unlink()
+
+
+def convert_streaming(json_path, test_path, vendor_path, budget_path, columnar=None, budget_period=None):
+    """支払明細を1パスで逐次変換し、3種類のTSVを出力する（ストリーミングモード）
+
+    支払明細は1件ずつ分類・変換してそのまま書き出すため、保持するのは
+    月別合計・業者名・費目別実績（いずれも件数ではなく種類数に比例）のみ。
+    columnar（"parquet"/"arrow"）を指定すると同じ内容を列指向形式でも出力する。
+    予算期間は検出した月度ではなく budget_period（工期、省略時は BUDGET_PERIOD）で決める。
+    出力はすべて一時ファイルに書き、入力を最後まで読めた場合のみまとめて置き換えるため、
+    入力が途中で壊れていても（ValueError）前回の出力はそのまま残る。
+
+    Returns:
+        dict: 月別合計・月度一覧・件数・手動確認項目（先頭のみ）
+    """
+    monthly_totals = defaultdict(int)
+    vendors = OrderedDict()
+    expense_totals = new_expense_totals()
+    months = OrderedDict()  # 月度ラベル → YYYY-MM（出現順）
+    review_preview = []
+    review_count = 0
+    seq = 0
+    staged = []  # (一時ファイル, 出力先)
+    row_counts = {}
+
+    try:
+        with contextlib.ExitStack() as stack:
+            f = stack.enter_context(open(stage_output(staged, test_path), "w", encoding="utf-8", newline=""))
+            columnar_writer = None
+            if columnar:
+                columnar_test_path = columnar_output_path(test_path, columnar)
+                columnar_writer = stack.enter_context(open_columnar_writer(
+                    test_path, "payment", columnar, stage_output(staged, columnar_test_path)))
+            writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+            writer.writerow(TEST_HEADERS)
+
+            for month_key, year_month, item in iter_resolved_items(json_path, months):
+                seq += 1
+                classified = classify_item(item)
+                row = build_payment_row(seq, year_month, item, classified)
+                writer.writerow(row)
+                if columnar_writer:
+                    columnar_writer.write_row(row)
+
+                monthly_totals[month_key] += classified.amount
+                if classified.comment:
+                    review_count += 1
+                    if len(review_preview) < REVIEW_PREVIEW_LIMIT:
+                        review_preview.append(f"行{seq}: {classified.comment}")
+                if classified.vendor:
+                    vendors.setdefault(classified.vendor, None)
+                accumulate_expense(expense_totals, classified)
+        row_counts[test_path] = seq
+        if columnar:
+            row_counts[columnar_test_path] = seq
+
+        vendor_rows = build_vendor_rows(vendors.keys())
+        write_tsv(stage_output(staged, vendor_path), VENDOR_HEADERS, vendor_rows, quiet=True)
+        row_counts[vendor_path] = len(vendor_rows)
+
+        budget_rows = build_budget_rows(expense_totals, budget_period)
+        write_tsv(stage_output(staged, budget_path), BUDGET_HEADERS, budget_rows, quiet=True)
+        row_counts[budget_path] = len(budget_rows)
+
+        if columnar:
+            for tsv_path, table, rows in ((vendor_path, "vendor", vendor_rows), (budget_path, "budget", budget_rows)):
+                path = columnar_output_path(tsv_path, columnar)
+                row_counts[path] = write_columnar(tsv_path, table, rows, columnar, stage_output(staged, path))
+    except BaseException:
+        discard_outputs(staged)
+        raise
+    commit_outputs(staged, row_counts)
+
+    return {
+        "monthly_totals": monthly_totals,
+        "months": months,
+        "row_count": seq,
+        "vendor_count": len(vendor_rows),
+        "budget_rows": budget_rows,
+        "review_count": review_count,
+        "review_preview": review_preview,
+        "vendor_reviews": vendor_review_comments(row[1] for row in vendor_rows),
+    }
+
+
+# === 差分変換（行キャッシュ） ===
+
+def rules_fingerprint():
+    """分類結果に影響する対応表のハッシュ（変わった場合はキャッシュ済みの分類を使わない）"""
+    payload = json.dumps([
+        sorted(EXPENSE_CODE_MAP.items()),
+        list(PETTY_CASH_MAP.items()),
+        sorted(VENDOR_NORMALIZE.items()),
+        sorted(CORPORATE_FORMS.items()),
+        VENDOR_FUZZY_THRESHOLD,
+    ], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def row_hash(year_month, item):
+    """支払明細1件の内容ハッシュ（キー順に依存しない）"""
+    payload = json.dumps([year_month, item], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def load_row_cache(cache_path):
+    """行キャッシュを読み込む（無い・壊れている・版が違う場合は空で初期化）"""
+    empty = {
+        "version": ROW_CACHE_VERSION,
+        "rules": "",
+        "next_seq": 1,
+        "next_vendor": 1,
+        "rows": {},
+        "vendors": {},
+        "test_data_size": None,
+    }
+    if not cache_path.exists():
+        return empty
+    try:
+        cache = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"警告: 行キャッシュを読み込めません（全件変換します）: {e}", file=sys.stderr)
+        return empty
+    if cache.get("version") != ROW_CACHE_VERSION:
+        print("警告: 行キャッシュの版が異なります（全件変換します）", file=sys.stderr)
+        return empty
+    return cache
+
+
+def write_text_atomic(path, text):
+    """一時ファイルに書いてから置き換える（途中で中断しても元のファイルが残る）"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8", newline="")
+    os.replace(tmp_path, path)
+
+
+def write_tsv_atomic(filepath, headers, rows):
+    """TSVファイルを一時ファイル経由で書き出し"""
+    tmp_path = tmp_output_path(filepath)
+    write_tsv(tmp_path, headers, rows, quiet=True)
+    os.replace(tmp_path, filepath)
+    print(f"  出力: {filepath} ({len(rows)}行)")
+
+
+def convert_incremental(json_path, cache_path, test_path, vendor_path, budget_path, columnar=None,
+                        budget_period=None):
+    """前回からの差分だけを分類し、3種類のTSVを更新する（差分モード）
+
+    明細は「月度ラベル#内容ハッシュ#同一内容の出現順」で識別し、前回もあった行は分類を
+    スキップしてキャッシュ済みの行を使う。月の途中に行を挿入・削除しても他の行の識別は
+    変わらない。No.と取引先IDはキャッシュに記録し、新しい行（内容を変更した行を含む）・
+    業者には続きの番号を振るため、既存の行の番号は実行をまたいで変わらない。
+    内容を変更した行は「削除1件・新規1件」として数え、再分類は対応表が変わって
+    キャッシュ済みの行を分類し直した結果が変わった件数。手動確認項目はキャッシュに
+    記録したコメントから、分類をスキップした行も含めて全件を数える。
+    支払明細TSVは追加行のみなら追記、再分類・削除があれば全体を書き直す。
+    列指向形式（columnar指定時）はキャッシュ済みの行から毎回全体を書き出す。
+
+    Returns:
+        dict: convert_streamingの戻り値に新規・再分類・変更なし・削除の件数を加えたもの
+    """
+    cache = load_row_cache(cache_path)
+    rules = rules_fingerprint()
+    rules_changed = cache["rules"] != rules
+    cached_rows = cache["rows"]
+    vendor_ids = cache["vendors"]
+    next_seq = cache["next_seq"]
+    next_vendor = cache["next_vendor"]
+
+    # キャッシュ済みの業者名を名寄せ先に加える（スキップした行の表記に寄せるため）
+    for name in vendor_ids:
+        VENDOR_NORMALIZER.register(name)
+
+    months = OrderedDict()
+    occurrences = defaultdict(int)  # (月度ラベル, 内容ハッシュ) → 出現数
+    rows = {}
+    appended = []
+    counts = {"new": 0, "reclassified": 0, "unchanged": 0}
+
+    for month_key, year_month, item in iter_resolved_items(json_path, months):
+        digest = row_hash(year_month, item)
+        occurrence = occurrences[month_key, digest]
+        occurrences[month_key, digest] += 1
+        key = f"{month_key}#{digest}#{occurrence}"
+
+        entry = cached_rows.get(key)
+        if entry is not None and not rules_changed:
+            rows[key] = entry
+            counts["unchanged"] += 1
+            continue
+
+        if entry is not None:
+            seq = entry["seq"]
+        else:
+            seq = next_seq
+            next_seq += 1
+            appended.append(key)
+
+        classified = classify_item(item)
+        row = build_payment_row(seq, year_month, item, classified)
+        rows[key] = {"seq": seq, "row": row, "expense_name": classified.expense_name,
+                     "comment": classified.comment}
+        if entry is None:
+            counts["new"] += 1
+        elif entry["row"] != row:
+            counts["reclassified"] += 1
+        else:
+            counts["unchanged"] += 1
+
+    removed = len(cached_rows.keys() - rows.keys())
+    ordered = sorted(rows.items(), key=lambda kv: kv[1]["seq"])
+    reviews = [(entry["seq"], entry["comment"]) for _, entry in ordered if entry["comment"]]
+    review_preview = [f"行{seq}: {comment}" for seq, comment in reviews[:REVIEW_PREVIEW_LIMIT]]
+
+    # 支払明細: 追加のみで前回出力がそのまま残っていれば追記する
+    can_append = (
+        not counts["reclassified"] and not removed and test_path.exists()
+        and test_path.stat().st_size == cache["test_data_size"]
+    )
+    if can_append:
+        with open(test_path, "a", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+            for key in appended:
+                writer.writerow(rows[key]["row"])
+        print(f"  追記: {test_path} (+{len(appended)}行)")
+    else:
+        write_tsv_atomic(test_path, TEST_HEADERS, [entry["row"] for _, entry in ordered])
+
+    # 取引先マスタ: 一度振った取引先IDは再利用しない
+    monthly_totals = defaultdict(int)
+    expense_totals = new_expense_totals()
+    referenced = set()
+    for key, entry in ordered:
+        row = entry["row"]
+        monthly_totals[key.split("#", 1)[0]] += row[10]
+        totals = expense_totals[row[4]]
+        totals["amount"] += row[10]
+        totals["category"] = row[1]
+        totals["expense_id"] = row[4]
+        totals["expense_name"] = entry["expense_name"]
+        vendor = row[5]
+        if vendor:
+            referenced.add(vendor)
+            if vendor not in vendor_ids:
+                vendor_ids[vendor] = f"V{next_vendor:03d}"
+                next_vendor += 1
+
+    vendor_rows = sorted(
+        ([vid, name, classify_vendor_type(name), "TRUE"] for name, vid in vendor_ids.items() if name in referenced),
+        key=lambda r: int(r[0][1:]),
+    )
+    write_tsv_atomic(vendor_path, VENDOR_HEADERS, vendor_rows)
+
+    budget_rows = build_budget_rows(expense_totals, budget_period)
+    write_tsv_atomic(budget_path, BUDGET_HEADERS, budget_rows)
+
+    if columnar:
+        write_columnar(test_path, "payment", (entry["row"] for _, entry in ordered), columnar)
+        write_columnar(vendor_path, "vendor", vendor_rows, columnar)
+        write_columnar(budget_path, "budget", budget_rows, columnar)
+
+    cache.update({
+        "rules": rules,
+        "next_seq": next_seq,
+        "next_vendor": next_vendor,
+        "rows": rows,
+        "vendors": vendor_ids,
+        "test_data_size": test_path.stat().st_size,
+    })
+    write_text_atomic(cache_path, json.dumps(cache, ensure_ascii=False, separators=(",", ":")))
+
+    return {
+        "monthly_totals": monthly_totals,
+        "months": months,
+        "row_count": len(rows),
+        "vendor_count": len(vendor_rows),
+        "budget_rows": budget_rows,
+        "review_count": len(reviews),
+        "review_preview": review_preview,
+        "vendor_reviews": vendor_review_comments(row[1] for row in vendor_rows),
+        "counts": dict(counts, removed=removed),
+    }
+
+
+def check_totals(monthly_totals, expected=None):
+    """月別合計を検証値と突き合わせる
+
+    Returns:
+        list[dict]: 月度ごとの {"month", "expected", "actual", "passed"}
+    """
+    expected = EXPECTED_TOTALS if expected is None else expected
+    results = []
+    for month, expected_total in expected.items():
+        actual = monthly_totals.get(month, 0)
+        results.append({
+            "month": month,
+            "expected": expected_total,
+            "actual": actual,
+            "passed": actual == expected_total,
+        })
+    return results
+
+
+def validate_totals(monthly_totals, expected=None):
     """月別合計の検証"""
     all_passed = True
     print("\n--- 月別合計 検証 ---")
-    for month, expected in EXPECTED_TOTALS.items():
-        actual = monthly_totals.get(month, 0)
-        status = "passed" if actual == expected else "FAILED"
+    for result in check_totals(monthly_totals, expected):
+        status = "passed" if result["passed"] else "FAILED"
         if status == "FAILED":
             all_passed = False
-        print(f"  {month}: 期待値={expected:>12,}  実績={actual:>12,}  [{status}]")
+        print(f"  {result['month']}: 期待値={result['expected']:>12,}  実績={result['actual']:>12,}  [{status}]")
     return all_passed
 
 
-def write_tsv(filepath, headers, rows):
+def write_tsv(filepath, headers, rows, quiet=False):
     """TSVファイル書き出し"""
     with open(filepath, "w", encoding="utf-8", newline="") as f:
         writer = csv.writer(f, delimiter="\t", lineterminator="\n")
         writer.writerow(headers)
         for row in rows:
             writer.writerow(row)
-    print(f"  出力: {filepath} ({len(rows)}行)")
+    if not quiet:
+        print(f"  出力: {filepath} ({len(rows)}行)")
+
+
+def main_streaming(json_path, vendor_master_path, cache_path=None, columnar=None, budget_period=None):
+    """ストリーミングモード（cache_path指定時は差分モード）のメイン処理"""
+    mode = "差分" if cache_path else "ストリーミング"
+    print(f"=== PoC用テストデータ変換（{mode}） ===\n")
+
+    print("1. 入力ファイル確認")
+    if not json_path.exists():
+        print(f"エラー: JSONファイルが見つかりません: {json_path}", file=sys.stderr)
+        sys.exit(1)
+    master = load_csv_master()
+    vendor_master = set_vendor_master(load_vendor_master(vendor_master_path))
+    print(f"  JSON: {json_path.name}")
+    print(f"  CSV:  {CSV_PATH.name} (費目{len(master['expense_element'])}件, "
+          f"工種{len(master['koushus'])}件, 取引先{len(master['vendor'])}件)")
+    print(f"  取引先マスタ（名寄せ先）: {len(vendor_master)}社")
+
+    print("\n2. 逐次変換・TSV出力")
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        if cache_path:
+            print(f"  行キャッシュ: {cache_path}")
+            result = convert_incremental(json_path, cache_path, TSV_TEST_DATA, TSV_VENDORS, TSV_BUDGET,
+                                         columnar, budget_period)
+        else:
+            result = convert_streaming(json_path, TSV_TEST_DATA, TSV_VENDORS, TSV_BUDGET, columnar,
+                                       budget_period)
+    except ValueError as e:
+        # JSON解析エラー・文字コードエラー（出力は書き換えていない）
+        print(f"エラー: JSONファイルを読み込めません（出力は前回のまま）: {json_path}: {e}", file=sys.stderr)
+        sys.exit(1)
+    if cache_path:
+        counts = result["counts"]
+        print(f"  差分: 新規{counts['new']}件 / 再分類{counts['reclassified']}件 / "
+              f"変更なし{counts['unchanged']}件 / 削除{counts['removed']}件"
+              f"（内容を変更した行は削除+新規、新しいNo.で末尾に追加）")
+    months = [f"{k}({v})" for k, v in result["months"].items() if v]
+    print(f"  検出月度: {len(months)}件 {', '.join(months[:12])}{' ...' if len(months) > 12 else ''}")
+    print(f"  支払明細: {result['row_count']}件 / 取引先: {result['vendor_count']}社 / "
+          f"予算箱: {len(result['budget_rows'])}行")
+    print(f"  予算期間: {' ~ '.join(budget_period or BUDGET_PERIOD)}")
+    total_budget = sum(r[6] for r in result["budget_rows"])
+    print(f"  予算合計: {total_budget:,}円")
+
+    if not validate_totals(result["monthly_totals"]):
+        print("\n  検証失敗: 月別合計が不一致。出力を続行しますが確認してください。", file=sys.stderr)
+
+    if result["review_count"]:
+        print(f"\n3. 手動確認項目 ({result['review_count']}件、全件はTSVの備考列を参照)")
+        for comment in result["review_preview"]:
+            print(f"  - {comment}")
+        if result["review_count"] > len(result["review_preview"]):
+            print(f"  ... 他 {result['review_count'] - len(result['review_preview'])}件")
+
+    if result["vendor_reviews"]:
+        print(f"\n4. 取引先の確認項目 ({len(result['vendor_reviews'])}件、名寄せしていない近い表記)")
+        for comment in result["vendor_reviews"]:
+            print(f"  - {comment}")
+
+    print("\n=== 完了 ===")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="PoC用テストデータ変換")
+    parser.add_argument(
+        "--json",
+        type=Path,
+        default=JSON_PATH,
+        help="入力JSON（final_output.json形式）のパス"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="JSONを逐次読み込みし、月度を自動検出して1パスで変換する"
+    )
+    parser.add_argument(
+        "--vendor-master",
+        type=Path,
+        default=TSV_VENDORS,
+        help="業者名の名寄せ先とする取引先マスタTSV（既定: 既存のpoc_vendors.tsv）"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="行キャッシュを使い、新規・変更行のみ分類してTSVを更新する（ストリーミング読み込み）"
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=ROW_CACHE_PATH,
+        help="差分モードの行キャッシュのパス"
+    )
+    parser.add_argument(
+        "--budget-start",
+        type=year_month_arg,
+        default=BUDGET_PERIOD[0],
+        help=f"実行予算の開始月 YYYY-MM（工期の開始月、既定: {BUDGET_PERIOD[0]}）"
+    )
+    parser.add_argument(
+        "--budget-end",
+        type=year_month_arg,
+        default=BUDGET_PERIOD[1],
+        help=f"実行予算の終了月 YYYY-MM（工期の終了月、既定: {BUDGET_PERIOD[1]}）"
+    )
+    parser.add_argument(
+        "--columnar",
+        choices=["parquet", "arrow"],
+        help="TSVに加えて列指向形式（Parquet / Arrow IPCストリーム）でも出力する（pyarrowが必要）"
+    )
+    args = parser.parse_args()
+    if args.budget_start > args.budget_end:
+        parser.error(f"--budget-start ({args.budget_start}) が --budget-end ({args.budget_end}) より後です")
+    budget_period = (args.budget_start, args.budget_end)
+
+    if args.columnar:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("エラー: --columnar には pyarrow が必要です: pip install pyarrow", file=sys.stderr)
+            sys.exit(1)
+
+    if args.stream or args.incremental:
+        main_streaming(args.json, args.vendor_master, args.cache if args.incremental else None, args.columnar,
+                       budget_period)
+        return
+
     print("=== PoC用テストデータ変換 ===\n")
 
     # 1. 入力ファイル読み込み
     print("1. 入力ファイル読み込み")
-    json_data = load_json()
+    json_data = load_json(args.json)
     master = load_csv_master()
-    print(f"  JSON: {JSON_PATH.name} (読み込み完了)")
+    vendor_master = set_vendor_master(load_vendor_master(args.vendor_master))
+    print(f"  JSON: {args.json.name} (読み込み完了)")
     print(f"  CSV:  {CSV_PATH.name} (費目{len(master['expense_element'])}件, "
           f"工種{len(master['koushus'])}件, 取引先{len(master['vendor'])}件)")
+    print(f"  取引先マスタ（名寄せ先）: {len(vendor_master)}社")
 
-    # 2. 支払明細データ生成
+    # 2. 支払明細の分類（全出力で共有）・データ生成
     print("\n2. 支払明細データ生成")
-    test_rows, monthly_totals, review_comments = generate_test_data(json_data)
+    records = classify_payments(json_data)
+    test_rows, monthly_totals, review_comments = generate_test_data(records)
     print(f"  生成件数: {len(test_rows)}件")
 
     # 3. 月別合計検証
@@ -428,12 +1497,12 @@ def main():
 
     # 4. 取引先マスタ生成
     print("\n3. 取引先マスタ生成")
-    vendor_rows = generate_vendors(json_data)
+    vendor_rows = generate_vendors(records)
     print(f"  生成件数: {len(vendor_rows)}社")
 
     # 5. 実行予算テーブル生成
     print("\n4. 実行予算テーブル生成")
-    budget_rows = generate_budget(json_data)
+    budget_rows = generate_budget(records, budget_period)
     print(f"  生成件数: {len(budget_rows)}行")
     total_budget = sum(r[6] for r in budget_rows)
     print(f"  予算合計: {total_budget:,}円")
@@ -441,24 +1510,13 @@ def main():
     # 6. TSV出力
     print("\n5. TSV出力")
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-    test_headers = [
-        "No.", "カテゴリ", "工事種別", "工種", "費目", "支払先",
-        "支払年月", "数量", "単位", "単価", "金額",
-        "相殺額", "相殺先",
-        "課税区分", "消費税", "税込合計", "予算箱ID", "備考"
-    ]
-    write_tsv(TSV_TEST_DATA, test_headers, test_rows)
-
-    vendor_headers = ["vendor_id", "vendor_name", "vendor_type", "active"]
-    write_tsv(TSV_VENDORS, vendor_headers, vendor_rows)
-
-    budget_headers = [
-        "budget_box_id", "category", "work_type", "koushus",
-        "expense_id", "expense_name", "budget_amount",
-        "start_month", "end_month"
-    ]
-    write_tsv(TSV_BUDGET, budget_headers, budget_rows)
+    write_tsv(TSV_TEST_DATA, TEST_HEADERS, test_rows)
+    write_tsv(TSV_VENDORS, VENDOR_HEADERS, vendor_rows)
+    write_tsv(TSV_BUDGET, BUDGET_HEADERS, budget_rows)
+    if args.columnar:
+        write_columnar(TSV_TEST_DATA, "payment", test_rows, args.columnar)
+        write_columnar(TSV_VENDORS, "vendor", vendor_rows, args.columnar)
+        write_columnar(TSV_BUDGET, "budget", budget_rows, args.columnar)
 
     # 7. 手動確認項目の出力
     if review_comments:
@@ -466,6 +1524,12 @@ def main():
         for comment in review_comments:
             print(f"  - {comment}")
 
+    vendor_reviews = vendor_review_comments(row[1] for row in vendor_rows)
+    if vendor_reviews:
+        print(f"\n7. 取引先の確認項目 ({len(vendor_reviews)}件、名寄せしていない近い表記)")
+        for comment in vendor_reviews:
+            print(f"  - {comment}")
+
     print("\n=== 完了 ===")
 
 
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+工事台帳（project_registry.json）の保存層
+
+登録はジャーナル（project_registry.journal.jsonl）への1行の追記（fsync済み）で確定し、
+台帳全体は書き直さないため、登録にかかる時間は台帳の件数によらない。
+ジャーナルが COMPACT_THRESHOLD 件たまると、台帳とジャーナルを合わせた内容を
+project_registry.json に書き出し（一時ファイルに書いてから置き換える）、ジャーナルを空にする。
+project_registry.json は従来と同じ形式の一覧（エクスポートしたビュー）として使える。
+
+読み込みは project_registry.json（最後に書き出した時点）にジャーナルを適用して、
+工事IDの索引（辞書）を作る。書き込みは台帳ごとのロックファイルで排他し、ロック中に
+他のプロセスが追記した分を読み直してから重複を確認するため、同時に登録しても
+どちらかの登録が失われることはない。
+
+障害時の扱い:
+  - ジャーナルの各行は連番（seq）付き。project_registry.json は取り込み済みの連番
+    （journal_seq）を持ち、書き出し後・ジャーナルを空にする前に止まっても二重に適用しない
+  - 書き込み途中で止まった末尾の行は読み込み時に無視し、次の追記の前に切り詰める
+
+使用方法:
+    python scripts/project_registry.py list             # 登録済みの工事（ジャーナル分を含む）
+    python scripts/project_registry.py export           # project_registry.json を最新にする
+    python scripts/project_registry.py --registry path/to/registry.json list
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+REGISTRY_PATH = PROJECT_DIR / "project_registry.json"
+
+# ジャーナルがこの件数になったら project_registry.json に書き出す
+COMPACT_THRESHOLD = 64
+# ロックの取得を諦めるまでの秒数
+LOCK_TIMEOUT = 30
+LOCK_RETRY_INTERVAL = 0.05
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class DuplicateProjectError(ValueError):
+    """登録済みの工事IDを登録しようとした"""
+
+    def __init__(self, *project_ids):
+        super().__init__(f"project_id {', '.join(repr(p) for p in project_ids)} は既に登録済みです")
+        self.project_id = project_ids[0]
+        self.project_ids = list(project_ids)
+
+
+class RegistryLockTimeout(TimeoutError):
+    """台帳のロックを取得できなかった"""
+
+
+def _fsync_directory(path):
+    """ディレクトリのエントリ（rename）をディスクに反映する（Windowsでは不要・不可）"""
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, content):
+    """一時ファイルに書いてから置き換える（途中で止まっても元のファイルは壊れない）"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    _fsync_directory(path.parent)
+
+
+class ProjectRegistry:
+    """工事台帳（ジャーナル付き）
+
+    registry = ProjectRegistry()
+    registry.add({"project_id": "P005", ...})    # 重複なら DuplicateProjectError
+    registry.add_many([...])                      # 一括登録（1回の追記、重複が1件でもあれば登録しない）
+    registry.get("P005"), "P005" in registry, registry.projects()
+    """
+
+    def __init__(self, path=REGISTRY_PATH, compact_threshold=COMPACT_THRESHOLD):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.stem + ".journal.jsonl")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.compact_threshold = compact_threshold
+        self._projects = []
+        self._index = {}
+        self._snapshot_seq = 0
+        self._snapshot_key = None
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._last_seq = 0
+        self._updated_at = ""
+        self.refresh()
+
+    # === 参照 ===
+
+    def __contains__(self, project_id):
+        return project_id in self._index
+
+    def __len__(self):
+        return len(self._projects)
+
+    def get(self, project_id):
+        position = self._index.get(project_id)
+        return None if position is None else self._projects[position]
+
+    def projects(self):
+        """登録順の工事一覧"""
+        return list(self._projects)
+
+    @property
+    def updated_at(self):
+        return self._updated_at
+
+    @property
+    def pending(self):
+        """project_registry.json にまだ書き出していない登録の件数"""
+        return self._journal_entries
+
+    # === 読み込み ===
+
+    def _file_key(self, path):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _load_snapshot(self):
+        self._projects = []
+        self._index = {}
+        self._snapshot_seq = 0
+        self._updated_at = ""
+        self._journal_offset = 0
+        self._journal_entries = 0
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for project in data.get("projects", []):
+                self._apply(project)
+            self._snapshot_seq = int(data.get("journal_seq", 0))
+            self._updated_at = data.get("updated_at", "")
+        self._last_seq = self._snapshot_seq
+        self._snapshot_key = self._file_key(self.path)
+
+    def _apply(self, project):
+        project_id = project["project_id"]
+        if project_id in self._index:
+            self._projects[self._index[project_id]] = project
+        else:
+            self._index[project_id] = len(self._projects)
+            self._projects.append(project)
+
+    def _read_journal(self):
+        """前回読んだ位置以降のジャーナルを適用する（末尾の書きかけの行は読まない）"""
+        try:
+            f = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            self._journal_offset = 0
+            return
+        with f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._journal_offset += len(line)
+                if entry["seq"] <= self._snapshot_seq:
+                    continue
+                if entry.get("op") == "add":
+                    self._apply(entry["project"])
+                self._last_seq = entry["seq"]
+                self._updated_at = entry.get("at", self._updated_at)
+                self._journal_entries += 1
+
+    def refresh(self):
+        """他のプロセスの変更を取り込む（書き出し済みの台帳が変わっていれば読み直す）"""
+        if self._file_key(self.path) != self._snapshot_key:
+            self._load_snapshot()
+        self._read_journal()
+
+    # === 書き込み ===
+
+    @contextmanager
+    def lock(self):
+        """台帳の排他ロック（プロセス間）"""
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a+b") as f:
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while True:
+                try:
+                    if fcntl:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    else:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise RegistryLockTimeout(f"台帳のロックを取得できません: {self.lock_path}") from None
+                    time.sleep(LOCK_RETRY_INTERVAL)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _append(self, entries):
+        data = b"".join((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8") for entry in entries)
+        with open(self.journal_path, "ab") as f:
+            # 書きかけで止まった末尾の行があれば捨てる
+            if f.tell() != self._journal_offset:
+                f.truncate(self._journal_offset)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_offset += len(data)
+        self._journal_entries += len(entries)
+
+    def add(self, project):
+        """工事を登録する（ロック中に最新の状態を読み直してから重複を確認する）"""
+        return self.add_many([project])[0]
+
+    def add_many(self, projects):
+        """複数の工事を1回の追記で登録する（重複が1件でもあればどれも登録しない）"""
+        projects = list(projects)
+        with self.lock():
+            self.refresh()
+            seen = set()
+            duplicates = []
+            for project in projects:
+                project_id = project["project_id"]
+                if project_id in self._index or project_id in seen:
+                    duplicates.append(project_id)
+                seen.add(project_id)
+            if duplicates:
+                raise DuplicateProjectError(*duplicates)
+            if not projects:
+                return projects
+            at = datetime.now().strftime(TIMESTAMP_FORMAT)
+            first_seq = self._last_seq + 1
+            self._append([
+                {"seq": seq, "op": "add", "at": at, "project": project}
+                for seq, project in enumerate(projects, start=first_seq)
+            ])
+            self._last_seq += len(projects)
+            self._updated_at = at
+            for project in projects:
+                self._apply(project)
+            if self._journal_entries >= self.compact_threshold:
+                self._compact_locked()
+        return projects
+
+    def _compact_locked(self):
+        registry = {
+            "projects": self._projects,
+            "updated_at": self._updated_at,
+            "journal_seq": self._last_seq,
+        }
+        write_atomic(self.path, json.dumps(registry, ensure_ascii=False, indent=2) + "\n")
+        self._snapshot_seq = self._last_seq
+        self._snapshot_key = self._file_key(self.path)
+        # 書き出した分のジャーナルを空にする（ここで止まっても連番で二重適用しない）
+        with open(self.journal_path, "wb") as f:
+            os.fsync(f.fileno())
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    def export(self):
+        """ジャーナルの内容を project_registry.json に書き出す（書き出したらTrue）"""
+        with self.lock():
+            self.refresh()
+            if not self._journal_entries and self.path.exists():
+                return False
+            self._compact_locked()
+            return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工事台帳（project_registry.json）の一覧表示・書き出し")
+    parser.add_argument("--registry", type=Path, default=REGISTRY_PATH, help="工事台帳のパス")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="登録済みの工事の一覧（ジャーナル分を含む）")
+    subparsers.add_parser("export", help="ジャーナルを取り込んで project_registry.json を最新にする")
+    args = parser.parse_args()
+
+    try:
+        registry = ProjectRegistry(args.registry)
+        if args.command == "list":
+            print(f"=== {registry.path.name} ===\n")
+            print(f"  登録数: {len(registry)}件 / 更新日時: {registry.updated_at or '-'} / 未書き出し: {registry.pending}件\n")
+            for project in registry.projects():
+                print(f"  {project['project_id']:<6} {project.get('start_date', ''):<10} ~ "
+                      f"{project.get('end_date', ''):<10}  {project.get('project_name', '')}")
+        else:
+            written = registry.export()
+            print(f"{registry.path}: {'書き出しました' if written else '最新です'}（{len(registry)}件）")
+    except (OSError, ValueError, KeyError, RegistryLockTimeout) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+現場の api.gs のキャッシュプロキシ（TTL・stale-while-revalidate・無効化）
+
+api.gs は要求のたびにシート全体を getDataRange().getValues() で読み直すため、
+Difyのチャットボットやダッシュボードの1回の問い合わせに数秒かかる。集計値が変わるのは
+runMonthlyAggregation の実行時なので、mode=health / summary / aggregate / master の応答を
+モードごとのTTLでキャッシュし、api.gs と同じURL・パラメータで返す。
+
+  - 鮮度（--ttl）内の応答はキャッシュからそのまま返す（HIT）
+  - 鮮度切れ後も猶予（--stale-ttl）内なら古い応答をすぐ返し、裏で取り直す（STALE）
+  - 猶予も過ぎていれば api.gs から取得する（MISS）。同じ応答を待つ要求は1回の取得にまとめる
+  - success:true の応答だけを保存する（認証エラー・success:false は保存しない）
+  - APIキーごとに別のキャッシュになる（キーが違えば必ず api.gs で認証される）
+  - project / dashboard 等のモードはキャッシュせずに中継する（BYPASS）
+  応答ヘッダー X-Cache（HIT / STALE / MISS / BYPASS）と Age（秒）で状態がわかる。
+  キャッシュはメモリ上にあり、再起動すると空になる。
+
+URL:
+    GET  /macros/s/{project_id}/exec?mode=...&month=...&key=...   工事ごとの api.gs
+    GET  /exec?mode=...                                           --default-project の工事
+    GET  /_cache/stats                                            ヒット数等
+    POST /_cache/invalidate  {"project_id": "P005", "mode": "health", "month": "2025-12", "warm": true}
+         （項目は省略可。省略した項目はすべてに一致する。warm なら消した応答を裏で取り直す）
+
+現場の api.gs のURLは hub_aggregator.py と同じく --sites / 台帳の gas_webapp_url /
+--site-url-template の順に探す。
+
+使用方法:
+    python scripts/site_api_cache.py serve --port 8767 --default-project P004
+    python scripts/site_api_cache.py serve --ttl health=600 --stale-ttl health=43200
+    python scripts/site_api_cache.py invalidate --project-id P004 --month 2025-12 --warm
+    python scripts/site_api_cache.py stats
+
+    # 横断集計をキャッシュ経由にする
+    python scripts/hub_aggregator.py cross_health \\
+        --site-url-template "http://127.0.0.1:8767/macros/s/{project_id}/exec"
+
+集計結果の更新時は aggregation.gs がスクリプトプロパティ CACHE_INVALIDATE_URL
+（例: https://<このプロキシ>/_cache/invalidate）へ無効化を通知する。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from hub_aggregator import API_KEY_ENV, current_year_month, iso_timestamp, load_sites, site_endpoint
+from project_registry import ProjectRegistry, RegistryLockTimeout
+
+# パス設定
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+REGISTRY_PATH = PROJECT_DIR / "project_registry.json"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8767
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_ENTRIES = 4096
+REFRESH_WORKERS = 4
+# 横断集計の同時接続を取りこぼさないよう listen の待ち行列を広げる
+REQUEST_QUEUE_SIZE = 256
+# 未登録の工事IDで台帳を読み直す間隔（秒）
+REGISTRY_RELOAD_INTERVAL = 10.0
+ADMIN_TOKEN_ENV = "SITE_CACHE_ADMIN_TOKEN"
+ADMIN_TOKEN_HEADER = "X-Cache-Admin-Token"
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+# モードごとの鮮度（秒）: この間はキャッシュをそのまま返す
+DEFAULT_TTLS = {"health": 300, "summary": 300, "aggregate": 900, "master": 3600}
+# 鮮度切れ後の猶予（秒）: この間は古い応答を返しつつ裏で取り直す
+DEFAULT_STALE_TTLS = {"health": 86400, "summary": 86400, "aggregate": 86400, "master": 7 * 86400}
+CACHED_MODES = tuple(DEFAULT_TTLS)
+# 年月に依存しないモード（キャッシュのキーに month を含めない）
+MONTHLESS_MODES = ("master",)
+
+
+class UpstreamError(Exception):
+    """api.gs から応答を得られなかった（接続エラー・タイムアウト・HTTP 429/5xx）"""
+
+
+def error_body(message):
+    """api.gs のエラー応答と同じ形"""
+    return json.dumps({"success": False, "error": message, "timestamp": iso_timestamp()},
+                      ensure_ascii=False).encode("utf-8")
+
+
+def is_cacheable(status, body):
+    """保存してよい応答か（HTTP 200 かつ success:true）"""
+    if status != 200:
+        return False
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return False
+    return isinstance(payload, dict) and payload.get("success") is True
+
+
+# === api.gs への取得 ===
+
+class UpstreamClient:
+    """api.gs へのGET（スレッドごとにセッションを持ち、Apps Script の302転送をたどる）"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def fetch(self, url, params):
+        """(ステータス, 本文, Content-Type) を返す"""
+        try:
+            response = self._session().get(url, params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise UpstreamError(f"api.gsへの接続エラー: {e}") from None
+        if response.status_code == 429 or response.status_code >= 500:
+            raise UpstreamError(f"api.gsがHTTP {response.status_code}を返しました")
+        return response.status_code, response.content, response.headers.get("Content-Type", JSON_CONTENT_TYPE)
+
+
+# === キャッシュ ===
+
+@dataclass
+class CacheEntry:
+    """保存した応答（url / params は取り直し用）"""
+    body: bytes
+    fetched_at: float
+    ttl: float
+    stale_ttl: float
+    url: str
+    params: dict
+
+    def age(self, now):
+        return now - self.fetched_at
+
+    def is_fresh(self, now):
+        return self.age(now) < self.ttl
+
+    def is_usable(self, now):
+        return self.age(now) < self.ttl + self.stale_ttl
+
+
+class _Flight:
+    """取得中の応答（同じキーの要求はこれの完了を待つ）"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SiteApiCache:
+    """api.gs の応答のキャッシュ（モードごとのTTL・stale-while-revalidate・無効化）
+
+    キーは (工事ID, モード, 年月, 匿名化, APIキーのハッシュ)。fetch(url, params) は
+    (ステータス, 本文, Content-Type) を返し、取得できなければ UpstreamError を送出する。
+    """
+
+    def __init__(self, fetch, ttls=None, stale_ttls=None, max_entries=DEFAULT_MAX_ENTRIES,
+                 refresh_workers=REFRESH_WORKERS):
+        self._fetch = fetch
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stale_ttls = {**DEFAULT_STALE_TTLS, **(stale_ttls or {})}
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._flights = {}
+        # 無効化のたびに増やし、無効化より前に始まった取得の結果は保存しない
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self._stats = Counter()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def get(self, key, url, params):
+        """(ステータス, 本文, Content-Type, 状態, 経過秒) を返す（状態は HIT / STALE / MISS）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None and entry.is_fresh(now):
+            self.count("hit")
+            return 200, entry.body, JSON_CONTENT_TYPE, "HIT", entry.age(now)
+        if entry is not None and entry.is_usable(now):
+            self.count("stale")
+            self.refresh(key, url, params)
+            return 200, entry.body, JSON_CONTENT_TYPE, "STALE", entry.age(now)
+        self.count("miss")
+        status, body, content_type = self._load(key, url, params)
+        return status, body, content_type, "MISS", 0.0
+
+    def _load(self, key, url, params):
+        """api.gs から取得して保存する（同じキーの取得中があればその結果を待つ）"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            fetched_at = time.monotonic()
+            flight.result = self._fetch(url, params)
+            status, body, _ = flight.result
+            if is_cacheable(status, body):
+                self._store(key, CacheEntry(body, fetched_at, self.ttls[key[1]], self.stale_ttls[key[1]], url, params),
+                            generation)
+            self.count("upstream")
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            self.count("upstream_error")
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _store(self, key, entry, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evicted"] += 1
+
+    def refresh(self, key, url, params):
+        """裏で取り直す（同じキーを取得中なら何もしない）"""
+        with self._lock:
+            if key in self._flights:
+                return
+        self.count("refresh")
+        self._refresher.submit(self._refresh, key, url, params)
+
+    def _refresh(self, key, url, params):
+        try:
+            self._load(key, url, params)
+        except Exception:
+            self.count("refresh_error")
+
+    def invalidate(self, project_id=None, mode=None, month=None, warm=False):
+        """条件に合う応答を消して件数を返す（None の項目はすべてに一致。warm なら裏で取り直す）"""
+        with self._lock:
+            self._generation += 1
+            keys = [
+                key for key in self._entries
+                if (project_id is None or key[0] == project_id)
+                and (mode is None or key[1] == mode)
+                and (month is None or key[2] == month)
+            ]
+            removed = [(key, self._entries.pop(key)) for key in keys]
+            self._stats["invalidated"] += len(removed)
+        if warm:
+            for key, entry in removed:
+                self.refresh(key, entry.url, entry.params)
+        return len(removed)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+        lookups = sum(stats.get(name, 0) for name in ("hit", "stale", "miss"))
+        return {
+            "entries": entries,
+            "hit": stats.get("hit", 0),
+            "stale": stats.get("stale", 0),
+            "miss": stats.get("miss", 0),
+            "bypass": stats.get("bypass", 0),
+            "hit_rate": round((stats.get("hit", 0) + stats.get("stale", 0)) / lookups, 3) if lookups else None,
+            "upstream": stats.get("upstream", 0),
+            "upstream_error": stats.get("upstream_error", 0),
+            "refresh": stats.get("refresh", 0),
+            "refresh_error": stats.get("refresh_error", 0),
+            "invalidated": stats.get("invalidated", 0),
+            "evicted": stats.get("evicted", 0),
+            "ttl": self.ttls,
+            "stale_ttl": self.stale_ttls,
+        }
+
+    def close(self):
+        self._refresher.shutdown(wait=False, cancel_futures=True)
+
+
+# === プロキシ ===
+
+class SiteApiProxy:
+    """工事IDから api.gs のURLを求め、キャッシュ経由で応答する"""
+
+    def __init__(self, cache, upstream, registry_path=REGISTRY_PATH, sites=None, url_template=None,
+                 api_key=None, default_project=None):
+        self.cache = cache
+        self.upstream = upstream
+        self.registry_path = Path(registry_path)
+        self.sites = sites or {}
+        self.url_template = url_template
+        self.api_key = api_key
+        self.default_project = default_project
+        self._projects = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _project(self, project_id):
+        """台帳の工事情報（未登録のIDでは一定間隔で台帳を読み直す）"""
+        with self._lock:
+            now = time.monotonic()
+            if project_id not in self._projects and (
+                    self._loaded_at is None or now - self._loaded_at >= REGISTRY_RELOAD_INTERVAL):
+                self._loaded_at = now
+                try:
+                    self._projects = {p["project_id"]: p for p in ProjectRegistry(self.registry_path).projects()}
+                except (OSError, ValueError, RegistryLockTimeout) as e:
+                    print(f"警告: 工事台帳を読み込めません: {e}", file=sys.stderr)
+            return self._projects.get(project_id, {"project_id": project_id})
+
+    def handle(self, project_id, params):
+        """(ステータス, 本文, Content-Type, 状態, 経過秒) を返す"""
+        project_id = project_id or self.default_project
+        if not project_id:
+            return 404, error_body("工事IDがありません（/macros/s/{project_id}/exec を使うか --default-project を指定）"), \
+                JSON_CONTENT_TYPE, "BYPASS", 0.0
+        url, site_key = site_endpoint(self._project(project_id), self.sites, self.url_template, self.api_key)
+        if not url:
+            return 404, error_body(f"{project_id}: api.gsのURL未設定"), JSON_CONTENT_TYPE, "BYPASS", 0.0
+
+        mode = params.get("mode") or "summary"
+        if mode == "evm":
+            mode = "health"
+        key = params.get("key") or site_key or ""
+        try:
+            if mode not in CACHED_MODES:
+                self.cache.count("bypass")
+                status, body, content_type = self.upstream.fetch(url, {**params, **({"key": key} if key else {})})
+                return status, body, content_type, "BYPASS", 0.0
+            month = "" if mode in MONTHLESS_MODES else params.get("month") or current_year_month()
+            anonymize = params.get("anonymize") == "true"
+            upstream_params = {"mode": mode}
+            if month:
+                upstream_params["month"] = month
+            if key:
+                upstream_params["key"] = key
+            if anonymize:
+                upstream_params["anonymize"] = "true"
+            cache_key = (project_id, mode, month, anonymize, hashlib.sha256(key.encode("utf-8")).hexdigest()[:16])
+            return self.cache.get(cache_key, url, upstream_params)
+        except UpstreamError as e:
+            return 502, error_body(str(e)), JSON_CONTENT_TYPE, "MISS", 0.0
+
+
+def parse_invalidation(params):
+    """無効化の条件（空の項目は条件にしない）"""
+    mode = params.get("mode") or None
+    return {
+        "project_id": params.get("project_id") or None,
+        "mode": "health" if mode == "evm" else mode,
+        "month": params.get("month") or None,
+        "warm": params.get("warm") in (True, "true", "1"),
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type=JSON_CONTENT_TYPE, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        proxy = self.server.proxy
+        if url.path == "/_cache/stats":
+            self._send_json(200, {"success": True, "timestamp": iso_timestamp(), "data": proxy.cache.stats()})
+            return
+        parts = url.path.strip("/").split("/")
+        if len(parts) == 4 and parts[:2] == ["macros", "s"] and parts[3] == "exec":
+            project_id = parts[2]
+        elif url.path.rstrip("/") in ("", "/exec"):
+            project_id = None
+        else:
+            self._send(404, error_body(f"未知のパス: {url.path}"))
+            return
+        status, body, content_type, state, age = proxy.handle(project_id, params)
+        self._send(status, body, content_type, [("X-Cache", state), ("Age", str(int(age)))])
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/_cache/invalidate":
+            self._send(404, error_body(f"未知のパス: {url.path}"))
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        token = self.server.admin_token
+        if token and self.headers.get(ADMIN_TOKEN_HEADER) != token:
+            self._send(403, error_body("認証エラー: 無効化には管理トークンが必要"))
+            return
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if raw.strip():
+            try:
+                body = json.loads(raw)
+            except ValueError:
+                body = None
+            if not isinstance(body, dict):
+                self._send(400, error_body("本文はJSONオブジェクトで指定"))
+                return
+            params.update(body)
+        condition = parse_invalidation(params)
+        count = self.server.proxy.cache.invalidate(**condition)
+        print(f"無効化: {count}件 {json.dumps(condition, ensure_ascii=False)}", file=sys.stderr, flush=True)
+        self._send_json(200, {"success": True, "timestamp": iso_timestamp(),
+                              "data": {"invalidated": count, **condition}})
+
+
+def serve(proxy, host, port, admin_token=None):
+    server_class = type("_Server", (ThreadingHTTPServer,), {"request_queue_size": REQUEST_QUEUE_SIZE})
+    server = server_class((host, port), _Handler)
+    server.daemon_threads = True
+    server.proxy = proxy
+    server.admin_token = admin_token
+    host, port = server.server_address[:2]
+    print(f"URL: http://{host}:{port}", flush=True)
+    print(f"例: http://{host}:{port}/macros/s/P004/exec?mode=health&key=...")
+    print("Ctrl+C で終了", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        proxy.cache.close()
+    return 0
+
+
+def parse_mode_seconds(specs, option):
+    """["health=600", ...] → {"health": 600.0}"""
+    values = {}
+    for spec in specs or []:
+        mode, sep, seconds = spec.partition("=")
+        if not sep or mode not in CACHED_MODES:
+            raise ValueError(f"{option} は モード=秒 で指定（モード: {' / '.join(CACHED_MODES)}）: {spec}")
+        try:
+            values[mode] = float(seconds)
+        except ValueError:
+            raise ValueError(f"{option} の秒数が数値ではありません: {spec}") from None
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="現場の api.gs のキャッシュプロキシ（TTL・stale-while-revalidate・無効化）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="キャッシュプロキシを起動する")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けるアドレス（既定: {DEFAULT_HOST}）")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"待ち受けるポート（既定: {DEFAULT_PORT}）")
+    serve_parser.add_argument("--registry", type=Path, default=REGISTRY_PATH, help="工事台帳（project_registry.json）のパス")
+    serve_parser.add_argument("--sites", type=Path, help="工事IDごとの api.gs のURL（JSON）")
+    serve_parser.add_argument("--site-url-template", help="api.gs のURLのテンプレート（{project_id} 等）")
+    serve_parser.add_argument("--default-project", help="/exec で応答する工事ID（Difyの GAS_ENDPOINT_URL 用）")
+    serve_parser.add_argument("--api-key", default=os.environ.get(API_KEY_ENV, ""),
+                              help=f"要求に key がないときに使うAPIキー（既定は環境変数 {API_KEY_ENV}）")
+    serve_parser.add_argument("--ttl", action="append", metavar="MODE=SEC",
+                              help="モードごとの鮮度（秒、複数指定可）。既定: "
+                                   + ", ".join(f"{m}={s}" for m, s in DEFAULT_TTLS.items()))
+    serve_parser.add_argument("--stale-ttl", action="append", metavar="MODE=SEC",
+                              help="鮮度切れ後に古い応答を返す猶予（秒、複数指定可）。既定: "
+                                   + ", ".join(f"{m}={s}" for m, s in DEFAULT_STALE_TTLS.items()))
+    serve_parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES, help="保存する応答の上限数")
+    serve_parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="api.gs のタイムアウト（秒）")
+    serve_parser.add_argument("--admin-token", default=os.environ.get(ADMIN_TOKEN_ENV, ""),
+                              help=f"無効化に必要なトークン（既定は環境変数 {ADMIN_TOKEN_ENV}、空なら不要）")
+
+    for name, help_text in (("invalidate", "キャッシュを無効化する"), ("stats", "ヒット数等を表示する")):
+        client_parser = subparsers.add_parser(name, help=help_text)
+        client_parser.add_argument("--proxy", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}",
+                                   help="キャッシュプロキシのURL")
+        if name == "invalidate":
+            client_parser.add_argument("--project-id", help="工事ID（省略時は全工事）")
+            client_parser.add_argument("--mode", choices=CACHED_MODES, help="モード（省略時は全モード）")
+            client_parser.add_argument("--month", help="年月 YYYY-MM（省略時は全月）")
+            client_parser.add_argument("--warm", action="store_true", help="消した応答を裏で取り直す")
+            client_parser.add_argument("--admin-token", default=os.environ.get(ADMIN_TOKEN_ENV, ""),
+                                       help=f"管理トークン（既定は環境変数 {ADMIN_TOKEN_ENV}）")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            ttls = parse_mode_seconds(args.ttl, "--ttl")
+            stale_ttls = parse_mode_seconds(args.stale_ttl, "--stale-ttl")
+            sites = load_sites(args.sites) if args.sites else {}
+        except (OSError, ValueError) as e:
+            print(f"エラー: {e}", file=sys.stderr)
+            return 1
+        upstream = UpstreamClient(args.timeout)
+        cache = SiteApiCache(upstream.fetch, ttls, stale_ttls, max(1, args.max_entries))
+        proxy = SiteApiProxy(cache, upstream, args.registry, sites, args.site_url_template,
+                             args.api_key or None, args.default_project)
+        try:
+            return serve(proxy, args.host, args.port, args.admin_token or None)
+        except OSError as e:
+            print(f"エラー: {e}", file=sys.stderr)
+            return 1
+
+    try:
+        if args.command == "invalidate":
+            condition = {"project_id": args.project_id, "mode": args.mode, "month": args.month, "warm": args.warm}
+            response = requests.post(f"{args.proxy.rstrip('/')}/_cache/invalidate",
+                                     json={k: v for k, v in condition.items() if v},
+                                     headers={ADMIN_TOKEN_HEADER: args.admin_token}, timeout=10)
+        else:
+            response = requests.get(f"{args.proxy.rstrip('/')}/_cache/stats", timeout=10)
+        payload = response.json()
+    except (requests.RequestException, ValueError) as e:
+        print(f"エラー: キャッシュプロキシに接続できません: {e}", file=sys.stderr)
+        return 1
+    if not payload.get("success"):
+        print(f"エラー: {payload.get('error')}", file=sys.stderr)
+        return 1
+    if args.command == "invalidate":
+        print(f"無効化: {payload['data']['invalidated']}件")
+    else:
+        print(json.dumps(payload["data"], ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())